@@ -40,11 +40,28 @@ def _run_script(path: Path, *args: str) -> None:
     _run_command(command)
 
 
+def _parallel_options(processes: int, lease_db: str | None, pipeline: bool) -> list[str]:
+    """Build the src.main options that control how transfers are parallelised."""
+    options: list[str] = []
+    if processes < 1:
+        raise typer.BadParameter("--processes は 1 以上を指定してください。")
+    if processes > 1:
+        options.extend(["--processes", str(processes)])
+    if lease_db:
+        options.extend(["--lease-db", lease_db])
+    if pipeline:
+        options.append("--pipeline")
+    return options
+
+
 @app.command()
 def transfer(
     reset: bool = typer.Option(False, help="--reset を付与して転送キャッシュを初期化"),
     full_rebuild: bool = typer.Option(False, help="--full-rebuild を付与して完全再構築"),
     verbose: bool = typer.Option(False, help="src.main の --verbose を付与"),
+    processes: int = typer.Option(1, help="転送をパスのハッシュで分割して並列実行するプロセス数"),
+    lease_db: str | None = typer.Option(None, help="複数ノードで分担転送する共有リースDB（SQLite）のパス"),
+    pipeline: bool = typer.Option(False, help="--pipeline を付与してクロールと並行して転送"),
 ) -> None:
     """Run the primary OneDrive → SharePoint transfer flow (src/main.py)."""
 
@@ -58,6 +75,7 @@ def transfer(
         options.append("--full-rebuild")
     if verbose:
         options.append("--verbose")
+    options.extend(_parallel_options(processes, lease_db, pipeline))
 
     _run_module("src.main", *options)
 
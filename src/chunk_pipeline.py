@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+大容量ファイル用チャンク先読みパイプライン
+
+ダウンロードストリームの読み出しを別スレッドで行い、次のN個のチャンクを有界バッファへ
+先読みする。アップロード中もダウンロードが止まらないため、転送時間は
+「ダウンロード時間 + アップロード時間」ではなく両者の大きい方に近づく。
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from typing import Any
+
+# 読み出し終了を示す番兵
+_EOF = object()
+
+
+def read_exact(stream: Any, size: int) -> bytes:
+    """
+    ストリームから size バイトを読み出す（EOF の場合のみ短くなる）
+
+    Graph のアップロードセッションは最終チャンク以外 320KiB の倍数を要求するため、
+    ソケットからの短い読み出しをそのままチャンクにしない
+    """
+    data = stream.read(size)
+    if not data or len(data) >= size:
+        return data
+    buffer = bytearray(data)
+    while len(buffer) < size:
+        data = stream.read(size - len(buffer))
+        if not data:
+            break
+        buffer.extend(data)
+    return bytes(buffer)
+
+
+class ChunkPrefetcher:
+    """ダウンロードストリームをチャンク単位で先読みするイテレータ"""
+
+    def __init__(self, stream: Any, chunk_size: int | Callable[[], int], depth: int = 2):
+        """
+        Args:
+            stream: read(n) を持つダウンロードストリーム
+            chunk_size: 1チャンクのバイト数、または読み出し毎に呼ばれてサイズを返す関数
+            depth: 先読みするチャンク数（0 の場合はアップロードと同じスレッドで逐次読み出し）
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.depth = max(0, depth)
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, self.depth))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "ChunkPrefetcher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.depth == 0:
+            yield from self._iter_sequential()
+            return
+
+        self._thread = threading.Thread(target=self._reader, name="chunk-prefetch", daemon=True)
+        self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is _EOF:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _next_size(self) -> int:
+        """次に読み出すチャンクのバイト数"""
+        return self.chunk_size() if callable(self.chunk_size) else self.chunk_size
+
+    def _iter_sequential(self) -> Iterator[bytes]:
+        """先読み無効時の逐次読み出し"""
+        while True:
+            size = self._next_size()
+            chunk = read_exact(self.stream, size)
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < size:
+                # 短いチャンクはEOFに達した最終チャンク
+                return
+
+    def _put(self, item: Any) -> bool:
+        """停止要求を確認しながらバッファへ格納する（停止時は False）"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _reader(self) -> None:
+        """読み出しスレッド本体"""
+        try:
+            while not self._stop.is_set():
+                size = self._next_size()
+                chunk = read_exact(self.stream, size)
+                if not chunk:
+                    break
+                if not self._put(chunk):
+                    return
+                if len(chunk) < size:
+                    break
+        except Exception as e:
+            # 例外はアップロード側スレッドで再送出する
+            self._put(e)
+            return
+        self._put(_EOF)
+
+    def close(self) -> None:
+        """読み出しスレッドを停止する（アップロード失敗時の途中終了にも対応）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
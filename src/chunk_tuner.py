@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+大容量ファイル用チャンクサイズ自動調整モジュール
+
+チャンク毎のアップロード所要時間を計測し、timeout_sec に対して余裕がある回線では
+チャンクを大きく、タイムアウトやリトライが発生し始めたら小さくする。
+チャンクサイズは常に Graph の要件（320KiB の倍数・60MiB 未満）を満たす。
+"""
+
+import threading
+import time
+from typing import Any
+
+# Graph のアップロードセッションは最終チャンク以外 320KiB の倍数を要求する
+CHUNK_ALIGNMENT = 320 * 1024
+# 1リクエストあたり 60MiB 未満
+MAX_CHUNK_SIZE = (60 * 1024 * 1024 - 1) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+MIN_CHUNK_SIZE = CHUNK_ALIGNMENT
+
+
+def align_chunk_size(size: int, min_size: int = MIN_CHUNK_SIZE, max_size: int = MAX_CHUNK_SIZE) -> int:
+    """チャンクサイズを 320KiB の倍数に切り捨て、上下限に収める"""
+    aligned = size // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+    return max(min_size, min(max_size, aligned))
+
+
+class ChunkSizeTuner:
+    """計測したチャンク毎のレイテンシからチャンクサイズを調整する（1ファイルにつき1インスタンス）"""
+
+    def __init__(
+        self,
+        initial_size: int,
+        timeout_sec: float,
+        max_size: int = MAX_CHUNK_SIZE,
+        adaptive: bool = True,
+        target_ratio: float = 0.25,
+    ):
+        """
+        Args:
+            initial_size: 初期チャンクサイズ（バイト、chunk_size_mb 相当）
+            timeout_sec: 1リクエストのタイムアウト秒数
+            max_size: チャンクサイズ上限（バイト）
+            adaptive: False の場合は初期サイズ固定（計測のみ行う）
+            target_ratio: 1チャンクの目標所要時間（timeout_sec に対する比率）
+        """
+        self.max_size = align_chunk_size(max_size)
+        self.adaptive = adaptive
+        self.target_sec = max(float(timeout_sec), 0.1) * target_ratio
+        self._size = align_chunk_size(initial_size, max_size=self.max_size)
+        self._lock = threading.Lock()
+        # チャンク毎のサイズは保持せず、件数・最小・最大と採用したサイズの種類のみを持つ
+        self._chunk_count = 0
+        self._min_chunk = 0
+        self._max_chunk = 0
+        self._distinct_sizes: set[int] = set()
+        self._bytes = 0
+        self._upload_sec = 0.0
+        self._started_at = time.time()
+
+    def next_size(self) -> int:
+        """次に読み出すチャンクのサイズ（先読みスレッドからも呼ばれる）"""
+        with self._lock:
+            return self._size
+
+    def record(self, size: int, elapsed: float) -> None:
+        """
+        成功したチャンクの所要時間を記録し、次のチャンクサイズを決める
+
+        目標時間の半分未満なら倍に、目標時間を超えたら目標時間に収まるサイズまで縮める
+        """
+        with self._lock:
+            self._min_chunk = min(self._min_chunk, size) if self._chunk_count else size
+            self._max_chunk = max(self._max_chunk, size)
+            self._chunk_count += 1
+            self._distinct_sizes.add(size)
+            self._bytes += size
+            self._upload_sec += elapsed
+            if not self.adaptive or size < self._size:
+                # 最終チャンクや拡大前に先読みされたチャンクは判定に使わない
+                return
+            if elapsed < self.target_sec / 2:
+                self._size = align_chunk_size(self._size * 2, max_size=self.max_size)
+            elif elapsed > self.target_sec:
+                self._size = align_chunk_size(int(size * self.target_sec / elapsed), max_size=self.max_size)
+
+    def record_failure(self) -> None:
+        """タイムアウト・リトライが発生したチャンクを記録し、チャンクサイズを半分にする"""
+        with self._lock:
+            if self.adaptive:
+                self._size = align_chunk_size(self._size // 2, max_size=self.max_size)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        ファイル単位の計測結果（ログ出力用）
+
+        チャンクサイズは件数・最小・最大・調整後のサイズと、採用したサイズの種類（昇順）で表す
+        """
+        with self._lock:
+            uploaded_mb = self._bytes / 1024 / 1024
+            elapsed = time.time() - self._started_at
+            return {
+                "adaptive_chunk_size": self.adaptive,
+                "chunk_count": self._chunk_count,
+                "chunk_size_min_kib": self._min_chunk // 1024,
+                "chunk_size_max_kib": self._max_chunk // 1024,
+                "chunk_size_final_kib": self._size // 1024,
+                "chunk_sizes_distinct_kib": sorted(size // 1024 for size in self._distinct_sizes),
+                "uploaded_bytes": self._bytes,
+                "upload_mb_per_sec": round(uploaded_mb / self._upload_sec, 2) if self._upload_sec else 0.0,
+                "mb_per_sec": round(uploaded_mb / elapsed, 2) if elapsed else 0.0,
+            }
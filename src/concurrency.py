@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+適応的同時転送数制御モジュール
+
+AIMD（加算増加・乗算減少）で同時転送数を調整する。
+レイテンシが基準から悪化せずスロットリングも無い間は1つずつ増やし、
+429/503・タイムアウトを検出したら半分に減らす。
+"""
+
+import threading
+import time
+from typing import Any
+
+from src.structured_logger import get_structured_logger
+from src.throttle import ThrottleController
+
+# レイテンシ正規化の単位（ファイルサイズの影響を除くため 1MiB あたりの秒数で比較する）
+LATENCY_UNIT_BYTES = 1024 * 1024
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD で上限を調整するスレッドセーフな同時実行数リミッタ"""
+
+    def __init__(
+        self,
+        initial_limit: int,
+        max_limit: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        decrease_cooldown_sec: float = 5.0,
+        throttle: ThrottleController | None = None,
+        adaptive: bool = True,
+    ):
+        """
+        Args:
+            initial_limit: 開始時の同時実行数
+            max_limit: 同時実行数の上限
+            min_limit: 同時実行数の下限
+            decrease_factor: 混雑検出時に上限へ掛ける係数
+            latency_tolerance: 基準レイテンシの何倍までを健全とみなすか
+            decrease_cooldown_sec: 連続した混雑検出で続けて減らさない期間（秒）
+            throttle: 429/503・タイムアウトの発生回数を参照するスロットリング制御
+            adaptive: False の場合は initial_limit 固定で動作する
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit, initial_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.decrease_cooldown_sec = decrease_cooldown_sec
+        self.throttle = throttle
+        self.adaptive = adaptive
+        self._limit = float(max(self.min_limit, min(initial_limit, self.max_limit)))
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._window_successes = 0
+        self._latency_ewma: float | None = None
+        self._latency_baseline: float | None = None
+        self._seen_congestion = throttle.congestion_events() if throttle is not None else 0
+        self._last_decrease = float("-inf")
+        self._started = time.monotonic()
+        self.increases = 0
+        self.decreases = 0
+        self.history: list[tuple[float, int]] = [(0.0, self.limit)]
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限"""
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """空きが出るまで待ってから実行枠を確保する"""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, elapsed: float | None = None, size: int = 0) -> None:
+        """
+        実行枠を返却し、結果に応じて上限を調整する
+
+        Args:
+            elapsed: 転送にかかった秒数（None の場合はレイテンシ判定を行わない）
+            size: 転送したバイト数
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if self.adaptive:
+                if self._congested():
+                    self._decrease()
+                else:
+                    self._on_success(elapsed, size)
+            self._cond.notify_all()
+
+    def _congested(self) -> bool:
+        # 前回の判定以降に 429/503・タイムアウトが発生していれば混雑とみなす
+        if self.throttle is None:
+            return False
+        events = self.throttle.congestion_events()
+        congested = events > self._seen_congestion
+        self._seen_congestion = events
+        return congested
+
+    def _on_success(self, elapsed: float | None, size: int) -> None:
+        if elapsed is not None:
+            latency = elapsed / max(1.0, size / LATENCY_UNIT_BYTES)
+            ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+            self._latency_ewma = ewma
+            if self._latency_baseline is None or ewma < self._latency_baseline:
+                self._latency_baseline = ewma
+            if ewma > self._latency_baseline * self.latency_tolerance:
+                # レイテンシが悪化している間は増やさない
+                return
+        # 現在の上限分の転送が成功するごとに1つ増やす（加算増加）
+        self._window_successes += 1
+        if self._window_successes >= self.limit and self.limit < self.max_limit:
+            self._window_successes = 0
+            self.increases += 1
+            self._set_limit(self._limit + 1, "healthy")
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown_sec:
+            return
+        self._last_decrease = now
+        self._window_successes = 0
+        if self.limit > self.min_limit:
+            self.decreases += 1
+            self._set_limit(max(self.min_limit, self._limit * self.decrease_factor), "throttled")
+
+    def _set_limit(self, new_limit: float, reason: str) -> None:
+        previous = self.limit
+        self._limit = float(min(self.max_limit, max(self.min_limit, new_limit)))
+        if self.limit == previous:
+            return
+        self.history.append((round(time.monotonic() - self._started, 2), self.limit))
+        logger = get_structured_logger("main")
+        logger.info("同時転送数を変更", previous=previous, limit=self.limit, reason=reason)
+
+    def stats(self) -> dict[str, Any]:
+        """上限の推移と増減回数"""
+        with self._cond:
+            limits = [limit for _, limit in self.history]
+            return {
+                "concurrency_limit": self.limit,
+                "concurrency_limit_min": min(limits),
+                "concurrency_limit_max": max(limits),
+                "concurrency_increases": self.increases,
+                "concurrency_decreases": self.decreases,
+            }
@@ -86,18 +86,89 @@ def get_skip_list_path() -> str:
     return get_config("skip_list_path", "logs/skip_list.json", "SKIP_LIST_PATH")
 
 
+def get_skip_list_fsync() -> str:
+    """スキップリストのジャーナルの fsync の方針（always / interval / never）"""
+    policy = str(get_config("skip_list_fsync", "interval", "SKIP_LIST_FSYNC")).lower()
+    return policy if policy in ("always", "interval", "never") else "interval"
+
+
+def get_skip_list_fsync_interval_sec() -> float:
+    """skip_list_fsync が interval の場合に fsync する間隔の秒数"""
+    return float(get_config("skip_list_fsync_interval_sec", 1.0, "SKIP_LIST_FSYNC_INTERVAL_SEC"))
+
+
+def get_skip_list_compact_records() -> int:
+    """スキップリストのジャーナルをスナップショットへ圧縮するまでに追記する件数（0 以下で圧縮しない）"""
+    return int(get_config("skip_list_compact_records", 10000, "SKIP_LIST_COMPACT_RECORDS"))
+
+
 def get_onedrive_files_path() -> str:
-    return get_config("onedrive_files_path", "logs/onedrive_files.json", "ONEDRIVE_FILES_PATH")
+    return get_config("onedrive_files_path", "logs/onedrive_files.ndjson", "ONEDRIVE_FILES_PATH")
+
+
+def get_onedrive_crawl_snapshot_path() -> str:
+    """OneDrive クロールのフォルダ毎のタグ・一覧の保存先（空文字で無効）"""
+    return str(
+        get_config("onedrive_crawl_snapshot_path", "logs/onedrive_crawl_snapshot.json", "ONEDRIVE_CRAWL_SNAPSHOT_PATH")
+        or ""
+    )
+
+
+def get_sharepoint_crawl_snapshot_path() -> str:
+    """SharePoint クロールのフォルダ毎のタグ・一覧の保存先（空文字で無効）"""
+    return str(
+        get_config(
+            "sharepoint_crawl_snapshot_path",
+            "logs/sharepoint_crawl_snapshot.json",
+            "SHAREPOINT_CRAWL_SNAPSHOT_PATH",
+        )
+        or ""
+    )
+
+
+def get_onedrive_delta_enabled() -> bool:
+    """OneDrive のインベントリを delta クエリで差分更新するか"""
+    return _to_bool(get_config("onedrive_delta_enabled", True, "ONEDRIVE_DELTA_ENABLED"))
+
+
+def get_onedrive_delta_state_path() -> str:
+    return get_config("onedrive_delta_state_path", "logs/onedrive_delta_state.json", "ONEDRIVE_DELTA_STATE_PATH")
 
 
 def get_sharepoint_current_files_path() -> str:
     return get_config(
         "sharepoint_current_files_path",
-        "logs/sharepoint_current_files.json",
+        "logs/sharepoint_current_files.ndjson",
         "SHAREPOINT_CURRENT_FILES_PATH",
     )
 
 
+def get_sharepoint_delta_enabled() -> bool:
+    """転送先（SharePoint）のインベントリを delta クエリで差分更新するか"""
+    return _to_bool(get_config("sharepoint_delta_enabled", True, "SHAREPOINT_DELTA_ENABLED"))
+
+
+def get_sharepoint_delta_state_path() -> str:
+    return get_config(
+        "sharepoint_delta_state_path",
+        "logs/sharepoint_delta_state.json",
+        "SHAREPOINT_DELTA_STATE_PATH",
+    )
+
+
+def get_skip_list_reconcile_before_transfer() -> bool:
+    """通常転送の前に転送先のインベントリでスキップリストを照合し直すか"""
+    return _to_bool(get_config("skip_list_reconcile_before_transfer", False, "SKIP_LIST_RECONCILE_BEFORE_TRANSFER"))
+
+
+def get_upload_session_state_path() -> str:
+    return get_config(
+        "upload_session_state_path",
+        "logs/upload_sessions.json",
+        "UPLOAD_SESSION_STATE_PATH",
+    )
+
+
 def get_checksum_report_path() -> str:
     return get_config("checksum_report_path", "logs/checksum_report.json", "CHECKSUM_REPORT_PATH")
 
@@ -118,10 +189,159 @@ def get_chunk_size_mb() -> int:
     return get_config("chunk_size_mb", 5, "CHUNK_SIZE_MB")
 
 
+def _to_bool(value: Any) -> bool:
+    """設定値（bool または環境変数の文字列）を真偽値に変換する"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_adaptive_chunk_size() -> bool:
+    """大容量ファイルのチャンクサイズを計測結果に応じて自動調整するか（chunk_size_mb は初期値）"""
+    return _to_bool(get_config("adaptive_chunk_size", True, "ADAPTIVE_CHUNK_SIZE"))
+
+
+def get_chunk_size_max_mb() -> int:
+    """自動調整時のチャンクサイズ上限（Graph の上限 60MiB 未満に丸められる）"""
+    return int(get_config("chunk_size_max_mb", 60, "CHUNK_SIZE_MAX_MB"))
+
+
+def get_chunk_prefetch_depth() -> int:
+    """大容量ファイル転送時に先読みするチャンク数（0 で先読み無効）"""
+    return int(get_config("chunk_prefetch_depth", 2, "CHUNK_PREFETCH_DEPTH"))
+
+
+def get_chunk_retry_count() -> int:
+    """チャンク単位のアップロード最大試行回数"""
+    return int(get_config("chunk_retry_count", 5, "CHUNK_RETRY_COUNT"))
+
+
+def get_chunk_retry_wait_sec() -> float:
+    """チャンクリトライの初回待機秒数（以降は指数バックオフ）"""
+    return float(get_config("chunk_retry_wait_sec", 2, "CHUNK_RETRY_WAIT_SEC"))
+
+
 def get_large_file_threshold_mb() -> int:
     return get_config("large_file_threshold_mb", 4, "LARGE_FILE_THRESHOLD_MB")
 
 
+def get_max_parallel_transfers() -> int:
+    """同時転送数（adaptive_concurrency 有効時は開始値）"""
+    return int(get_config("max_parallel_transfers", 4, "MAX_PARALLEL_TRANSFERS"))
+
+
+def get_adaptive_concurrency() -> bool:
+    """同時転送数をスロットリング・レイテンシに応じて自動調整するか（AIMD）"""
+    return _to_bool(get_config("adaptive_concurrency", True, "ADAPTIVE_CONCURRENCY"))
+
+
+def get_max_parallel_transfers_ceiling() -> int:
+    """自動調整時の同時転送数の上限（max_parallel_transfers 未満の場合はそちらに合わせる）"""
+    ceiling = int(get_config("max_parallel_transfers_ceiling", 16, "MAX_PARALLEL_TRANSFERS_CEILING"))
+    return max(ceiling, get_max_parallel_transfers())
+
+
+def get_large_file_parallel_transfers() -> int:
+    """大容量ファイルレーン（large_file_threshold_mb 以上）の同時転送数"""
+    return max(1, int(get_config("large_file_parallel_transfers", 2, "LARGE_FILE_PARALLEL_TRANSFERS")))
+
+
+def get_transfer_submit_window() -> int:
+    """小容量レーンで同時に投入しておく（未完了の）転送数の上限"""
+    return int(get_config("transfer_submit_window", 1000, "TRANSFER_SUBMIT_WINDOW"))
+
+
+def get_transfer_pipeline() -> bool:
+    """クロールと転送を並行させるか（クロール中のファイルを到着順に転送する）"""
+    return _to_bool(get_config("transfer_pipeline", False, "TRANSFER_PIPELINE"))
+
+
+def get_transfer_pipeline_queue_size() -> int:
+    """パイプライン転送でクロール済み・未転送のファイルを保持する件数の上限"""
+    return max(1, int(get_config("transfer_pipeline_queue_size", 10000, "TRANSFER_PIPELINE_QUEUE_SIZE")))
+
+
+def get_shard_lease_db_path() -> str:
+    """複数ノードで分担転送する共有リースDB（SQLite）のパス（空の場合は分担しない）"""
+    return str(get_config("shard_lease_db_path", "", "SHARD_LEASE_DB_PATH") or "")
+
+
+def get_shard_count() -> int:
+    """分担転送でインベントリを分割するシャード数（全ノードで同じ値にする）"""
+    return max(1, int(get_config("shard_count", 64, "SHARD_COUNT")))
+
+
+def get_shard_lease_ttl_sec() -> float:
+    """シャードのリース期間（ハートビートが途絶えてから他のノードが回収するまでの秒数）"""
+    return float(get_config("shard_lease_ttl_sec", 60, "SHARD_LEASE_TTL_SEC"))
+
+
+def get_http_pool_maxsize() -> int:
+    """ホスト毎の接続プールサイズ（0以下の場合は小容量・大容量レーンの同時転送数の上限の合計）"""
+    pool_maxsize = int(get_config("http_pool_maxsize", 0, "HTTP_POOL_MAXSIZE"))
+    if pool_maxsize > 0:
+        return pool_maxsize
+    small_lane = get_max_parallel_transfers_ceiling() if get_adaptive_concurrency() else get_max_parallel_transfers()
+    return small_lane + get_large_file_parallel_transfers()
+
+
+def get_http_retry_total() -> int:
+    return int(get_config("http_retry_total", 3, "HTTP_RETRY_TOTAL"))
+
+
+def get_http_retry_backoff_sec() -> float:
+    return float(get_config("http_retry_backoff_sec", 0.5, "HTTP_RETRY_BACKOFF_SEC"))
+
+
+def get_graph_batch_size() -> int:
+    """メタデータ要求を $batch にまとめる最大件数（Graph の上限は20、1以下で無効）"""
+    return int(get_config("graph_batch_size", 20, "GRAPH_BATCH_SIZE"))
+
+
+def get_graph_batch_wait_ms() -> float:
+    """$batch に要求が揃うのを待つ最大時間（ミリ秒）"""
+    return float(get_config("graph_batch_wait_ms", 20, "GRAPH_BATCH_WAIT_MS"))
+
+
+def get_graph_batch_max_in_flight() -> int:
+    """同時に送信中にする $batch の最大数"""
+    return int(get_config("graph_batch_max_in_flight", 4, "GRAPH_BATCH_MAX_IN_FLIGHT"))
+
+
+def get_download_url_ttl_sec() -> float:
+    """クロール時に取得したダウンロードURLを再利用する秒数（0 で無効）"""
+    return float(get_config("download_url_ttl_sec", 1800, "DOWNLOAD_URL_TTL_SEC"))
+
+
+def get_throttle_max_retries() -> int:
+    """429/503 を受けた要求を全ワーカー一時停止後に再送する最大回数"""
+    return int(get_config("throttle_max_retries", 5, "THROTTLE_MAX_RETRIES"))
+
+
+def get_throttle_backoff_base_sec() -> float:
+    """Retry-After が無い場合のバックオフ基準秒数（ジッタ付き指数バックオフ）"""
+    return float(get_config("throttle_backoff_base_sec", 1, "THROTTLE_BACKOFF_BASE_SEC"))
+
+
+def get_throttle_backoff_max_sec() -> float:
+    return float(get_config("throttle_backoff_max_sec", 60, "THROTTLE_BACKOFF_MAX_SEC"))
+
+
+def get_crawl_max_workers() -> int:
+    """クロール時に同時に取得するフォルダページ数"""
+    return max(1, int(get_config("crawl_max_workers", 8, "CRAWL_MAX_WORKERS")))
+
+
+def get_crawl_page_size() -> int:
+    """クロール時の1ページあたりの取得件数（$top）"""
+    return int(get_config("crawl_page_size", 999, "CRAWL_PAGE_SIZE"))
+
+
+def get_crawl_checkpoint_interval_sec() -> float:
+    """クロール・delta 同期の途中経過を保存する間隔の秒数（0 で無効）"""
+    return float(get_config("crawl_checkpoint_interval_sec", 30, "CRAWL_CHECKPOINT_INTERVAL_SEC"))
+
+
 class SecureConfigManager(ConfigManager):
     """セキュリティ強化された設定管理クラス"""
 
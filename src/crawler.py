@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Graph ドライブの並列クロールモジュール
+
+フォルダのキューをワーカープールで幅優先に処理し、@odata.nextLink の全ページを辿る。
+各作業項目はフォルダの相対パスを持つため、フルパスを親パスの文字列分解なしに組み立てられる。
+フォルダ毎のタグ（eTag・cTag）と直下の一覧を保存しておけば、再クロール時はタグが変わっていない
+フォルダの配下を取得せずに再利用するため、コストは変更量に比例する。
+未取得の作業項目（フォルダ・nextLink のページ）は一定間隔でチェックポイントに保存し、
+クロールが途中で停止した場合は次回のクロールを保存した作業項目から再開する。
+"""
+
+import json
+import os
+import posixpath
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import requests
+
+from src.inventory import InventoryWriter
+from src.structured_logger import get_structured_logger
+
+# children の1ページあたりの最大件数
+DEFAULT_PAGE_SIZE = 999
+
+# チェックポイントはファイルリストと同じ場所に <ファイルリストのパス>.checkpoint で保存する
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+def folder_tag(item: dict[str, Any]) -> list[str] | None:
+    """フォルダの変更検知用タグ（eTag・cTag）。どちらも無い場合は None（再利用しない）"""
+    tag = [item.get("eTag") or "", item.get("cTag") or ""]
+    return tag if any(tag) else None
+
+
+@dataclass
+class CrawlPage:
+    """クロールの作業項目（フォルダの1ページ）"""
+
+    url: str
+    rel_path: str
+    # nextLink のページは URL にクエリが含まれるため $top/$select を付けない
+    first_page: bool = True
+    # 前回クロールの一覧を再利用するためのフォルダID・タグ（起点フォルダは None）
+    folder_id: str | None = None
+    tag: list[str] | None = None
+
+
+@dataclass
+class PageResult:
+    """1ページの取得結果"""
+
+    page: CrawlPage
+    files: list[dict[str, Any]] = field(default_factory=list)
+    folders: list[dict[str, Any]] = field(default_factory=list)
+    next_page: CrawlPage | None = None
+    # ページ内のアイテム数（取得失敗時は None）
+    item_count: int | None = None
+
+
+@dataclass
+class CrawlStats:
+    """クロールの処理件数と速度"""
+
+    folders: int = 0
+    pages: int = 0
+    items: int = 0
+    errors: int = 0
+    reused_folders: int = 0
+    elapsed_sec: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        elapsed = self.elapsed_sec
+        return {
+            "folders": self.folders,
+            "pages": self.pages,
+            "items": self.items,
+            "errors": self.errors,
+            "reused_folders": self.reused_folders,
+            "elapsed_sec": round(elapsed, 2),
+            "folders_per_sec": round(self.folders / elapsed, 1) if elapsed > 0 else 0.0,
+            "items_per_sec": round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class CrawlSnapshot:
+    """
+    フォルダ毎のタグと直下の一覧（前回クロールの結果）の永続化
+
+    フォルダID → {"tag", "files", "folders"} を保存し、次回のクロールでタグが一致するフォルダは
+    配下を取得せずに保存済みの一覧を再利用する。クロール中は前回・今回の一覧をメモリに保持する
+    （メモリ使用量はファイル数に比例する）
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, root_url: str):
+        self.path = path
+        self.root_url = root_url
+        self.previous: dict[str, dict[str, Any]] = {}
+        self.current: dict[str, dict[str, Any]] = {}
+
+    def load(self) -> None:
+        self.previous, self.current = {}, {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 破損時は全件クロールする
+            return
+        # 起点フォルダが異なる（設定変更など）スナップショットは使わない
+        if state.get("version") == self.VERSION and state.get("root_url") == self.root_url:
+            self.previous = state.get("folders", {})
+
+    def lookup(self, page: CrawlPage) -> dict[str, Any] | None:
+        """タグが前回と一致するフォルダの一覧（一致しない・未保存の場合は None）"""
+        if page.folder_id is None or page.tag is None:
+            return None
+        entry = self.previous.get(page.folder_id)
+        if entry is None or entry.get("tag") != page.tag:
+            return None
+        return entry
+
+    def record(self, folder_id: str, entry: dict[str, Any]) -> None:
+        self.current[folder_id] = entry
+
+    def save(self) -> None:
+        """今回のクロールで一覧が揃ったフォルダのみ保存する（削除されたフォルダは残さない）"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {"version": self.VERSION, "root_url": self.root_url, "folders": self.current}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class CrawlCheckpoint:
+    """
+    クロールの途中経過（未取得の作業項目と書き込み済みのファイル数）の保存
+
+    未取得のフォルダ・nextLink のページと、その時点でファイルリストに書き込み済みの件数を
+    一定間隔で保存する。次回のクロールは保存した作業項目から再開し、ファイルリストは
+    書き込み済みの件数までを .partial から引き継ぐ（それより後のレコードは再取得するページのもの）。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, writer: InventoryWriter, interval_sec: float = 30):
+        """
+        Args:
+            path: チェックポイントの保存先
+            writer: クロール結果を書き込むファイルリストのライタ
+            interval_sec: 保存間隔の秒数
+        """
+        self.path = path
+        self.writer = writer
+        self.interval_sec = interval_sec
+        self._last_saved = time.monotonic()
+
+    def restore(self, root_url: str) -> list[CrawlPage] | None:
+        """保存した作業項目（起点フォルダが一致し、ファイルリストを引き継げた場合のみ）"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            pages = [CrawlPage(**page) for page in state["pages"]]
+            records = int(state["records"])
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            # 破損時は最初からクロールする
+            self.clear()
+            return None
+        if state.get("version") != self.VERSION or state.get("root_url") != root_url:
+            self.clear()
+            return None
+        if not self.writer.resume(records):
+            # 前回のファイルリスト（.partial）が無い・欠けている場合は最初からクロールする
+            self.clear()
+            return None
+        return pages
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_saved >= self.interval_sec
+
+    def save(self, root_url: str, pages: Iterable[CrawlPage]) -> None:
+        """未取得の作業項目を保存する（先にファイルリストをディスクへ書き出す）"""
+        self.writer.flush()
+        state = {
+            "version": self.VERSION,
+            "root_url": root_url,
+            "records": self.writer.count,
+            "pages": [asdict(page) for page in pages],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._last_saved = time.monotonic()
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def inventory_checkpoint(inventory_path: str, writer: InventoryWriter, interval_sec: float) -> CrawlCheckpoint | None:
+    """ファイルリストの隣に保存するクロールのチェックポイント（interval_sec が 0 以下の場合は無効）"""
+    if interval_sec <= 0:
+        return None
+    return CrawlCheckpoint(inventory_path + CHECKPOINT_SUFFIX, writer, interval_sec)
+
+
+def _snapshot_item(item: dict[str, Any]) -> dict[str, Any]:
+    # ダウンロードURLは有効期限が短いため保存しない
+    return {key: value for key, value in item.items() if key not in ("full_path", "@microsoft.graph.downloadUrl")}
+
+
+class DriveCrawler:
+    """フォルダのキューを並列・ページ単位で処理するクローラ"""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        headers_func: Callable[[], dict[str, str]],
+        children_url: Callable[[dict[str, Any]], str],
+        select: str | None = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        max_workers: int = 8,
+        timeout: float = 10,
+        method: str = "crawl",
+        snapshot_path: str | None = None,
+    ):
+        """
+        Args:
+            session: Graph 呼び出しに使うセッション
+            headers_func: 認証ヘッダを返す関数
+            children_url: フォルダのアイテムから子アイテム一覧の URL を組み立てる関数
+            select: $select で取得するプロパティ（前回の一覧を再利用する場合は eTag・cTag を含める）
+            page_size: $top で指定する1ページあたりの件数
+            max_workers: 同時に取得するページ数
+            timeout: 1ページの取得タイムアウト秒数
+            method: ログに出力する呼び出し元メソッド名
+            snapshot_path: フォルダ毎のタグと一覧を保存するファイルのパス（未指定時は毎回全件クロール）
+        """
+        self.session = session
+        self.headers_func = headers_func
+        self.children_url = children_url
+        self.select = select
+        self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.method = method
+        self.snapshot_path = snapshot_path
+        self.stats = CrawlStats()
+
+    def crawl(self, root_url: str, root_path: str = "") -> list[dict[str, Any]]:
+        """
+        root_url のフォルダ配下を幅優先・並列にクロールする
+
+        Returns:
+            ファイルアイテムのリスト（各アイテムに "full_path" を追加）
+        """
+        return list(self.iter_crawl(root_url, root_path))
+
+    def iter_crawl(
+        self, root_url: str, root_path: str = "", checkpoint: CrawlCheckpoint | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """
+        root_url のフォルダ配下を幅優先・並列にクロールし、ページの取得順にファイルアイテムを返す
+
+        snapshot_path が指定されている場合、タグが前回から変わっていないフォルダは
+        配下を取得せず前回の一覧を再利用する
+
+        Args:
+            root_url: 起点フォルダの子アイテム一覧の URL
+            root_path: 起点フォルダの相対パス（フルパスの先頭）
+            checkpoint: 途中経過の保存先（前回停止したクロールのチェックポイントがあれば再開する）
+
+        Yields:
+            ファイルアイテム（"full_path" を追加）
+        """
+        self.stats = CrawlStats()
+        start = time.monotonic()
+        snapshot = CrawlSnapshot(self.snapshot_path, root_url) if self.snapshot_path else None
+        if snapshot is not None:
+            snapshot.load()
+        file_count = 0
+        # 前回の一覧から再利用したファイル（次に返すまで保持する）
+        reused: list[dict[str, Any]] = []
+        # フォルダID → 取得中の一覧（全ページが揃ったらスナップショットに記録する）
+        listings: dict[str, dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawler") as executor:
+            # 取得中の作業項目（チェックポイントに保存する）
+            pending: dict[Future, CrawlPage] = {}
+
+            def submit(page: CrawlPage) -> None:
+                pending[executor.submit(self._fetch, page)] = page
+
+            resumed = self._start(CrawlPage(root_url, root_path), snapshot, checkpoint, reused, submit)
+            while pending or reused:
+                file_count += len(reused)
+                yield from reused
+                reused.clear()
+                if not pending:
+                    break
+                if checkpoint is not None and checkpoint.due():
+                    # ここまでに返したファイルは呼び出し元で書き込み済み
+                    checkpoint.save(root_url, pending.values())
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    # 集計はこのスレッドのみで行う
+                    result: PageResult = future.result()
+                    self._record_listing(result, snapshot, listings)
+                    for child in result.folders:
+                        self._enqueue_folder(self._child_page(result.page.rel_path, child), snapshot, reused, submit)
+                    if result.next_page is not None:
+                        submit(result.next_page)
+                    file_count += len(result.files)
+                    yield from result.files
+        self._finish(snapshot, checkpoint, resumed)
+        self.stats.elapsed_sec = time.monotonic() - start
+        logger = get_structured_logger("transfer")
+        logger.info("クロール完了", method=self.method, file_count=file_count, **self.stats.as_dict())
+
+    def _start(
+        self,
+        root: CrawlPage,
+        snapshot: CrawlSnapshot | None,
+        checkpoint: CrawlCheckpoint | None,
+        files: list[dict[str, Any]],
+        submit: Callable[[CrawlPage], None],
+    ) -> bool:
+        """起点フォルダ（チェックポイントがあれば保存した作業項目）を取得キューに入れる（再開した場合は True）"""
+        resumed = checkpoint.restore(root.url) if checkpoint is not None else None
+        if checkpoint is None or resumed is None:
+            self._enqueue_folder(root, snapshot, files, submit)
+            return False
+        logger = get_structured_logger("transfer")
+        logger.info("クロールを再開", method=self.method, pages=len(resumed), records=checkpoint.writer.count)
+        for page in resumed:
+            submit(page)
+        return True
+
+    def _finish(self, snapshot: CrawlSnapshot | None, checkpoint: CrawlCheckpoint | None, resumed: bool) -> None:
+        if checkpoint is not None:
+            checkpoint.clear()
+        if snapshot is not None and self.stats.errors == 0 and not resumed:
+            # 取得に失敗したフォルダがある場合・再開したクロール（停止前に揃った一覧が無い）の場合は
+            # 前回のスナップショットを残す
+            snapshot.save()
+
+    def _child_page(self, parent_path: str, folder: dict[str, Any]) -> CrawlPage:
+        full_path = posixpath.join(parent_path, folder["name"]) if parent_path else folder["name"]
+        return CrawlPage(self.children_url(folder), full_path, folder_id=folder["id"], tag=folder.get("tag"))
+
+    def _enqueue_folder(
+        self,
+        page: CrawlPage,
+        snapshot: CrawlSnapshot | None,
+        files: list[dict[str, Any]],
+        submit: Callable[[CrawlPage], None],
+    ) -> None:
+        """フォルダを取得キューに入れる（タグが前回と同じフォルダは配下ごと前回の一覧を再利用する）"""
+        stack = [page]
+        while stack:
+            current = stack.pop()
+            self.stats.folders += 1
+            entry = snapshot.lookup(current) if snapshot is not None else None
+            if snapshot is None or entry is None or current.folder_id is None:
+                submit(current)
+                continue
+            snapshot.record(current.folder_id, entry)
+            self.stats.reused_folders += 1
+            for item in entry["files"]:
+                full_path = posixpath.join(current.rel_path, item["name"]) if current.rel_path else item["name"]
+                files.append({**item, "full_path": full_path})
+            stack.extend(self._child_page(current.rel_path, folder) for folder in entry["folders"])
+
+    def _record_listing(
+        self, result: PageResult, snapshot: CrawlSnapshot | None, listings: dict[str, dict[str, Any]]
+    ) -> None:
+        if result.item_count is None:
+            self.stats.errors += 1
+        else:
+            self.stats.pages += 1
+            self.stats.items += result.item_count
+        page = result.page
+        if snapshot is None or page.folder_id is None or page.tag is None:
+            return
+        listing = listings.setdefault(page.folder_id, {"tag": page.tag, "files": [], "folders": []})
+        if result.item_count is None:
+            # 一覧が欠けたフォルダは記録しない
+            listing["failed"] = True
+        listing["files"].extend(_snapshot_item(item) for item in result.files)
+        listing["folders"].extend(result.folders)
+        if result.next_page is None or result.item_count is None:
+            listings.pop(page.folder_id)
+            if not listing.pop("failed", False):
+                snapshot.record(page.folder_id, listing)
+
+    def _get_page(self, page: CrawlPage) -> dict[str, Any] | None:
+        params: dict[str, Any] | None = None
+        if page.first_page:
+            params = {"$top": self.page_size}
+            if self.select:
+                params["$select"] = self.select
+        logger = get_structured_logger("transfer")
+        try:
+            resp = self.session.get(page.url, headers=self.headers_func(), params=params, timeout=self.timeout)
+            resp.raise_for_status()
+        except requests.exceptions.Timeout:
+            logger.warning("API応答がありません（タイムアウト）", url=page.url, method=self.method)
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(
+                "API リクエストエラー",
+                error=str(e),
+                response=getattr(e.response, "text", ""),
+                url=page.url,
+                method=self.method,
+            )
+            return None
+        return resp.json()
+
+    def _fetch(self, page: CrawlPage) -> PageResult:
+        """1ページを取得し、ファイル・子フォルダ・次ページに分ける"""
+        result = PageResult(page)
+        data = self._get_page(page)
+        if data is None:
+            return result
+        values = data.get("value", [])
+        for item in values:
+            if item.get("folder"):
+                result.folders.append({"id": item["id"], "name": item["name"], "tag": folder_tag(item)})
+            else:
+                full_path = posixpath.join(page.rel_path, item["name"]) if page.rel_path else item["name"]
+                result.files.append({**item, "full_path": full_path})
+        next_link = data.get("@odata.nextLink")
+        if next_link:
+            result.next_page = CrawlPage(
+                next_link, page.rel_path, first_page=False, folder_id=page.folder_id, tag=page.tag
+            )
+        result.item_count = len(values)
+        return result
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Graph delta クエリによるドライブのインベントリ差分同期モジュール
+
+初回はドライブ全体を delta で列挙して deltaLink を保存し、以降は deltaLink から
+追加・変更・移動・削除のみを取得して保存済みのアイテムツリーに反映する。
+delta の応答には parentReference.path が含まれないため、アイテムID → (親ID, 名前) のツリーを保持し、
+フルパスはツリーを辿って組み立てる（フォルダの移動・名前変更は配下のパスにも反映される）。
+同期中は一定間隔で次のページの nextLink とそれまでに反映したツリーを保存し、途中で停止した場合は
+次回の同期を保存した nextLink から再開する。
+"""
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import requests
+
+from src.structured_logger import get_structured_logger
+
+DELTA_STATE_VERSION = 1
+
+# deltaLink が失効した場合の応答（初回同期からやり直す）
+RESYNC_REQUIRED_STATUS = 410
+
+# ツリーに保持するファイルのプロパティ
+_FILE_FIELDS = ("size", "lastModifiedDateTime")
+
+
+class DriveDeltaSync:
+    """
+    delta クエリでドライブのアイテムツリーを差分更新し、状態をファイルに保存する
+
+    パスの組み立てに親子関係が必要なため、ドライブ全体のアイテムをメモリに保持する
+    （メモリ使用量はアイテム数に比例する）
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        headers_func: Callable[[], dict[str, str]],
+        delta_url: str,
+        state_path: str,
+        select: str | None = None,
+        on_item: Callable[[dict[str, Any]], None] | None = None,
+        timeout: float = 30,
+        method: str = "delta_sync",
+        checkpoint_interval_sec: float = 0,
+    ):
+        """
+        Args:
+            session: Graph 呼び出しに使うセッション
+            headers_func: 認証ヘッダを返す関数
+            delta_url: ドライブルートの delta の URL（初回同期・再同期で使う）
+            state_path: deltaLink とアイテムツリーを保存するファイルのパス
+            select: 初回要求の $select で取得するプロパティ
+            on_item: 追加・変更されたアイテム毎に呼ぶ関数（ダウンロードURLのキャッシュ等）
+            timeout: 1ページの取得タイムアウト秒数（delta のページは children より大きい）
+            method: ログに出力する呼び出し元メソッド名
+            checkpoint_interval_sec: 同期途中の nextLink を保存する間隔の秒数（0 以下で保存しない）
+        """
+        self.session = session
+        self.headers_func = headers_func
+        self.delta_url = delta_url
+        self.state_path = state_path
+        self.select = select
+        self.on_item = on_item
+        self.timeout = timeout
+        self.method = method
+        self.checkpoint_interval_sec = checkpoint_interval_sec
+        self.delta_link: str | None = None
+        # 途中で停止した同期の次のページ（再開用）
+        self.next_link: str | None = None
+        self.root_id: str | None = None
+        self.items: dict[str, dict[str, Any]] = {}
+
+    def _load(self) -> None:
+        self.delta_link, self.next_link, self.root_id, self.items = None, None, None, {}
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 破損時は初回同期からやり直す
+            logger = get_structured_logger("transfer")
+            logger.warning("delta 状態ファイルが破損しています。全件同期します。", path=self.state_path)
+            return
+        # 別のドライブ（ユーザー変更など）の状態は使わない
+        if state.get("version") != DELTA_STATE_VERSION or state.get("delta_url") != self.delta_url:
+            return
+        self.delta_link = state.get("delta_link")
+        self.next_link = state.get("next_link")
+        self.root_id = state.get("root_id")
+        self.items = state.get("items", {})
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "version": DELTA_STATE_VERSION,
+            "delta_url": self.delta_url,
+            "delta_link": self.delta_link,
+            "next_link": self.next_link,
+            "root_id": self.root_id,
+            "items": self.items,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        # 書き込み途中で強制終了されても前回の deltaLink とツリーを壊さない
+        os.replace(tmp_path, self.state_path)
+
+    def sync(self) -> dict[str, Any]:
+        """
+        保存済みの deltaLink から変更を取得してツリーに反映し、新しい deltaLink を保存する
+
+        途中のページで失敗した場合は例外を送出する。状態ファイルは最後に保存したチェックポイントのまま
+        （次回は保存した nextLink、無ければ前回の deltaLink から再開）
+
+        Returns:
+            同期の統計（全件同期か、再開したか、ページ数、変更・削除件数）
+        """
+        self._load()
+        resume_link = self.next_link
+        stats: dict[str, Any] = {"full_sync": self.delta_link is None, "resumed": resume_link is not None}
+        stats.update(pages=0, changed=0, deleted=0)
+        url = resume_link or self.delta_link or self.delta_url
+        resynced = False
+        last_checkpoint = time.monotonic()
+        while True:
+            params = {"$select": self.select} if self.select and url == self.delta_url else None
+            resp = self.session.get(url, headers=self.headers_func(), params=params, timeout=self.timeout)
+            restart_url = self._restart_url(resp, url, resume_link, resynced)
+            if restart_url is not None:
+                resynced = resynced or resp.status_code == RESYNC_REQUIRED_STATUS
+                resume_link = None
+                stats.update(full_sync=self.delta_link is None, pages=0, changed=0, deleted=0)
+                url = restart_url
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+            self._apply_page(data, stats)
+            if "@odata.nextLink" in data:
+                url = data["@odata.nextLink"]
+                last_checkpoint = self._checkpoint(url, last_checkpoint)
+                continue
+            self.delta_link = data.get("@odata.deltaLink")
+            self.next_link = None
+            break
+        self._prune()
+        self._save()
+        stats["items"] = len(self.items)
+        return stats
+
+    def _checkpoint(self, next_link: str, last_checkpoint: float) -> float:
+        """一定間隔でここまでに反映したツリーと次のページを保存する（停止した場合はこのページから再開する）"""
+        if self.checkpoint_interval_sec <= 0 or time.monotonic() - last_checkpoint < self.checkpoint_interval_sec:
+            return last_checkpoint
+        self.next_link = next_link
+        self._save()
+        return time.monotonic()
+
+    def _restart_url(self, resp: requests.Response, url: str, resume_link: str | None, resynced: bool) -> str | None:
+        """同期をやり直す場合の URL（deltaLink の失効・保存した nextLink で再開できない場合）"""
+        logger = get_structured_logger("transfer")
+        if resp.status_code == RESYNC_REQUIRED_STATUS and not resynced:
+            logger.warning("deltaLink が失効しました。全件同期します。", method=self.method)
+            self.delta_link, self.root_id, self.items = None, None, {}
+            return self.delta_url
+        if url == resume_link and 400 <= resp.status_code < 500:
+            # 同じ回の同期をやり直す（差分の反映は冪等。初回同期の途中はツリーを捨てて列挙し直す）
+            logger.warning("保存した nextLink から再開できません。同期をやり直します。", method=self.method)
+            if self.delta_link is None:
+                self.root_id, self.items = None, {}
+            return self.delta_link or self.delta_url
+        return None
+
+    def _apply_page(self, data: dict[str, Any], stats: dict[str, Any]) -> None:
+        stats["pages"] += 1
+        for item in data.get("value", []):
+            if self._apply(item):
+                stats["changed"] += 1
+            else:
+                stats["deleted"] += 1
+
+    def _apply(self, item: dict[str, Any]) -> bool:
+        """1アイテムの変更をツリーに反映する（削除の場合は False）"""
+        item_id = item["id"]
+        if "deleted" in item:
+            self.items.pop(item_id, None)
+            return False
+        if "root" in item:
+            self.root_id = item_id
+            return True
+        record: dict[str, Any] = {"name": item.get("name", ""), "parent": (item.get("parentReference") or {}).get("id")}
+        if "folder" in item:
+            record["folder"] = True
+        elif "file" in item:
+            record.update({field: item.get(field) for field in _FILE_FIELDS})
+            hashes = (item.get("file") or {}).get("hashes")
+            record["file"] = {"hashes": hashes} if hashes else {}
+            if self.on_item is not None:
+                self.on_item(item)
+        else:
+            # パッケージ（OneNote 等）はクロールと同様に対象外
+            self.items.pop(item_id, None)
+            return True
+        self.items[item_id] = record
+        return True
+
+    def _resolve_paths(self) -> dict[str, str]:
+        """ルートまで辿れるアイテムのフルパス（ルートからの相対パス）"""
+        paths: dict[str, str] = {}
+        if self.root_id is not None:
+            paths[self.root_id] = ""
+        for item_id in self.items:
+            chain: list[str] = []
+            current: str | None = item_id
+            # 親を辿り、パスが判明している祖先に到達したら下りながらパスを確定する
+            while current is not None and current not in paths and current in self.items and current not in chain:
+                chain.append(current)
+                current = self.items[current].get("parent")
+            if current not in paths:
+                continue
+            base = paths[current]
+            for node in reversed(chain):
+                name = self.items[node]["name"]
+                base = f"{base}/{name}" if base else name
+                paths[node] = base
+        return paths
+
+    def _prune(self) -> None:
+        # 削除されたフォルダの配下（個別の削除通知が無いもの）をツリーから除く
+        paths = self._resolve_paths()
+        self.items = {item_id: record for item_id, record in self.items.items() if item_id in paths}
+
+    def files(self, root_path: str = "") -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        root_path 配下のファイルを (root_path からの相対パス, アイテム) で返す
+
+        Args:
+            root_path: ドライブルートからの相対パス（空の場合はドライブ全体）。
+                OneDrive/SharePoint のパスは大文字小文字を区別しないため、casefold して比較する
+        """
+        prefix = root_path.replace("\\", "/").strip("/")
+        prefix_parts = [part.casefold() for part in prefix.split("/")] if prefix else []
+        depth = len(prefix_parts)
+        paths = self._resolve_paths()
+        for item_id, record in self.items.items():
+            path = paths.get(item_id)
+            if path is None or record.get("folder"):
+                continue
+            if prefix:
+                parts = path.split("/")
+                if len(parts) <= depth or [part.casefold() for part in parts[:depth]] != prefix_parts:
+                    continue
+                path = "/".join(parts[depth:])
+            yield path, {"id": item_id, **record}
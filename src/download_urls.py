@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+ダウンロードURLキャッシュモジュール
+
+クロール時に $select で取得した @microsoft.graph.downloadUrl をアイテムID毎に短時間保持し、
+転送時のアイテム再取得（1ファイル1往復）を省く。
+ダウンロードURLは事前認証済みで有効期限が短いため、ファイルには保存せずメモリ上のみで扱う。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Graph のダウンロードURLは概ね1時間で失効するため、余裕を持たせた既定値
+DEFAULT_TTL_SEC = 1800
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class DownloadUrlCache:
+    """アイテムID → ダウンロードURL の TTL 付きキャッシュ（スレッドセーフ）"""
+
+    def __init__(self, ttl_sec: float = DEFAULT_TTL_SEC, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, item_id: str | None) -> str | None:
+        """有効期限内のダウンロードURLを返す（無い・期限切れの場合は None）"""
+        if not item_id or self.ttl_sec <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(item_id)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(item_id, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, item_id: str | None, download_url: str | None) -> None:
+        """ダウンロードURLを登録する（上限を超えたら古いものから破棄）"""
+        if not item_id or not download_url or self.ttl_sec <= 0:
+            return
+        with self._lock:
+            self._entries[item_id] = (download_url, time.monotonic() + self.ttl_sec)
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, item_id: str | None) -> None:
+        """401/403 などで使えなかったURLを破棄する"""
+        if not item_id:
+            return
+        with self._lock:
+            self._entries.pop(item_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """キャッシュのヒット数・ミス数"""
+        return {"download_url_cache_hits": self.hits, "download_url_cache_misses": self.misses}
+
+
+# 設定値管理を使用（クロール用と転送用のクライアントが別インスタンスのため、プロセス内で共有する）
+try:
+    from src.config_manager import get_download_url_ttl_sec
+
+    shared_download_url_cache = DownloadUrlCache(get_download_url_ttl_sec())
+except ImportError:
+    # フォールバック（直接実行時など）
+    shared_download_url_cache = DownloadUrlCache()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+SharePoint 転送先フォルダのキャッシュモジュール
+
+作成済み・確認済みのフォルダ（パス → アイテムID）と存在しないことが分かっているフォルダを
+ワーカースレッド間で共有し、同じフォルダの存在確認・作成を繰り返さないようにする。
+同じパスの作成は1スレッドのみが行い（single-flight）、他のスレッドはその完了を待つ。
+"""
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+def normalize_folder_path(path: str) -> str:
+    """フォルダパスを正規化する（区切り文字を / に統一し前後の / を除去）"""
+    return path.replace("\\", "/").strip("/")
+
+
+def _key(path: str) -> str:
+    # SharePoint のパスは大文字小文字を区別しない
+    return normalize_folder_path(path).casefold()
+
+
+def _parent(path: str) -> str:
+    return normalize_folder_path(path).rpartition("/")[0]
+
+
+class FolderCache:
+    """フォルダ存在情報のスレッドセーフなキャッシュ"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._exists: dict[str, str | None] = {}
+        self._missing: set[str] = set()
+        self._created: set[str] = set()
+        self._path_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.created_count = 0
+
+    def exists(self, path: str) -> bool:
+        """存在が確認済み（または作成済み）か"""
+        with self._lock:
+            found = _key(path) in self._exists
+            if found:
+                self.hits += 1
+            return found
+
+    def item_id(self, path: str) -> str | None:
+        """確認済みフォルダのアイテムID（不明な場合は None）"""
+        with self._lock:
+            return self._exists.get(_key(path))
+
+    def is_missing(self, path: str) -> bool:
+        """
+        存在しないことが分かっているか
+
+        明示的に記録したパスに加え、このプロセスで新規作成したフォルダの子も存在しない
+        """
+        key = _key(path)
+        with self._lock:
+            if key in self._exists:
+                return False
+            return key in self._missing or _key(_parent(path)) in self._created
+
+    def mark_exists(self, path: str, item_id: str | None = None) -> None:
+        """存在を記録する"""
+        key = _key(path)
+        with self._lock:
+            self._exists[key] = item_id
+            self._missing.discard(key)
+
+    def mark_created(self, path: str, item_id: str | None = None) -> None:
+        """新規作成したフォルダを記録する（子フォルダは確認不要で作成できる）"""
+        key = _key(path)
+        with self._lock:
+            self._exists[key] = item_id
+            self._missing.discard(key)
+            self._created.add(key)
+            self.created_count += 1
+
+    def mark_missing(self, path: str) -> None:
+        """存在しないことを記録する"""
+        key = _key(path)
+        with self._lock:
+            if key not in self._exists:
+                self._missing.add(key)
+
+    def invalidate(self, path: str) -> None:
+        """記録を破棄する（外部で削除された場合など）"""
+        key = _key(path)
+        with self._lock:
+            self._exists.pop(key, None)
+            self._missing.discard(key)
+            self._created.discard(key)
+
+    @contextmanager
+    def creating(self, path: str) -> Iterator[None]:
+        """同じパスの確認・作成を1スレッドに限定する（single-flight）"""
+        key = _key(path)
+        with self._lock:
+            path_lock = self._path_locks.setdefault(key, threading.Lock())
+        with path_lock:
+            yield
+
+    def stats(self) -> dict[str, int]:
+        """キャッシュヒット数・作成数"""
+        with self._lock:
+            return {
+                "folder_cache_hits": self.hits,
+                "folders_known": len(self._exists),
+                "folders_created": self.created_count,
+            }
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Graph JSON バッチ（$batch）モジュール
+
+複数スレッドから投入された小さなメタデータ要求（アイテム取得・フォルダ存在確認など）を
+最大20件ずつ1回の POST /$batch にまとめて送信する。
+送信中の $batch は max_in_flight 件まで並行させ、その間に届いた要求は次の $batch にまとめる。
+呼び出し側には要求毎の Future を返し、部分失敗・要求単位の 429 はここで処理する。
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import requests
+
+from src.structured_logger import get_structured_logger
+from src.throttle import ThrottleController, parse_retry_after
+
+# Graph の $batch が受け付ける最大要求数
+MAX_BATCH_SIZE = 20
+# 要求単位でリトライするステータス
+RETRYABLE_ITEM_STATUS = {429, 503, 504}
+
+
+@dataclass
+class BatchResponse:
+    """$batch 内の個別レスポンス（requests.Response と同じ属性名で参照できる）"""
+
+    status_code: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: Any = None
+
+    def json(self) -> Any:
+        return self.body
+
+    @property
+    def text(self) -> str:
+        return "" if self.body is None else str(self.body)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error in $batch response: {self.text}")
+
+
+@dataclass
+class _BatchItem:
+    method: str
+    url: str
+    body: Any
+    future: Future = field(default_factory=Future)
+    attempts: int = 0
+
+
+class GraphBatcher:
+    """メタデータ要求を $batch にまとめて送信するバッチャ（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        base_url: str,
+        headers_func: Callable[[], dict[str, str]],
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = 20,
+        max_item_retries: int = 3,
+        timeout: float = 30,
+        throttle: ThrottleController | None = None,
+        max_in_flight: int = 4,
+    ):
+        """
+        Args:
+            session: 接続プール付きセッション
+            base_url: Graph のベースURL（例: https://graph.microsoft.com/v1.0）
+            headers_func: 認証ヘッダを返す関数
+            max_batch_size: 1回の $batch にまとめる最大要求数（Graph の上限は20）
+            max_wait_ms: 要求が揃うのを待つ最大時間（ミリ秒）
+            max_item_retries: 要求単位の 429/503/504 をリトライする最大回数
+            timeout: $batch 要求のタイムアウト秒数
+            throttle: 要求単位の 429 を全ワーカーの一時停止に反映するスロットリング制御
+            max_in_flight: 同時に送信中にする $batch の最大数
+        """
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.headers_func = headers_func
+        self.max_batch_size = max(1, min(MAX_BATCH_SIZE, max_batch_size))
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000
+        self.max_item_retries = max_item_retries
+        self.timeout = timeout
+        self.throttle = throttle
+        self.max_in_flight = max(1, max_in_flight)
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor: ThreadPoolExecutor | None = None
+        self._stats_lock = threading.Lock()
+        self._pending: list[_BatchItem] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self.batches_sent = 0
+        self.requests_batched = 0
+
+    def submit(self, method: str, url: str, body: Any = None) -> "Future[BatchResponse]":
+        """
+        要求を投入し、個別レスポンスの Future を返す
+
+        Args:
+            method: HTTPメソッド
+            url: base_url 配下の絶対URL、または base_url からの相対パス
+            body: JSONボディ（POST/PATCH 用）
+        """
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url) :]
+        item = _BatchItem(method=method.upper(), url=url if url.startswith("/") else "/" + url, body=body)
+        self._enqueue(item)
+        return item.future
+
+    def execute(self, requests_: list[tuple[str, str]]) -> list[BatchResponse]:
+        """(メソッド, URL) のリストをまとめて実行し、同じ順序でレスポンスを返す"""
+        futures = [self.submit(method, url) for method, url in requests_]
+        return [f.result() for f in futures]
+
+    def _enqueue(self, item: _BatchItem) -> None:
+        with self._condition:
+            if self._closed:
+                item.future.set_exception(RuntimeError("GraphBatcher は既に閉じられています"))
+                return
+            self._pending.append(item)
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="graph-batch-send")
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._executor,), name="graph-batch", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def _take_batch(self) -> list[_BatchItem]:
+        """要求が揃うか待ち時間が過ぎるまで待ってから最大 max_batch_size 件を取り出す"""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            deadline = time.monotonic() + self.max_wait_sec
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            return batch
+
+    def _run(self, executor: ThreadPoolExecutor) -> None:
+        """収集スレッド本体（送信枠が空くまで待ち、その間に届いた要求は次の $batch にまとめる）"""
+        while True:
+            self._in_flight.acquire()
+            batch = self._take_batch()
+            if not batch:
+                self._in_flight.release()
+                return
+            executor.submit(self._send_and_release, batch)
+
+    def _send_and_release(self, batch: list[_BatchItem]) -> None:
+        try:
+            self._send(batch)
+        finally:
+            self._in_flight.release()
+
+    def _send(self, batch: list[_BatchItem]) -> None:
+        """1回の $batch を送信し、個別レスポンスを各 Future へ振り分ける"""
+        batch_requests: list[dict[str, Any]] = []
+        for index, item in enumerate(batch):
+            request: dict[str, Any] = {"id": str(index), "method": item.method, "url": item.url}
+            if item.body is not None:
+                request["body"] = item.body
+                request["headers"] = {"Content-Type": "application/json"}
+            batch_requests.append(request)
+        payload = {"requests": batch_requests}
+
+        try:
+            headers = {**self.headers_func(), "Content-Type": "application/json"}
+            resp = self.session.post(f"{self.base_url}/$batch", headers=headers, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            responses = resp.json().get("responses", [])
+        except Exception as e:
+            # $batch 自体の失敗は含まれる全要求の失敗として通知する
+            for item in batch:
+                item.future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self.batches_sent += 1
+            self.requests_batched += len(batch)
+
+        by_id = {str(r.get("id")): r for r in responses}
+        for index, item in enumerate(batch):
+            raw = by_id.get(str(index))
+            if raw is None:
+                item.future.set_exception(Exception(f"$batch レスポンスに結果がありません: {item.method} {item.url}"))
+                continue
+            response = BatchResponse(
+                status_code=int(raw.get("status", 0)),
+                headers=raw.get("headers") or {},
+                body=raw.get("body"),
+            )
+            if response.status_code in RETRYABLE_ITEM_STATUS and item.attempts < self.max_item_retries:
+                self._retry_later(item, response)
+                continue
+            item.future.set_result(response)
+
+    def _retry_later(self, item: _BatchItem, response: BatchResponse) -> None:
+        """要求単位の 429 等を Retry-After（無ければ指数バックオフ）後に再投入する"""
+        item.attempts += 1
+        if self.throttle is not None:
+            # 要求単位の 429 でもテナント全体がスロットリングされているため全ワーカーを止める
+            delay = self.throttle.record_throttle(response, item.attempts, url=item.url)
+        else:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = retry_after if retry_after is not None else 0.5 * (2 ** (item.attempts - 1))
+        logger = get_structured_logger("transfer")
+        logger.warning(
+            "$batch 内の要求がスロットリングされました - 再投入",
+            url=item.url,
+            status_code=response.status_code,
+            attempt=item.attempts,
+            delay_sec=delay,
+        )
+        timer = threading.Timer(delay, self._enqueue, args=(item,))
+        timer.daemon = True
+        timer.start()
+
+    def stats(self) -> dict[str, int]:
+        """送信した $batch 数とまとめた要求数"""
+        return {"batches_sent": self.batches_sent, "requests_batched": self.requests_batched}
+
+    def close(self) -> None:
+        """未送信の要求を送信し終えてから収集スレッドと送信スレッドを停止する"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+            executor = self._executor
+        if thread is not None:
+            thread.join(timeout=self.timeout)
+        if executor is not None:
+            # 送信中の $batch の完了を待つ
+            executor.shutdown(wait=True)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+HTTP接続プール管理モジュール
+
+GraphTransferClient の全リクエスト（Graph API・ダウンロードURL・アップロードセッション）が
+共有する requests.Session を提供し、接続の再利用状況を集計する。
+スロットリング制御を指定した場合は全リクエストが 429/503 の一時停止に従う
+"""
+
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.throttle import THROTTLE_STATUS, ThrottleController
+
+# リトライアダプタで再送するステータス（冪等なGET/HEADのみ対象）
+RETRY_STATUS_FORCELIST = (500, 502, 504)
+RETRY_ALLOWED_METHODS = frozenset({"GET", "HEAD"})
+
+
+def _is_replayable(data: Any) -> bool:
+    """同じボディで再送できるか（ファイル・ストリームは読み出し済みのため不可）"""
+    return data is None or isinstance(data, (bytes, bytearray, str, dict, list, tuple))
+
+
+class PooledSession(requests.Session):
+    """ホスト毎の接続プールとリトライアダプタを備えたスレッドセーフなセッション"""
+
+    def __init__(
+        self,
+        pool_maxsize: int = 4,
+        pool_connections: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        throttle: ThrottleController | None = None,
+    ):
+        """
+        Args:
+            pool_maxsize: 1ホストあたりに保持するkeep-alive接続数（並列転送数に合わせる）
+            pool_connections: プールを保持するホスト数
+            max_retries: 接続エラー・5xx時のアダプタレベルのリトライ回数
+            backoff_factor: リトライ間隔の指数バックオフ係数（秒）
+            throttle: 全ワーカーで共有するスロットリング制御（None の場合は制御しない）
+        """
+        super().__init__()
+        self.throttle = throttle
+        self.pool_maxsize = max(1, pool_maxsize)
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            status_forcelist=RETRY_STATUS_FORCELIST,
+            allowed_methods=RETRY_ALLOWED_METHODS,
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        # プール上限を超えた接続はブロックせず使い捨てにする（統計上は新規接続として計上）
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+            pool_block=False,
+        )
+        self.mount("https://", self._adapter)
+        self.mount("http://", self._adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        """
+        スロットリング制御付きでリクエストを送信する
+
+        一時停止中は解除まで待ってから送信し、429/503 を受けたら全ワーカーを一時停止する。
+        タイムアウトは同時転送数制御の混雑信号として記録する。
+        ボディを再送できる要求は停止解除後に再送し、ストリームを送る要求は応答をそのまま返す
+        """
+        if self.throttle is None:
+            return super().request(method, url, *args, **kwargs)
+
+        attempt = 0
+        while True:
+            self.throttle.wait()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.Timeout:
+                self.throttle.record_timeout()
+                raise
+            if response.status_code not in THROTTLE_STATUS:
+                return response
+            attempt += 1
+            self.throttle.record_throttle(response, attempt, url=url)
+            if attempt > self.throttle.max_retries or args or not _is_replayable(kwargs.get("data")):
+                return response
+            response.close()
+
+    def connection_stats(self) -> dict[str, Any]:
+        """
+        接続の新規作成数と再利用数を集計する
+
+        Returns:
+            hosts: 接続プールを持つホスト数
+            requests: 送信したリクエスト数（リトライ含む）
+            new_connections: 新規に確立したTCP/TLS接続数
+            reused_connections: keep-alive接続を再利用したリクエスト数
+        """
+        total_requests = 0
+        new_connections = 0
+        hosts = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts += 1
+            total_requests += getattr(pool, "num_requests", 0)
+            new_connections += getattr(pool, "num_connections", 0)
+        return {
+            "hosts": hosts,
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "reused_connections": max(total_requests - new_connections, 0),
+        }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+ファイルリスト（インベントリ）の読み書きモジュール
+
+クロール結果を1行1レコードの NDJSON としてページの到着に合わせて逐次追記し、
+読み込みもリストに展開せず1件ずつ行う（ピークメモリがファイル数に比例しない）。
+パスの末尾が .gz の場合は gzip 圧縮する。読み込みは形式を自動判定し、従来の JSON 配列も読める。
+
+書き込み中は <path>.partial に追記し、完了時に <path> へ置き換える。途中で停止しても
+前回のファイルは壊れず、停止までに追記したレコードは .partial に残る（クロールの再開時に引き継ぐ）。
+"""
+
+import gzip
+import io
+import itertools
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from typing import IO, Any
+
+from src.structured_logger import get_structured_logger
+
+GZIP_MAGIC = b"\x1f\x8b"
+PARTIAL_SUFFIX = ".partial"
+RESUME_SUFFIX = ".resume"
+
+# 追記したレコードをこの件数ごとにディスクへ書き出す
+DEFAULT_FLUSH_EVERY = 1000
+
+
+def _is_gzip(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def _open_text(path: str, mode: str, compress: bool) -> IO[str]:
+    if compress:
+        return io.TextIOWrapper(gzip.GzipFile(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_inventory(path: str) -> Iterator[dict[str, Any]]:
+    """
+    ファイルリストを1件ずつ読み込む（存在しない場合は何も返さない）
+
+    NDJSON・gzip 圧縮の NDJSON・従来の JSON 配列を自動判定する。
+    書き込み途中で停止したファイルの末尾の不完全な行は読み飛ばす。
+    """
+    if not os.path.exists(path):
+        return
+    with _open_text(path, "r", _is_gzip(path)) as f:
+        try:
+            first_line = f.readline()
+            while first_line and not first_line.strip():
+                first_line = f.readline()
+            if first_line.lstrip().startswith("["):
+                # 従来の JSON 配列（一括読み込み）
+                yield from json.loads(first_line + f.read())
+                return
+            line_no = 0
+            for line in _chain_first(first_line, f):
+                line_no += 1
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger = get_structured_logger("main")
+                    logger.warning("ファイルリストの不完全な行を読み飛ばしました", path=path, line=line_no)
+        except EOFError:
+            # gzip の書き込み途中で停止したファイルは読めたところまでで終える
+            logger = get_structured_logger("main")
+            logger.warning("ファイルリストが途中で終わっています", path=path)
+
+
+def _chain_first(first_line: str, rest: IO[str]) -> Iterator[str]:
+    if first_line:
+        yield first_line
+    yield from rest
+
+
+def count_inventory(path: str) -> int:
+    """ファイルリストの件数（リストに展開せずに数える）"""
+    return sum(1 for _ in iter_inventory(path))
+
+
+class InventoryFile:
+    """ファイルリストを遅延読み込みする再走査可能なイテラブル（件数は初回の len() で数える）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._count: int | None = None
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter_inventory(self.path)
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = count_inventory(self.path)
+        return self._count
+
+
+class FilteredInventory:
+    """
+    条件に合うファイルのみを走査する再走査可能なイテラブル
+
+    走査の度に元のファイルリスト（InventoryFile などの再走査可能なもの）から読み直すため、
+    絞り込んだ一覧をメモリに保持しない。件数は最後まで走査した時点で記録し、未走査なら len() で数える
+    """
+
+    def __init__(self, files: Iterable[dict[str, Any]], include: Callable[[dict[str, Any]], bool]):
+        self.files = files
+        self.include = include
+        self._count: int | None = None
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        count = 0
+        for file_info in self.files:
+            if self.include(file_info):
+                count += 1
+                yield file_info
+        self._count = count
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(1 for _ in self)
+        return self._count
+
+
+class InventoryWriter:
+    """
+    ファイルリストを NDJSON で逐次追記するライタ（with 文で使う）
+
+    .partial は最初の書き込み（または resume）で開くため、前回停止時の .partial から再開できる
+    """
+
+    def __init__(self, path: str, flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.path = path
+        self.partial_path = path + PARTIAL_SUFFIX
+        self.flush_every = max(1, flush_every)
+        self.count = 0
+        self._entered = False
+        self._file: IO[str] | None = None
+
+    def __enter__(self) -> "InventoryWriter":
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entered = True
+        return self
+
+    def _open(self) -> IO[str]:
+        if not self._entered:
+            raise RuntimeError("InventoryWriter は with 文で使用してください")
+        if self._file is None:
+            self._file = _open_text(self.partial_path, "w", self.path.endswith(".gz"))
+        return self._file
+
+    def resume(self, records: int) -> bool:
+        """
+        前回停止時の .partial の先頭 records 件を引き継いで追記を再開する
+
+        Returns:
+            引き継げた場合は True（.partial が無い・件数が足りない場合は False で、最初から書き込む）
+        """
+        if self._file is not None or self.count:
+            raise RuntimeError("resume は書き込みの前に呼び出してください")
+        if records <= 0 or not os.path.exists(self.partial_path):
+            return records <= 0
+        # 再開時点より後に追記されたレコードは再取得するページのものなので捨てる
+        previous = self.partial_path + RESUME_SUFFIX
+        os.replace(self.partial_path, previous)
+        self.write_many(itertools.islice(iter_inventory(previous), records))
+        os.remove(previous)
+        if self.count == records:
+            return True
+        self._open().close()
+        self._file = None
+        self.count = 0
+        return False
+
+    def write(self, record: dict[str, Any]) -> None:
+        f = self._open()
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            f.flush()
+
+    def write_many(self, records: Iterable[dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """書き込み済みのレコードをディスクへ書き出す（クロールのチェックポイント保存前に呼ぶ）"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            # 全件書き終えた場合のみ置き換える（0件の場合も空のファイルリストを作る）
+            self._open().close()
+        elif self._file is not None:
+            # 途中停止時は .partial を残す
+            self._file.close()
+        self._file = None
+        self._entered = False
+        if exc_type is None:
+            os.replace(self.partial_path, self.path)
+
+
+def write_inventory(path: str, records: Iterable[dict[str, Any]]) -> int:
+    """レコードを逐次書き込んでファイルリストを作成し、件数を返す"""
+    with InventoryWriter(path) as writer:
+        writer.write_many(records)
+    return writer.count
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+シャードのリース管理モジュール（複数ノードでの分担転送）
+
+共有ストレージ上の SQLite に各シャードの担当ノードとリース期限を記録し、
+ノードはシャードを1つずつ取得（claim）して転送する。転送中はハートビートでリースを延長し、
+期限切れのリース（停止したノードのシャード）は他のノードが回収して続きを転送する。
+シャード内の転送済みファイルも記録するため、回収したノードは転送済みのファイルを再転送しない。
+
+リース期限はノード間で比較するため壁時計（time.time）を使う。ノード間の時刻ずれは
+リース期間より十分小さいこと。
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Collection, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from src.structured_logger import get_structured_logger
+
+SHARD_PENDING = "pending"
+SHARD_LEASED = "leased"
+SHARD_DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    claims INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS transferred (
+    shard INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (shard, path, name)
+);
+"""
+
+
+def default_node_id() -> str:
+    """ノードID（ホスト名とプロセスID）"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardLeaseStore:
+    """SQLite によるシャードのリース管理"""
+
+    def __init__(self, db_path: str, node_id: str | None = None, lease_ttl_sec: float = 60):
+        """
+        Args:
+            db_path: 全ノードで共有する SQLite ファイルのパス
+            node_id: このノードのID（未指定時はホスト名とプロセスID）
+            lease_ttl_sec: リースの有効期間（ハートビートが途絶えてから回収されるまでの秒数）
+        """
+        self.db_path = db_path
+        self.node_id = node_id or default_node_id()
+        self.lease_ttl_sec = lease_ttl_sec
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # ハートビートスレッドからも使うため、接続の利用は self._lock で直列化する
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE で書き込みロックを先に取り、ノード間で同じシャードを二重に取得しない
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def initialize(self, shard_count: int) -> None:
+        """シャードを登録する（登録済みの場合はシャード数が一致することを確認する）"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'shard_count'").fetchone()
+            if row is not None:
+                if int(row[0]) != shard_count:
+                    raise ValueError(f"シャード数が既存のリースDBと一致しません: {shard_count} != {row[0]}")
+                return
+            conn.execute("INSERT INTO meta (key, value) VALUES ('shard_count', ?)", (str(shard_count),))
+            conn.executemany(
+                "INSERT INTO shards (shard, status) VALUES (?, ?)",
+                [(shard, SHARD_PENDING) for shard in range(shard_count)],
+            )
+
+    def claim(self, exclude: Collection[int] = ()) -> int | None:
+        """
+        未処理または期限切れのシャードを1つ取得する（無ければ None）
+
+        Args:
+            exclude: 取得しないシャード（このノードで転送に失敗したファイルを残して解放したシャードなど）
+        """
+        now = time.time()
+        excluded = ",".join(str(int(shard)) for shard in exclude)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT shard, status, owner FROM shards "
+                "WHERE (status = ? OR (status = ? AND lease_expires < ?))"
+                + (f" AND shard NOT IN ({excluded})" if excluded else "")
+                + " ORDER BY shard LIMIT 1",
+                (SHARD_PENDING, SHARD_LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            shard, status, previous_owner = row
+            conn.execute(
+                "UPDATE shards SET status = ?, owner = ?, lease_expires = ?, claims = claims + 1, updated_at = ? "
+                "WHERE shard = ?",
+                (SHARD_LEASED, self.node_id, now + self.lease_ttl_sec, now, shard),
+            )
+        logger = get_structured_logger("main")
+        if status == SHARD_LEASED:
+            logger.warning("期限切れのリースを回収", shard=shard, previous_owner=previous_owner, node_id=self.node_id)
+        else:
+            logger.info("シャードを取得", shard=shard, node_id=self.node_id)
+        return shard
+
+    def heartbeat(self, shard: int) -> bool:
+        """リースを延長する（他のノードに回収されていた場合は False）"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? WHERE shard = ? AND owner = ? AND status = ?",
+                (now + self.lease_ttl_sec, now, shard, self.node_id, SHARD_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, shard: int) -> bool:
+        """シャードを完了にする（他のノードに回収されていた場合は False）"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE shards SET status = ?, updated_at = ? WHERE shard = ? AND owner = ? AND status = ?",
+                (SHARD_DONE, time.time(), shard, self.node_id, SHARD_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, shard: int) -> None:
+        """シャードを未処理に戻す（停止要求時など、他のノードがすぐに取得できるようにする）"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shards SET status = ?, owner = NULL, lease_expires = 0, updated_at = ? "
+                "WHERE shard = ? AND owner = ? AND status = ?",
+                (SHARD_PENDING, time.time(), shard, self.node_id, SHARD_LEASED),
+            )
+
+    def record_transferred(self, shard: int, file_info: dict[str, Any]) -> None:
+        """シャード内の転送済みファイルを記録する"""
+        self.record_transferred_many(shard, [file_info])
+
+    def record_transferred_many(self, shard: int, file_infos: Iterable[dict[str, Any]]) -> None:
+        """シャード内の複数の転送済みファイルを1回のトランザクションで記録する"""
+        rows = [(shard, file_info.get("path") or "", file_info.get("name") or "") for file_info in file_infos]
+        if not rows:
+            return
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO transferred (shard, path, name) VALUES (?, ?, ?)", rows)
+
+    def transferred_keys(self, shard: int) -> set[tuple[str, str]]:
+        """シャード内の転送済みファイルの (path, name)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, name FROM transferred WHERE shard = ?", (shard,)).fetchall()
+        return {(path, name) for path, name in rows}
+
+    def stats(self) -> dict[str, int]:
+        """状態別のシャード数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall()
+        counts = dict(rows)
+        return {f"shards_{status}": counts.get(status, 0) for status in (SHARD_PENDING, SHARD_LEASED, SHARD_DONE)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TransferredRecorder:
+    """
+    シャード内の転送済みファイルをまとめてリースDBへ記録する（スレッドセーフ）
+
+    ファイル毎にトランザクションを開くと共有DBの書き込みロックを全ノードで奪い合うため、
+    flush_count 件または flush_sec 秒ごとにまとめて記録する。記録前にノードが停止した場合、
+    その分は回収したノードが再転送する（スキップリストには転送時に記録済み）。
+    """
+
+    def __init__(self, store: ShardLeaseStore, shard: int, flush_count: int = 200, flush_sec: float = 2.0):
+        self.store = store
+        self.shard = shard
+        self.flush_count = flush_count
+        self.flush_sec = flush_sec
+        self._pending: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, file_info: dict[str, Any]) -> None:
+        """転送済みファイルを追加する（件数・間隔に達した場合は記録する）"""
+        with self._lock:
+            self._pending.append(file_info)
+            if len(self._pending) >= self.flush_count or time.monotonic() - self._last_flush >= self.flush_sec:
+                self._flush()
+
+    def flush(self) -> None:
+        """未記録の転送済みファイルを記録する"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        try:
+            self.store.record_transferred_many(self.shard, self._pending)
+        except sqlite3.Error as e:
+            # 共有ストレージの一時的な障害は次回の記録で再試行する
+            logger = get_structured_logger("main")
+            logger.warning("転送済みファイルの記録に失敗", shard=self.shard, pending=len(self._pending), error=str(e))
+            return
+        self._pending = []
+
+    def __enter__(self) -> "TransferredRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.flush()
+
+
+class LeaseHeartbeat:
+    """
+    シャードの転送中にバックグラウンドでリースを延長する
+
+    リースを他のノードに回収された場合は lost と stop_event を設定する。
+    stop_event を転送の停止イベントとして渡しておくと、回収されたシャードの新規転送をすぐに止められる
+    """
+
+    def __init__(
+        self,
+        store: ShardLeaseStore,
+        shard: int,
+        interval_sec: float | None = None,
+        stop_event: threading.Event | None = None,
+    ):
+        self.store = store
+        self.shard = shard
+        self.interval_sec = interval_sec if interval_sec is not None else store.lease_ttl_sec / 3
+        self.lost = threading.Event()
+        self.stop_event = stop_event
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-heartbeat-{shard}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            try:
+                alive = self.store.heartbeat(self.shard)
+            except sqlite3.Error as e:
+                # 共有ストレージの一時的な障害は次回のハートビートで再試行する
+                logger = get_structured_logger("main")
+                logger.warning("リースの延長に失敗", shard=self.shard, error=str(e))
+                continue
+            if not alive:
+                logger = get_structured_logger("main")
+                logger.error("リースが他のノードに回収されました", shard=self.shard, node_id=self.store.node_id)
+                self.lost.set()
+                if self.stop_event is not None:
+                    self.stop_event.set()
+                return
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._stop.set()
+        self._thread.join()
@@ -53,11 +53,19 @@ def log_transfer_start(file_info: dict[str, Any]) -> None:
 def log_transfer_success(
     file_info: dict[str, Any],
     elapsed: float | None = None,
+    chunk_retries: int | None = None,
+    retry_saved_bytes: int | None = None,
 ) -> None:
+    message = "SUCCESS: %s"
+    args: list[Any] = [file_info["path"]]
     if elapsed is not None:
-        logger.info("SUCCESS: %s [elapsed: %.2fs]", file_info["path"], elapsed)
-    else:
-        logger.info("SUCCESS: %s", file_info["path"])
+        message += " [elapsed: %.2fs]"
+        args.append(elapsed)
+    if chunk_retries:
+        # チャンク単位リトライで再転送を回避できたバイト数も併記する
+        message += " [chunk_retries: %d, saved_bytes: %d]"
+        args.extend([chunk_retries, retry_saved_bytes or 0])
+    logger.info(message, *args)
 
 
 def log_transfer_error(
@@ -237,11 +245,19 @@ class SecureLogger:
         )
         self.info(message)
 
-    def log_transfer_success(self, file_info: dict[str, Any], elapsed: float | None = None):
+    def log_transfer_success(
+        self,
+        file_info: dict[str, Any],
+        elapsed: float | None = None,
+        chunk_retries: int | None = None,
+        retry_saved_bytes: int | None = None,
+    ):
         """転送成功ログ（セキュア版）"""
         message = f"SUCCESS: {file_info['path']}"
         if elapsed is not None:
             message += f" [elapsed: {elapsed:.2f}s]"
+        if chunk_retries:
+            message += f" [chunk_retries: {chunk_retries}, saved_bytes: {retry_saved_bytes or 0}]"
         self.info(message)
 
     def log_transfer_error(self, file_info: dict[str, Any], error: str, retry_count: int = 0):
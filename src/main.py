@@ -1,9 +1,15 @@
 import argparse
 import json
+import multiprocessing
 import os
+import queue
+import signal
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from functools import partial
 
 import requests
 import urllib3
@@ -18,10 +24,27 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # ローカルモジュールのインポート
 from config_manager import (  # noqa: E402
+    get_adaptive_concurrency,
     get_config,
+    get_crawl_checkpoint_interval_sec,
+    get_large_file_parallel_transfers,
+    get_large_file_threshold_mb,
+    get_max_parallel_transfers,
+    get_max_parallel_transfers_ceiling,
+    get_onedrive_delta_enabled,
+    get_onedrive_delta_state_path,
     get_onedrive_files_path,
+    get_shard_count,
+    get_shard_lease_db_path,
+    get_shard_lease_ttl_sec,
     get_sharepoint_current_files_path,
+    get_sharepoint_delta_enabled,
     get_skip_list_path,
+    get_skip_list_reconcile_before_transfer,
+    get_transfer_pipeline,
+    get_transfer_pipeline_queue_size,
+    get_transfer_submit_window,
+    get_upload_session_state_path,
 )
 from logger import (  # noqa: E402
     log_transfer_error,
@@ -31,8 +54,25 @@ from logger import (  # noqa: E402
 from rebuild_skip_list import (  # noqa: E402
     crawl_sharepoint,
     create_skip_list_from_sharepoint,
+    sharepoint_skip_index,
 )
-from skiplist import add_to_skip_list, is_skipped, load_skip_list  # noqa: E402
+
+# transfer と同じスロットリング状態を共有するため src パッケージ経由で参照する
+from src.concurrency import AdaptiveConcurrencyLimiter  # noqa: E402
+from src.crawler import CHECKPOINT_SUFFIX, inventory_checkpoint  # noqa: E402
+from src.inventory import PARTIAL_SUFFIX, FilteredInventory, InventoryFile, InventoryWriter  # noqa: E402
+from src.leases import LeaseHeartbeat, ShardLeaseStore, TransferredRecorder  # noqa: E402
+from src.pipeline import DestinationReconciler, TransferFeed  # noqa: E402
+from src.scheduling import BoundedDispatcher, LaneTimings, split_transfer_lanes  # noqa: E402
+from src.sharding import shard_of  # noqa: E402
+from src.skiplist import (  # noqa: E402
+    SkipIndex,
+    add_many_to_skip_list,
+    add_to_skip_list,
+    remove_skip_list,
+    skip_list_exists,
+)
+from src.throttle import THROTTLE_STATUS, throttle_controller  # noqa: E402
 from structured_logger import get_structured_logger  # noqa: E402
 from transfer import GraphTransferClient  # noqa: E402
 
@@ -40,10 +80,19 @@ from transfer import GraphTransferClient  # noqa: E402
 def retry_with_backoff(func, max_retries=3, wait_sec=10, *args, **kwargs):
     """
     ネットワーク系の一時的な失敗時にリトライする汎用関数
+
+    429/503 の HTTPError は共有のスロットリング制御に記録し、
+    Retry-After（無ければジッタ付き指数バックオフ）の間だけ待機する
     """
     for attempt in range(1, max_retries + 1):
         try:
             return func(*args, **kwargs)
+        except requests.exceptions.HTTPError as e:
+            status_code = getattr(e.response, "status_code", None)
+            if status_code not in THROTTLE_STATUS or attempt == max_retries:
+                raise
+            throttle_controller.record_throttle(e.response, attempt)
+            throttle_controller.wait()
         except (
             requests.exceptions.ConnectionError,
             urllib3.exceptions.MaxRetryError,
@@ -115,14 +164,20 @@ def clear_logs_and_update_config():
     log_files = [
         get_onedrive_files_path(),
         get_sharepoint_current_files_path(),
-        get_skip_list_path(),
+        get_upload_session_state_path(),
         get_config("transfer_log_path", "logs/transfer_start_success_error.log"),
     ]
+    # 途中で停止したクロールの書き込み途中のファイルリストとチェックポイント（設定変更後は再開しない）
+    for inventory_path in (get_onedrive_files_path(), get_sharepoint_current_files_path()):
+        log_files += [inventory_path + PARTIAL_SUFFIX, inventory_path + CHECKPOINT_SUFFIX]
 
     for log_file in log_files:
         if os.path.exists(log_file):
             os.remove(log_file)
             structured_logger.info("ファイル削除", file_path=log_file)
+    # スキップリストはスナップショットと追記中のジャーナルをまとめて削除する
+    for log_file in remove_skip_list(get_skip_list_path()):
+        structured_logger.info("ファイル削除", file_path=log_file)
 
     # 設定ハッシュを更新
     current_hash = get_current_config_hash()
@@ -132,22 +187,71 @@ def clear_logs_and_update_config():
     structured_logger.info("キャッシュクリア完了")
 
 
-def get_onedrive_files(force_crawl=False):
-    """OneDriveファイルリストを取得（キャッシュ機能付き）"""
+def _enumerate_onedrive_files(client, source_folder, user_principal_name, checkpoint=None, streaming=False):
+    """OneDriveのファイルリストを取得（delta 有効時は差分同期、失敗時は全件クロールを逐次返す）
+
+    streaming（パイプライン転送）の場合は delta を使わず、ページの到着に合わせてファイルを返す
+    全件クロールを行う（delta は全ページの反映後でないとファイルを返せず、転送の開始が遅れるため）
+    """
+    if streaming and get_onedrive_delta_enabled():
+        structured_logger = get_structured_logger("main")
+        structured_logger.info("パイプライン転送のため delta 同期ではなく全件クロールでファイルを取得します")
+    elif get_onedrive_delta_enabled():
+        # 保存済みの deltaLink があれば差分のみ取得する（初回は全件を列挙して deltaLink を保存）
+        try:
+            return client.sync_onedrive_delta(
+                folder_path=source_folder,
+                state_path=get_onedrive_delta_state_path(),
+                user_principal_name=user_principal_name,
+            )
+        except requests.exceptions.RequestException as e:
+            structured_logger = get_structured_logger("main")
+            structured_logger.warning("OneDrive差分同期に失敗しました。全件クロールします。", error=str(e))
+    return client.iter_file_targets_from_onedrive(
+        folder_path=source_folder,
+        user_principal_name=user_principal_name,
+        drive_id=None,
+        checkpoint=checkpoint,
+    )
+
+
+def _tee_files(files, on_file):
+    for file_info in files:
+        on_file(file_info)
+        yield file_info
+
+
+def _load_cached_onedrive_files(cache_file, on_file=None):
+    """キャッシュ済みの OneDrive ファイルリストを返す（破損している場合は None）"""
+    try:
+        # キャッシュは全件をリストに展開せず、走査の都度ファイルから読み込む
+        cached_files = InventoryFile(cache_file)
+        structured_logger = get_structured_logger("main")
+        structured_logger.info("OneDriveファイルリスト（キャッシュ利用）", file_count=len(cached_files))
+        if on_file is not None:
+            for file_info in cached_files:
+                on_file(file_info)
+        return cached_files
+    except (OSError, json.JSONDecodeError):
+        structured_logger = get_structured_logger("main")
+        structured_logger.warning("キャッシュファイルが破損しています。再クロールします。")
+        return None
+
+
+def get_onedrive_files(force_crawl=False, on_file=None):
+    """OneDriveファイルリストを取得（キャッシュ機能付き）
+
+    Args:
+        force_crawl: キャッシュがあっても再クロールするか
+        on_file: 取得したファイル毎に呼ぶ関数（パイプライン転送でクロール中のファイルを転送側へ渡す）
+    """
     # キャッシュファイルの存在確認
     cache_file = get_onedrive_files_path()
 
     if not force_crawl and os.path.exists(cache_file):
-        try:
-            # キャッシュから読み込み
-            with open(cache_file, encoding="utf-8") as f:
-                cached_files = json.load(f)
-            structured_logger = get_structured_logger("main")
-            structured_logger.info("OneDriveファイルリスト（キャッシュ利用）", file_count=len(cached_files))
+        cached_files = _load_cached_onedrive_files(cache_file, on_file)
+        if cached_files is not None:
             return cached_files
-        except (OSError, json.JSONDecodeError):
-            structured_logger = get_structured_logger("main")
-            structured_logger.warning("キャッシュファイルが破損しています。再クロールします。")
 
     CLIENT_ID = os.getenv("CLIENT_ID")
     CLIENT_SECRET = os.getenv("CLIENT_SECRET")
@@ -175,8 +279,6 @@ def get_onedrive_files(force_crawl=False):
     if not USER_PRINCIPAL_NAME:
         raise ValueError("USER_PRINCIPAL_NAME is required")
 
-    client = GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)
-
     structured_logger = get_structured_logger("main")
     structured_logger.info("OneDriveファイルリスト取得（新規クロール）")
 
@@ -186,19 +288,41 @@ def get_onedrive_files(force_crawl=False):
         get_config("source_onedrive_user", "TEST-Onedrive"),
     )
 
-    file_targets = client.collect_file_targets_from_onedrive(
-        folder_path=source_folder,
-        user_principal_name=USER_PRINCIPAL_NAME,
-        drive_id=None,
-    )
-
-    # ファイルリストをキャッシュとして保存
-    os.makedirs("logs", exist_ok=True)
-    with open(cache_file, "w", encoding="utf-8") as f:
-        json.dump(file_targets, f, ensure_ascii=False, indent=2)
-
-    structured_logger.info("OneDriveファイル数", file_count=len(file_targets))
-    return file_targets
+    # ページの到着に合わせてファイルリスト（キャッシュ）へ逐次書き込む（全件をメモリに保持しない）
+    # 全件クロールは途中経過を保存し、前回停止したクロールがあれば続きから再開する
+    with (
+        closing(GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)) as client,
+        InventoryWriter(cache_file) as writer,
+    ):
+        checkpoint = inventory_checkpoint(cache_file, writer, get_crawl_checkpoint_interval_sec())
+        files = _enumerate_onedrive_files(
+            client, source_folder, USER_PRINCIPAL_NAME, checkpoint, streaming=on_file is not None
+        )
+        writer.write_many(files if on_file is None else _tee_files(files, on_file))
+
+    structured_logger.info("OneDriveファイル数", file_count=writer.count)
+    return InventoryFile(cache_file)
+
+
+def _get_sharepoint_files(force_crawl=False):
+    """SharePoint（転送先）のファイルリストを取得（キャッシュ機能付き）"""
+    # SharePointをクロール（force_crawl または delta 有効時は新規取得。delta は差分のみ取得する）
+    if force_crawl or get_sharepoint_delta_enabled():
+        return retry_with_backoff(crawl_sharepoint)
+    # SharePointキャッシュの確認
+    sharepoint_cache_file = get_sharepoint_current_files_path()
+    if os.path.exists(sharepoint_cache_file):
+        structured_logger = get_structured_logger("main")
+        try:
+            sharepoint_files = InventoryFile(sharepoint_cache_file)
+            structured_logger.info(
+                "SharePointファイルリスト（キャッシュ利用）",
+                file_count=len(sharepoint_files),
+            )
+            return sharepoint_files
+        except (OSError, json.JSONDecodeError):
+            structured_logger.warning("SharePointキャッシュが破損しています。再クロールします。")
+    return crawl_sharepoint()
 
 
 def rebuild_skip_list(onedrive_files=None, force_crawl=False, verbose=False):
@@ -210,25 +334,7 @@ def rebuild_skip_list(onedrive_files=None, force_crawl=False, verbose=False):
     if onedrive_files is None:
         onedrive_files = get_onedrive_files(force_crawl)
 
-    # SharePointをクロール（force_crawlの場合は強制的に新規クロール）
-    if force_crawl:
-        sharepoint_files = retry_with_backoff(crawl_sharepoint)
-    else:
-        # SharePointキャッシュの確認
-        sharepoint_cache_file = get_sharepoint_current_files_path()
-        if os.path.exists(sharepoint_cache_file):
-            try:
-                with open(sharepoint_cache_file, encoding="utf-8") as f:
-                    sharepoint_files = json.load(f)
-                structured_logger.info(
-                    "SharePointファイルリスト（キャッシュ利用）",
-                    file_count=len(sharepoint_files),
-                )
-            except (OSError, json.JSONDecodeError):
-                structured_logger.warning("SharePointキャッシュが破損しています。再クロールします。")
-                sharepoint_files = crawl_sharepoint()
-        else:
-            sharepoint_files = crawl_sharepoint()
+    sharepoint_files = _get_sharepoint_files(force_crawl)
 
     # スキップリストを構築
     skip_list = create_skip_list_from_sharepoint(onedrive_files, sharepoint_files)
@@ -248,9 +354,18 @@ def rebuild_skip_list(onedrive_files=None, force_crawl=False, verbose=False):
     return len(onedrive_files) - len(skip_list)
 
 
-def transfer_file(file_info, client, retry_count, timeout):
-    """ファイル転送処理"""
-    # 環境変数からフォルダパスを取得
+def _chunk_retry_stats(result):
+    """アップロード結果からチャンク単位リトライの統計を取り出す（リトライが無ければ空）"""
+    if not isinstance(result, dict) or not result.get("chunk_retries"):
+        return {}
+    return {
+        "chunk_retries": result["chunk_retries"],
+        "retry_saved_bytes": result.get("retry_saved_bytes", 0),
+    }
+
+
+def _get_transfer_roots():
+    """環境変数（なければ設定値）から転送元・転送先のルートフォルダを取得"""
     src_root = os.getenv(
         "SOURCE_ONEDRIVE_FOLDER_PATH",
         get_config("source_onedrive_user", "TEST-Onedrive"),
@@ -259,15 +374,38 @@ def transfer_file(file_info, client, retry_count, timeout):
         "DESTINATION_SHAREPOINT_DOCLIB",
         get_config("destination_sharepoint_doclib", "TEST-Sharepoint"),
     )
+    return src_root, dst_root
+
+
+# 転送済みファイルの記録先（None の場合はスキップリストへ直接書き込む）
+# マルチプロセス転送のワーカーではコーディネータへのキュー送信、リース転送ではリースDBへの記録を設定する
+_transferred_sink = None
+
+# コーディネータがスキップリストへまとめて書き込む件数・間隔
+SKIP_LIST_FLUSH_COUNT = 200
+SKIP_LIST_FLUSH_SEC = 2.0
+
+
+def _record_transferred(file_info):
+    """転送済みファイルをスキップリストに記録（マルチプロセス時はコーディネータ経由でまとめて書き込む）"""
+    if _transferred_sink is not None:
+        _transferred_sink(file_info)
+    else:
+        add_to_skip_list(file_info, get_skip_list_path())
+
+
+def transfer_file(file_info, client, retry_count, timeout):
+    """ファイル転送処理"""
+    src_root, dst_root = _get_transfer_roots()
 
     for attempt in range(1, retry_count + 1):
         try:
             log_transfer_start(file_info)
             start = time.time()
-            client.upload_file_to_sharepoint(file_info, src_root=src_root, dst_root=dst_root, timeout=timeout)
+            result = client.upload_file_to_sharepoint(file_info, src_root=src_root, dst_root=dst_root, timeout=timeout)
             elapsed = time.time() - start
-            log_transfer_success(file_info, elapsed=elapsed)
-            add_to_skip_list(file_info, get_skip_list_path())
+            log_transfer_success(file_info, elapsed=elapsed, **_chunk_retry_stats(result))
+            _record_transferred(file_info)
             return True
         except Exception as e:
             log_transfer_error(file_info, str(e), retry_count=attempt)
@@ -277,8 +415,98 @@ def transfer_file(file_info, client, retry_count, timeout):
     return False
 
 
-def run_transfer(onedrive_files=None):
-    """転送処理を実行"""
+def _transfer_in_lane(lane, limiter, timings, client, retry_count, timeout, item):
+    """レーンの同時転送数枠を確保してファイルを転送し、所要時間を上限調整と完了時間の比較に反映する"""
+    _, file_info = item
+    limiter.acquire()
+    start = time.time()
+    try:
+        return transfer_file(file_info, client, retry_count, timeout)
+    finally:
+        elapsed = time.time() - start
+        limiter.release(elapsed, file_info.get("size") or 0)
+        timings.record(lane, elapsed)
+
+
+@contextmanager
+def _stop_on_signals(stop_event):
+    """SIGINT/SIGTERM で stop_event を設定し、投入済みの転送の完了を待って終了できるようにする
+
+    停止要求後にもう一度 SIGINT を受けた場合は通常どおり KeyboardInterrupt で中断する
+    """
+    if threading.current_thread() is not threading.main_thread():
+        # シグナルハンドラはメインスレッドでしか登録できない
+        yield
+        return
+
+    def _handler(signum, frame):
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        stop_event.set()
+        structured_logger = get_structured_logger("main")
+        structured_logger.warning(
+            "停止要求を受信 - 新規転送を停止し実行中の転送の完了を待ちます", signal=signal.Signals(signum).name
+        )
+
+    previous = {sig: signal.signal(sig, _handler) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        yield
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def _count_successes(dispatcher):
+    """BoundedDispatcher の完了を待ち、転送に成功した件数を返す"""
+    success_count = 0
+    for future, (_, f) in dispatcher:
+        try:
+            if future.result():
+                success_count += 1
+        except Exception as e:
+            log_transfer_error(f, str(e))
+    return success_count
+
+
+def _run_transfer_lanes(targets, client, max_workers, retry_count, timeout, stop_event=None):
+    """小容量・大容量レーンに投入数を制限しながら転送を投入する
+
+    stop_event（未指定時は新規作成）が設定されるか SIGINT/SIGTERM を受けると新規投入を止める
+
+    Returns:
+        (成功件数, 小容量レーンのリミッタ, LaneTimings, BoundedDispatcher)
+    """
+    # 小容量レーンは max_parallel_transfers を開始値として、スロットリング・レイテンシに応じて上限まで増減させる
+    limiter = AdaptiveConcurrencyLimiter(
+        max_workers,
+        get_max_parallel_transfers_ceiling(),
+        throttle=throttle_controller,
+        adaptive=get_adaptive_concurrency(),
+    )
+    # 大容量レーンは帯域律速のため固定の同時転送数で、大きい順に投入する
+    large_workers = get_large_file_parallel_transfers()
+    large_limiter = AdaptiveConcurrencyLimiter(large_workers, large_workers, adaptive=False)
+    small, large = split_transfer_lanes(targets, int(get_large_file_threshold_mb()) * 1024 * 1024)
+    timings = LaneTimings()
+    dispatcher = BoundedDispatcher(stop_event or threading.Event())
+    with (
+        _stop_on_signals(dispatcher.stop_event),
+        ThreadPoolExecutor(max_workers=limiter.max_limit, thread_name_prefix="small-lane") as small_executor,
+        ThreadPoolExecutor(max_workers=large_workers, thread_name_prefix="large-lane") as large_executor,
+    ):
+        # 全件を一度に submit せず、レーン毎に未完了の Future を window 件までに抑える
+        for lane, executor, lane_limiter, items, window in (
+            ("large", large_executor, large_limiter, large, large_workers * 2),
+            ("small", small_executor, limiter, small, max(get_transfer_submit_window(), limiter.max_limit * 2)),
+        ):
+            func = partial(_transfer_in_lane, lane, lane_limiter, timings, client, retry_count, timeout)
+            dispatcher.add_lane(executor, func, items, window)
+        success_count = _count_successes(dispatcher)
+    return success_count, limiter, timings, dispatcher
+
+
+def _get_transfer_credentials():
+    """転送に必要な環境変数を取得（不足している場合はエラーログを出力してNoneを返す）"""
     CLIENT_ID = os.getenv("CLIENT_ID")
     CLIENT_SECRET = os.getenv("CLIENT_SECRET")
     TENANT_ID = os.getenv("TENANT_ID")
@@ -299,36 +527,391 @@ def run_transfer(onedrive_files=None):
             "SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME",
         ]
         structured_logger.error(f"必要な環境変数: {', '.join(required_vars)}")
-        return
+        return None
+
+    return CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID
+
+
+def _log_transfer_summary(mode, target_count, success_count, elapsed):
+    """転送モード（単一プロセス・パイプライン・マルチプロセス・リース）間で比較できるよう転送スループットを記録"""
+    structured_logger = get_structured_logger("main")
+    structured_logger.info(
+        "転送完了",
+        mode=mode,
+        target_count=target_count,
+        success_count=success_count,
+        elapsed_sec=round(elapsed, 2),
+        files_per_sec=round(success_count / elapsed, 2) if elapsed > 0 else 0.0,
+    )
+
+
+def run_transfer(onedrive_files=None, stop_event=None):
+    """転送処理を実行
+
+    Args:
+        onedrive_files: 転送対象のファイルリスト（未指定時は取得する）
+        stop_event: 設定されると新規転送の投入を止める停止イベント
+
+    Returns:
+        停止要求で中断されずに最後まで転送したか
+    """
+    credentials = _get_transfer_credentials()
+    if credentials is None:
+        return False
 
     # 転送クライアント初期化
-    # 型チェッカー用のassert（実際の検証は上で済んでいる）
+    max_workers = get_max_parallel_transfers()
+    with closing(GraphTransferClient(*credentials)) as client:
+        # OneDriveファイルリストが提供されていない場合は取得
+        if onedrive_files is None:
+            onedrive_files = get_onedrive_files()
+
+        # スキップリスト適用（索引を1回だけ作り、各ファイルは O(1) で判定する）
+        # 転送対象はリストに展開せず、フォルダの事前作成・レーンへの投入の都度ファイルリストから絞り込む
+        skip_index = SkipIndex.load(get_skip_list_path())
+        targets = FilteredInventory(onedrive_files, lambda f: f not in skip_index)
+        # 転送先フォルダを事前に作成し、各ファイルの転送ではフォルダ確認を行わない
+        client.prepare_sharepoint_folders(targets, *_get_transfer_roots(), max_workers=max_workers)
+        _, _, stopped = _transfer_targets(targets, client, max_workers, stop_event)
+    return not stopped
+
+
+def _transfer_targets(targets, client, max_workers, stop_event=None, mode="single"):
+    """転送先フォルダ作成済みの転送対象を client で転送し、統計を記録する（mode は統計の転送モード名）
+
+    Returns:
+        (成功件数, 転送対象件数, 停止要求で中断したか)
+    """
+    retry_count = get_config("retry_count", 3)
+    timeout = get_config("timeout_sec", 10)
 
-    client = GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)
+    structured_logger = get_structured_logger("main")
+    start = time.time()
+    # 件数はフォルダの事前作成で走査済みの場合はその件数を使う
+    target_count = len(targets)
+    structured_logger.info("転送対象", target_count=target_count)
+    success_count, limiter, timings, dispatcher = _run_transfer_lanes(
+        targets, client, max_workers, retry_count, timeout, stop_event
+    )
+
+    makespan = time.time() - start
+    _log_transfer_summary(mode, target_count, success_count, makespan)
+    structured_logger.info("同時転送数統計", **limiter.stats())
+    # 同じ所要時間を単一プール（max_parallel_transfers、元の順序）で処理した場合との全体完了時間の比較
+    structured_logger.info("レーン別スケジューリング", **timings.report(makespan, max_workers))
+    stopped = dispatcher.stop_event.is_set()
+    if stopped:
+        structured_logger.warning(
+            "転送を中断しました（未転送のファイルは次回実行時に転送されます）",
+            submitted=dispatcher.submitted,
+            cancelled=dispatcher.cancelled,
+        )
+    # 接続プールの再利用状況（新規接続 vs 再利用）を記録
+    structured_logger.info("HTTP接続統計", **client.connection_stats())
+    return success_count, target_count, stopped
+
+
+def _pipeline_reconciler(client, force_crawl=False):
+    """パイプライン転送で転送先のインベントリと照合する DestinationReconciler を作る
+
+    インベントリの取得中は転送前に転送先のアイテムを1件ずつ確認し、存在したファイルはスキップリストに追加する
+    """
+    src_root, dst_root = _get_transfer_roots()
+    return DestinationReconciler(
+        lambda: sharepoint_skip_index(_get_sharepoint_files(force_crawl)),
+        lambda file_info: client.get_sharepoint_item(file_info, src_root=src_root, dst_root=dst_root) is not None,
+        _record_transferred,
+    )
 
-    # OneDriveファイルリストが提供されていない場合は取得
-    if onedrive_files is None:
-        onedrive_files = get_onedrive_files()
 
-    # スキップリスト適用
-    skip_list = load_skip_list(get_skip_list_path())
-    targets = [f for f in onedrive_files if not is_skipped(f, skip_list)]
+def _pipeline_lane(threshold_bytes, item):
+    return "large" if (item[1].get("size") or 0) >= threshold_bytes else "small"
+
+
+def _transfer_unless_present(reconciler, transfer, item):
+    """転送先に既に存在するファイルは転送せず、転送済みとして記録する"""
+    if reconciler.is_present(item[1]):
+        return True
+    return transfer(item)
+
+
+def _dispatch_pipelined(feed, client, max_workers, retry_count, timeout, reconciler=None):
+    """TransferFeed から到着順に取り出し、サイズ別のレーンに投入数を制限しながら転送する
+
+    Returns:
+        (成功件数, 小容量レーンのリミッタ)
+    """
+    limiter = AdaptiveConcurrencyLimiter(
+        max_workers,
+        get_max_parallel_transfers_ceiling(),
+        throttle=throttle_controller,
+        adaptive=get_adaptive_concurrency(),
+    )
+    # 到着順のため大きい順には並べ替えられないが、大容量ファイルは別のスレッドプールで固定の同時転送数に抑える
+    large_workers = get_large_file_parallel_transfers()
+    large_limiter = AdaptiveConcurrencyLimiter(large_workers, large_workers, adaptive=False)
+    small_window = max(get_transfer_submit_window(), limiter.max_limit * 2)
+    threshold_bytes = int(get_large_file_threshold_mb()) * 1024 * 1024
+    timings = LaneTimings()
+    dispatcher = BoundedDispatcher(feed.stop_event)
+    with (
+        ThreadPoolExecutor(max_workers=limiter.max_limit, thread_name_prefix="small-lane") as small_executor,
+        ThreadPoolExecutor(max_workers=large_workers, thread_name_prefix="large-lane") as large_executor,
+    ):
+        lanes = {}
+        for lane, executor, lane_limiter, window in (
+            ("large", large_executor, large_limiter, large_workers * 2),
+            ("small", small_executor, limiter, small_window),
+        ):
+            func = partial(_transfer_in_lane, lane, lane_limiter, timings, client, retry_count, timeout)
+            if reconciler is not None:
+                func = partial(_transfer_unless_present, reconciler, func)
+            lanes[lane] = (executor, func, window)
+        # 片方のレーンが埋まっている間に到着した、そのレーンのファイルは small_window 件まで保持する
+        dispatcher.add_routed_lanes(feed, partial(_pipeline_lane, threshold_bytes), lanes, small_window)
+        success_count = _count_successes(dispatcher)
+    return success_count, limiter
+
+
+def run_transfer_pipelined(force_crawl=False, reconcile=False):
+    """クロールと並行して転送する（クロールしたファイルを有界キュー経由で到着順に転送する）
+
+    転送先フォルダは事前作成せず、各ファイルの転送時に作成する（作成済みフォルダはキャッシュされる）
+
+    Args:
+        force_crawl: キャッシュがあっても OneDrive・SharePoint を再クロールするか
+        reconcile: スキップリストに加えて転送先のインベントリと照合するか（インベントリの取得と並行して転送する）
+
+    Returns:
+        停止要求・クロールの失敗で中断されずに最後まで転送したか
+    """
+    credentials = _get_transfer_credentials()
+    if credentials is None:
+        return False
+    max_workers = get_max_parallel_transfers()
+    skip_index = SkipIndex.load(get_skip_list_path())
 
-    # 並列転送
-    max_workers = get_config("max_parallel_transfers", 4)
     retry_count = get_config("retry_count", 3)
     timeout = get_config("timeout_sec", 10)
 
     structured_logger = get_structured_logger("main")
-    structured_logger.info("転送対象", target_count=len(targets))
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(transfer_file, f, client, retry_count, timeout): f for f in targets}
-        for future in as_completed(futures):
-            f = futures[future]
-            try:
-                future.result()
-            except Exception as e:
-                log_transfer_error(f, str(e))
+    queue_size = get_transfer_pipeline_queue_size()
+    structured_logger.info("パイプライン転送開始", queue_size=queue_size, force_crawl=force_crawl, reconcile=reconcile)
+    start = time.time()
+    with closing(GraphTransferClient(*credentials)) as client:
+        reconciler = _pipeline_reconciler(client, force_crawl) if reconcile else None
+
+        def _is_skipped(file_info):
+            return file_info in skip_index or (reconciler is not None and reconciler.is_indexed(file_info))
+
+        feed = TransferFeed(queue_size, threading.Event(), _is_skipped)
+        with _stop_on_signals(feed.stop_event):
+            if reconciler is not None:
+                reconciler.start()
+            feed.start(lambda on_file: get_onedrive_files(force_crawl, on_file=on_file))
+            success_count, limiter = _dispatch_pipelined(feed, client, max_workers, retry_count, timeout, reconciler)
+            feed.join()
+        connection_stats = client.connection_stats()
+
+    _log_transfer_summary("pipeline", feed.enqueued, success_count, time.time() - start)
+    structured_logger.info("パイプライン統計", **feed.stats(), **(reconciler.stats() if reconciler else {}))
+    structured_logger.info("同時転送数統計", **limiter.stats())
+    if feed.error is not None:
+        structured_logger.error(
+            "クロールに失敗したため転送を中断しました（次回実行時にクロールを再開します）", error=str(feed.error)
+        )
+    if feed.stop_event.is_set():
+        structured_logger.warning("転送を中断しました（未転送のファイルは次回実行時に転送されます）")
+    structured_logger.info("HTTP接続統計", **connection_stats)
+    return feed.error is None and not feed.stop_event.is_set()
+
+
+def _put_transferred(result_queue, file_info):
+    result_queue.put(("transferred", file_info))
+
+
+def _transfer_shard_worker(shard_index, shard_count, result_queue):
+    """マルチプロセス転送のワーカー（担当シャードのみを独自のクライアント・接続プールで転送する）"""
+    global _transferred_sink
+    _transferred_sink = partial(_put_transferred, result_queue)
+    target_count = 0
+    try:
+        # インベントリはコーディネータが用意したキャッシュから各ワーカーが読み込む
+        shard = FilteredInventory(get_onedrive_files(), lambda f: shard_of(f, shard_count) == shard_index)
+        run_transfer(shard)
+        target_count = len(shard)
+    finally:
+        result_queue.put(("finished", shard_index, target_count))
+
+
+def _collect_shard_results(result_queue, workers, shard_count):
+    """ワーカーからの転送済みファイルをまとめてスキップリストへ書き込み、進捗を集計する
+
+    Returns:
+        (転送成功件数, 転送対象件数)
+    """
+    structured_logger = get_structured_logger("main")
+    pending = []
+    transferred = 0
+    target_count = 0
+    finished = set()
+    last_flush = time.time()
+    while len(finished) < shard_count:
+        try:
+            message = result_queue.get(timeout=SKIP_LIST_FLUSH_SEC)
+        except queue.Empty:
+            if not any(w.is_alive() for w in workers):
+                structured_logger.error("転送ワーカーが完了報告なしで終了しました", finished_shards=len(finished))
+                break
+            message = None
+        if message and message[0] == "transferred":
+            pending.append(message[1])
+            transferred += 1
+        elif message and message[0] == "finished":
+            finished.add(message[1])
+            target_count += message[2]
+        if pending and (len(pending) >= SKIP_LIST_FLUSH_COUNT or time.time() - last_flush >= SKIP_LIST_FLUSH_SEC):
+            add_many_to_skip_list(pending, get_skip_list_path())
+            pending = []
+            last_flush = time.time()
+            structured_logger.info("転送進捗", transferred=transferred, finished_shards=len(finished))
+    add_many_to_skip_list(pending, get_skip_list_path())
+    return transferred, target_count
+
+
+def run_transfer_multiprocess(processes):
+    """転送対象をパスのハッシュで processes 個のシャードに分け、ワーカープロセスで並列に転送する
+
+    スキップリストの更新はコーディネータ（このプロセス）がまとめて行う
+    """
+    structured_logger = get_structured_logger("main")
+    structured_logger.info("マルチプロセス転送開始", processes=processes)
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    workers = [
+        context.Process(
+            target=_transfer_shard_worker,
+            args=(index, processes, result_queue),
+            name=f"transfer-shard-{index}",
+        )
+        for index in range(processes)
+    ]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    # Ctrl+C は各ワーカーが受けて停止するため、コーディネータは結果の回収を続ける
+    with _stop_on_signals(threading.Event()):
+        transferred, target_count = _collect_shard_results(result_queue, workers, processes)
+        for worker in workers:
+            worker.join()
+    _log_transfer_summary(f"multiprocess-{processes}", target_count, transferred, time.time() - start)
+
+
+def _record_leased(recorder, file_info):
+    add_to_skip_list(file_info, get_skip_list_path())
+    recorder.add(file_info)
+
+
+def _transfer_leased_shard(store, shard, shard_count, onedrive_files, skip_index, client, max_workers):
+    """取得したシャードを転送する
+
+    リースを他のノードに回収された場合はその時点で新規転送の投入を止める
+
+    Returns:
+        (全ファイルを転送したか, リースを失ったか, 停止要求で中断したか)
+    """
+    global _transferred_sink
+    # 他のノードが途中まで転送していたシャードは転送済みのファイルを除く
+    done = store.transferred_keys(shard)
+    # シャードの転送対象（全体の 1/shard_count）は1回の走査でリストにし、件数・レーン分けで再走査しない
+    targets = [
+        f
+        for f in onedrive_files
+        if shard_of(f, shard_count) == shard and f not in skip_index and (f.get("path"), f.get("name")) not in done
+    ]
+    stop_event = threading.Event()
+    with TransferredRecorder(store, shard, SKIP_LIST_FLUSH_COUNT, SKIP_LIST_FLUSH_SEC) as recorder:
+        _transferred_sink = partial(_record_leased, recorder)
+        try:
+            with LeaseHeartbeat(store, shard, stop_event=stop_event) as heartbeat:
+                success_count, target_count, stopped = _transfer_targets(
+                    targets, client, max_workers, stop_event, mode="leased"
+                )
+        finally:
+            _transferred_sink = None
+    lost = heartbeat.lost.is_set()
+    return not stopped and success_count == target_count, lost, stopped and not lost
+
+
+def run_transfer_leased(lease_db_path, onedrive_files):
+    """共有リースDBからシャードを1つずつ取得して転送する（複数ノードでの分担転送）
+
+    ハートビートの途絶えたノードのシャードは期限切れ後に他のノードが回収する。
+    転送クライアント・スキップリストの索引・転送先フォルダの事前作成はノードで1回だけ行い、全シャードで使う
+    """
+    credentials = _get_transfer_credentials()
+    if credentials is None:
+        return
+    max_workers = get_max_parallel_transfers()
+    store = ShardLeaseStore(lease_db_path, lease_ttl_sec=get_shard_lease_ttl_sec())
+    shard_count = get_shard_count()
+    structured_logger = get_structured_logger("main")
+    client = GraphTransferClient(*credentials)
+    try:
+        store.initialize(shard_count)
+        structured_logger.info("リース転送開始", node_id=store.node_id, shard_count=shard_count, **store.stats())
+        skip_index = SkipIndex.load(get_skip_list_path())
+        pending = FilteredInventory(onedrive_files, lambda f: f not in skip_index)
+        client.prepare_sharepoint_folders(pending, *_get_transfer_roots(), max_workers=max_workers)
+        # 転送に失敗したファイルが残るシャードは解放し、このノードでは再取得しない（他のノード・次回実行で再試行）
+        failed_shards = set()
+        while (shard := store.claim(exclude=failed_shards)) is not None:
+            completed, lost, stopped = _transfer_leased_shard(
+                store, shard, shard_count, onedrive_files, skip_index, client, max_workers
+            )
+            if completed:
+                store.complete(shard)
+            elif lost:
+                # 回収されたシャードは他のノードが続きを転送するため、次のシャードを取得する
+                structured_logger.warning("リースを失ったシャードの転送を中断しました", shard=shard)
+            elif stopped:
+                # 停止要求時はこのシャードを手放して終了する（続きは他のノードが転送する）
+                store.release(shard)
+                break
+            else:
+                structured_logger.warning("転送に失敗したファイルが残るシャードを解放しました", shard=shard)
+                store.release(shard)
+                failed_shards.add(shard)
+        structured_logger.info(
+            "リース転送終了", node_id=store.node_id, failed_shards=sorted(failed_shards), **store.stats()
+        )
+    finally:
+        store.close()
+        client.close()
+
+
+def _run_transfer_command(onedrive_files, args):
+    """--lease-db / --processes に応じてリース転送・マルチプロセス転送・単一プロセス転送を行う"""
+    lease_db_path = args.lease_db or get_shard_lease_db_path()
+    if lease_db_path:
+        run_transfer_leased(lease_db_path, onedrive_files)
+    elif args.processes > 1:
+        # ワーカーはキャッシュ済みのインベントリ（onedrive_files_path）を各自読み込む
+        run_transfer_multiprocess(args.processes)
+    else:
+        run_transfer(onedrive_files)
+
+
+def _use_pipeline(args):
+    """パイプライン転送（クロールと並行して転送）を行うか（単一プロセス転送のみ対応）"""
+    if not (args.pipeline or get_transfer_pipeline()):
+        return False
+    leased = args.lease_db or get_shard_lease_db_path()
+    if leased or args.processes > 1:
+        structured_logger = get_structured_logger("main")
+        structured_logger.warning("パイプライン転送は単一プロセス転送のみ対応しています。クロール完了後に転送します。")
+        return False
+    return True
 
 
 def main():
@@ -345,6 +928,22 @@ def main():
         help="ログ・キャッシュをクリアし、スキップリスト再構築＋転送まで全て実行",
     )
     parser.add_argument("--verbose", action="store_true", help="詳細情報を表示する")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="転送をパスのハッシュで分割して並列実行するプロセス数（既定は 1）",
+    )
+    parser.add_argument(
+        "--lease-db",
+        default=None,
+        help="複数ノードで分担転送する共有リースDB（SQLite）のパス（未指定時は config の shard_lease_db_path）",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="クロールと並行して転送する（未指定時は config の transfer_pipeline）",
+    )
     args = parser.parse_args()
 
     # 設定変更をチェック
@@ -362,22 +961,38 @@ def main():
     # 2. --full-rebuild または設定変更検知時: ログクリア＋スキップリスト再構築＋転送
     if args.full_rebuild or config_changed:
         clear_logs_and_update_config()
+        if _use_pipeline(args):
+            # スキップリストは再構築せず、転送先のインベントリと照合しながら転送する
+            structured_logger = get_structured_logger("main")
+            structured_logger.info("フルリビルド（クロールと並行して転送）")
+            run_transfer_pipelined(force_crawl=True, reconcile=True)
+            return
         onedrive_files = get_onedrive_files(force_crawl=True)
         rebuild_skip_list(onedrive_files, force_crawl=True, verbose=args.verbose)
         structured_logger = get_structured_logger("main")
         structured_logger.info("フルリビルド（転送も実行）")
-        run_transfer(onedrive_files)
+        _run_transfer_command(onedrive_files, args)
         return
 
     # 3. デフォルト（通常転送）
+    skip_list_path = get_skip_list_path()
+    if _use_pipeline(args):
+        # スキップリストが無い場合・照合する設定の場合は転送先のインベントリとも照合する
+        reconcile = not skip_list_exists(skip_list_path) or get_skip_list_reconcile_before_transfer()
+        run_transfer_pipelined(reconcile=reconcile)
+        return
     onedrive_files = get_onedrive_files()
     # スキップリストが存在しない場合は自動再構築
-    skip_list_path = get_skip_list_path()
-    if not os.path.exists(skip_list_path):
+    if not skip_list_exists(skip_list_path):
         structured_logger = get_structured_logger("main")
         structured_logger.info("スキップリストが存在しないため自動再構築します。")
         rebuild_skip_list(onedrive_files, force_crawl=False, verbose=args.verbose)
-    run_transfer(onedrive_files)
+    elif get_skip_list_reconcile_before_transfer():
+        # 転送先のインベントリ（delta で差分更新）と照合し直してから転送する
+        structured_logger = get_structured_logger("main")
+        structured_logger.info("転送前にスキップリストを照合します。")
+        rebuild_skip_list(onedrive_files, force_crawl=False, verbose=args.verbose)
+    _run_transfer_command(onedrive_files, args)
 
 
 if __name__ == "__main__":
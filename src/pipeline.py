@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+クロールと転送を並行させるパイプラインモジュール
+
+クロール（生産側）が取得したファイルをスキップ判定しながら有界キューへ入れ、転送側は
+キューから到着順に取り出して転送する。全件のクロールを待たずに最初のファイルから転送を始められる。
+転送が追いつかずキューが満杯の間はクロールを待たせる（キューの件数以上をメモリに保持しない）。
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from src.structured_logger import get_structured_logger
+
+# 生産側の終了を転送側に知らせる番兵
+_END = object()
+
+
+class FeedStopped(Exception):
+    """停止要求によりクロールを中断する（チェックポイントは残るため次回は続きから再開する）"""
+
+
+class TransferFeed:
+    """
+    クロールしたファイルを有界キューで転送側へ受け渡す
+
+    生産側は put() でファイルを渡し、転送側はイテレートして (投入順, ファイル情報) を受け取る。
+    stop_event が設定されると put() は FeedStopped を送出し、イテレートはその時点で終える。
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        stop_event: threading.Event | None = None,
+        is_skipped: Callable[[dict[str, Any]], bool] | None = None,
+        poll_sec: float = 0.5,
+    ):
+        """
+        Args:
+            maxsize: キューに保持するファイル数の上限
+            stop_event: 停止要求のイベント
+            is_skipped: 転送済みのファイルを判定する関数（True のファイルはキューに入れない）
+            poll_sec: キューの待機中に停止要求を確認する間隔
+        """
+        self.stop_event = stop_event or threading.Event()
+        self.is_skipped = is_skipped
+        self.poll_sec = poll_sec
+        self.error: BaseException | None = None
+        self.crawled = 0
+        self.skipped = 0
+        self.enqueued = 0
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, maxsize))
+        self._started = time.monotonic()
+        self._first_item_sec: float | None = None
+        self._crawl_sec: float | None = None
+        self._thread: threading.Thread | None = None
+
+    def _put(self, item: Any) -> None:
+        while True:
+            try:
+                self._queue.put(item, timeout=self.poll_sec)
+                return
+            except queue.Full:
+                if self.stop_event.is_set():
+                    raise FeedStopped from None
+
+    def put(self, file_info: dict[str, Any]) -> None:
+        """クロールしたファイルを渡す（転送済みのファイルは除く。キューが満杯の間は待つ）"""
+        if self.stop_event.is_set():
+            raise FeedStopped
+        self.crawled += 1
+        if self.is_skipped is not None and self.is_skipped(file_info):
+            self.skipped += 1
+            return
+        self._put((self.enqueued, file_info))
+        self.enqueued += 1
+
+    def start(self, produce: Callable[[Callable[[dict[str, Any]], None]], Any]) -> None:
+        """
+        生産側のスレッドを開始する
+
+        Args:
+            produce: put を受け取り、クロールしたファイル毎に呼び出す関数
+        """
+
+        def _run() -> None:
+            try:
+                produce(self.put)
+            except FeedStopped:
+                pass
+            except BaseException as e:
+                # 転送側はキューに入った分を転送してから、呼び出し元が error を確認する
+                self.error = e
+            finally:
+                self._crawl_sec = time.monotonic() - self._started
+                try:
+                    self._put(_END)
+                except FeedStopped:
+                    pass
+
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=_run, name="pipeline-crawl", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __iter__(self) -> Iterator[tuple[int, dict[str, Any]]]:
+        while not self.stop_event.is_set():
+            try:
+                item = self._queue.get(timeout=self.poll_sec)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            if self._first_item_sec is None:
+                self._first_item_sec = time.monotonic() - self._started
+                logger = get_structured_logger("main")
+                logger.info("最初の転送を開始", elapsed_sec=round(self._first_item_sec, 2))
+            yield item
+
+    def stats(self) -> dict[str, Any]:
+        """クロール・スキップ・投入の件数と、最初の転送開始・クロール完了までの秒数"""
+        return {
+            "crawled": self.crawled,
+            "skipped": self.skipped,
+            "enqueued": self.enqueued,
+            "first_transfer_sec": round(self._first_item_sec, 2) if self._first_item_sec is not None else None,
+            "crawl_sec": round(self._crawl_sec, 2) if self._crawl_sec is not None else None,
+        }
+
+
+class DestinationReconciler:
+    """
+    転送先のインベントリを取得しながら、転送先に既に存在するファイルを判定する
+
+    インベントリ（全件クロールまたは差分同期）はバックグラウンドで取得し、転送の開始を待たせない。
+    取得が終わるまでは転送前に転送先へ1件ずつ問い合わせ、取得後は索引を参照する。
+    転送先に存在したファイルは on_match で逐次記録し、ファイル自体は保持しない（件数のみ）。
+    """
+
+    def __init__(
+        self,
+        load_index: Callable[[], Any],
+        lookup: Callable[[dict[str, Any]], bool],
+        on_match: Callable[[dict[str, Any]], None],
+    ):
+        """
+        Args:
+            load_index: 転送先のインベントリを取得し、`file_info in index` で判定できる索引を返す関数
+            lookup: 転送先にファイルが存在するかを1件問い合わせる関数
+            on_match: 転送先に存在したファイルを記録する関数
+        """
+        self._load_index = load_index
+        self._lookup = lookup
+        self._on_match = on_match
+        self._index: Any = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.error: BaseException | None = None
+        self.matched = 0
+        self.lookups = 0
+
+    def start(self) -> None:
+        """インベントリの取得を開始する"""
+
+        def _run() -> None:
+            logger = get_structured_logger("main")
+            try:
+                index = self._load_index()
+            except Exception as e:
+                self.error = e
+                logger.warning("転送先インベントリの取得に失敗しました。転送前の個別確認を続けます。", error=str(e))
+                return
+            self._index = index
+            logger.info("転送先インベントリの取得完了", file_count=len(index))
+
+        self._thread = threading.Thread(target=_run, name="pipeline-reconcile", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def is_indexed(self, file_info: dict[str, Any]) -> bool:
+        """取得済みの索引で転送先に存在するか（取得前は False。存在した場合は記録する）"""
+        index = self._index
+        if index is None or file_info not in index:
+            return False
+        self._match(file_info)
+        return True
+
+    def is_present(self, file_info: dict[str, Any]) -> bool:
+        """
+        転送先に存在するか（取得前は転送先に問い合わせる。存在した場合は記録する）
+
+        問い合わせに失敗した場合は存在しないものとして扱う（転送時に上書きする）
+        """
+        index = self._index
+        if index is not None:
+            present = file_info in index
+        else:
+            with self._lock:
+                self.lookups += 1
+            try:
+                present = self._lookup(file_info)
+            except Exception as e:
+                logger = get_structured_logger("main")
+                logger.warning("転送先の存在確認に失敗しました", file_path=file_info.get("path"), error=str(e))
+                present = False
+        if present:
+            self._match(file_info)
+        return present
+
+    def _match(self, file_info: dict[str, Any]) -> None:
+        self._on_match(file_info)
+        with self._lock:
+            self.matched += 1
+
+    def stats(self) -> dict[str, Any]:
+        """転送先に存在した件数・個別に問い合わせた件数と、インベントリの取得状況"""
+        return {"sharepoint_matched": self.matched, "sharepoint_lookups": self.lookups, "reconcile_ready": self.ready}
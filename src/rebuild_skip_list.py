@@ -3,10 +3,11 @@
 SharePointクロールとスキップリスト再構築ツール
 """
 
-import json
 import os
 import sys
+from contextlib import closing
 
+import requests
 from dotenv import load_dotenv
 
 # プロジェクトルートの.envを必ず読み込む（OS環境変数優先、なければ.env）
@@ -17,10 +18,55 @@ load_dotenv(env_path, override=False)
 sys.path.insert(0, os.path.dirname(__file__))
 
 # ローカルモジュールのインポート
+from config_manager import (  # noqa: E402
+    get_crawl_checkpoint_interval_sec,
+    get_onedrive_files_path,
+    get_sharepoint_current_files_path,
+    get_sharepoint_delta_enabled,
+    get_sharepoint_delta_state_path,
+)
+from src.crawler import inventory_checkpoint  # noqa: E402
+from src.inventory import InventoryFile, InventoryWriter, write_inventory  # noqa: E402
+from src.skiplist import SkipIndex, save_skip_list  # noqa: E402
 from structured_logger import get_structured_logger  # noqa: E402
 from transfer import GraphTransferClient  # noqa: E402
 
 
+def _full_path_from_parent_reference(item, sharepoint_folder):
+    """parentReference.path からフルパスを再構築する（full_path を持たないアイテム用）"""
+    file_path = item.get("parentReference", {}).get("path", "")
+
+    # パスから指定フォルダ以降を抽出
+    if f"/{sharepoint_folder}" in file_path:
+        relative_path = file_path.split(f"/{sharepoint_folder}")[1]
+        if relative_path.startswith("/"):
+            relative_path = relative_path[1:]
+        if relative_path:
+            return os.path.join(sharepoint_folder, relative_path, item["name"]).replace("\\", "/")
+    return f"{sharepoint_folder}/{item['name']}"
+
+
+def _sharepoint_records(items, sharepoint_folder):
+    """クロールしたアイテムを SharePoint ファイルリストのレコードとして1件ずつ返す"""
+    count = 0
+    for item in items:
+        full_path = item.get("full_path") or _full_path_from_parent_reference(item, sharepoint_folder)
+        yield {
+            "name": item["name"],
+            "path": full_path,
+            "size": item.get("size"),
+            "lastModifiedDateTime": item.get("lastModifiedDateTime"),
+            "id": item.get("id"),
+        }
+        count += 1
+
+        # 1000件ごとに進捗ログを出力
+        if count % 1000 == 0:
+            from src.logger import logger
+
+            logger.info(f"SharePointクロール進捗: {count}ファイル処理済み")
+
+
 def crawl_sharepoint():
     """SharePointの指定フォルダ配下をクロールしてファイルリストを生成"""
     CLIENT_ID = os.getenv("CLIENT_ID")
@@ -29,65 +75,33 @@ def crawl_sharepoint():
     SITE_ID = os.getenv("DESTINATION_SHAREPOINT_SITE_ID")
     DRIVE_ID = os.getenv("DESTINATION_SHAREPOINT_DRIVE_ID")
 
-    client = GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)
-
-    # 環境変数からSharePointフォルダパスを取得
-    sharepoint_folder = os.getenv("DESTINATION_SHAREPOINT_DOCLIB", "TEST-Sharepoint")
-    structured_logger = get_structured_logger("rebuild_skip_list")
-    structured_logger.info("SharePointクロール開始", folder=sharepoint_folder)
-
-    # SharePoint側のファイルリストを取得（既存のlist_drive_itemsを使用）
-    sharepoint_files = client.list_drive_items(sharepoint_folder)
-
-    # ファイル情報を整理してフルパスを生成
-    sharepoint_file_list = []
-    for _i, item in enumerate(sharepoint_files):
-        # SharePoint側のパス情報を再構築
-        file_path = item.get("parentReference", {}).get("path", "")
-
-        # パスから指定フォルダ以降を抽出
-        if f"/{sharepoint_folder}" in file_path:
-            relative_path = file_path.split(f"/{sharepoint_folder}")[1]
-            if relative_path.startswith("/"):
-                relative_path = relative_path[1:]
-            full_path = (
-                os.path.join(sharepoint_folder, relative_path, item["name"]).replace("\\", "/")
-                if relative_path
-                else f"{sharepoint_folder}/{item['name']}"
-            )
-        else:
-            full_path = f"{sharepoint_folder}/{item['name']}"
-
-        sharepoint_file_list.append(
-            {
-                "name": item["name"],
-                "path": full_path,
-                "size": item.get("size"),
-                "lastModifiedDateTime": item.get("lastModifiedDateTime"),
-                "id": item.get("id"),
-            }
-        )
-
-        # 1000件ごとに進捗ログを出力
-        if len(sharepoint_file_list) % 1000 == 0:
-            from src.logger import logger
-
-            logger.info(f"SharePointクロール進捗: {len(sharepoint_file_list)}ファイル処理済み")
-
-    # SharePointファイルリストを保存
-    os.makedirs("logs", exist_ok=True)
-    try:
-        from src.config_manager import get_sharepoint_current_files_path
+    with closing(GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)) as client:
+        # 環境変数からSharePointフォルダパスを取得
+        sharepoint_folder = os.getenv("DESTINATION_SHAREPOINT_DOCLIB", "TEST-Sharepoint")
+        structured_logger = get_structured_logger("rebuild_skip_list")
+        structured_logger.info("SharePointクロール開始", folder=sharepoint_folder)
 
         sharepoint_files_path = get_sharepoint_current_files_path()
-    except ImportError:
-        sharepoint_files_path = "logs/sharepoint_current_files.json"
-
-    with open(sharepoint_files_path, "w", encoding="utf-8") as f:
-        json.dump(sharepoint_file_list, f, ensure_ascii=False, indent=2)
-
-    structured_logger.info("SharePointクロール完了", file_count=len(sharepoint_file_list))
-    return sharepoint_file_list
+        if get_sharepoint_delta_enabled():
+            # 転送先の deltaLink があれば差分のみ取得する（転送元とは別の状態ファイル）
+            try:
+                sharepoint_files = client.sync_sharepoint_delta(sharepoint_folder, get_sharepoint_delta_state_path())
+            except requests.exceptions.RequestException as e:
+                structured_logger.warning("SharePoint差分同期に失敗しました。全件クロールします。", error=str(e))
+            else:
+                file_count = write_inventory(sharepoint_files_path, sharepoint_files)
+                structured_logger.info("SharePointクロール完了", file_count=file_count)
+                return InventoryFile(sharepoint_files_path)
+
+        # SharePoint側のファイルリストを並列・ページング対応でクロールし、ページの到着に合わせて逐次書き込む
+        # （途中経過を保存し、前回停止したクロールがあれば続きから再開する）
+        with InventoryWriter(sharepoint_files_path) as writer:
+            checkpoint = inventory_checkpoint(sharepoint_files_path, writer, get_crawl_checkpoint_interval_sec())
+            items = client.iter_drive_items(sharepoint_folder, checkpoint=checkpoint)
+            writer.write_many(_sharepoint_records(items, sharepoint_folder))
+
+        structured_logger.info("SharePointクロール完了", file_count=writer.count)
+        return InventoryFile(sharepoint_files_path)
 
 
 def crawl_onedrive():
@@ -99,32 +113,39 @@ def crawl_onedrive():
     DRIVE_ID = os.getenv("DESTINATION_SHAREPOINT_DRIVE_ID")
     USER_PRINCIPAL_NAME = os.getenv("SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME")
 
-    client = GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)
+    with closing(GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)) as client:
+        # 環境変数からOneDriveフォルダパスを取得
+        onedrive_folder = os.getenv("SOURCE_ONEDRIVE_FOLDER_PATH", "TEST-Onedrive")
+        structured_logger = get_structured_logger("rebuild_skip_list")
+        structured_logger.info("OneDriveクロール開始", folder=onedrive_folder)
 
-    # 環境変数からOneDriveフォルダパスを取得
-    onedrive_folder = os.getenv("SOURCE_ONEDRIVE_FOLDER_PATH", "TEST-Onedrive")
-    structured_logger = get_structured_logger("rebuild_skip_list")
-    structured_logger.info("OneDriveクロール開始", folder=onedrive_folder)
-
-    file_targets = client.collect_file_targets_from_onedrive(
-        folder_path=onedrive_folder,
-        user_principal_name=USER_PRINCIPAL_NAME,
-        drive_id=None,
-    )
+        # OneDriveファイルリストをページの到着に合わせて逐次保存（前回停止したクロールがあれば続きから再開する）
+        onedrive_files_path = get_onedrive_files_path()
+        with InventoryWriter(onedrive_files_path) as writer:
+            file_targets = client.iter_file_targets_from_onedrive(
+                folder_path=onedrive_folder,
+                user_principal_name=USER_PRINCIPAL_NAME,
+                drive_id=None,
+                checkpoint=inventory_checkpoint(onedrive_files_path, writer, get_crawl_checkpoint_interval_sec()),
+            )
+            writer.write_many(file_targets)
 
-    # OneDriveファイルリストを保存
-    try:
-        from src.config_manager import get_onedrive_files_path
+        structured_logger.info("OneDriveクロール完了", file_count=writer.count)
+        return InventoryFile(onedrive_files_path)
 
-        onedrive_files_path = get_onedrive_files_path()
-    except ImportError:
-        onedrive_files_path = "logs/onedrive_files.json"
 
-    with open(onedrive_files_path, "w", encoding="utf-8") as f:
-        json.dump(file_targets, f, ensure_ascii=False, indent=2)
+def sharepoint_skip_index(sharepoint_files):
+    """SharePointの転送済みファイルを OneDrive 側の (パス, ファイル名) に変換した SkipIndex"""
+    # 環境変数からフォルダパスを取得
+    onedrive_folder = os.getenv("SOURCE_ONEDRIVE_FOLDER_PATH", "TEST-Onedrive")
+    sharepoint_folder = os.getenv("DESTINATION_SHAREPOINT_DOCLIB", "TEST-Sharepoint")
 
-    structured_logger.info("OneDriveクロール完了", file_count=len(file_targets))
-    return file_targets
+    # SharePointファイルの名前とパスのみで照合する（サイズ・メタデータ無視）
+    # SharePointフォルダをOneDriveフォルダに変換したパスを作成
+    return SkipIndex(
+        {"path": sp_file["path"].replace(sharepoint_folder, onedrive_folder), "name": sp_file["name"]}
+        for sp_file in sharepoint_files
+    )
 
 
 def create_skip_list_from_sharepoint(onedrive_files, sharepoint_files):
@@ -132,25 +153,14 @@ def create_skip_list_from_sharepoint(onedrive_files, sharepoint_files):
     structured_logger = get_structured_logger("rebuild_skip_list")
     structured_logger.info("スキップリスト再構築開始")
 
-    # 環境変数からフォルダパスを取得
-    onedrive_folder = os.getenv("SOURCE_ONEDRIVE_FOLDER_PATH", "TEST-Onedrive")
-    sharepoint_folder = os.getenv("DESTINATION_SHAREPOINT_DOCLIB", "TEST-Sharepoint")
-
-    # SharePointファイルの名前とパスのみでマッピング作成（サイズ・メタデータ無視）
-    sharepoint_map = {}
-    for sp_file in sharepoint_files:
-        # SharePointフォルダをOneDriveフォルダに変換したパスを作成
-        converted_path = sp_file["path"].replace(sharepoint_folder, onedrive_folder)
-        key = (sp_file["name"], converted_path)
-        sharepoint_map[key] = sp_file
+    sharepoint_index = sharepoint_skip_index(sharepoint_files)
 
     skip_list = []
     matched_count = 0
 
     for od_file in onedrive_files:
         # OneDriveファイルに対応するSharePointファイルを検索（サイズ・メタデータ無視）
-        key = (od_file["name"], od_file["path"])
-        if key in sharepoint_map:
+        if od_file in sharepoint_index:
             skip_list.append(od_file)
             matched_count += 1
             structured_logger.debug("ファイルマッチ", file_path=od_file["path"])
@@ -164,8 +174,8 @@ def create_skip_list_from_sharepoint(onedrive_files, sharepoint_files):
     except ImportError:
         skip_list_path = "logs/skip_list.json"
 
-    with open(skip_list_path, "w", encoding="utf-8") as f:
-        json.dump(skip_list, f, ensure_ascii=False, indent=2)
+    # 転送済みとして追記済みのジャーナルも置き換える
+    save_skip_list(skip_list, skip_list_path)
 
     structured_logger.info(
         "スキップリスト構築完了",
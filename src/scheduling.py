@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+サイズ別転送レーンのスケジューリングモジュール
+
+小容量ファイルと大容量ファイルを別々のレーン（同時実行数・投入順序が独立）に分け、
+大容量ファイルが全ワーカーを占有して小容量ファイルが待たされることを防ぐ。
+大容量ファイルは大きい順に投入し、巨大なファイルが最後に残って全体の完了を遅らせないようにする。
+"""
+
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any
+
+# (転送対象の元の順序, ファイル情報)
+LaneItem = tuple[int, dict[str, Any]]
+
+
+def split_transfer_lanes(
+    targets: Iterable[dict[str, Any]], threshold_bytes: int
+) -> tuple[Iterator[LaneItem], list[LaneItem]]:
+    """
+    転送対象を小容量レーンと大容量レーンに分ける
+
+    大容量ファイルのみを先に走査して並べ替え、小容量ファイルは転送の進行に合わせて
+    もう一度走査しながら取り出す（targets は再走査できるものを渡す）
+
+    Returns:
+        (小容量ファイル（元の順序のイテレータ）, 大容量ファイル（サイズの大きい順）)
+    """
+
+    def _is_large(file_info: dict[str, Any]) -> bool:
+        return (file_info.get("size") or 0) >= threshold_bytes
+
+    large = [(index, file_info) for index, file_info in enumerate(targets) if _is_large(file_info)]
+    large.sort(key=lambda item: item[1].get("size") or 0, reverse=True)
+    small = ((index, file_info) for index, file_info in enumerate(targets) if not _is_large(file_info))
+    return small, large
+
+
+class LaneTimings:
+    """
+    レーン別の転送所要時間を集計し、単一プールとの全体完了時間を比較する（スレッドセーフ）
+
+    ファイル毎の所要時間は保持せず、レーン毎の件数・合計・最長のみを持つ
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # レーン -> (件数, 合計秒数, 最長秒数)
+        self._lanes: dict[str, tuple[int, float, float]] = {}
+
+    def record(self, lane: str, elapsed: float) -> None:
+        """レーンの転送1件分の所要時間を集計に加える"""
+        with self._lock:
+            count, total, longest = self._lanes.get(lane, (0, 0.0, 0.0))
+            self._lanes[lane] = (count + 1, total + elapsed, max(longest, elapsed))
+
+    def report(self, makespan: float, single_pool_workers: int) -> dict[str, Any]:
+        """
+        実際の全体完了時間と、同じ所要時間を単一プールで処理した場合の見積もりを返す
+
+        単一プールの見積もりは、合計をワーカーで均等に分けたうえで最長の転送が最後に残る場合
+        （元の順序で巨大なファイルが後ろにある場合）の完了時間とする
+        """
+        with self._lock:
+            lanes = dict(self._lanes)
+        workers = max(1, single_pool_workers)
+        total = sum(values[1] for values in lanes.values())
+        longest = max((values[2] for values in lanes.values()), default=0.0)
+        single_pool = total / workers + longest * (1 - 1 / workers)
+        return {
+            "makespan_sec": round(makespan, 2),
+            "single_pool_makespan_estimate_sec": round(single_pool, 2),
+            "makespan_improvement_pct": round((1 - makespan / single_pool) * 100, 1) if single_pool > 0 else 0.0,
+            **{f"{lane}_lane_files": values[0] for lane, values in lanes.items()},
+        }
+
+
+class _Route:
+    """BoundedDispatcher で1本のイテレータを複数のレーンへ振り分ける状態"""
+
+    def __init__(self, items: Iterable[Any], choose: Callable[[Any], int], lanes: Iterable[int], backlog: int):
+        self.items = iter(items)
+        self.choose = choose
+        self.buffers: dict[int, deque[Any]] = {lane: deque() for lane in lanes}
+        self.backlog = max(1, backlog)
+        self.exhausted = False
+
+
+class BoundedDispatcher:
+    """
+    レーン毎に投入済み（未完了）の Future を window 件までに制限して転送を投入する
+
+    全件を一度に submit せず、完了した分だけイテレータから取り出して補充するため、
+    転送対象が数百万件でも Future の数は window の合計に収まる。
+    stop_event が設定されると新規投入を止め、未着手の Future を取り消す。
+    到着順の1本のイテレータを複数のレーン（スレッドプール）に振り分けて投入することもできる。
+    """
+
+    def __init__(self, stop_event: threading.Event | None = None, poll_sec: float = 0.5):
+        self.stop_event = stop_event or threading.Event()
+        self.poll_sec = poll_sec
+        self._lanes: list[tuple[Executor, Callable[..., Any], Iterator[Any] | None, int]] = []
+        self._routes: list[_Route] = []
+        self.submitted = 0
+        self.cancelled = 0
+
+    def add_lane(self, executor: Executor, func: Callable[..., Any], items: Iterable[Any], window: int) -> None:
+        """レーンを追加する（items の各要素を func に渡して executor で実行する）"""
+        self._lanes.append((executor, func, iter(items), max(1, window)))
+
+    def add_routed_lanes(
+        self,
+        items: Iterable[Any],
+        choose: Callable[[Any], str],
+        lanes: Mapping[str, tuple[Executor, Callable[..., Any], int]],
+        backlog: int,
+    ) -> None:
+        """
+        到着順の1本のイテレータを、要素毎に choose で選んだレーンへ振り分けて投入する
+
+        lanes はレーン名 -> (executor, func, window)。投入数が window に達したレーンの要素は
+        レーン毎に backlog 件まで保持して他のレーンへの投入を続け、いずれかが backlog 件に達すると
+        そのレーンの完了を待ってから読み進める。
+        """
+        indexes = {}
+        for name, (executor, func, window) in lanes.items():
+            indexes[name] = len(self._lanes)
+            self._lanes.append((executor, func, None, max(1, window)))
+        self._routes.append(_Route(items, lambda item: indexes[choose(item)], indexes.values(), backlog))
+
+    def __iter__(self) -> Iterator[tuple[Future, Any]]:
+        """完了した順に (Future, 投入した要素) を返す"""
+        pending: dict[Future, tuple[int, Any]] = {}
+        in_lane = [0] * len(self._lanes)
+        exhausted = [False] * len(self._lanes)
+        while True:
+            if self.stop_event.is_set():
+                self._cancel_queued(pending, in_lane)
+            else:
+                self._refill(pending, in_lane, exhausted)
+            if not pending:
+                return
+            done, _ = wait(pending, timeout=self.poll_sec, return_when=FIRST_COMPLETED)
+            for future in done:
+                lane, item = pending.pop(future)
+                in_lane[lane] -= 1
+                if not future.cancelled():
+                    yield future, item
+
+    def _refill(self, pending: dict[Future, tuple[int, Any]], in_lane: list[int], exhausted: list[bool]) -> None:
+        for lane, (_, _, items, window) in enumerate(self._lanes):
+            while items is not None and not exhausted[lane] and in_lane[lane] < window:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted[lane] = True
+                    break
+                self._submit(lane, item, pending, in_lane)
+        for route in self._routes:
+            self._refill_route(route, pending, in_lane)
+
+    def _refill_route(self, route: _Route, pending: dict[Future, tuple[int, Any]], in_lane: list[int]) -> None:
+        def _has_room(lane: int) -> bool:
+            return in_lane[lane] < self._lanes[lane][3]
+
+        while True:
+            for lane, buffer in route.buffers.items():
+                while buffer and _has_room(lane):
+                    self._submit(lane, buffer.popleft(), pending, in_lane)
+            # 空きのあるレーンがない、または保持数が上限のレーンがある間は読み進めない
+            if route.exhausted or not any(_has_room(lane) for lane in route.buffers):
+                return
+            if any(len(buffer) >= route.backlog for buffer in route.buffers.values()):
+                return
+            try:
+                item = next(route.items)
+            except StopIteration:
+                route.exhausted = True
+                return
+            route.buffers[route.choose(item)].append(item)
+
+    def _submit(self, lane: int, item: Any, pending: dict[Future, tuple[int, Any]], in_lane: list[int]) -> None:
+        executor, func, _, _ = self._lanes[lane]
+        pending[executor.submit(func, item)] = (lane, item)
+        in_lane[lane] += 1
+        self.submitted += 1
+
+    def _cancel_queued(self, pending: dict[Future, tuple[int, Any]], in_lane: list[int]) -> None:
+        for future in list(pending):
+            if future.cancel():
+                lane, _ = pending.pop(future)
+                in_lane[lane] -= 1
+                self.cancelled += 1
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+転送対象のシャード分割モジュール
+
+転送対象をパスのハッシュで決定的にシャードへ振り分ける。
+同じインベントリと同じシャード数であれば、どのプロセス・どの実行でも同じ振り分けになる。
+"""
+
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+
+def shard_key(file_info: dict[str, Any]) -> str:
+    """シャード振り分けに使うキー（OneDrive 上のパス）"""
+    return file_info.get("path") or file_info.get("name") or ""
+
+
+def shard_of(file_info: dict[str, Any], shard_count: int) -> int:
+    """
+    ファイルの担当シャード番号（0 〜 shard_count-1）
+
+    Python の hash() はプロセス毎にランダム化されるため、プロセス間で一致する CRC32 を使う
+    """
+    if shard_count <= 1:
+        return 0
+    return zlib.crc32(shard_key(file_info).encode("utf-8")) % shard_count
+
+
+def iter_shard(targets: Iterable[dict[str, Any]], shard_index: int, shard_count: int) -> Iterator[dict[str, Any]]:
+    """指定シャードに属する転送対象のみを返す"""
+    return (f for f in targets if shard_of(f, shard_count) == shard_index)
@@ -1,8 +1,29 @@
+"""
+スキップリスト（転送済みファイルの一覧）モジュール
+
+スキップリストはスナップショット（<path>）と追記専用のジャーナル（<path>.journal）からなる。
+転送済みファイルはジャーナルへ1行1件で追記し（スキップリスト全体を読み書きしない）、
+一定件数ごとにスナップショットとジャーナルを重複を除いて新しいスナップショットへまとめる（圧縮）。
+読み込みは両方を合わせて行い、スナップショットは従来の JSON 配列・NDJSON のどちらも読める。
+"""
+
+import atexit
+import itertools
 import json
 import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:
+    # Windows では flock を使わず、追記後にジャーナルが置き換えられていないか確認する
+    fcntl = None  # type: ignore[assignment]
+
 from src.filelock import FileLock
+from src.inventory import iter_inventory, write_inventory
 
 # 設定値管理を使用
 try:
@@ -15,20 +36,116 @@ except ImportError:
 
 LOCK_PATH = SKIP_LIST_PATH + ".lock"
 
+JOURNAL_SUFFIX = ".journal"
+# 圧縮中（スナップショットへまとめている途中）のジャーナル
+COMPACTING_SUFFIX = ".compacting"
+
+# ジャーナルの fsync の方針（always: 追記毎、interval: 一定間隔、never: OS に任せる）
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+
+def skip_list_files(path: str = SKIP_LIST_PATH) -> list[str]:
+    """スキップリストを構成するファイル（スナップショット、圧縮中のジャーナル、ジャーナル）"""
+    journal_path = path + JOURNAL_SUFFIX
+    return [path, journal_path + COMPACTING_SUFFIX, journal_path]
+
+
+def skip_list_exists(path: str = SKIP_LIST_PATH) -> bool:
+    return any(os.path.exists(file_path) for file_path in skip_list_files(path))
+
+
+def _unique(records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    seen = SkipIndex()
+    return (record for record in records if seen.add(record))
+
+
+def iter_skip_list(path: str = SKIP_LIST_PATH) -> Iterator[dict[str, Any]]:
+    """スキップリストを1件ずつ読み込む（スナップショットとジャーナルを合わせ、重複は除く）"""
+    return _unique(itertools.chain.from_iterable(iter_inventory(file_path) for file_path in skip_list_files(path)))
+
+
+def count_skip_list(path: str = SKIP_LIST_PATH) -> int:
+    """スキップリストの件数（リストに展開せずに数える）"""
+    return sum(1 for _ in iter_skip_list(path))
+
 
 def load_skip_list(path: str = SKIP_LIST_PATH) -> list[dict[str, Any]]:
-    if not os.path.exists(path):
-        return []
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+    return list(iter_skip_list(path))
 
 
-def save_skip_list(skip_list: list[dict[str, Any]], path: str = SKIP_LIST_PATH):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(skip_list, f, ensure_ascii=False, indent=2)
+def skip_key(file_info: dict[str, Any]) -> tuple[Any, Any]:
+    """スキップ判定のキー（パス＋ファイル名のみ。サイズ・タイムスタンプは無視）"""
+    return file_info.get("path"), file_info.get("name")
 
 
-def is_skipped(file_info: dict[str, Any], skip_list: list[dict[str, Any]]) -> bool:
+class SkipIndex:
+    """
+    スキップリストの (パス, ファイル名) の索引
+
+    判定はリストの走査ではなく集合の参照（O(1)）で行い、転送済みのファイルは add() で逐次追加する。
+    アイテムIDを持つレコードは ID も索引し、has_id() で判定できる（移動・名前変更の確認用）。
+    """
+
+    def __init__(self, records: Iterable[dict[str, Any]] = ()):
+        self._keys: set[tuple[Any, Any]] = set()
+        self._ids: set[str] = set()
+        self.add_many(records)
+
+    @classmethod
+    def load(cls, path: str = SKIP_LIST_PATH) -> "SkipIndex":
+        """スキップリストを1件ずつ読み込んで索引を作る（リストに展開しない）"""
+        return cls(iter_skip_list(path))
+
+    def add(self, file_info: dict[str, Any]) -> bool:
+        """
+        ファイルを追加する
+
+        Returns:
+            新たに追加した場合は True（登録済みの場合は False）
+        """
+        key = skip_key(file_info)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        item_id = file_info.get("id")
+        if item_id:
+            self._ids.add(item_id)
+        return True
+
+    def add_many(self, file_infos: Iterable[dict[str, Any]]) -> int:
+        """複数のファイルを追加し、新たに追加した件数を返す"""
+        return sum(1 for file_info in file_infos if self.add(file_info))
+
+    def has_id(self, item_id: str | None) -> bool:
+        return bool(item_id) and item_id in self._ids
+
+    def __contains__(self, file_info: dict[str, Any]) -> bool:
+        return skip_key(file_info) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def save_skip_list(skip_list: Iterable[dict[str, Any]], path: str = SKIP_LIST_PATH) -> int:
+    """
+    スキップリストを skip_list で置き換え、件数を返す（ジャーナルに追記済みの分も破棄する）
+
+    スナップショットは圧縮時と同じ NDJSON で逐次書き込む（読み込み時に全体を1回で解析しない）
+    """
+    count = write_inventory(path, skip_list)
+    _discard_journal(path)
+    for journal_path in skip_list_files(path)[1:]:
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+    return count
+
+
+def is_skipped(file_info: dict[str, Any], skip_list: "SkipIndex | Iterable[dict[str, Any]]") -> bool:
+    """スキップ対象か（多数のファイルを判定する場合は SkipIndex を渡す）"""
+    if isinstance(skip_list, SkipIndex):
+        return file_info in skip_list
     for item in skip_list:
         # パス＋ファイル名のみでスキップ判定（サイズ・タイムスタンプは無視）
         if item.get("path") == file_info.get("path") and item.get("name") == file_info.get("name"):
@@ -36,9 +153,247 @@ def is_skipped(file_info: dict[str, Any], skip_list: list[dict[str, Any]]) -> bo
     return False
 
 
+class SkipJournal:
+    """
+    転送済みファイルをスキップリストのジャーナルへ1行1件で追記する（スレッドセーフ）
+
+    追記は O_APPEND の1回の書き込みで行うため、他プロセスの追記と行が混ざらない。
+    追記済みの判定用に、最初の追記時にスキップリストの索引を1回だけ読み込む。
+    compact_records 件を追記するごとにスナップショットへ圧縮する（圧縮どうしは FileLock で排他する）。
+    追記はジャーナルの共有ロック（flock）、圧縮によるジャーナルの置き換えは排他ロックの下で行い、
+    置き換え前のジャーナルへの追記が圧縮に含まれず失われないようにする。
+    """
+
+    def __init__(
+        self,
+        path: str = SKIP_LIST_PATH,
+        lock_path: str | None = None,
+        fsync: str = FSYNC_INTERVAL,
+        fsync_interval_sec: float = 1.0,
+        compact_records: int = 10000,
+    ):
+        """
+        Args:
+            path: スナップショットのパス（ジャーナルは <path>.journal）
+            lock_path: 圧縮時に取得するロックファイルのパス
+            fsync: fsync の方針（always / interval / never）
+            fsync_interval_sec: fsync が interval の場合の間隔の秒数
+            compact_records: 圧縮するまでに追記する件数（0 以下で圧縮しない）
+        """
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.lock_path = lock_path or path + ".lock"
+        self.fsync = fsync
+        self.fsync_interval_sec = fsync_interval_sec
+        self.compact_records = compact_records
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        self._index: SkipIndex | None = None
+        self._appended = 0
+        self._unsynced = False
+        self._last_sync = time.monotonic()
+
+    def _open(self) -> int:
+        if self._fd is not None and not self._is_current(self._fd):
+            # 他のプロセスが圧縮した場合は新しいジャーナルを開き直す
+            os.close(self._fd)
+            self._fd = None
+        if self._fd is None:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        return self._fd
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            current = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return False
+        opened = os.fstat(fd)
+        return (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
+
+    def add(self, file_info: dict[str, Any]) -> bool:
+        """転送済みファイルを追記する（追記済みの場合は False）"""
+        return self.add_many([file_info]) == 1
+
+    def add_many(self, file_infos: Iterable[dict[str, Any]]) -> int:
+        """
+        複数の転送済みファイルを1回の書き込みで追記する
+
+        Returns:
+            追記した件数
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = SkipIndex.load(self.path)
+            new = [file_info for file_info in file_infos if self._index.add(file_info)]
+            if not new:
+                return 0
+            data = "".join(json.dumps(file_info, ensure_ascii=False) + "\n" for file_info in new).encode("utf-8")
+            self._append(data)
+            self._unsynced = True
+            self._appended += len(new)
+            self._sync(force=self.fsync == FSYNC_ALWAYS)
+            if 0 < self.compact_records <= self._appended:
+                self._compact()
+            return len(new)
+
+    def _append(self, data: bytes) -> None:
+        """
+        ジャーナルへ追記する
+
+        他のプロセスの圧縮がジャーナルを置き換えた直後に置き換え前のファイルへ追記すると、
+        その追記は圧縮に含まれず失われる。共有ロックを取得してからジャーナルが置き換えられていないか
+        確認し、置き換えられていた場合は新しいジャーナルを開き直して追記する。
+        flock を使えない環境では追記後に確認し、置き換えられていた場合は新しいジャーナルへ追記し直す
+        （重複した行は読み込み・圧縮の際に除かれる）。
+        """
+        while True:
+            fd = self._open()
+            if fcntl is None:
+                self._write(fd, data)
+                if self._is_current(fd):
+                    return
+                continue
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                if self._is_current(fd):
+                    self._write(fd, data)
+                    return
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write(fd: int, data: bytes) -> None:
+        while data:
+            data = data[os.write(fd, data) :]
+
+    def _rotate(self, compacting_path: str) -> None:
+        """進行中の追記を待ってから、ジャーナルを圧縮中のジャーナルへ置き換える"""
+        if fcntl is None:
+            os.replace(self.journal_path, compacting_path)
+            return
+        fd = os.open(self.journal_path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.replace(self.journal_path, compacting_path)
+        finally:
+            os.close(fd)
+
+    def _sync(self, force: bool = False) -> None:
+        if self._fd is None or not self._unsynced or self.fsync == FSYNC_NEVER:
+            return
+        if force or time.monotonic() - self._last_sync >= self.fsync_interval_sec:
+            os.fsync(self._fd)
+            self._unsynced = False
+            self._last_sync = time.monotonic()
+
+    def compact(self) -> int:
+        """スナップショットとジャーナルを重複を除いて新しいスナップショットへまとめ、件数を返す"""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        compacting_path = self.journal_path + COMPACTING_SUFFIX
+        with FileLock(self.lock_path, timeout=60):
+            if self._fd is not None:
+                self._sync(force=True)
+                os.close(self._fd)
+                self._fd = None
+            # 前回の圧縮が途中で停止していた場合はそのジャーナルを先にまとめる（今のジャーナルは次回）
+            if os.path.exists(self.journal_path) and not os.path.exists(compacting_path):
+                self._rotate(compacting_path)
+            # 書き込み途中で停止しても前回のスナップショットは壊れない（.partial に書いてから置き換える）
+            records = itertools.chain(iter_inventory(self.path), iter_inventory(compacting_path))
+            count = write_inventory(self.path, _unique(records))
+            if os.path.exists(compacting_path):
+                os.remove(compacting_path)
+        self._appended = 0
+        return count
+
+    def close(self) -> None:
+        """未 fsync の追記を書き出してジャーナルを閉じる"""
+        with self._lock:
+            self._sync(force=True)
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def _journal_settings() -> tuple[str, float, int]:
+    try:
+        from src.config_manager import (
+            get_skip_list_compact_records,
+            get_skip_list_fsync,
+            get_skip_list_fsync_interval_sec,
+        )
+
+        return get_skip_list_fsync(), get_skip_list_fsync_interval_sec(), get_skip_list_compact_records()
+    except ImportError:
+        return FSYNC_INTERVAL, 1.0, 10000
+
+
+# スキップリストのパス毎のジャーナル（プロセス内で共有する）
+_journals: dict[str, SkipJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def _journal(path: str, lock_path: str | None = None) -> SkipJournal:
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = _journals[path] = SkipJournal(path, lock_path, *_journal_settings())
+        return journal
+
+
+def _discard_journal(path: str) -> None:
+    with _journals_lock:
+        journal = _journals.pop(path, None)
+    if journal is not None:
+        journal.close()
+
+
+@atexit.register
+def close_skip_journals() -> None:
+    """プロセス内のジャーナルを閉じる（終了時に未 fsync の追記を書き出す）"""
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close()
+
+
+def compact_skip_list(path: str = SKIP_LIST_PATH, lock_path: str = LOCK_PATH) -> int:
+    """スキップリストのジャーナルをスナップショットへまとめ、件数を返す"""
+    return _journal(path, lock_path).compact()
+
+
+def remove_skip_list(path: str = SKIP_LIST_PATH) -> list[str]:
+    """スキップリスト（スナップショット・ジャーナル）を削除し、削除したファイルを返す"""
+    _discard_journal(path)
+    removed = []
+    for file_path in skip_list_files(path):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            removed.append(file_path)
+    return removed
+
+
 def add_to_skip_list(file_info: dict[str, Any], path: str = SKIP_LIST_PATH, lock_path: str = LOCK_PATH):
-    with FileLock(lock_path, timeout=10):
-        skip_list = load_skip_list(path)
-        if not is_skipped(file_info, skip_list):
-            skip_list.append(file_info)
-            save_skip_list(skip_list, path)
+    """転送済みファイルをスキップリストのジャーナルへ追記する"""
+    _journal(path, lock_path).add(file_info)
+
+
+def add_many_to_skip_list(
+    file_infos: list[dict[str, Any]], path: str = SKIP_LIST_PATH, lock_path: str = LOCK_PATH
+) -> int:
+    """
+    複数の転送済みファイルを1回の書き込みでスキップリストのジャーナルへ追記する
+
+    Returns:
+        追加した件数
+    """
+    if not file_infos:
+        return 0
+    return _journal(path, lock_path).add_many(file_infos)
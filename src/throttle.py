@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Graph API スロットリング制御モジュール
+
+429/503 を受けたら Retry-After（無ければジッタ付き指数バックオフ）の間、
+プロセス内の全ワーカーの送信を一時停止する。スロットリング中に各ワーカーが
+要求を送り続けてスロットリング期間を延ばすことを防ぐ。
+"""
+
+import random
+import threading
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from src.structured_logger import get_structured_logger
+
+# スロットリングを示すHTTPステータス
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+def parse_retry_after(value: Any) -> float | None:
+    """Retry-After ヘッダ（秒数または HTTP-date）を秒数に変換する"""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
+
+
+class ThrottleController:
+    """全ワーカーで共有するスロットリング状態（スレッドセーフ）"""
+
+    def __init__(self, max_retries: int = 5, backoff_base_sec: float = 1.0, backoff_max_sec: float = 60.0):
+        """
+        Args:
+            max_retries: スロットリングされた要求を再送する最大回数
+            backoff_base_sec: Retry-After が無い場合のバックオフ基準秒数
+            backoff_max_sec: バックオフの上限秒数
+        """
+        self.max_retries = max_retries
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self.throttled_requests = 0
+        self.timeouts = 0
+        self.seconds_lost = 0.0
+        self.worker_wait_sec = 0.0
+
+    def wait(self) -> float:
+        """一時停止中であれば解除まで待機する（待機した秒数を返す）"""
+        with self._lock:
+            remaining = self._resume_at - time.monotonic()
+        if remaining <= 0:
+            return 0.0
+        time.sleep(remaining)
+        with self._lock:
+            self.worker_wait_sec += remaining
+        return remaining
+
+    def backoff_delay(self, response: Any, attempt: int) -> float:
+        """待機秒数を決める（Retry-After 優先、無ければフルジッタ付き指数バックオフ）"""
+        retry_after = parse_retry_after(getattr(response, "headers", {}).get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        ceiling = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** max(0, attempt - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def record_throttle(self, response: Any, attempt: int = 1, url: str | None = None) -> float:
+        """
+        スロットリング応答を記録し、全ワーカーの送信を一時停止する
+
+        Returns:
+            一時停止する秒数
+        """
+        delay = self.backoff_delay(response, attempt)
+        with self._lock:
+            self.throttled_requests += 1
+            now = time.monotonic()
+            resume_at = now + delay
+            if resume_at > self._resume_at:
+                # 既存の停止期間と重ならない分だけを損失時間として加算する
+                self.seconds_lost += resume_at - max(now, self._resume_at)
+                self._resume_at = resume_at
+        logger = get_structured_logger("transfer")
+        logger.warning(
+            "スロットリング検出 - 全ワーカーを一時停止",
+            status_code=getattr(response, "status_code", None),
+            url=url,
+            delay_sec=round(delay, 2),
+            attempt=attempt,
+        )
+        return delay
+
+    def record_timeout(self) -> None:
+        """タイムアウトを記録する（一時停止はせず、同時転送数制御の混雑信号として使う）"""
+        with self._lock:
+            self.timeouts += 1
+
+    def congestion_events(self) -> int:
+        """混雑を示す事象（スロットリング・タイムアウト）の累計回数"""
+        with self._lock:
+            return self.throttled_requests + self.timeouts
+
+    def stats(self) -> dict[str, Any]:
+        """スロットリング回数と損失時間"""
+        with self._lock:
+            return {
+                "throttled_requests": self.throttled_requests,
+                "request_timeouts": self.timeouts,
+                "throttle_seconds_lost": round(self.seconds_lost, 2),
+                "throttle_worker_wait_sec": round(self.worker_wait_sec, 2),
+            }
+
+
+# 設定値管理を使用（プロセス内の全クライアントで共有する）
+try:
+    from src.config_manager import (
+        get_throttle_backoff_base_sec,
+        get_throttle_backoff_max_sec,
+        get_throttle_max_retries,
+    )
+
+    throttle_controller = ThrottleController(
+        get_throttle_max_retries(), get_throttle_backoff_base_sec(), get_throttle_backoff_max_sec()
+    )
+except ImportError:
+    # フォールバック（直接実行時など）
+    throttle_controller = ThrottleController()
@@ -1,13 +1,28 @@
-import math
 import os
+import posixpath
+import time
+import urllib.parse
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import requests
 from dotenv import load_dotenv
 
 from src.auth import GraphAuthenticator
-from src.skiplist import is_skipped, load_skip_list
+from src.chunk_pipeline import ChunkPrefetcher
+from src.chunk_tuner import ChunkSizeTuner
+from src.crawler import CrawlCheckpoint, DriveCrawler
+from src.delta_sync import DriveDeltaSync
+from src.download_urls import shared_download_url_cache
+from src.folder_cache import FolderCache, normalize_folder_path
+from src.graph_batch import GraphBatcher
+from src.http_session import PooledSession
+from src.skiplist import SkipIndex
 from src.structured_logger import get_structured_logger
+from src.throttle import throttle_controller
+from src.upload_sessions import UploadSessionStore
 
 # プロジェクトルートの.envを必ず読み込む（OS環境変数優先、なければ.env）
 env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
@@ -16,15 +31,97 @@ load_dotenv(env_path, override=False)
 
 # 絶対インポートに修正
 try:
-    from src.config_manager import get_chunk_size_mb, get_large_file_threshold_mb
+    from src.config_manager import (
+        get_adaptive_chunk_size,
+        get_chunk_prefetch_depth,
+        get_chunk_retry_count,
+        get_chunk_retry_wait_sec,
+        get_chunk_size_max_mb,
+        get_chunk_size_mb,
+        get_crawl_checkpoint_interval_sec,
+        get_crawl_max_workers,
+        get_crawl_page_size,
+        get_graph_batch_max_in_flight,
+        get_graph_batch_size,
+        get_graph_batch_wait_ms,
+        get_http_pool_maxsize,
+        get_http_retry_backoff_sec,
+        get_http_retry_total,
+        get_large_file_threshold_mb,
+        get_onedrive_crawl_snapshot_path,
+        get_sharepoint_crawl_snapshot_path,
+        get_upload_session_state_path,
+    )
 except ImportError:
 
+    def get_onedrive_crawl_snapshot_path() -> str:
+        return "logs/onedrive_crawl_snapshot.json"
+
+    def get_sharepoint_crawl_snapshot_path() -> str:
+        return "logs/sharepoint_crawl_snapshot.json"
+
     def get_chunk_size_mb() -> int:
         return 5
 
+    def get_crawl_max_workers() -> int:
+        return 8
+
+    def get_crawl_page_size() -> int:
+        return 999
+
+    def get_crawl_checkpoint_interval_sec() -> float:
+        return 30
+
+    def get_chunk_prefetch_depth() -> int:
+        return 2
+
+    def get_adaptive_chunk_size() -> bool:
+        return True
+
+    def get_chunk_size_max_mb() -> int:
+        return 60
+
+    def get_chunk_retry_count() -> int:
+        return 5
+
+    def get_chunk_retry_wait_sec() -> float:
+        return 2.0
+
     def get_large_file_threshold_mb() -> int:
         return 4
 
+    def get_http_pool_maxsize() -> int:
+        return 4
+
+    def get_http_retry_total() -> int:
+        return 3
+
+    def get_http_retry_backoff_sec() -> float:
+        return 0.5
+
+    def get_upload_session_state_path() -> str:
+        return "logs/upload_sessions.json"
+
+    def get_graph_batch_size() -> int:
+        return 20
+
+    def get_graph_batch_wait_ms() -> float:
+        return 20.0
+
+    def get_graph_batch_max_in_flight() -> int:
+        return 4
+
+
+def _build_destination_path(src_path: str, src_root: str, dst_root: str) -> str:
+    """OneDrive側のパスからSharePoint側のアップロード先パスを生成"""
+    rel_path = os.path.relpath(src_path, src_root)
+    return os.path.join(dst_root, rel_path).replace("\\", "/")
+
+
+def _encode_drive_path(path: str) -> str:
+    """ドライブのパスを区切り毎にパーセントエンコードする（"#"・"%"・空白などを含むフォルダ名用）"""
+    return "/".join(urllib.parse.quote(part) for part in path.split("/"))
+
 
 def _build_onedrive_download_url(base_url: str, encoded_path: str, onedrive_drive_id: str | None = None) -> str:
     """OneDriveダウンロードURL構築のヘルパー関数"""
@@ -35,9 +132,106 @@ def _build_onedrive_download_url(base_url: str, encoded_path: str, onedrive_driv
         return f"{base_url}/users/{user_principal}/drive/root:/{encoded_path}:/content"
 
 
+# クロール時に $select で取得する DriveItem のプロパティ（ダウンロードURL・ハッシュを含む）
+ONEDRIVE_ITEM_SELECT = "id,name,size,lastModifiedDateTime,file,folder,eTag,cTag,@microsoft.graph.downloadUrl"
+
+# delta で $select するプロパティ（ツリー構築用の parentReference・root・deleted を加える）
+ONEDRIVE_DELTA_SELECT = ONEDRIVE_ITEM_SELECT + ",parentReference,root,deleted"
+
+# 転送先（SharePoint）のクロールで $select するプロパティ（スキップリスト照合に必要なもののみ）
+SHAREPOINT_ITEM_SELECT = "id,name,size,lastModifiedDateTime,file,folder,eTag,cTag"
+SHAREPOINT_DELTA_SELECT = SHAREPOINT_ITEM_SELECT + ",parentReference,root,deleted"
+
+# チャンク単位でリトライするHTTPステータス
+RETRYABLE_CHUNK_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_CHUNK_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.HTTPError,
+)
+
+
+def _retry_after_seconds(response: Any) -> float | None:
+    """Retry-After ヘッダ（秒指定）を取得"""
+    if response is None:
+        return None
+    value = getattr(response, "headers", {}).get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _session_expiration(response: Any) -> str | None:
+    """チャンク応答（202）の本文から延長後のセッション有効期限を取得"""
+    if response is None:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    value = body.get("expirationDateTime") if isinstance(body, dict) else None
+    return value if isinstance(value, str) else None
+
+
+def _next_expected_offset(response: Any) -> int | None:
+    """アップロードセッション状態の nextExpectedRanges から次に送るべき先頭バイトを取得"""
+    if response is None or response.status_code != 200:
+        return None
+    ranges = response.json().get("nextExpectedRanges") or []
+    if not ranges:
+        return None
+    try:
+        return int(str(ranges[0]).split("-")[0])
+    except ValueError:
+        return None
+
+
 # OneDrive/SharePoint ディレクトリ再帰取得・転送ロジック雛形
 
 
+def _file_target(item: dict[str, Any], full_path: str) -> dict[str, Any]:
+    """DriveItem からファイルリストのレコードを作る（ハッシュがあれば保持する）"""
+    target = {
+        "name": item["name"],
+        "path": full_path,
+        "size": item.get("size"),
+        "lastModifiedDateTime": item.get("lastModifiedDateTime"),
+        "id": item.get("id"),
+    }
+    hashes = (item.get("file") or {}).get("hashes")
+    if hashes:
+        target["hashes"] = hashes
+    return target
+
+
+class _FolderDedup:
+    """
+    クロール結果のフォルダ毎の重複排除
+
+    同じフォルダのページは1つのワーカーが順に取得するため、クロール中の（最近ファイルが届いた）
+    フォルダの分のみキーを保持し、それより古いフォルダは捨てる（全件のキーをメモリに持たない）
+    """
+
+    def __init__(self, max_folders: int):
+        self.max_folders = max(1, max_folders)
+        self._folders: OrderedDict[str, set[Any]] = OrderedDict()
+
+    def first_seen(self, folder: str, key: Any) -> bool:
+        """フォルダ内で初めて見たキーか"""
+        keys = self._folders.get(folder)
+        if keys is None:
+            keys = self._folders[folder] = set()
+            if len(self._folders) > self.max_folders:
+                self._folders.popitem(last=False)
+        else:
+            self._folders.move_to_end(folder)
+        if key in keys:
+            return False
+        keys.add(key)
+        return True
+
+
 class GraphTransferClient:
     def upload_file_to_sharepoint(
         self,
@@ -84,27 +278,13 @@ class GraphTransferClient:
         # OneDriveからファイルをダウンロード
         src_path = file_info["path"]  # src_pathを最初に定義
 
-        # OneDriveファイルIDを使った直接アクセス方式に変更
+        # OneDriveファイルIDを使った直接アクセス方式（クロール時に取得したダウンロードURLを優先）
         onedrive_drive_id = os.getenv("SOURCE_ONEDRIVE_DRIVE_ID")
-        file_id = file_info.get("id")
-
-        if onedrive_drive_id and file_id:
-            # 方法1: ファイルIDを使って直接ダウンロードURL取得
-            file_url = f"{self.base_url}/drives/{onedrive_drive_id}/items/{file_id}"
-            file_resp = requests.get(file_url, headers=self._headers(), timeout=timeout)
+        download_stream = None
+        if file_info.get("id"):
+            download_stream = self._open_item_download_stream(file_info, onedrive_drive_id, timeout)
 
-            if file_resp.status_code == 200:
-                file_data = file_resp.json()
-                download_url = file_data.get("@microsoft.graph.downloadUrl")
-
-                if download_url:
-                    resp = requests.get(download_url, stream=True, timeout=timeout)
-                    resp.raise_for_status()
-                else:
-                    raise Exception(f"ダウンロードURLが取得できませんでした: {file_info['name']}")
-            else:
-                raise Exception(f"ファイル情報の取得に失敗しました: {file_resp.status_code} - {file_resp.text}")
-        else:
+        if download_stream is None:
             # フォールバック: 従来のパスベース方式
             import urllib.parse
 
@@ -117,12 +297,12 @@ class GraphTransferClient:
 
             logger = get_structured_logger("transfer")
             logger.debug("OneDrive download_url", download_url=download_url)
-            resp = requests.get(download_url, headers=self._headers(), stream=True, timeout=timeout)
+            resp = self.session.get(download_url, headers=self._headers(), stream=True, timeout=timeout)
             resp.raise_for_status()
+            download_stream = resp.raw
 
         # SharePoint側のアップロード先パスを生成
-        rel_path = os.path.relpath(src_path, src_root)
-        dst_path = os.path.join(dst_root, rel_path).replace("\\", "/")
+        dst_path = _build_destination_path(src_path, src_root, dst_root)
 
         # ディレクトリ部分を抽出してフォルダを事前作成
         dst_dir = os.path.dirname(dst_path)
@@ -132,7 +312,7 @@ class GraphTransferClient:
         upload_url = f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root:/{dst_path}:/content"
 
         # PUTでストリーミングアップロード
-        put_resp = requests.put(upload_url, headers=self._headers(), data=resp.raw, timeout=timeout)
+        put_resp = self.session.put(upload_url, headers=self._headers(), data=download_stream, timeout=timeout)
         put_resp.raise_for_status()
         return put_resp.json()
 
@@ -150,8 +330,8 @@ class GraphTransferClient:
             except ImportError:
                 skip_list_path = "logs/skip_list.json"
 
-        skip_list = load_skip_list(skip_list_path)
-        return [f for f in file_targets if not is_skipped(f, skip_list)]
+        skip_index = SkipIndex.load(skip_list_path)
+        return [f for f in file_targets if f not in skip_index]
 
     def save_file_targets(self, file_targets: list[dict[str, Any]], save_path: str) -> None:
         """
@@ -172,41 +352,112 @@ class GraphTransferClient:
         """
         OneDriveから指定フォルダ配下のファイルリストを取得（ディレクトリ構造保持）
         """
+        return list(self.iter_file_targets_from_onedrive(folder_path, user_principal_name, drive_id))
+
+    def iter_file_targets_from_onedrive(
+        self,
+        folder_path: str,
+        user_principal_name: str | None = None,
+        drive_id: str | None = None,
+        checkpoint: CrawlCheckpoint | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        OneDriveから指定フォルダ配下のファイルリストをページの取得順に1件ずつ返す
+        （全件をメモリに保持せずファイルリストへ逐次書き込むため）
+
+        checkpoint を指定した場合は途中経過を保存し、前回停止したクロールがあれば再開する
+        """
         logger = get_structured_logger("transfer")
         logger.info("OneDriveクロール開始", folder_path=folder_path)
-        items = self.list_onedrive_items_with_path(
+        items = self.iter_onedrive_items_with_path(
             user_principal_name=user_principal_name,
             drive_id=drive_id,
             folder_path=folder_path,
             _parent_path=folder_path,  # ルートパスを設定
+            checkpoint=checkpoint,
         )
 
-        file_targets = []
-        seen = set()
+        file_count = 0
+        # 重複（ページ境界で同じアイテムが返る場合など）はフォルダ内で排除する
+        dedup = _FolderDedup(get_crawl_max_workers() * 4)
 
-        for _i, item in enumerate(items):
+        for item in items:
             if "file" in item:
-                file_key = (item["full_path"], item.get("id"))
-                if file_key not in seen:
-                    seen.add(file_key)
-                    file_targets.append(
-                        {
-                            "name": item["name"],
-                            "path": item["full_path"],
-                            "size": item.get("size"),
-                            "lastModifiedDateTime": item.get("lastModifiedDateTime"),
-                            "id": item.get("id"),
-                        }
-                    )
+                folder, _, name = item["full_path"].rpartition("/")
+                if dedup.first_seen(folder, (name, item.get("id"))):
+                    # ダウンロードURLは有効期限が短いためファイルリストには保存せずキャッシュのみに保持
+                    self.download_urls.put(item.get("id"), item.get("@microsoft.graph.downloadUrl"))
+                    file_count += 1
+                    yield _file_target(item, item["full_path"])
 
                     # 1000件ごとに進捗ログを出力
-                    if len(file_targets) % 1000 == 0:
+                    if file_count % 1000 == 0:
                         progress_logger = get_structured_logger("transfer")
-                        progress_logger.info(f"OneDriveクロール進捗: {len(file_targets)}ファイル処理済み")
+                        progress_logger.info(f"OneDriveクロール進捗: {file_count}ファイル処理済み")
 
-        logger.info("OneDriveクロール完了", file_count=len(file_targets))
+        logger.info("OneDriveクロール完了", file_count=file_count)
+
+    def _sync_drive_delta(
+        self,
+        delta: DriveDeltaSync,
+        folder_path: str,
+        label: str,
+    ) -> list[dict[str, Any]]:
+        """delta で同期したツリーから folder_path 配下のファイルリストを作る"""
+        logger = get_structured_logger("transfer")
+        logger.info(f"{label}差分同期開始", folder_path=folder_path)
+        stats = delta.sync()
+        parent_path = folder_path.replace("\\", "/")
+        file_targets = [
+            _file_target(item, posixpath.join(parent_path, rel_path) if parent_path else rel_path)
+            for rel_path, item in delta.files(folder_path)
+        ]
+        logger.info(f"{label}差分同期完了", file_count=len(file_targets), **stats)
         return file_targets
 
+    def sync_onedrive_delta(
+        self,
+        folder_path: str,
+        state_path: str,
+        user_principal_name: str | None = None,
+        drive_id: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        OneDrive の delta クエリで指定フォルダ配下のファイルリストを取得する
+
+        初回はドライブ全体を列挙し、2回目以降は state_path に保存した deltaLink から
+        追加・変更・移動・削除のみを取得して保存済みのツリーに反映する
+        """
+        drive_base_url = self._onedrive_drive_url(user_principal_name, drive_id)
+        delta = DriveDeltaSync(
+            self.session,
+            self._headers,
+            f"{drive_base_url}/root/delta",
+            state_path,
+            select=ONEDRIVE_DELTA_SELECT,
+            on_item=lambda item: self.download_urls.put(item.get("id"), item.get("@microsoft.graph.downloadUrl")),
+            method="sync_onedrive_delta",
+            checkpoint_interval_sec=get_crawl_checkpoint_interval_sec(),
+        )
+        return self._sync_drive_delta(delta, folder_path, "OneDrive")
+
+    def sync_sharepoint_delta(self, folder_path: str, state_path: str) -> list[dict[str, Any]]:
+        """
+        転送先（SharePoint）の delta クエリで指定フォルダ配下のファイルリストを取得する
+
+        転送元とは別の状態ファイル（deltaLink・ツリー）を使い、2回目以降は差分のみ取得する
+        """
+        delta = DriveDeltaSync(
+            self.session,
+            self._headers,
+            f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root/delta",
+            state_path,
+            select=SHAREPOINT_DELTA_SELECT,
+            method="sync_sharepoint_delta",
+            checkpoint_interval_sec=get_crawl_checkpoint_interval_sec(),
+        )
+        return self._sync_drive_delta(delta, folder_path, "SharePoint")
+
     def __init__(
         self,
         client_id: str,
@@ -214,11 +465,70 @@ class GraphTransferClient:
         tenant_id: str,
         site_id: str,
         drive_id: str,
+        pool_maxsize: int | None = None,
     ):
         self.site_id = site_id
         self.drive_id = drive_id
         self.base_url = "https://graph.microsoft.com/v1.0"
         self.auth = GraphAuthenticator(client_id, client_secret, tenant_id)
+        # 全てのGraph/ダウンロード呼び出しで共有する接続プール（ワーカースレッド間で共有）
+        self.session = PooledSession(
+            pool_maxsize=pool_maxsize or get_http_pool_maxsize(),
+            max_retries=get_http_retry_total(),
+            backoff_factor=get_http_retry_backoff_sec(),
+            # 429/503 の一時停止はプロセス内の全クライアント・全ワーカーで共有する
+            throttle=throttle_controller,
+        )
+        # 大容量ファイルのアップロードセッション（再開用）の永続化先
+        self.upload_sessions = UploadSessionStore(get_upload_session_state_path())
+        # 再クロール時にタグが変わっていないフォルダの一覧を再利用するためのスナップショット（空文字で無効）
+        self.onedrive_crawl_snapshot_path = get_onedrive_crawl_snapshot_path()
+        self.sharepoint_crawl_snapshot_path = get_sharepoint_crawl_snapshot_path()
+        # 確認・作成済みの転送先フォルダ（ワーカースレッド間で共有）
+        self.folder_cache = FolderCache()
+        # クロール時に取得したダウンロードURL（同一プロセス内のクライアント間で共有）
+        self.download_urls = shared_download_url_cache
+        # メタデータ要求（アイテム取得・フォルダ存在確認）をまとめる $batch（1以下で無効）
+        batch_size = get_graph_batch_size()
+        self.batcher: GraphBatcher | None = (
+            GraphBatcher(
+                self.session,
+                self.base_url,
+                self._headers,
+                batch_size,
+                get_graph_batch_wait_ms(),
+                throttle=throttle_controller,
+                max_in_flight=get_graph_batch_max_in_flight(),
+            )
+            if batch_size > 1
+            else None
+        )
+
+    def connection_stats(self) -> dict[str, Any]:
+        """接続プールの新規接続数・再利用数（$batch 有効時はバッチ統計も）を返す"""
+        stats = self.session.connection_stats()
+        stats.update(self.download_urls.stats())
+        if self.session.throttle is not None:
+            stats.update(self.session.throttle.stats())
+        if self.batcher is not None:
+            stats.update(self.batcher.stats())
+        return stats
+
+    def close(self) -> None:
+        """$batch 送信スレッドと接続プールを解放する"""
+        if self.batcher is not None:
+            self.batcher.close()
+        self.session.close()
+
+    def _get_metadata(self, url: str, timeout=10) -> Any:
+        """
+        メタデータ取得のGET（$batch 有効時は他スレッドの要求とまとめて送信）
+
+        戻り値は status_code / json() / text を持つレスポンス
+        """
+        if self.batcher is not None:
+            return self.batcher.submit("GET", url).result()
+        return self.session.get(url, headers=self._headers(), timeout=timeout)
 
     def _acquire_token(self) -> str:
         return self.auth.get_access_token()
@@ -228,45 +538,51 @@ class GraphTransferClient:
 
     def list_drive_items(self, folder_path: str = "") -> list[dict[str, Any]]:
         """
-        指定フォルダ配下のアイテム（ファイル・フォルダ）を再帰的に取得
+        指定フォルダ配下のファイルを取得（転送先ドライブ）
+
+        フォルダを幅優先・並列に辿り、@odata.nextLink の全ページを取得する。
+        各アイテムには folder_path を先頭とするフルパス（"full_path"）を付与する。
         タイムアウト・エラー内容も出力
         """
-        items = []
-        url = f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root"
+        return list(self.iter_drive_items(folder_path))
+
+    def iter_drive_items(
+        self, folder_path: str = "", checkpoint: CrawlCheckpoint | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """list_drive_items と同じファイルをページの取得順に1件ずつ返す（checkpoint で途中経過を保存・再開する）"""
+        drive_base_url = f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}"
+        url = f"{drive_base_url}/root"
         if folder_path:
             url += f":/{folder_path}:"
         url += "/children"
-        try:
-            resp = requests.get(url, headers=self._headers(), timeout=10)
-            resp.raise_for_status()
-        except requests.exceptions.Timeout:
-            logger = get_structured_logger("transfer")
-            logger.warning(
-                "API応答がありません（タイムアウト）",
-                url=url,
-                method="list_drive_items",
-            )
-            return []
-        except requests.exceptions.RequestException as e:
-            logger = get_structured_logger("transfer")
-            logger.error(
-                "API リクエストエラー",
-                error=str(e),
-                response=getattr(e.response, "text", ""),
-                url=url,
-                method="list_drive_items",
-            )
-            return []
-        data = resp.json()
-        for item in data.get("value", []):
-            if item.get("folder"):
-                # フォルダは再帰のみ、itemsには追加しない（二重再帰バグ修正）
-                sub_path = os.path.join(folder_path, item["name"]) if folder_path else item["name"]
-                items.extend(self.list_drive_items(sub_path))
-            else:
-                # ファイルのみitemsに追加
-                items.append(item)
-        return items
+
+        crawler = self._drive_crawler(
+            drive_base_url, SHAREPOINT_ITEM_SELECT, "list_drive_items", self.sharepoint_crawl_snapshot_path
+        )
+        return crawler.iter_crawl(url, folder_path.replace("\\", "/").strip("/"), checkpoint=checkpoint)
+
+    def _drive_crawler(
+        self, drive_base_url: str, select: str | None, method: str, snapshot_path: str = ""
+    ) -> DriveCrawler:
+        """ドライブを並列・ページ単位でクロールするクローラ（子フォルダはアイテムIDで辿る）"""
+        return DriveCrawler(
+            self.session,
+            self._headers,
+            lambda item: f"{drive_base_url}/items/{item['id']}/children",
+            select=select,
+            page_size=get_crawl_page_size(),
+            max_workers=get_crawl_max_workers(),
+            method=method,
+            snapshot_path=snapshot_path or None,
+        )
+
+    def _onedrive_drive_url(self, user_principal_name: str | None, drive_id: str | None) -> str:
+        """OneDrive（転送元）のドライブの URL"""
+        if user_principal_name:
+            return f"{self.base_url}/users/{user_principal_name}/drive"
+        if drive_id:
+            return f"{self.base_url}/drives/{drive_id}"
+        raise ValueError("user_principal_name か drive_id のいずれかを指定してください")
 
     def list_onedrive_items_with_path(
         self,
@@ -276,68 +592,56 @@ class GraphTransferClient:
         _parent_path: str = "",
     ) -> list[dict[str, Any]]:
         """
-        OneDrive個人用のアイテム一覧取得（パス情報付き・再帰対応）
+        OneDrive個人用のアイテム一覧取得（パス情報付き）
+
+        フォルダを幅優先・並列に辿り、@odata.nextLink の全ページを取得する
         folder_path: API呼び出し用のパス
-        _parent_path: 内部的に使用する親パス（再帰用）
+        _parent_path: フルパスの先頭に付ける親パス
         """
-        items = []
-        if user_principal_name:
-            url = f"{self.base_url}/users/{user_principal_name}/drive/root"
-        elif drive_id:
-            url = f"{self.base_url}/drives/{drive_id}/root"
-        else:
-            raise ValueError("user_principal_name か drive_id のいずれかを指定してください")
+        return list(self.iter_onedrive_items_with_path(user_principal_name, drive_id, folder_path, _parent_path))
+
+    def iter_onedrive_items_with_path(
+        self,
+        user_principal_name: str | None = None,
+        drive_id: str | None = None,
+        folder_path: str = "",
+        _parent_path: str = "",
+        checkpoint: CrawlCheckpoint | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        list_onedrive_items_with_path と同じアイテムをページの取得順に1件ずつ返す
+
+        checkpoint: 途中経過の保存先（前回停止したクロールのチェックポイントがあれば再開する）
+        """
+        drive_base_url = self._onedrive_drive_url(user_principal_name, drive_id)
+        url = f"{drive_base_url}/root"
         if folder_path:
             url += f":/{folder_path}:"
         url += "/children"
 
-        try:
-            resp = requests.get(url, headers=self._headers(), timeout=10)
-            resp.raise_for_status()
-        except requests.exceptions.Timeout:
-            logger = get_structured_logger("transfer")
-            logger.warning(
-                "API応答がありません（タイムアウト）",
-                url=url,
-                method="list_onedrive_items_with_path",
-            )
-            return []
-        except requests.exceptions.RequestException as e:
-            logger = get_structured_logger("transfer")
-            logger.error(
-                "API リクエストエラー",
-                error=str(e),
-                response=getattr(e.response, "text", ""),
-                url=url,
-                method="list_onedrive_items_with_path",
-            )
-            return []
-        data = resp.json()
-        for item in data.get("value", []):
-            # フルパスを構築
-            current_path = os.path.join(_parent_path, item["name"]) if _parent_path else item["name"]
-            current_path = current_path.replace("\\", "/")
-
-            # アイテムにパス情報を追加
-            item_with_path = item.copy()
-            item_with_path["full_path"] = current_path
-
-            if item.get("folder"):
-                # フォルダの場合は再帰的に取得
-                sub_folder_path = os.path.join(folder_path, item["name"]) if folder_path else item["name"]
-                sub_folder_path = sub_folder_path.replace("\\", "/")
-                items.extend(
-                    self.list_onedrive_items_with_path(
-                        user_principal_name=user_principal_name,
-                        drive_id=drive_id,
-                        folder_path=sub_folder_path,
-                        _parent_path=current_path,
-                    )
-                )
-            else:
-                # ファイルの場合はリストに追加
-                items.append(item_with_path)
-        return items
+        crawler = self._drive_crawler(
+            drive_base_url, ONEDRIVE_ITEM_SELECT, "list_onedrive_items_with_path", self.onedrive_crawl_snapshot_path
+        )
+        return crawler.iter_crawl(url, _parent_path.replace("\\", "/"), checkpoint=checkpoint)
+
+    def get_sharepoint_item(
+        self, file_info: dict[str, Any], src_root: str = "TEST-Onedrive", dst_root: str = "TEST-Sharepoint"
+    ) -> dict[str, Any] | None:
+        """
+        OneDrive側のファイルに対応する転送先のアイテムを取得する（存在しなければ None）
+        """
+        return self._get_drive_item(_build_destination_path(file_info["path"], src_root, dst_root))
+
+    def _drive_item_url(self, dst_path: str) -> str:
+        return f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root:/{_encode_drive_path(dst_path)}"
+
+    def _get_drive_item(self, dst_path: str) -> dict[str, Any] | None:
+        """転送先のパスのアイテムを取得する（$batch 有効時は他スレッドの要求とまとめて送信）"""
+        resp = self._get_metadata(self._drive_item_url(dst_path))
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
 
     def create_folder(self, parent_path: str, folder_name: str) -> dict[str, Any]:
         """
@@ -352,7 +656,7 @@ class GraphTransferClient:
             "folder": {},
             "@microsoft.graph.conflictBehavior": "fail",
         }
-        resp = requests.post(url, headers=self._headers(), json=payload, timeout=10)
+        resp = self.session.post(url, headers=self._headers(), json=payload, timeout=10)
         if resp.status_code == 409:
             # 既に存在する場合は何もしない（正常終了扱い）
             logger = get_structured_logger("transfer")
@@ -364,37 +668,123 @@ class GraphTransferClient:
     def ensure_sharepoint_folder(self, folder_path: str) -> None:
         """
         SharePoint側で指定されたフォルダパスが存在しない場合、再帰的に作成する
+
+        確認・作成済みのフォルダはキャッシュし、以降は API を呼ばない
         """
         if not folder_path or folder_path == ".":
             return
 
         # パスを正規化
-        folder_path = folder_path.replace("\\", "/").strip("/")
+        folder_path = normalize_folder_path(folder_path)
         if not folder_path:
             return
+        if self.folder_cache.exists(folder_path):
+            return
 
         # 親ディレクトリから順に作成
         path_parts = folder_path.split("/")
-        current_path = ""
-
-        for part in path_parts:
-            parent_path = current_path
-            current_path = os.path.join(current_path, part).replace("\\", "/") if current_path else part
-
-            # フォルダの存在確認
-            check_url = f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root:/{current_path}"
+        prefixes = ["/".join(path_parts[: i + 1]) for i in range(len(path_parts))]
+
+        # $batch 有効時は未確認の階層の存在確認を先に投入し、1回の要求にまとめる
+        root_url = f"{self.base_url}/sites/{self.site_id}/drives/{self.drive_id}/root:"
+        check_futures = {}
+        if self.batcher is not None:
+            for prefix in prefixes:
+                if not self.folder_cache.exists(prefix) and not self.folder_cache.is_missing(prefix):
+                    check_futures[prefix] = self.batcher.submit("GET", f"{root_url}/{_encode_drive_path(prefix)}")
+
+        parent_missing = False
+        for prefix, part in zip(prefixes, path_parts, strict=True):
+            if self.folder_cache.exists(prefix):
+                continue
             try:
-                resp = requests.get(check_url, headers=self._headers(), timeout=10)
-                if resp.status_code == 404:
-                    # フォルダが存在しないので作成
-                    logger = get_structured_logger("transfer")
-                    logger.info("フォルダを作成", folder_path=current_path)
-                    self.create_folder(parent_path, part)
+                parent_missing = self._ensure_folder_segment(
+                    prefix, part, root_url, check_futures.get(prefix), parent_missing
+                )
             except Exception as e:
                 logger = get_structured_logger("transfer")
-                logger.warning("フォルダ確認/作成エラー", folder_path=current_path, error=str(e))
+                logger.warning("フォルダ確認/作成エラー", folder_path=prefix, error=str(e))
                 # エラーが発生しても処理を続行
 
+    def _ensure_folder_segment(
+        self, prefix: str, part: str, root_url: str, check_future: Any, parent_missing: bool
+    ) -> bool:
+        """
+        1階層分のフォルダを確認し、存在しなければ作成する
+
+        Returns:
+            この階層を新規作成したか（以降の階層は存在確認が不要）
+        """
+        # 同じフォルダの確認・作成は1ワーカーのみが行い、他はその結果を待つ
+        with self.folder_cache.creating(prefix):
+            if self.folder_cache.exists(prefix):
+                return False
+            missing = parent_missing or self.folder_cache.is_missing(prefix)
+            if not missing:
+                # フォルダの存在確認
+                if check_future is not None:
+                    resp = check_future.result()
+                else:
+                    resp = self.session.get(
+                        f"{root_url}/{_encode_drive_path(prefix)}", headers=self._headers(), timeout=10
+                    )
+                if resp.status_code == 200:
+                    self.folder_cache.mark_exists(prefix, resp.json().get("id"))
+                    return False
+                if resp.status_code != 404:
+                    return False
+            # フォルダが存在しないので作成
+            self.folder_cache.mark_missing(prefix)
+            logger = get_structured_logger("transfer")
+            logger.info("フォルダを作成", folder_path=prefix)
+            created = self.create_folder(prefix.rpartition("/")[0], part)
+            self.folder_cache.mark_created(prefix, (created or {}).get("id"))
+            return True
+
+    def prepare_sharepoint_folders(
+        self,
+        file_targets: Iterable[dict[str, Any]],
+        src_root: str = "TEST-Onedrive",
+        dst_root: str = "TEST-Sharepoint",
+        max_workers: int | None = None,
+    ) -> int:
+        """
+        転送対象から転送先フォルダを洗い出し、転送開始前に幅優先・並列で作成する
+
+        同じ深さのフォルダは親が揃っているため並列に作成でき、作成後は各ファイルの
+        ensure_sharepoint_folder がキャッシュのみで完了する。
+
+        Returns:
+            転送先フォルダ数
+        """
+        folders: set[str] = set()
+        for file_info in file_targets:
+            dst_dir = os.path.dirname(_build_destination_path(file_info["path"], src_root, dst_root))
+            if dst_dir and dst_dir != dst_root:
+                parts = normalize_folder_path(dst_dir).split("/")
+                folders.update("/".join(parts[: i + 1]) for i in range(len(parts)))
+
+        levels: dict[int, list[str]] = {}
+        for folder in folders:
+            levels.setdefault(folder.count("/"), []).append(folder)
+
+        logger = get_structured_logger("transfer")
+        start = time.time()
+        with ThreadPoolExecutor(
+            max_workers=max_workers or get_http_pool_maxsize(), thread_name_prefix="folder-prepass"
+        ) as executor:
+            for depth in sorted(levels):
+                list(executor.map(self.ensure_sharepoint_folder, sorted(levels[depth])))
+
+        logger.info(
+            "転送先フォルダ事前作成完了",
+            folder_count=len(folders),
+            depth=len(levels),
+            elapsed_sec=round(time.time() - start, 2),
+            **self.folder_cache.stats(),
+        )
+        return len(folders)
+
     def _upload_large_file_to_sharepoint(
         self,
         file_info,
@@ -409,48 +799,158 @@ class GraphTransferClient:
         file_size = file_info.get("size", 0)
 
         # SharePoint側のアップロード先パスを生成
-        rel_path = os.path.relpath(src_path, src_root)
-        dst_path = os.path.join(dst_root, rel_path).replace("\\", "/")
+        dst_path = _build_destination_path(src_path, src_root, dst_root)
 
         # ディレクトリ部分を抽出してフォルダを事前作成
         dst_dir = os.path.dirname(dst_path)
         if dst_dir and dst_dir != dst_root:
             self.ensure_sharepoint_folder(dst_dir)
 
-        # 1. アップロードセッションを作成
-        upload_session = self._create_upload_session(dst_path, file_size)
-        upload_url = upload_session["uploadUrl"]
+        # 1. アップロードセッションを作成（永続化済みのセッションがあれば途中から再開）
+        session_record, start_offset = self._resume_or_create_upload_session(file_info, dst_path, file_size)
+        upload_url = session_record["uploadUrl"]
+
+        # 2. OneDriveからファイルをダウンロード（ストリーム、再開時は確定済み位置から）
+        download_stream = self._get_onedrive_file_stream(file_info, timeout, start_byte=start_offset)
+
+        # 3. チャンク分割アップロード（読み出しスレッドが次のチャンクを先読みする）
+        #    チャンクサイズは計測したレイテンシに応じて自動調整する
+        tuner = ChunkSizeTuner(
+            get_chunk_size_mb() * 1024 * 1024,  # MBをバイトに変換
+            timeout,
+            max_size=get_chunk_size_max_mb() * 1024 * 1024,
+            adaptive=get_adaptive_chunk_size(),
+        )
+        offset = start_offset
+        chunk_index = 0
+        retry_stats = {"chunk_retries": 0, "retry_saved_bytes": 0}
+
+        with ChunkPrefetcher(download_stream, tuner.next_size, get_chunk_prefetch_depth()) as chunks:
+            for chunk_data in chunks:
+                if offset >= file_size:
+                    break
+                start_byte = offset
+                end_byte = min(start_byte + len(chunk_data) - 1, file_size - 1)
+                chunk_index += 1
+
+                logger = get_structured_logger("transfer")
+                logger.info(
+                    "チャンクアップロード中",
+                    chunk_index=chunk_index,
+                    chunk_size=end_byte - start_byte + 1,
+                    start_byte=start_byte,
+                    end_byte=end_byte,
+                    total_size=file_size,
+                )
+
+                # チャンクをアップロード（リトライが発生したらチャンクを縮める）
+                retries_before = retry_stats["chunk_retries"]
+                chunk_start = time.time()
+                chunk_response = self._upload_chunk(
+                    upload_url,
+                    chunk_data,
+                    start_byte,
+                    end_byte,
+                    file_size,
+                    timeout,
+                    retry_stats=retry_stats,
+                    dst_path=dst_path,
+                )
+                if retry_stats["chunk_retries"] > retries_before:
+                    tuner.record_failure()
+                else:
+                    tuner.record(len(chunk_data), time.time() - chunk_start)
+                offset = end_byte + 1
+                if offset < file_size:
+                    # 確定済みバイト位置を記録し、失敗・再起動時はここから再開する
+                    self.upload_sessions.update_offset(
+                        file_info, session_record, offset, _session_expiration(chunk_response)
+                    )
+
+        self.upload_sessions.remove(file_info)
+        logger = get_structured_logger("transfer")
+        logger.info("アップロード完了", dst_path=dst_path, resumed_from=start_offset, **retry_stats, **tuner.summary())
+        return {"message": "Upload completed via upload session", **retry_stats}
+
+    def _resume_or_create_upload_session(
+        self, file_info: dict[str, Any], dst_path: str, file_size: int
+    ) -> tuple[dict[str, Any], int]:
+        """
+        永続化済みのアップロードセッションを再開する。再開できない場合は新規作成する
 
-        # 2. OneDriveからファイルをダウンロード（ストリーム）
-        download_stream = self._get_onedrive_file_stream(file_info, timeout)
+        Returns:
+            (セッション記録, 送信を開始するバイト位置)
+        """
+        logger = get_structured_logger("transfer")
+        record = self.upload_sessions.get(file_info)
+        if record is not None and record.get("dst_path") == dst_path:
+            start_offset = self._query_upload_session_offset(record["uploadUrl"])
+            if start_offset is not None:
+                logger.info(
+                    "アップロードセッション再開",
+                    dst_path=dst_path,
+                    start_byte=start_offset,
+                    file_size=file_size,
+                )
+                record["next_offset"] = start_offset
+                return record, start_offset
+            logger.info("保存済みアップロードセッションが無効のため新規作成", dst_path=dst_path)
 
-        # 3. チャンク分割アップロード
-        chunk_size = get_chunk_size_mb() * 1024 * 1024  # MBをバイトに変換
-        total_chunks = math.ceil(file_size / chunk_size)
+        upload_session = self._create_upload_session(dst_path, file_size)
+        return self.upload_sessions.save(file_info, upload_session, dst_path), 0
 
-        for chunk_index in range(total_chunks):
-            start_byte = chunk_index * chunk_size
-            end_byte = min(start_byte + chunk_size - 1, file_size - 1)
-            chunk_data = download_stream.read(chunk_size)
+    def _query_upload_session_offset(self, upload_url: str) -> int | None:
+        """
+        アップロードセッションの nextExpectedRanges から次に送るべき先頭バイトを取得
 
-            if not chunk_data:
-                break
+        セッションが失効・削除されている場合は None
+        """
+        return _next_expected_offset(self._get_upload_session(upload_url))
 
+    def _get_upload_session(self, upload_url: str) -> Any:
+        """アップロードセッションの状態を取得（取得に失敗した場合は None）"""
+        try:
+            return self.session.get(upload_url, timeout=10)
+        except requests.exceptions.RequestException as e:
             logger = get_structured_logger("transfer")
-            logger.info(
-                "チャンクアップロード中",
-                chunk_index=chunk_index + 1,
-                total_chunks=total_chunks,
-                start_byte=start_byte,
-                end_byte=end_byte,
-            )
+            logger.warning("アップロードセッション状態の取得に失敗", error=str(e))
+            return None
 
-            # チャンクをアップロード
-            self._upload_chunk(upload_url, chunk_data, start_byte, end_byte, file_size, timeout)
+    def _chunk_resume_point(
+        self, upload_url: str, dst_path: str | None, end_byte: int, total_size: int
+    ) -> tuple[int | None, Any]:
+        """
+        チャンクの送信失敗後に、サーバ側で受信済みの位置を確認する
+
+        最終チャンクの後にセッションが見つからない（404）場合は、応答が失われただけでアップロードが完了し
+        セッションが閉じられた可能性があるため、転送先のアイテム（名前・サイズ）を確認する
 
+        Returns:
+            (次に送るべき先頭バイト（不明なら None）, 確認に使ったレスポンス)
+        """
+        response = self._get_upload_session(upload_url)
+        if dst_path and end_byte == total_size - 1 and response is not None and response.status_code == 404:
+            committed = self._find_committed_upload(dst_path, total_size)
+            if committed is not None:
+                return total_size, committed
+        return _next_expected_offset(response), response
+
+    def _find_committed_upload(self, dst_path: str, total_size: int) -> Any:
+        """転送先に名前・サイズが一致するアイテムがあればそのレスポンスを返す（なければ None）"""
+        try:
+            response = self._get_metadata(self._drive_item_url(dst_path))
+        except requests.exceptions.RequestException as e:
+            logger = get_structured_logger("transfer")
+            logger.warning("転送先アイテムの確認に失敗", dst_path=dst_path, error=str(e))
+            return None
+        if response.status_code != 200:
+            return None
+        item = response.json() or {}
+        if item.get("name") != posixpath.basename(dst_path) or item.get("size") != total_size:
+            return None
         logger = get_structured_logger("transfer")
-        logger.info("アップロード完了", dst_path=dst_path)
-        return {"message": "Upload completed via upload session"}
+        logger.info("最終チャンクの応答は失敗したがアップロードは完了していた", dst_path=dst_path, size=total_size)
+        return response
 
     def _create_upload_session(self, dst_path: str, file_size: int) -> dict[str, Any]:
         """
@@ -467,50 +967,93 @@ class GraphTransferClient:
             }
         }
 
-        response = requests.post(session_url, headers=self._headers(), json=payload, timeout=10)
+        response = self.session.post(session_url, headers=self._headers(), json=payload, timeout=10)
         response.raise_for_status()
         return response.json()
 
-    def _get_onedrive_file_stream(self, file_info, timeout=10):
+    def _get_onedrive_file_stream(self, file_info, timeout=10, start_byte=0):
         """
         OneDriveからファイルのダウンロードストリームを取得
+        start_byte 指定時は Range 要求でその位置以降のみを取得する
         """
-        # OneDriveファイルIDを使った直接アクセス方式
+        # OneDriveファイルIDを使った直接アクセス方式（クロール時に取得したダウンロードURLを優先）
         onedrive_drive_id = os.getenv("SOURCE_ONEDRIVE_DRIVE_ID")
-        file_id = file_info.get("id")
+        if file_info.get("id"):
+            stream = self._open_item_download_stream(file_info, onedrive_drive_id, timeout, start_byte)
+            if stream is not None:
+                return stream
 
-        if onedrive_drive_id and file_id:
-            # ファイルIDを使って直接ダウンロードURL取得
-            file_url = f"{self.base_url}/drives/{onedrive_drive_id}/items/{file_id}"
-            file_resp = requests.get(file_url, headers=self._headers(), timeout=10)
+        # フォールバック: 従来のパスベース方式
+        src_path = file_info["path"]
+        import urllib.parse
 
-            if file_resp.status_code == 200:
-                file_data = file_resp.json()
-                download_url = file_data.get("@microsoft.graph.downloadUrl")
+        encoded_path = "/".join([urllib.parse.quote(part) for part in src_path.split("/")])
 
-                if download_url:
-                    resp = requests.get(download_url, stream=True, timeout=timeout)
-                    resp.raise_for_status()
-                    return resp.raw
-                else:
-                    raise Exception(f"ダウンロードURLが取得できませんでした: {file_info['name']}")
-            else:
-                raise Exception(f"ファイル情報の取得に失敗しました: {file_resp.status_code} - {file_resp.text}")
+        if onedrive_drive_id:
+            download_url = _build_onedrive_download_url(self.base_url, encoded_path, onedrive_drive_id)
         else:
-            # フォールバック: 従来のパスベース方式
-            src_path = file_info["path"]
-            import urllib.parse
+            download_url = _build_onedrive_download_url(self.base_url, encoded_path, onedrive_drive_id)
 
-            encoded_path = "/".join([urllib.parse.quote(part) for part in src_path.split("/")])
+        return self._open_download_stream(download_url, self._headers(), start_byte, timeout)
 
-            if onedrive_drive_id:
-                download_url = _build_onedrive_download_url(self.base_url, encoded_path, onedrive_drive_id)
-            else:
-                download_url = _build_onedrive_download_url(self.base_url, encoded_path, onedrive_drive_id)
+    def _open_item_download_stream(self, file_info, onedrive_drive_id, timeout=10, start_byte=0):
+        """
+        アイテムIDからダウンロードストリームを開く
 
-            resp = requests.get(download_url, headers=self._headers(), stream=True, timeout=timeout)
-            resp.raise_for_status()
-            return resp.raw
+        クロール時にキャッシュしたダウンロードURLが有効期限内ならアイテム取得を省略する。
+        期限切れ、または 401/403 で拒否された場合のみアイテムを取得し直す。
+        キャッシュが無くドライブIDも無い場合は None（パスベース方式へフォールバック）
+        """
+        file_id = file_info["id"]
+        cached_url = self.download_urls.get(file_id)
+        if cached_url:
+            try:
+                return self._open_download_stream(cached_url, None, start_byte, timeout)
+            except requests.exceptions.HTTPError as e:
+                if getattr(e.response, "status_code", None) not in (401, 403):
+                    raise
+                logger = get_structured_logger("transfer")
+                logger.info("キャッシュ済みダウンロードURLが拒否されたため再取得", file_id=file_id)
+                self.download_urls.invalidate(file_id)
+
+        if not onedrive_drive_id:
+            return None
+
+        # ファイルIDを使って直接ダウンロードURL取得
+        file_url = f"{self.base_url}/drives/{onedrive_drive_id}/items/{file_id}"
+        file_resp = self._get_metadata(file_url, timeout=timeout)
+        if file_resp.status_code != 200:
+            raise Exception(f"ファイル情報の取得に失敗しました: {file_resp.status_code} - {file_resp.text}")
+
+        download_url = file_resp.json().get("@microsoft.graph.downloadUrl")
+        if not download_url:
+            raise Exception(f"ダウンロードURLが取得できませんでした: {file_info['name']}")
+        self.download_urls.put(file_id, download_url)
+        return self._open_download_stream(download_url, None, start_byte, timeout)
+
+    def _open_download_stream(self, download_url, headers=None, start_byte=0, timeout=10):
+        """
+        ダウンロードURLのストリームを開く
+        start_byte 指定時に Range が無視された（200応答）場合は先頭から読み捨てて位置を合わせる
+        """
+        request_headers = dict(headers or {})
+        if start_byte:
+            request_headers["Range"] = f"bytes={start_byte}-"
+
+        if request_headers:
+            resp = self.session.get(download_url, headers=request_headers, stream=True, timeout=timeout)
+        else:
+            resp = self.session.get(download_url, stream=True, timeout=timeout)
+        resp.raise_for_status()
+
+        if start_byte and resp.status_code != 206:
+            remaining = start_byte
+            while remaining > 0:
+                skipped = resp.raw.read(min(remaining, 1024 * 1024))
+                if not skipped:
+                    raise Exception(f"再開位置までダウンロードできませんでした: {start_byte} bytes")
+                remaining -= len(skipped)
+        return resp.raw
 
     def _upload_chunk(
         self,
@@ -520,15 +1063,68 @@ class GraphTransferClient:
         end_byte: int,
         total_size: int,
         timeout=10,
+        retry_stats: dict[str, int] | None = None,
+        dst_path: str | None = None,
     ):
         """
         チャンクデータをアップロードセッションURLにアップロード
-        """
-        headers = {
-            "Content-Range": f"bytes {start_byte}-{end_byte}/{total_size}",
-            "Content-Length": str(len(chunk_data)),
-        }
 
-        response = requests.put(upload_url, headers=headers, data=chunk_data, timeout=timeout)
-        response.raise_for_status()
-        return response
+        一時的な失敗（接続エラー・タイムアウト・408/429/5xx）はチャンク単位でリトライする。
+        リトライ前にセッションの受信済み位置を確認し、バッファ済みのチャンクから未送信部分のみを再送する。
+        dst_path を渡すと、最終チャンクの失敗後にセッションが閉じられていた場合に転送先のアイテムで完了を確認する。
+        """
+        max_attempts = max(1, get_chunk_retry_count())
+        offset = start_byte
+        data = chunk_data
+
+        for attempt in range(1, max_attempts + 1):
+            headers = {
+                "Content-Range": f"bytes {offset}-{end_byte}/{total_size}",
+                "Content-Length": str(len(data)),
+            }
+            try:
+                response = self.session.put(upload_url, headers=headers, data=data, timeout=timeout)
+                response.raise_for_status()
+                return response
+            except RETRYABLE_CHUNK_ERRORS as e:
+                error_response = getattr(e, "response", None)
+                status_code = getattr(error_response, "status_code", None)
+                if isinstance(e, requests.exceptions.HTTPError) and status_code not in RETRYABLE_CHUNK_STATUS:
+                    raise
+                if attempt == max_attempts:
+                    raise
+
+                wait_sec = _retry_after_seconds(error_response)
+                if wait_sec is None:
+                    wait_sec = get_chunk_retry_wait_sec() * (2 ** (attempt - 1))
+                logger = get_structured_logger("transfer")
+                logger.warning(
+                    "チャンクアップロード失敗 - チャンク単位でリトライ",
+                    start_byte=offset,
+                    end_byte=end_byte,
+                    status_code=status_code,
+                    error=str(e),
+                    attempt=attempt,
+                    max_attempts=max_attempts,
+                    wait_sec=wait_sec,
+                )
+                if retry_stats is not None:
+                    retry_stats["chunk_retries"] = retry_stats.get("chunk_retries", 0) + 1
+                    # ファイル全体のリトライなら再転送していた確定済みバイト数
+                    retry_stats["retry_saved_bytes"] = retry_stats.get("retry_saved_bytes", 0) + start_byte
+                time.sleep(wait_sec)
+
+                # サーバ側で受信済みの位置を確認し、未送信部分だけを再送する
+                next_offset, status_response = self._chunk_resume_point(upload_url, dst_path, end_byte, total_size)
+                if next_offset is None:
+                    continue
+                if next_offset > end_byte:
+                    # 失敗応答だったが実際にはチャンク全体が受理されていた（セッション状態・完了したアイテムを返す）
+                    return status_response
+                if next_offset < start_byte:
+                    raise Exception(
+                        f"アップロードセッションの受信位置が不正です: expected={start_byte}, actual={next_offset}"
+                    ) from e
+                data = chunk_data[next_offset - start_byte :]
+                offset = next_offset
+        return None
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+アップロードセッション永続化モジュール
+
+大容量ファイルのアップロードセッションURL・有効期限・確定済みバイト位置をファイル毎に保存し、
+チャンク失敗後のリトライや watchdog による再起動後も途中から転送を再開できるようにする
+"""
+
+import json
+import os
+import threading
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from src.filelock import FileLock
+
+# 有効期限ぎりぎりのセッションは再開中に失効するため使わない
+EXPIRY_MARGIN = timedelta(minutes=5)
+
+
+def session_key(file_info: dict[str, Any]) -> str:
+    """ファイルを一意に識別するキー（ID優先、無ければパス）"""
+    return str(file_info.get("id") or file_info["path"])
+
+
+def _parse_datetime(value: str | None) -> datetime | None:
+    """Graph の ISO 8601 日時（末尾Z）を datetime に変換"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+class UploadSessionStore:
+    """アップロードセッション状態のJSON永続化ストア（スレッド・プロセス間で共有可能）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 破損時は再開を諦めて新規セッションから転送する
+            return {}
+
+    def _save(self, sessions: dict[str, dict[str, Any]]) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(sessions, f, ensure_ascii=False, indent=2)
+        # 書き込み途中で強制終了されても既存の状態を壊さない
+        os.replace(tmp_path, self.path)
+
+    def _update(self, key: str, record: dict[str, Any] | None) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, FileLock(self.lock_path, timeout=10):
+            sessions = self._load()
+            if record is None:
+                if key not in sessions:
+                    return
+                sessions.pop(key)
+            else:
+                sessions[key] = record
+            self._save(sessions)
+
+    def get(self, file_info: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        再開可能なセッションを取得する
+
+        ソースファイルのサイズ・更新日時が変わった場合や有効期限切れの場合は None
+        """
+        with self._lock:
+            record = self._load().get(session_key(file_info))
+        if record is None:
+            return None
+        if record.get("file_size") != file_info.get("size") or record.get("lastModifiedDateTime") != file_info.get(
+            "lastModifiedDateTime"
+        ):
+            return None
+        expiration = _parse_datetime(record.get("expirationDateTime"))
+        if expiration is not None and expiration - EXPIRY_MARGIN <= datetime.now(UTC):
+            return None
+        return record
+
+    def save(
+        self,
+        file_info: dict[str, Any],
+        upload_session: dict[str, Any],
+        dst_path: str,
+        next_offset: int = 0,
+    ) -> dict[str, Any]:
+        """新しく作成したアップロードセッションを保存する"""
+        record = {
+            "uploadUrl": upload_session["uploadUrl"],
+            "expirationDateTime": upload_session.get("expirationDateTime"),
+            "dst_path": dst_path,
+            "src_path": file_info.get("path"),
+            "file_size": file_info.get("size"),
+            "lastModifiedDateTime": file_info.get("lastModifiedDateTime"),
+            "next_offset": next_offset,
+        }
+        self._update(session_key(file_info), record)
+        return record
+
+    def update_offset(
+        self,
+        file_info: dict[str, Any],
+        record: dict[str, Any],
+        next_offset: int,
+        expiration: str | None = None,
+    ) -> None:
+        """
+        確定済みバイト位置（次に送るべき先頭バイト）を記録する
+
+        Graph はチャンクを受理する度にセッションの有効期限を延長するため、
+        チャンク応答の expirationDateTime を渡された場合は保存済みの有効期限も更新する
+        """
+        record["next_offset"] = next_offset
+        if expiration:
+            record["expirationDateTime"] = expiration
+        self._update(session_key(file_info), record)
+
+    def remove(self, file_info: dict[str, Any]) -> None:
+        """完了または無効になったセッションを削除する"""
+        self._update(session_key(file_info), None)
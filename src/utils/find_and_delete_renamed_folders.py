@@ -16,15 +16,17 @@ SharePoint上のリネーム（例: 'XXXXX 1', 'XXXXX 2'）フォルダを抽出
 """
 
 import argparse
-import json
 import os
 import re
 import sys
+from contextlib import closing
 
 from dotenv import load_dotenv
 
 # プロジェクトルートをimportパスに追加（srcをimportルートにする）
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from src.config_manager import get_sharepoint_current_files_path
+from src.inventory import InventoryFile
 from src.transfer import GraphTransferClient
 
 # .env読み込み
@@ -47,9 +49,11 @@ def load_sharepoint_filelist(path=None):
     # プロジェクトルート基準でlogs/を参照
     if path is None:
         root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-        path = os.path.join(root, "logs/sharepoint_current_files.json")
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+        path = os.path.join(root, get_sharepoint_current_files_path())
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    # NDJSON（従来の JSON 配列も可）を1件ずつ読み込む
+    return InventoryFile(path)
 
 
 def find_renamed_folders(filelist):
@@ -81,15 +85,15 @@ def main():
         return
 
     # 削除実行
-    client = GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)
-    for f in renamed_folders:
-        try:
-            client.delete_sharepoint_item(f["id"])
-            if args.verbose:
-                pass
-        except Exception:
-            if args.verbose:
-                pass
+    with closing(GraphTransferClient(CLIENT_ID, CLIENT_SECRET, TENANT_ID, SITE_ID, DRIVE_ID)) as client:
+        for f in renamed_folders:
+            try:
+                client.delete_sharepoint_item(f["id"])
+                if args.verbose:
+                    pass
+            except Exception:
+                if args.verbose:
+                    pass
 
 
 if __name__ == "__main__":
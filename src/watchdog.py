@@ -25,7 +25,6 @@ usage:
 
 """
 
-import json
 import os
 import subprocess  # nosec B404
 import sys
@@ -34,6 +33,12 @@ from datetime import datetime
 
 from structured_logger import get_structured_logger
 
+# python src/watchdog.py として実行した場合も src パッケージを参照できるよう、プロジェクトルートを import パスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config_manager import get_onedrive_files_path, get_skip_list_path  # noqa: E402
+from src.inventory import count_inventory  # noqa: E402
+from src.skiplist import count_skip_list, skip_list_exists  # noqa: E402
+
 # 設定値
 MAIN_LOG_PATH = "logs/transfer_start_success_error.log"
 WATCHDOG_LOG_PATH = "logs/watchdog.log"
@@ -88,13 +93,17 @@ def format_time_diff(seconds):
 def is_transfer_remaining():
     """転送対象が残っているか判定（OneDrive総件数 > スキップリスト件数）"""
     try:
-        # OneDriveファイル数
-        with open("logs/onedrive_files.json", encoding="utf-8") as f:
-            onedrive_count = len(json.load(f))
+        # OneDriveファイル数（ファイルリストは展開せずに数える）
+        onedrive_files_path = get_onedrive_files_path()
+        if not os.path.exists(onedrive_files_path):
+            raise FileNotFoundError(onedrive_files_path)
+        onedrive_count = count_inventory(onedrive_files_path)
 
         # スキップリスト件数
-        with open("logs/skip_list.json", encoding="utf-8") as f:
-            skiplist_count = len(json.load(f))
+        skip_list_path = get_skip_list_path()
+        if not skip_list_exists(skip_list_path):
+            raise FileNotFoundError(skip_list_path)
+        skiplist_count = count_skip_list(skip_list_path)
 
         remaining = onedrive_count - skiplist_count
         log_watchdog(
@@ -168,8 +168,8 @@ def mock_upload_session_response():
 
 @pytest.fixture
 def mock_requests_get():
-    """requests.get のモック"""
-    with patch("requests.get") as mock:
+    """requests.Session.get のモック"""
+    with patch("requests.Session.get") as mock:
         mock.return_value.status_code = 200
         mock.return_value.json.return_value = {"value": []}
         mock.return_value.iter_content = lambda chunk_size: [b"test_content"]
@@ -179,8 +179,8 @@ def mock_requests_get():
 
 @pytest.fixture
 def mock_requests_post():
-    """requests.post のモック"""
-    with patch("requests.post") as mock:
+    """requests.Session.post のモック"""
+    with patch("requests.Session.post") as mock:
         mock.return_value.status_code = 201
         mock.return_value.json.return_value = {"id": "test_id", "name": "test_file.txt"}
         yield mock
@@ -188,8 +188,8 @@ def mock_requests_post():
 
 @pytest.fixture
 def mock_requests_put():
-    """requests.put のモック"""
-    with patch("requests.put") as mock:
+    """requests.Session.put のモック"""
+    with patch("requests.Session.put") as mock:
         mock.return_value.status_code = 200
         mock.return_value.json.return_value = {"id": "test_id", "name": "test_file.txt"}
         yield mock
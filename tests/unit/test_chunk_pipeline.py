@@ -0,0 +1,126 @@
+"""
+チャンク先読みパイプラインのテスト
+"""
+
+import io
+import threading
+import time
+
+import pytest
+
+from src.chunk_pipeline import ChunkPrefetcher, read_exact
+
+
+class _TrickleStream:
+    """1回の read で最大 step バイトしか返さないストリーム"""
+
+    def __init__(self, data: bytes, step: int):
+        self._buffer = io.BytesIO(data)
+        self.step = step
+
+    def read(self, size: int) -> bytes:
+        return self._buffer.read(min(size, self.step))
+
+
+class _FailingStream:
+    """指定回数読み出した後に例外を送出するストリーム"""
+
+    def __init__(self, fail_after: int):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def read(self, size: int) -> bytes:
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise ConnectionError("download interrupted")
+        return b"a" * size
+
+
+class TestReadExact:
+    """read_exact 関数のテスト"""
+
+    @pytest.mark.unit
+    def test_read_exact_joins_short_reads(self):
+        """短い読み出しの結合テスト"""
+        # 検証対象: read_exact()
+        # 目的: ソケットからの短い読み出しを結合して指定サイズのチャンクを返すことを確認
+        stream = _TrickleStream(b"0123456789", step=3)
+
+        assert read_exact(stream, 8) == b"01234567"
+        assert read_exact(stream, 8) == b"89"
+        assert read_exact(stream, 8) == b""
+
+
+class TestChunkPrefetcher:
+    """ChunkPrefetcher クラスのテスト"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("depth", [0, 1, 3])
+    def test_chunks_preserve_order_and_content(self, depth):
+        """チャンク順序・内容テスト"""
+        # 検証対象: ChunkPrefetcher.__iter__()
+        # 目的: 先読みの有無に関わらず同じ順序・サイズでチャンクが得られることを確認
+        data = bytes(range(256)) * 10
+        stream = _TrickleStream(data, step=100)
+
+        with ChunkPrefetcher(stream, chunk_size=1000, depth=depth) as prefetcher:
+            chunks = list(prefetcher)
+
+        assert [len(c) for c in chunks] == [1000, 1000, 560]
+        assert b"".join(chunks) == data
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("depth", [0, 2])
+    def test_callable_chunk_size(self, depth):
+        """可変チャンクサイズテスト"""
+        # 検証対象: ChunkPrefetcher._next_size()
+        # 目的: チャンクサイズ関数の戻り値が読み出し毎に反映され、短いチャンクで終了することを確認
+        sizes = iter([100, 200, 400, 400])
+        stream = _TrickleStream(b"z" * 500, step=50)
+
+        with ChunkPrefetcher(stream, lambda: next(sizes), depth=depth) as prefetcher:
+            chunks = list(prefetcher)
+
+        assert [len(c) for c in chunks] == [100, 200, 200]
+
+    @pytest.mark.unit
+    def test_reader_runs_ahead_of_consumer(self):
+        """先読み動作テスト"""
+        # 検証対象: ChunkPrefetcher._reader()
+        # 目的: 消費側が処理中でも読み出しスレッドがバッファ上限まで先読みすることを確認
+        stream = _TrickleStream(b"x" * 5000, step=1000)
+        reads_before_consume = []
+
+        with ChunkPrefetcher(stream, chunk_size=1000, depth=2) as prefetcher:
+            iterator = iter(prefetcher)
+            next(iterator)
+            time.sleep(0.2)  # アップロード処理中を想定
+            reads_before_consume.append(stream._buffer.tell())
+            rest = list(iterator)
+
+        # 消費済み1 + バッファ2 + 格納待ち1 = 最大4チャンクまで先読みされる
+        assert reads_before_consume[0] >= 3000
+        assert len(rest) == 4
+
+    @pytest.mark.unit
+    def test_reader_exception_propagates(self):
+        """読み出し例外の伝播テスト"""
+        # 検証対象: ChunkPrefetcher.__iter__()
+        # 目的: ダウンロード側の例外がアップロード側のスレッドで再送出されることを確認
+        stream = _FailingStream(fail_after=2)
+
+        with pytest.raises(ConnectionError, match="download interrupted"):
+            with ChunkPrefetcher(stream, chunk_size=10, depth=2) as prefetcher:
+                list(prefetcher)
+
+    @pytest.mark.unit
+    def test_close_stops_reader_thread(self):
+        """途中終了時のスレッド停止テスト"""
+        # 検証対象: ChunkPrefetcher.close()
+        # 目的: アップロード失敗で途中終了しても読み出しスレッドが残らないことを確認
+        stream = _TrickleStream(b"y" * 100000, step=1000)
+
+        with ChunkPrefetcher(stream, chunk_size=1000, depth=1) as prefetcher:
+            next(iter(prefetcher))
+
+        assert not any(t.name == "chunk-prefetch" and t.is_alive() for t in threading.enumerate())
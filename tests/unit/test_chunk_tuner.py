@@ -0,0 +1,108 @@
+"""
+チャンクサイズ自動調整のテスト
+"""
+
+import pytest
+
+from src.chunk_tuner import CHUNK_ALIGNMENT, MAX_CHUNK_SIZE, ChunkSizeTuner, align_chunk_size
+
+MIB = 1024 * 1024
+
+
+class TestAlignChunkSize:
+    """align_chunk_size 関数のテスト"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        ("size", "expected"),
+        [
+            (5 * MIB, 5 * MIB),
+            (CHUNK_ALIGNMENT * 3 + 1, CHUNK_ALIGNMENT * 3),
+            (1, CHUNK_ALIGNMENT),
+            (100 * MIB, MAX_CHUNK_SIZE),
+        ],
+    )
+    def test_align_chunk_size(self, size, expected):
+        """320KiB 境界への丸めテスト"""
+        # 検証対象: align_chunk_size()
+        # 目的: チャンクサイズが常に 320KiB の倍数かつ Graph の上限（60MiB 未満）に収まることを確認
+        assert align_chunk_size(size) == expected
+        assert MAX_CHUNK_SIZE < 60 * MIB
+        assert MAX_CHUNK_SIZE % CHUNK_ALIGNMENT == 0
+
+
+class TestChunkSizeTuner:
+    """ChunkSizeTuner クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_grows_on_fast_link(self):
+        """高速回線での拡大テスト"""
+        # 検証対象: ChunkSizeTuner.record()
+        # 目的: 所要時間が目標より十分短い場合にチャンクサイズが上限まで倍々に拡大することを確認
+        tuner = ChunkSizeTuner(5 * MIB, timeout_sec=10, max_size=20 * MIB)
+
+        tuner.record(5 * MIB, 0.1)
+        assert tuner.next_size() == 10 * MIB
+        tuner.record(10 * MIB, 0.1)
+        tuner.record(20 * MIB, 0.1)
+        assert tuner.next_size() == 20 * MIB
+
+    @pytest.mark.unit
+    def test_shrinks_when_slow(self):
+        """低速回線での縮小テスト"""
+        # 検証対象: ChunkSizeTuner.record()
+        # 目的: 所要時間が目標（timeout_sec × 0.25）を超えた場合に目標内に収まるサイズへ縮むことを確認
+        tuner = ChunkSizeTuner(10 * MIB, timeout_sec=10)
+
+        tuner.record(10 * MIB, 5.0)
+
+        assert tuner.next_size() == 5 * MIB
+        assert tuner.next_size() % CHUNK_ALIGNMENT == 0
+
+    @pytest.mark.unit
+    def test_failure_halves_size(self):
+        """タイムアウト時の縮小テスト"""
+        # 検証対象: ChunkSizeTuner.record_failure()
+        # 目的: リトライ発生時にチャンクサイズが半減し、下限（320KiB）を下回らないことを確認
+        tuner = ChunkSizeTuner(CHUNK_ALIGNMENT * 2, timeout_sec=10)
+
+        tuner.record_failure()
+        tuner.record_failure()
+
+        assert tuner.next_size() == CHUNK_ALIGNMENT
+
+    @pytest.mark.unit
+    def test_static_mode_keeps_size_and_reports(self):
+        """固定モードテスト"""
+        # 検証対象: ChunkSizeTuner.summary()
+        # 目的: 自動調整無効時もサイズは固定のまま、チャンクサイズの集計と MB/s が記録されることを確認
+        tuner = ChunkSizeTuner(5 * MIB, timeout_sec=10, adaptive=False)
+
+        tuner.record(5 * MIB, 0.5)
+        tuner.record_failure()
+        tuner.record(1 * MIB, 0.1)
+
+        summary = tuner.summary()
+        assert tuner.next_size() == 5 * MIB
+        assert summary["chunk_count"] == 2
+        assert summary["chunk_size_min_kib"] == 1024
+        assert summary["chunk_size_max_kib"] == 5 * 1024
+        assert summary["chunk_size_final_kib"] == 5 * 1024
+        assert summary["chunk_sizes_distinct_kib"] == [1024, 5 * 1024]
+        assert summary["uploaded_bytes"] == 6 * MIB
+        assert summary["upload_mb_per_sec"] == 10.0
+
+    @pytest.mark.unit
+    def test_summary_does_not_grow_with_chunks(self):
+        """集計サイズテスト"""
+        # 検証対象: ChunkSizeTuner.summary()
+        # 目的: チャンク数が多くてもチャンク毎のサイズを並べず、件数と採用したサイズの種類のみを記録することを確認
+        tuner = ChunkSizeTuner(5 * MIB, timeout_sec=10, adaptive=False)
+
+        for _ in range(1000):
+            tuner.record(5 * MIB, 0.5)
+        tuner.record(MIB, 0.1)
+
+        summary = tuner.summary()
+        assert summary["chunk_count"] == 1001
+        assert summary["chunk_sizes_distinct_kib"] == [1024, 5 * 1024]
@@ -0,0 +1,100 @@
+"""
+AdaptiveConcurrencyLimiter のテスト
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.concurrency import AdaptiveConcurrencyLimiter
+from src.throttle import ThrottleController
+
+
+def _complete(limiter, count, elapsed=1.0, size=0):
+    """指定回数の転送を完了させる"""
+    for _ in range(count):
+        limiter.acquire()
+        limiter.release(elapsed, size)
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """AdaptiveConcurrencyLimiter クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_additive_increase_up_to_ceiling(self):
+        """加算増加テスト"""
+        # 検証対象: AdaptiveConcurrencyLimiter.release()
+        # 目的: 現在の上限分の転送が成功するごとに1ずつ増え、上限値を超えないことを確認
+        limiter = AdaptiveConcurrencyLimiter(2, 4)
+
+        _complete(limiter, 2)
+        assert limiter.limit == 3
+        _complete(limiter, 3)
+        assert limiter.limit == 4
+        _complete(limiter, 20)
+        assert limiter.limit == 4
+        assert limiter.stats()["concurrency_increases"] == 2
+
+    @pytest.mark.unit
+    def test_multiplicative_decrease_on_throttle(self):
+        """乗算減少テスト"""
+        # 検証対象: AdaptiveConcurrencyLimiter.release()
+        # 目的: 429/503・タイムアウトの発生後は上限が半分になり、クールダウン中は続けて減らないことを確認
+        throttle = ThrottleController()
+        limiter = AdaptiveConcurrencyLimiter(8, 16, throttle=throttle)
+
+        throttle.record_throttle(MagicMock(status_code=429, headers={"Retry-After": "0"}))
+        _complete(limiter, 1)
+        assert limiter.limit == 4
+        throttle.record_timeout()
+        _complete(limiter, 1)
+        assert limiter.limit == 4
+
+        stats = limiter.stats()
+        assert stats["concurrency_decreases"] == 1
+        assert stats["concurrency_limit_min"] == 4
+        assert stats["concurrency_limit_max"] == 8
+
+    @pytest.mark.unit
+    def test_no_increase_while_latency_degraded(self):
+        """レイテンシ悪化時の抑制テスト"""
+        # 検証対象: AdaptiveConcurrencyLimiter.release()
+        # 目的: 1MiB あたりのレイテンシが基準の許容倍率を超えている間は上限を増やさないことを確認
+        limiter = AdaptiveConcurrencyLimiter(1, 8, latency_tolerance=2.0)
+        _complete(limiter, 1, elapsed=1.0, size=4 * 1024 * 1024)
+        assert limiter.limit == 2
+
+        _complete(limiter, 10, elapsed=40.0, size=4 * 1024 * 1024)
+        assert limiter.limit == 2
+
+    @pytest.mark.unit
+    def test_fixed_limit_when_not_adaptive(self):
+        """固定上限テスト"""
+        # 検証対象: AdaptiveConcurrencyLimiter.acquire()
+        # 目的: 自動調整無効時は開始値のまま、同時実行数が上限を超えないことを確認
+        limiter = AdaptiveConcurrencyLimiter(2, 8, adaptive=False)
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal in_flight, peak
+            limiter.acquire()
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            limiter.release(0.01)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak <= 2
+        assert limiter.limit == 2
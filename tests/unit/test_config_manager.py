@@ -168,6 +168,27 @@ class TestConfigManager:
             # 呼び出し回数を確認
             assert mock_get_config.call_count == 7
 
+    def test_get_http_pool_maxsize(self):
+        """接続プールサイズ取得テスト"""
+        # 検証対象: get_http_pool_maxsize()
+        # 目的: 明示値を優先し、0の場合は両レーンの同時転送数の上限の合計に合わせることを確認
+        from src.config_manager import get_http_pool_maxsize
+
+        settings = {
+            "http_pool_maxsize": "12",
+            "max_parallel_transfers": 4,
+            "max_parallel_transfers_ceiling": 10,
+            "large_file_parallel_transfers": 2,
+        }
+        with patch("src.config_manager.get_config", side_effect=lambda key, default, env: settings.get(key, default)):
+            assert get_http_pool_maxsize() == 12
+
+            settings["http_pool_maxsize"] = 0
+            assert get_http_pool_maxsize() == 12
+
+            settings["adaptive_concurrency"] = "false"
+            assert get_http_pool_maxsize() == 6
+
 
 class TestSecureConfigManager:
     """SecureConfigManagerクラスのテストクラス"""
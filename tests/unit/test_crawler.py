@@ -0,0 +1,273 @@
+"""
+DriveCrawler のテスト
+"""
+
+import json
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.crawler import CHECKPOINT_SUFFIX, CrawlCheckpoint, DriveCrawler
+from src.inventory import InventoryWriter, count_inventory, iter_inventory
+
+BASE = "https://graph.microsoft.com/v1.0/drives/d"
+
+
+def _page(values, next_link=None):
+    """children 応答のモック"""
+    resp = MagicMock()
+    resp.raise_for_status.return_value = None
+    data = {"value": values}
+    if next_link:
+        data["@odata.nextLink"] = next_link
+    resp.json.return_value = data
+    return resp
+
+
+def _crawler(session, **kwargs):
+    return DriveCrawler(
+        session,
+        lambda: {"Authorization": "Bearer t"},
+        lambda item: f"{BASE}/items/{item['id']}/children",
+        select="id,name,file,folder",
+        page_size=2,
+        **kwargs,
+    )
+
+
+class TestDriveCrawler:
+    """DriveCrawler クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_follows_next_link_and_subfolders(self):
+        """ページング・子フォルダ追跡テスト"""
+        # 検証対象: DriveCrawler.crawl()
+        # 目的: @odata.nextLink の全ページと子フォルダを辿り、相対パス付きのファイルを返すことを確認
+        pages = {
+            f"{BASE}/root/children": _page(
+                [{"id": "f1", "name": "docs", "folder": {"childCount": 1}}, {"id": "a", "name": "a.txt", "file": {}}],
+                next_link=f"{BASE}/root/children?$skiptoken=2",
+            ),
+            f"{BASE}/root/children?$skiptoken=2": _page([{"id": "b", "name": "b.txt", "file": {}}]),
+            f"{BASE}/items/f1/children": _page([{"id": "c", "name": "c.txt", "file": {}}]),
+        }
+        session = MagicMock()
+        session.get.side_effect = lambda url, **kwargs: pages[url]
+
+        crawler = _crawler(session)
+        files = crawler.crawl(f"{BASE}/root/children", "root")
+
+        assert sorted(f["full_path"] for f in files) == ["root/a.txt", "root/b.txt", "root/docs/c.txt"]
+        first_kwargs = session.get.call_args_list[0].kwargs
+        assert first_kwargs["params"] == {"$top": 2, "$select": "id,name,file,folder"}
+        next_call = next(c for c in session.get.call_args_list if "skiptoken" in c.args[0])
+        assert next_call.kwargs["params"] is None
+        stats = crawler.stats.as_dict()
+        assert (stats["folders"], stats["pages"], stats["items"]) == (2, 3, 4)
+
+    @pytest.mark.unit
+    def test_folders_fetched_in_parallel(self):
+        """並列取得テスト"""
+        # 検証対象: DriveCrawler.crawl()
+        # 目的: 同じ階層の複数フォルダが並列に取得されることを確認
+        folders = [{"id": f"f{i}", "name": f"dir{i}", "folder": {"childCount": 1}} for i in range(4)]
+        barrier = threading.Barrier(4, timeout=5)
+
+        def get(url, **kwargs):
+            if url.endswith("/root/children"):
+                return _page(folders)
+            # 4フォルダが同時に取得されなければ Barrier がタイムアウトする
+            barrier.wait()
+            return _page([{"id": url, "name": "x.txt", "file": {}}])
+
+        session = MagicMock()
+        session.get.side_effect = get
+
+        files = _crawler(session, max_workers=4).crawl(f"{BASE}/root/children")
+
+        assert len(files) == 4
+
+    @pytest.mark.unit
+    def test_failed_folder_skipped(self):
+        """取得失敗時の継続テスト"""
+        # 検証対象: DriveCrawler.crawl()
+        # 目的: 一部のフォルダの取得に失敗してもクロールを継続し、エラー件数を記録することを確認
+        session = MagicMock()
+
+        def get(url, **kwargs):
+            if url.endswith("/root/children"):
+                bad_folder = {"id": "bad", "name": "bad", "folder": {"childCount": 1}}
+                return _page([bad_folder, {"id": "a", "name": "a.txt", "file": {}}])
+            raise requests.exceptions.Timeout("timeout")
+
+        session.get.side_effect = get
+        crawler = _crawler(session)
+
+        files = crawler.crawl(f"{BASE}/root/children")
+
+        assert [f["name"] for f in files] == ["a.txt"]
+        assert crawler.stats.errors == 1
+
+
+class TestCrawlSnapshot:
+    """フォルダのタグによる再クロール省略のテスト"""
+
+    ROOT = f"{BASE}/root/children"
+
+    def _pages(self, docs_tag, archive_tag):
+        return {
+            self.ROOT: _page(
+                [
+                    {"id": "docs", "name": "docs", "folder": {"childCount": 1}, "eTag": docs_tag},
+                    {"id": "a", "name": "a.txt", "file": {}},
+                ]
+            ),
+            f"{BASE}/items/docs/children": _page(
+                [
+                    {"id": "archive", "name": "archive", "folder": {"childCount": 1}, "eTag": archive_tag},
+                    {"id": "b", "name": "b.txt", "file": {}, "@microsoft.graph.downloadUrl": "https://dl/b"},
+                ]
+            ),
+            f"{BASE}/items/archive/children": _page([{"id": "c", "name": "c.txt", "file": {}}]),
+        }
+
+    def _crawl(self, tmp_path, pages):
+        session = MagicMock()
+        session.get.side_effect = lambda url, **kwargs: pages[url]
+        crawler = _crawler(session, snapshot_path=str(tmp_path / "snapshot.json"))
+        files = crawler.crawl(self.ROOT, "root")
+        fetched = sorted(call.args[0] for call in session.get.call_args_list)
+        return crawler, sorted(f["full_path"] for f in files), fetched
+
+    @pytest.mark.unit
+    def test_unchanged_subtree_reused(self, tmp_path):
+        """タグ未変更フォルダの再利用テスト"""
+        # 検証対象: DriveCrawler.crawl()（snapshot_path 指定時）
+        # 目的: タグが前回と同じフォルダは配下を取得せず、前回の一覧（ダウンロードURLを除く）を再利用することを確認
+        expected = ["root/a.txt", "root/docs/archive/c.txt", "root/docs/b.txt"]
+        self._crawl(tmp_path, self._pages("v1", "v1"))
+
+        crawler, files, fetched = self._crawl(tmp_path, self._pages("v1", "v1"))
+
+        assert files == expected
+        assert fetched == [self.ROOT]
+        assert crawler.stats.reused_folders == 2
+        with open(tmp_path / "snapshot.json", encoding="utf-8") as f:
+            assert "downloadUrl" not in f.read()
+
+    @pytest.mark.unit
+    def test_changed_folder_refetched(self, tmp_path):
+        """タグ変更フォルダの再取得テスト"""
+        # 検証対象: DriveCrawler.crawl()（snapshot_path 指定時）
+        # 目的: タグが変わったフォルダのみ再取得し、その配下の未変更フォルダは再利用することを確認
+        self._crawl(tmp_path, self._pages("v1", "v1"))
+
+        _, files, fetched = self._crawl(tmp_path, self._pages("v2", "v1"))
+
+        assert files == ["root/a.txt", "root/docs/archive/c.txt", "root/docs/b.txt"]
+        assert fetched == [f"{BASE}/items/docs/children", self.ROOT]
+
+    @pytest.mark.unit
+    def test_snapshot_not_saved_on_error(self, tmp_path):
+        """取得失敗時のスナップショット保持テスト"""
+        # 検証対象: DriveCrawler.crawl()（snapshot_path 指定時）
+        # 目的: 取得に失敗したフォルダがある場合は不完全な一覧でスナップショットを上書きしないことを確認
+        self._crawl(tmp_path, self._pages("v1", "v1"))
+        pages = self._pages("v2", "v2")
+        pages[f"{BASE}/items/archive/children"] = MagicMock(
+            raise_for_status=MagicMock(side_effect=requests.exceptions.HTTPError("500"))
+        )
+        self._crawl(tmp_path, pages)
+
+        _, files, fetched = self._crawl(tmp_path, self._pages("v1", "v1"))
+
+        assert files == ["root/a.txt", "root/docs/archive/c.txt", "root/docs/b.txt"]
+        assert fetched == [self.ROOT]
+
+
+class TestCrawlCheckpoint:
+    """クロールのチェックポイント（途中経過の保存・再開）のテスト"""
+
+    ROOT = f"{BASE}/root/children"
+
+    def _pages(self):
+        return {
+            self.ROOT: _page(
+                [{"id": "f1", "name": "docs", "folder": {"childCount": 1}}, {"id": "a", "name": "a.txt", "file": {}}]
+            ),
+            f"{BASE}/items/f1/children": _page(
+                [{"id": "b", "name": "b.txt", "file": {}}], next_link=f"{BASE}/items/f1/children?$skiptoken=2"
+            ),
+            f"{BASE}/items/f1/children?$skiptoken=2": _page([{"id": "c", "name": "c.txt", "file": {}}]),
+        }
+
+    def _crawl(self, tmp_path, session, stop_after=None):
+        """ファイルリストに書き込みながらクロールする（stop_after 件で停止を模擬）"""
+        path = str(tmp_path / "files.ndjson")
+        with InventoryWriter(path) as writer:
+            checkpoint = CrawlCheckpoint(path + CHECKPOINT_SUFFIX, writer, interval_sec=0)
+            for item in _crawler(session, max_workers=1).iter_crawl(self.ROOT, "root", checkpoint=checkpoint):
+                if writer.count == stop_after:
+                    raise KeyboardInterrupt
+                writer.write({"path": item["full_path"]})
+        return path
+
+    @pytest.mark.unit
+    def test_resume_from_checkpoint(self, tmp_path):
+        """停止後の再開テスト"""
+        # 検証対象: DriveCrawler.iter_crawl(), CrawlCheckpoint
+        # 目的: 停止したクロールは保存した作業項目（nextLink を含む）から再開し、取得済みのページを再取得しない
+        pages = self._pages()
+        session = MagicMock()
+        session.get.side_effect = lambda url, **kwargs: pages[url]
+        with pytest.raises(KeyboardInterrupt):
+            self._crawl(tmp_path, session, stop_after=2)
+        assert os.path.exists(str(tmp_path / "files.ndjson") + CHECKPOINT_SUFFIX)
+
+        session.get.reset_mock()
+        path = self._crawl(tmp_path, session)
+
+        records = [record["path"] for record in iter_inventory(path)]
+        assert sorted(records) == ["root/a.txt", "root/docs/b.txt", "root/docs/c.txt"]
+        # 停止時点で未取得だった nextLink のページのみ取得する
+        assert [c.args[0] for c in session.get.call_args_list] == [f"{BASE}/items/f1/children?$skiptoken=2"]
+        assert not os.path.exists(path + CHECKPOINT_SUFFIX)
+        assert not os.path.exists(path + ".partial")
+
+    @pytest.mark.unit
+    def test_checkpoint_for_other_root_ignored(self, tmp_path):
+        """起点フォルダ不一致テスト"""
+        # 検証対象: CrawlCheckpoint.restore()
+        # 目的: 起点フォルダが異なるチェックポイントは使わず最初からクロールすることを確認
+        path = str(tmp_path / "files.ndjson")
+        with open(path + CHECKPOINT_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "root_url": f"{BASE}/other", "records": 5, "pages": []}, f)
+        pages = self._pages()
+        session = MagicMock()
+        session.get.side_effect = lambda url, **kwargs: pages[url]
+
+        self._crawl(tmp_path, session)
+
+        assert count_inventory(path) == 3
+        assert not os.path.exists(path + CHECKPOINT_SUFFIX)
+
+    @pytest.mark.unit
+    def test_missing_partial_restarts_crawl(self, tmp_path):
+        """ファイルリスト欠損テスト"""
+        # 検証対象: CrawlCheckpoint.restore(), InventoryWriter.resume()
+        # 目的: 書き込み済みの件数を .partial から引き継げない場合は最初からクロールすることを確認
+        path = str(tmp_path / "files.ndjson")
+        state = {"version": 1, "root_url": self.ROOT, "records": 2, "pages": [{"url": f"{BASE}/items/f1/children"}]}
+        with open(path + CHECKPOINT_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        pages = self._pages()
+        session = MagicMock()
+        session.get.side_effect = lambda url, **kwargs: pages[url]
+
+        self._crawl(tmp_path, session)
+
+        assert count_inventory(path) == 3
+        assert session.get.call_args_list[0].args[0] == self.ROOT
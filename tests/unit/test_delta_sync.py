@@ -0,0 +1,201 @@
+"""
+DriveDeltaSync のテスト
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.delta_sync import DriveDeltaSync
+
+DELTA_URL = "https://graph.microsoft.com/v1.0/drives/d/root/delta"
+
+
+def _resp(data=None, status_code=200):
+    """delta 応答のモック"""
+    resp = MagicMock()
+    resp.status_code = status_code
+    if status_code >= 400:
+        resp.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code}")
+    else:
+        resp.raise_for_status.return_value = None
+    resp.json.return_value = data or {}
+    return resp
+
+
+def _folder(item_id, name, parent):
+    return {"id": item_id, "name": name, "folder": {"childCount": 1}, "parentReference": {"id": parent}}
+
+
+def _file(item_id, name, parent, size=1):
+    return {"id": item_id, "name": name, "file": {}, "size": size, "parentReference": {"id": parent}}
+
+
+def _sync(tmp_path, responses, **kwargs):
+    session = MagicMock()
+    session.get.side_effect = responses
+    sync = DriveDeltaSync(session, lambda: {}, DELTA_URL, str(tmp_path / "delta.json"), select="id,name", **kwargs)
+    return sync, session
+
+
+INITIAL_PAGES = [
+    _resp(
+        {
+            "value": [{"id": "root", "root": {}}, _folder("src", "TEST-Onedrive", "root"), _file("a", "a.txt", "src")],
+            "@odata.nextLink": f"{DELTA_URL}?token=page2",
+        }
+    ),
+    _resp(
+        {
+            "value": [_folder("sub", "sub", "src"), _file("b", "b.txt", "sub"), _file("x", "x.txt", "root")],
+            "@odata.deltaLink": f"{DELTA_URL}?token=latest",
+        }
+    ),
+]
+
+
+class TestDriveDeltaSync:
+    """DriveDeltaSync クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_initial_sync_persists_delta_link(self, tmp_path):
+        """初回同期テスト"""
+        # 検証対象: DriveDeltaSync.sync(), files()
+        # 目的: 全ページを列挙してツリーからパスを組み立て、deltaLink を保存することを確認
+        sync, session = _sync(tmp_path, list(INITIAL_PAGES))
+
+        stats = sync.sync()
+
+        assert stats["full_sync"] is True
+        assert stats["pages"] == 2
+        assert sorted(path for path, _ in sync.files("TEST-Onedrive")) == ["a.txt", "sub/b.txt"]
+        assert session.get.call_args_list[0].kwargs["params"] == {"$select": "id,name"}
+        assert session.get.call_args_list[1].kwargs["params"] is None
+        with open(tmp_path / "delta.json", encoding="utf-8") as f:
+            assert json.load(f)["delta_link"] == f"{DELTA_URL}?token=latest"
+
+    @pytest.mark.unit
+    def test_files_prefix_is_case_insensitive(self, tmp_path):
+        """ルートパスの大文字小文字テスト"""
+        # 検証対象: DriveDeltaSync.files()
+        # 目的: 設定のフォルダ名と実際のフォルダ名の大文字小文字が異なっても配下のファイルを返すことを確認
+        sync, _ = _sync(tmp_path, list(INITIAL_PAGES))
+        sync.sync()
+
+        assert sorted(path for path, _ in sync.files("test-onedrive")) == ["a.txt", "sub/b.txt"]
+        assert sorted(path for path, _ in sync.files("TEST-ONEDRIVE/SUB")) == ["b.txt"]
+        assert list(sync.files("TEST-Onedrive-other")) == []
+
+    @pytest.mark.unit
+    def test_incremental_sync_applies_changes(self, tmp_path):
+        """差分同期テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 保存済みの deltaLink から変更のみを取得し、追加・移動・削除を反映することを確認
+        sync, _ = _sync(tmp_path, list(INITIAL_PAGES))
+        sync.sync()
+
+        changes = _resp(
+            {
+                "value": [
+                    # フォルダの名前変更は配下のパスにも反映される
+                    _folder("sub", "renamed", "src"),
+                    {"id": "a", "deleted": {}},
+                    _file("c", "c.txt", "src"),
+                ],
+                "@odata.deltaLink": f"{DELTA_URL}?token=next",
+            }
+        )
+        sync, session = _sync(tmp_path, [changes])
+        stats = sync.sync()
+
+        assert session.get.call_args.args[0] == f"{DELTA_URL}?token=latest"
+        assert stats["full_sync"] is False
+        assert (stats["changed"], stats["deleted"]) == (2, 1)
+        assert sorted(path for path, _ in sync.files("TEST-Onedrive")) == ["c.txt", "renamed/b.txt"]
+
+    @pytest.mark.unit
+    def test_deleted_folder_prunes_descendants(self, tmp_path):
+        """フォルダ削除テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 配下の個別の削除通知が無くても、削除されたフォルダ配下のファイルを除くことを確認
+        sync, _ = _sync(tmp_path, list(INITIAL_PAGES))
+        sync.sync()
+
+        sync, _ = _sync(tmp_path, [_resp({"value": [{"id": "sub", "deleted": {}}], "@odata.deltaLink": "d"})])
+        sync.sync()
+
+        assert [path for path, _ in sync.files("TEST-Onedrive")] == ["a.txt"]
+        assert "b" not in sync.items
+
+    @pytest.mark.unit
+    def test_expired_delta_link_resyncs(self, tmp_path):
+        """deltaLink 失効時の再同期テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 410 の場合は保存済みのツリーを破棄して全件同期し直すことを確認
+        sync, _ = _sync(tmp_path, list(INITIAL_PAGES))
+        sync.sync()
+
+        resync = _resp({"value": [{"id": "root", "root": {}}, _file("y", "y.txt", "root")], "@odata.deltaLink": "d"})
+        sync, session = _sync(tmp_path, [_resp(status_code=410), resync])
+        stats = sync.sync()
+
+        assert session.get.call_args.args[0] == DELTA_URL
+        assert stats["full_sync"] is True
+        assert [path for path, _ in sync.files()] == ["y.txt"]
+
+    @pytest.mark.unit
+    def test_failure_keeps_previous_state(self, tmp_path):
+        """取得失敗時の状態保持テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 途中のページで失敗した場合は状態ファイルを更新せず、次回は前回の deltaLink から再開することを確認
+        sync, _ = _sync(tmp_path, list(INITIAL_PAGES))
+        sync.sync()
+
+        failing = [_resp({"value": [{"id": "a", "deleted": {}}], "@odata.nextLink": "next"}), _resp(status_code=500)]
+        sync, _ = _sync(tmp_path, failing)
+        with pytest.raises(requests.exceptions.HTTPError):
+            sync.sync()
+
+        with open(tmp_path / "delta.json", encoding="utf-8") as f:
+            state = json.load(f)
+        assert state["delta_link"] == f"{DELTA_URL}?token=latest"
+        assert "a" in state["items"]
+
+    @pytest.mark.unit
+    def test_interrupted_sync_resumes_from_next_link(self, tmp_path):
+        """途中停止からの再開テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 同期途中に保存した nextLink とツリーから再開し、取得済みのページを再取得しないことを確認
+        sync, _ = _sync(tmp_path, [INITIAL_PAGES[0], _resp(status_code=500)], checkpoint_interval_sec=1e-9)
+        with pytest.raises(requests.exceptions.HTTPError):
+            sync.sync()
+
+        sync, session = _sync(tmp_path, [INITIAL_PAGES[1]], checkpoint_interval_sec=1e-9)
+        stats = sync.sync()
+
+        assert session.get.call_args_list[0].args[0] == f"{DELTA_URL}?token=page2"
+        assert stats["resumed"] is True
+        assert stats["full_sync"] is True
+        assert sorted(path for path, _ in sync.files("TEST-Onedrive")) == ["a.txt", "sub/b.txt"]
+        with open(tmp_path / "delta.json", encoding="utf-8") as f:
+            state = json.load(f)
+        assert state["next_link"] is None
+        assert state["delta_link"] == f"{DELTA_URL}?token=latest"
+
+    @pytest.mark.unit
+    def test_expired_next_link_restarts_sync(self, tmp_path):
+        """保存した nextLink の失効テスト"""
+        # 検証対象: DriveDeltaSync.sync()
+        # 目的: 保存した nextLink で再開できない場合は同期を最初からやり直すことを確認
+        sync, _ = _sync(tmp_path, [INITIAL_PAGES[0], _resp(status_code=500)], checkpoint_interval_sec=1e-9)
+        with pytest.raises(requests.exceptions.HTTPError):
+            sync.sync()
+
+        sync, session = _sync(tmp_path, [_resp(status_code=400)] + list(INITIAL_PAGES))
+        stats = sync.sync()
+
+        assert session.get.call_args_list[1].args[0] == DELTA_URL
+        assert stats["pages"] == 2
+        assert sorted(path for path, _ in sync.files("TEST-Onedrive")) == ["a.txt", "sub/b.txt"]
@@ -0,0 +1,63 @@
+"""
+DownloadUrlCache のテスト
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.download_urls import DownloadUrlCache
+
+
+class TestDownloadUrlCache:
+    """DownloadUrlCache クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_get_within_ttl(self):
+        """有効期限内の取得テスト"""
+        # 検証対象: DownloadUrlCache.get() / put()
+        # 目的: 登録したURLが有効期限内は返され、ヒット数が記録されることを確認
+        cache = DownloadUrlCache(ttl_sec=60)
+        cache.put("item1", "https://dl/1")
+
+        assert cache.get("item1") == "https://dl/1"
+        assert cache.get("item2") is None
+        assert cache.stats() == {"download_url_cache_hits": 1, "download_url_cache_misses": 1}
+
+    @pytest.mark.unit
+    def test_expired_entry_dropped(self):
+        """有効期限切れテスト"""
+        # 検証対象: DownloadUrlCache.get()
+        # 目的: TTL を過ぎたURLは返されずキャッシュから破棄されることを確認
+        cache = DownloadUrlCache(ttl_sec=10)
+        with patch("src.download_urls.time.monotonic", return_value=100.0):
+            cache.put("item1", "https://dl/1")
+        with patch("src.download_urls.time.monotonic", return_value=111.0):
+            assert cache.get("item1") is None
+        assert len(cache) == 0
+
+    @pytest.mark.unit
+    def test_invalidate_and_disabled(self):
+        """破棄・無効化テスト"""
+        # 検証対象: DownloadUrlCache.invalidate()
+        # 目的: 拒否されたURLを破棄でき、TTL 0 ではキャッシュしないことを確認
+        cache = DownloadUrlCache(ttl_sec=60)
+        cache.put("item1", "https://dl/1")
+        cache.invalidate("item1")
+        assert cache.get("item1") is None
+
+        disabled = DownloadUrlCache(ttl_sec=0)
+        disabled.put("item1", "https://dl/1")
+        assert len(disabled) == 0
+
+    @pytest.mark.unit
+    def test_max_entries_evicts_oldest(self):
+        """上限件数テスト"""
+        # 検証対象: DownloadUrlCache.put()
+        # 目的: 上限を超えた場合に古いエントリから破棄されることを確認
+        cache = DownloadUrlCache(ttl_sec=60, max_entries=2)
+        for i in range(3):
+            cache.put(f"item{i}", f"https://dl/{i}")
+
+        assert cache.get("item0") is None
+        assert cache.get("item2") == "https://dl/2"
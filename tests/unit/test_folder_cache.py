@@ -0,0 +1,76 @@
+"""
+FolderCache のテスト
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.folder_cache import FolderCache, normalize_folder_path
+
+
+class TestFolderCache:
+    """FolderCache クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_positive_and_negative_entries(self):
+        """存在・非存在エントリのテスト"""
+        # 検証対象: FolderCache.mark_exists() / mark_missing() / is_missing()
+        # 目的: 大文字小文字・区切り文字の違いを無視して存在情報が共有されることを確認
+        cache = FolderCache()
+        cache.mark_exists("Docs/Reports", "item-1")
+        cache.mark_missing("Docs/Archive")
+
+        assert cache.exists("/docs/reports/")
+        assert cache.item_id("docs\\reports") == "item-1"
+        assert cache.is_missing("docs/archive")
+        assert not cache.is_missing("docs/reports")
+
+    @pytest.mark.unit
+    def test_children_of_created_folder_are_missing(self):
+        """新規作成フォルダの子の扱いテスト"""
+        # 検証対象: FolderCache.mark_created()
+        # 目的: このプロセスで作成したフォルダの子は確認不要（存在しない）と判定されることを確認
+        cache = FolderCache()
+        cache.mark_created("a/b")
+
+        assert cache.exists("a/b")
+        assert cache.is_missing("a/b/c")
+        assert not cache.is_missing("a/x")
+        assert cache.stats()["folders_created"] == 1
+
+    @pytest.mark.unit
+    def test_creating_is_single_flight(self):
+        """single-flight テスト"""
+        # 検証対象: FolderCache.creating()
+        # 目的: 同じパスの作成処理が同時に1スレッドしか実行されないことを確認
+        cache = FolderCache()
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal active, peak
+            with cache.creating("A/B"):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.01)
+                with lock:
+                    active -= 1
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert peak == 1
+
+    @pytest.mark.unit
+    def test_normalize_folder_path(self):
+        """パス正規化テスト"""
+        # 検証対象: normalize_folder_path()
+        # 目的: 区切り文字と前後の / が正規化されることを確認
+        assert normalize_folder_path("\\a\\b/") == "a/b"
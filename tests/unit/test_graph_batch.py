@@ -0,0 +1,157 @@
+"""
+GraphBatcher のテスト
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.graph_batch import MAX_BATCH_SIZE, BatchResponse, GraphBatcher
+
+BASE_URL = "https://graph.microsoft.com/v1.0"
+
+
+def _batch_reply(*responses):
+    """$batch 応答のモック"""
+    reply = MagicMock()
+    reply.raise_for_status.return_value = None
+    reply.json.return_value = {"responses": list(responses)}
+    return reply
+
+
+@pytest.fixture
+def session():
+    """$batch の POST を記録するセッション"""
+    return MagicMock()
+
+
+@pytest.fixture
+def batcher(session):
+    """テスト用バッチャ"""
+    batcher = GraphBatcher(session, BASE_URL, lambda: {"Authorization": "Bearer t"}, max_wait_ms=50)
+    yield batcher
+    batcher.close()
+
+
+class TestGraphBatcher:
+    """GraphBatcher クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_requests_coalesced_into_one_batch(self, batcher, session):
+        """要求の集約テスト"""
+        # 検証対象: GraphBatcher.execute()
+        # 目的: 複数のメタデータ要求が1回の POST /$batch にまとめられ、順序通りに結果が返ることを確認
+        session.post.return_value = _batch_reply(
+            {"id": "1", "status": 404, "body": {"error": {"code": "itemNotFound"}}},
+            {"id": "0", "status": 200, "body": {"id": "a"}},
+        )
+
+        results = batcher.execute([("GET", f"{BASE_URL}/drives/d/items/a"), ("GET", "/drives/d/items/b")])
+
+        assert session.post.call_count == 1
+        args, kwargs = session.post.call_args
+        assert args[0] == f"{BASE_URL}/$batch"
+        assert kwargs["json"]["requests"] == [
+            {"id": "0", "method": "GET", "url": "/drives/d/items/a"},
+            {"id": "1", "method": "GET", "url": "/drives/d/items/b"},
+        ]
+        assert results[0].json() == {"id": "a"}
+        assert results[1].status_code == 404
+        assert batcher.stats() == {"batches_sent": 1, "requests_batched": 2}
+
+    @pytest.mark.unit
+    def test_batch_size_limit(self, batcher, session):
+        """最大件数テスト"""
+
+        # 検証対象: GraphBatcher._take_batch()
+        # 目的: 1回の $batch が Graph の上限（20件）を超えないことを確認
+        def reply(url, headers, json, timeout):
+            return _batch_reply(*[{"id": r["id"], "status": 200, "body": {}} for r in json["requests"]])
+
+        session.post.side_effect = reply
+
+        batcher.execute([("GET", f"/items/{i}") for i in range(MAX_BATCH_SIZE + 5)])
+
+        sizes = [len(c.kwargs["json"]["requests"]) for c in session.post.call_args_list]
+        assert max(sizes) <= MAX_BATCH_SIZE
+        assert sum(sizes) == MAX_BATCH_SIZE + 5
+
+    @pytest.mark.unit
+    def test_batches_sent_concurrently(self, session):
+        """並行送信テスト"""
+        # 検証対象: GraphBatcher._run()
+        # 目的: 送信中の $batch の応答を待たずに、max_in_flight 件まで次の $batch を送信することを確認
+        both_sent = threading.Barrier(2, timeout=5)
+
+        def post(url, headers, json, timeout):
+            # 2件の $batch が同時に送信中でなければ BrokenBarrierError になる
+            both_sent.wait()
+            return _batch_reply({"id": "0", "status": 200, "body": {"url": json["requests"][0]["url"]}})
+
+        session.post.side_effect = post
+        batcher = GraphBatcher(session, BASE_URL, lambda: {}, max_batch_size=1, max_wait_ms=0, max_in_flight=2)
+        try:
+            futures = [batcher.submit("GET", f"/drives/d/items/{name}") for name in ("a", "b")]
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            batcher.close()
+
+        assert [r.json()["url"] for r in results] == ["/drives/d/items/a", "/drives/d/items/b"]
+        assert batcher.stats() == {"batches_sent": 2, "requests_batched": 2}
+
+    @pytest.mark.unit
+    def test_item_throttling_retried(self, batcher, session):
+        """要求単位の 429 リトライテスト"""
+        # 検証対象: GraphBatcher._retry_later()
+        # 目的: $batch 内で 429 になった要求だけが Retry-After 後に再送されることを確認
+        session.post.side_effect = [
+            _batch_reply(
+                {"id": "0", "status": 200, "body": {"id": "a"}},
+                {"id": "1", "status": 429, "headers": {"Retry-After": "0"}},
+            ),
+            _batch_reply({"id": "0", "status": 200, "body": {"id": "b"}}),
+        ]
+
+        results = batcher.execute([("GET", "/items/a"), ("GET", "/items/b")])
+
+        assert [r.json() for r in results] == [{"id": "a"}, {"id": "b"}]
+        retried = session.post.call_args_list[1].kwargs["json"]["requests"]
+        assert retried == [{"id": "0", "method": "GET", "url": "/items/b"}]
+
+    @pytest.mark.unit
+    def test_batch_failure_propagates_to_all_items(self, batcher, session):
+        """$batch 自体の失敗テスト"""
+        # 検証対象: GraphBatcher._send()
+        # 目的: $batch 要求が失敗した場合に含まれる全要求の Future に例外が設定されることを確認
+        session.post.side_effect = requests.exceptions.ConnectionError("reset")
+
+        futures = [batcher.submit("GET", "/items/a"), batcher.submit("GET", "/items/b")]
+
+        for future in futures:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                future.result(timeout=5)
+
+    @pytest.mark.unit
+    def test_submit_after_close(self, batcher):
+        """クローズ後の投入テスト"""
+        # 検証対象: GraphBatcher.close()
+        # 目的: クローズ後の要求は送信されず例外になることを確認
+        batcher.close()
+
+        with pytest.raises(RuntimeError):
+            batcher.submit("GET", "/items/a").result(timeout=5)
+
+
+class TestBatchResponse:
+    """BatchResponse クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_raise_for_status(self):
+        """エラーステータスの例外テスト"""
+        # 検証対象: BatchResponse.raise_for_status()
+        # 目的: 4xx/5xx の個別レスポンスが requests と同じ HTTPError になることを確認
+        BatchResponse(status_code=200).raise_for_status()
+        with pytest.raises(requests.exceptions.HTTPError):
+            BatchResponse(status_code=403, body={"error": "denied"}).raise_for_status()
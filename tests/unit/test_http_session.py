@@ -0,0 +1,169 @@
+"""
+PooledSession のテスト
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.http_session import RETRY_STATUS_FORCELIST, PooledSession
+from src.throttle import ThrottleController
+from src.transfer import GraphTransferClient
+
+
+class TestPooledSession:
+    """PooledSession クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_adapter_configuration(self):
+        """接続プール・リトライアダプタ設定テスト"""
+        # 検証対象: PooledSession.__init__()
+        # 目的: https/http 双方に同一アダプタが設定され、プールサイズとリトライが反映されることを確認
+        session = PooledSession(pool_maxsize=8, max_retries=2, backoff_factor=0.1)
+
+        adapter = session.get_adapter("https://graph.microsoft.com/v1.0")
+        assert adapter is session.get_adapter("http://example.com")
+        assert adapter._pool_maxsize == 8
+        assert adapter.max_retries.total == 2
+        assert tuple(adapter.max_retries.status_forcelist) == RETRY_STATUS_FORCELIST
+        assert "PUT" not in adapter.max_retries.allowed_methods
+
+    @pytest.mark.unit
+    def test_pool_maxsize_lower_bound(self):
+        """プールサイズ下限テスト"""
+        # 検証対象: PooledSession.__init__()
+        # 目的: 0以下のプールサイズが1に補正されることを確認
+        session = PooledSession(pool_maxsize=0)
+
+        assert session.pool_maxsize == 1
+
+    @pytest.mark.unit
+    def test_connection_stats_empty(self):
+        """未使用時の接続統計テスト"""
+        # 検証対象: PooledSession.connection_stats()
+        # 目的: リクエスト未送信時は全て0になることを確認
+        session = PooledSession()
+
+        assert session.connection_stats() == {
+            "hosts": 0,
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+        }
+
+    @pytest.mark.unit
+    def test_connection_stats_aggregates_pools(self):
+        """ホスト毎プールの集計テスト"""
+        # 検証対象: PooledSession.connection_stats()
+        # 目的: 各ホストのプールからリクエスト数・新規接続数を合算し再利用数を算出することを確認
+        session = PooledSession()
+        graph_pool = MagicMock(num_requests=10, num_connections=2)
+        download_pool = MagicMock(num_requests=5, num_connections=1)
+        pools = {"graph": graph_pool, "download": download_pool}
+
+        with patch.object(session._adapter.poolmanager, "pools", pools):
+            stats = session.connection_stats()
+
+        assert stats == {
+            "hosts": 2,
+            "requests": 15,
+            "new_connections": 3,
+            "reused_connections": 12,
+        }
+
+
+def _throttled_response(status_code, retry_after=None):
+    """スロットリング判定用のレスポンスモック"""
+    response = MagicMock(status_code=status_code)
+    response.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return response
+
+
+class TestPooledSessionThrottle:
+    """PooledSession のスロットリング制御テスト"""
+
+    @pytest.mark.unit
+    def test_throttled_request_resent_after_pause(self):
+        """429 応答の再送テスト"""
+        # 検証対象: PooledSession.request()
+        # 目的: 429 を受けた要求が Retry-After の一時停止後に再送され、回数と損失時間が記録されることを確認
+        throttle = ThrottleController()
+        session = PooledSession(throttle=throttle)
+        first = _throttled_response(429, "3")
+        replies = [first, _throttled_response(200)]
+
+        with (
+            patch("requests.Session.request", side_effect=replies) as mock_request,
+            patch("src.throttle.time.sleep") as mock_sleep,
+        ):
+            response = session.request("GET", "https://graph.microsoft.com/v1.0/me")
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 2
+        first.close.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(3, abs=0.5)
+        stats = throttle.stats()
+        assert stats["throttled_requests"] == 1
+        assert stats["throttle_seconds_lost"] == pytest.approx(3, abs=0.5)
+
+    @pytest.mark.unit
+    def test_stream_body_not_resent(self):
+        """再送できない本文の扱いテスト"""
+        # 検証対象: PooledSession.request()
+        # 目的: ストリームを送る要求は再送せず 429 応答をそのまま返し、後続要求のみ一時停止されることを確認
+        throttle = ThrottleController()
+        session = PooledSession(throttle=throttle)
+        throttled = _throttled_response(429, "2")
+
+        with patch("requests.Session.request", return_value=throttled) as mock_request:
+            response = session.request("PUT", "https://example.com/upload", data=iter([b"chunk"]))
+
+        assert response is throttled
+        assert mock_request.call_count == 1
+        assert throttle.stats()["throttled_requests"] == 1
+
+    @pytest.mark.unit
+    def test_gives_up_after_max_retries(self):
+        """再送上限テスト"""
+        # 検証対象: PooledSession.request()
+        # 目的: 再送上限を超えたら最後の 429 応答を返すことを確認
+        throttle = ThrottleController(max_retries=2, backoff_base_sec=0.01)
+        session = PooledSession(throttle=throttle)
+
+        with (
+            patch("requests.Session.request", return_value=_throttled_response(503)) as mock_request,
+            patch("src.throttle.time.sleep"),
+        ):
+            response = session.request("GET", "https://graph.microsoft.com/v1.0/me")
+
+        assert response.status_code == 503
+        assert mock_request.call_count == 3
+
+
+class TestGraphTransferClientSession:
+    """GraphTransferClient の接続プール利用テスト"""
+
+    @pytest.mark.transfer
+    def test_client_owns_pooled_session(self, mock_env_vars, mock_auth):
+        """クライアントの接続プール所有テスト"""
+        # 検証対象: GraphTransferClient.__init__()
+        # 目的: 指定したプールサイズの PooledSession を保持することを確認
+        with patch("src.transfer.GraphAuthenticator", return_value=mock_auth.return_value):
+            client = GraphTransferClient("id", "secret", "tenant", "site", "drive", pool_maxsize=16)
+
+        assert isinstance(client.session, PooledSession)
+        assert client.session.pool_maxsize == 16
+        assert client.connection_stats()["requests"] == 0
+
+    @pytest.mark.transfer
+    def test_client_pool_size_from_config(self, mock_env_vars, mock_auth):
+        """設定値からのプールサイズ決定テスト"""
+        # 検証対象: GraphTransferClient.__init__()
+        # 目的: 未指定時は http_pool_maxsize 設定値（既定は並列転送数）が使われることを確認
+        with (
+            patch("src.transfer.GraphAuthenticator", return_value=mock_auth.return_value),
+            patch("src.transfer.get_http_pool_maxsize", return_value=6),
+        ):
+            client = GraphTransferClient("id", "secret", "tenant", "site", "drive")
+
+        assert client.session.pool_maxsize == 6
@@ -0,0 +1,151 @@
+"""
+src/inventory.py のテスト
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from src.inventory import (
+    FilteredInventory,
+    InventoryFile,
+    InventoryWriter,
+    count_inventory,
+    iter_inventory,
+    write_inventory,
+)
+
+RECORDS = [
+    {"name": "a.txt", "path": "TEST-Onedrive/a.txt", "size": 1},
+    {"name": "日本語.txt", "path": "TEST-Onedrive/sub/日本語.txt", "size": 2},
+]
+
+
+class TestInventory:
+    """ファイルリストの読み書きのテスト"""
+
+    @pytest.mark.unit
+    def test_ndjson_round_trip(self, tmp_path):
+        """NDJSON の書き込み・読み込みテスト"""
+        # 検証対象: write_inventory(), iter_inventory()
+        # 目的: 1行1レコードで書き込み、同じ順序で読み込めることを確認
+        path = str(tmp_path / "files.ndjson")
+
+        count = write_inventory(path, iter(RECORDS))
+
+        assert count == 2
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == RECORDS
+        assert list(iter_inventory(path)) == RECORDS
+        assert not os.path.exists(path + ".partial")
+
+    @pytest.mark.unit
+    def test_gzip_round_trip(self, tmp_path):
+        """gzip 圧縮のテスト"""
+        # 検証対象: write_inventory(), iter_inventory()
+        # 目的: パスの末尾が .gz の場合は圧縮して書き込み、読み込み時に自動判定することを確認
+        path = str(tmp_path / "files.ndjson.gz")
+
+        write_inventory(path, RECORDS)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert json.loads(f.readline()) == RECORDS[0]
+        assert list(iter_inventory(path)) == RECORDS
+
+    @pytest.mark.unit
+    def test_reads_legacy_json_array(self, tmp_path):
+        """従来形式の読み込みテスト"""
+        # 検証対象: iter_inventory()
+        # 目的: 従来の JSON 配列（indent 付き）のファイルも読み込めることを確認
+        path = tmp_path / "files.json"
+        path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        assert list(iter_inventory(str(path))) == RECORDS
+
+    @pytest.mark.unit
+    def test_skips_truncated_last_line(self, tmp_path):
+        """不完全な行のテスト"""
+        # 検証対象: iter_inventory()
+        # 目的: 書き込み途中で停止したファイルの末尾の不完全な行を読み飛ばすことを確認
+        path = tmp_path / "files.ndjson"
+        path.write_text(json.dumps(RECORDS[0]) + "\n" + '{"name": "b.t', encoding="utf-8")
+
+        assert list(iter_inventory(str(path))) == [RECORDS[0]]
+
+    @pytest.mark.unit
+    def test_missing_file_is_empty(self, tmp_path):
+        """存在しないファイルのテスト"""
+        # 検証対象: iter_inventory(), count_inventory()
+        # 目的: ファイルが無い場合は空として扱うことを確認
+        path = str(tmp_path / "missing.ndjson")
+
+        assert list(iter_inventory(path)) == []
+        assert count_inventory(path) == 0
+
+    @pytest.mark.unit
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        """書き込み失敗時のテスト"""
+        # 検証対象: InventoryWriter
+        # 目的: 途中で例外が発生した場合は前回のファイルを置き換えず、書き込んだ分を .partial に残すことを確認
+        path = str(tmp_path / "files.ndjson")
+        write_inventory(path, RECORDS[:1])
+
+        def _records():
+            yield RECORDS[1]
+            raise RuntimeError("crawl failed")
+
+        with pytest.raises(RuntimeError):
+            with InventoryWriter(path) as writer:
+                writer.write_many(_records())
+
+        assert list(iter_inventory(path)) == RECORDS[:1]
+        assert list(iter_inventory(path + ".partial")) == RECORDS[1:]
+
+    @pytest.mark.unit
+    def test_inventory_file_is_reiterable(self, tmp_path):
+        """InventoryFile のテスト"""
+        # 検証対象: InventoryFile
+        # 目的: 走査の都度ファイルから読み込み、件数は len() で数えられることを確認
+        path = str(tmp_path / "files.ndjson")
+        write_inventory(path, RECORDS)
+        files = InventoryFile(path)
+
+        assert len(files) == 2
+        assert list(files) == RECORDS
+        assert [item["name"] for item in files] == ["a.txt", "日本語.txt"]
+
+    @pytest.mark.unit
+    def test_filtered_inventory_is_reiterable(self, tmp_path):
+        """FilteredInventory のテスト"""
+        # 検証対象: FilteredInventory
+        # 目的: 走査の都度元のファイルリストから絞り込み、件数は走査済みなら読み直さずに返すことを確認
+        path = str(tmp_path / "files.ndjson")
+        write_inventory(path, RECORDS)
+        filtered = FilteredInventory(InventoryFile(path), lambda f: f["size"] > 1)
+
+        assert list(filtered) == RECORDS[1:]
+        os.remove(path)
+        assert len(filtered) == 1
+        assert list(filtered) == []
+
+    @pytest.mark.unit
+    def test_resume_keeps_checkpointed_records(self, tmp_path):
+        """追記の再開テスト"""
+        # 検証対象: InventoryWriter.resume()
+        # 目的: 前回の .partial の先頭から指定件数のみを引き継ぎ、それより後のレコードは捨てることを確認
+        path = str(tmp_path / "files.ndjson.gz")
+        with pytest.raises(RuntimeError):
+            with InventoryWriter(path) as writer:
+                writer.write_many(RECORDS)
+                raise RuntimeError("stopped")
+
+        with InventoryWriter(path) as writer:
+            assert writer.resume(1) is True
+            writer.write({"name": "c.txt"})
+
+        assert list(iter_inventory(path)) == [RECORDS[0], {"name": "c.txt"}]
+        with InventoryWriter(path) as writer:
+            # .partial が無い場合は引き継げない
+            assert writer.resume(1) is False
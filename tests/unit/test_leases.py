@@ -0,0 +1,157 @@
+"""
+シャードのリース管理のテスト
+"""
+
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from src.leases import LeaseHeartbeat, ShardLeaseStore, TransferredRecorder
+
+
+def _claim_all(db_path, node_id, delay_sec):
+    """ノードとしてシャードを取得できなくなるまで取得・完了を繰り返す（別プロセスで実行）"""
+    store = ShardLeaseStore(db_path, node_id=node_id)
+    claimed = []
+    while (shard := store.claim()) is not None:
+        claimed.append(shard)
+        time.sleep(delay_sec)
+        store.complete(shard)
+    store.close()
+    return claimed
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """共有リースDBのパス"""
+    return str(tmp_path / "shared" / "leases.sqlite")
+
+
+class TestShardLeaseStore:
+    """ShardLeaseStore クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_nodes_claim_disjoint_shards(self, db_path):
+        """複数ノードの分担テスト"""
+        # 検証対象: ShardLeaseStore.claim()
+        # 目的: 複数のプロセス（ノード）が同じリースDBから重複なく全シャードを取得することを確認
+        ShardLeaseStore(db_path).initialize(12)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(3) as pool:
+            results = pool.starmap(_claim_all, [(db_path, f"node-{i}", 0.01) for i in range(3)])
+
+        claimed = [shard for shards in results for shard in shards]
+        assert sorted(claimed) == list(range(12))
+        assert ShardLeaseStore(db_path).stats() == {"shards_pending": 0, "shards_leased": 0, "shards_done": 12}
+
+    @pytest.mark.unit
+    def test_expired_lease_reclaimed(self, db_path):
+        """期限切れリースの回収テスト"""
+        # 検証対象: ShardLeaseStore.claim(), ShardLeaseStore.heartbeat()
+        # 目的: ハートビートが途絶えたノードのシャードを他のノードが回収し、元のノードは延長・完了できないことを確認
+        dead = ShardLeaseStore(db_path, node_id="dead", lease_ttl_sec=0.05)
+        dead.initialize(1)
+        assert dead.claim() == 0
+
+        alive = ShardLeaseStore(db_path, node_id="alive", lease_ttl_sec=60)
+        assert alive.claim() is None
+        time.sleep(0.1)
+        assert alive.claim() == 0
+
+        assert dead.heartbeat(0) is False
+        assert dead.complete(0) is False
+        assert alive.complete(0) is True
+
+    @pytest.mark.unit
+    def test_transferred_files_and_release(self, db_path):
+        """転送済みファイルの記録・解放テスト"""
+        # 検証対象: ShardLeaseStore.record_transferred(), ShardLeaseStore.release()
+        # 目的: 転送済みファイルがシャード毎に記録され、解放したシャードはすぐに他のノードが取得できることを確認
+        store = ShardLeaseStore(db_path, node_id="a")
+        store.initialize(2)
+        shard = store.claim()
+        store.record_transferred(shard, {"path": "/x/a.txt", "name": "a.txt"})
+        store.record_transferred(shard, {"path": "/x/a.txt", "name": "a.txt"})
+        store.release(shard)
+
+        other = ShardLeaseStore(db_path, node_id="b")
+        assert other.claim() == shard
+        assert other.transferred_keys(shard) == {("/x/a.txt", "a.txt")}
+
+    @pytest.mark.unit
+    def test_claim_excludes_shards(self, db_path):
+        """取得対象外のシャードの指定テスト"""
+        # 検証対象: ShardLeaseStore.claim()
+        # 目的: exclude に指定した未処理のシャードは取得しないことを確認
+        store = ShardLeaseStore(db_path, node_id="a")
+        store.initialize(3)
+
+        assert store.claim(exclude={0, 1}) == 2
+        assert store.claim(exclude=[0, 1]) is None
+        assert store.claim() == 0
+
+    @pytest.mark.unit
+    def test_recorder_batches_transferred_files(self, db_path):
+        """転送済みファイルのまとめ記録テスト"""
+        # 検証対象: TransferredRecorder
+        # 目的: 件数に達するまでは記録せず、件数に達した時点と終了時にまとめて記録することを確認
+        store = ShardLeaseStore(db_path, node_id="a")
+        store.initialize(1)
+        shard = store.claim()
+
+        with TransferredRecorder(store, shard, flush_count=2, flush_sec=60) as recorder:
+            recorder.add({"path": "/x/a.txt", "name": "a.txt"})
+            assert store.transferred_keys(shard) == set()
+            recorder.add({"path": "/x/b.txt", "name": "b.txt"})
+            assert len(store.transferred_keys(shard)) == 2
+            recorder.add({"path": "/x/c.txt", "name": "c.txt"})
+
+        assert len(store.transferred_keys(shard)) == 3
+
+    @pytest.mark.unit
+    def test_shard_count_mismatch(self, db_path):
+        """シャード数不一致テスト"""
+        # 検証対象: ShardLeaseStore.initialize()
+        # 目的: 既存のリースDBと異なるシャード数で参加した場合にエラーとなることを確認
+        ShardLeaseStore(db_path).initialize(4)
+
+        with pytest.raises(ValueError):
+            ShardLeaseStore(db_path).initialize(8)
+
+
+class TestLeaseHeartbeat:
+    """LeaseHeartbeat クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_heartbeat_extends_lease(self, db_path):
+        """リース延長テスト"""
+        # 検証対象: LeaseHeartbeat
+        # 目的: ハートビート中はリース期間を過ぎても他のノードに回収されないことを確認
+        store = ShardLeaseStore(db_path, node_id="a", lease_ttl_sec=0.2)
+        store.initialize(1)
+        shard = store.claim()
+
+        with LeaseHeartbeat(store, shard, interval_sec=0.05) as heartbeat:
+            time.sleep(0.4)
+            assert ShardLeaseStore(db_path, node_id="b").claim() is None
+
+        assert not heartbeat.lost.is_set()
+
+    @pytest.mark.unit
+    def test_lost_lease_detected(self, db_path):
+        """リース喪失検出テスト"""
+        # 検証対象: LeaseHeartbeat
+        # 目的: リースを他のノードに回収された場合に lost と転送の停止イベントが設定されることを確認
+        store = ShardLeaseStore(db_path, node_id="a", lease_ttl_sec=0.05)
+        store.initialize(1)
+        shard = store.claim()
+        time.sleep(0.1)
+        ShardLeaseStore(db_path, node_id="b").claim()
+        stop_event = threading.Event()
+
+        with LeaseHeartbeat(store, shard, interval_sec=0.01, stop_event=stop_event) as heartbeat:
+            assert heartbeat.lost.wait(1)
+        assert stop_event.is_set()
@@ -48,6 +48,13 @@ class TestLogger:
         log_transfer_success(self.test_file_info, elapsed=1.5)
         mock_logger.info.assert_called_once()
 
+    @patch("src.logger.logger")
+    def test_log_transfer_success_with_chunk_retries(self, mock_logger: Any):
+        """転送成功ログテスト（チャンクリトライ統計付き）"""
+        log_transfer_success(self.test_file_info, elapsed=1.5, chunk_retries=2, retry_saved_bytes=1024)
+        message, *args = mock_logger.info.call_args.args
+        assert (message % tuple(args)).endswith("[elapsed: 1.50s] [chunk_retries: 2, saved_bytes: 1024]")
+
     @patch("src.logger.logger")
     def test_log_transfer_error(self, mock_logger: Any):
         """転送エラーログテスト"""
@@ -4,12 +4,22 @@ src/main.py のテスト
 
 import json
 import os
+import queue
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from unittest.mock import MagicMock, Mock, mock_open, patch
 
 import pytest
 import requests
 
+from src.leases import ShardLeaseStore
 from src.main import (
+    _collect_shard_results,
+    _put_transferred,
+    _record_transferred,
+    _transfer_shard_worker,
     check_config_changed,
     clear_logs_and_update_config,
     get_current_config_hash,
@@ -18,8 +28,13 @@ from src.main import (
     rebuild_skip_list,
     retry_with_backoff,
     run_transfer,
+    run_transfer_leased,
+    run_transfer_pipelined,
     transfer_file,
 )
+from src.sharding import shard_of
+from src.skiplist import SkipIndex
+from src.throttle import ThrottleController
 
 
 class TestRetryWithBackoff:
@@ -59,6 +74,29 @@ class TestRetryWithBackoff:
 
         assert mock_func.call_count == 2
 
+    def test_throttled_http_error_waits_for_retry_after(self):
+        """検証対象: retry_with_backoff() 目的: 429 が Retry-After 分の一時停止後に再試行されることを確認"""
+        response = Mock(status_code=429, headers={"Retry-After": "7"})
+        mock_func = Mock(side_effect=[requests.exceptions.HTTPError(response=response), "success"])
+
+        with patch("src.main.throttle_controller", ThrottleController()), patch("time.sleep") as mock_sleep:
+            result = retry_with_backoff(mock_func, max_retries=3, wait_sec=30)
+
+        assert result == "success"
+        assert mock_func.call_count == 2
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(7, abs=0.5)
+
+    def test_non_throttle_http_error_not_retried(self):
+        """検証対象: retry_with_backoff() 目的: スロットリング以外の HTTPError は再試行されないことを確認"""
+        response = Mock(status_code=404, headers={})
+        mock_func = Mock(side_effect=requests.exceptions.HTTPError(response=response))
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            retry_with_backoff(mock_func, max_retries=3, wait_sec=1)
+
+        mock_func.assert_called_once()
+
     def test_non_retryable_exception(self):
         """検証対象: retry_with_backoff() 目的: リトライ対象外例外の即座な再発生確認"""
         mock_func = Mock(side_effect=ValueError("not retryable"))
@@ -186,49 +224,108 @@ class TestClearLogsAndUpdateConfig:
 class TestGetOneDriveFiles:
     """OneDriveファイル取得のテスト"""
 
+    ENV = {
+        "CLIENT_ID": "test_id",
+        "CLIENT_SECRET": "test_secret",
+        "TENANT_ID": "test_tenant",
+        "DESTINATION_SHAREPOINT_SITE_ID": "test_site",
+        "DESTINATION_SHAREPOINT_DRIVE_ID": "test_drive",
+        "SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME": "test@example.com",
+    }
+
+    @pytest.fixture(autouse=True)
+    def _cache_file(self, tmp_path):
+        # ファイルリスト（キャッシュ）は一時ディレクトリに読み書きする
+        self.cache_file = str(tmp_path / "onedrive_files.ndjson")
+        with patch("src.main.get_onedrive_files_path", return_value=self.cache_file):
+            yield
+
     @patch("src.main.GraphTransferClient")
-    @patch("os.path.exists")
-    def test_get_onedrive_files_from_cache(self, mock_exists, mock_client):
+    def test_get_onedrive_files_from_cache(self, mock_client):
         """検証対象: get_onedrive_files() 目的: キャッシュからのファイル読み込み確認"""
-        mock_exists.return_value = True
         cached_files = [{"name": "test.txt", "path": "/test.txt"}]
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps(cached_files[0]) + "\n")
 
-        with patch("builtins.open", mock_open(read_data=json.dumps(cached_files))):
-            result = get_onedrive_files(force_crawl=False)
+        result = get_onedrive_files(force_crawl=False)
 
-        assert result == cached_files
+        assert list(result) == cached_files
+        assert len(result) == 1
         mock_client.assert_not_called()
 
     @patch("src.main.GraphTransferClient")
-    @patch("os.path.exists")
-    @patch("os.makedirs")
-    def test_get_onedrive_files_force_crawl(self, mock_makedirs, mock_exists, mock_client):
+    def test_get_onedrive_files_from_legacy_json_cache(self, mock_client):
+        """検証対象: get_onedrive_files() 目的: 従来の JSON 配列のキャッシュも読み込めることを確認"""
+        cached_files = [{"name": "test.txt", "path": "/test.txt"}]
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(cached_files, f, indent=2)
+
+        result = get_onedrive_files(force_crawl=False)
+
+        assert list(result) == cached_files
+        mock_client.assert_not_called()
+
+    @patch("src.main.get_onedrive_delta_enabled", return_value=False)
+    @patch("src.main.GraphTransferClient")
+    def test_get_onedrive_files_force_crawl(self, mock_client, mock_delta_enabled):
         """検証対象: get_onedrive_files() 目的: 強制クロール時の新規取得確認"""
-        mock_exists.return_value = True
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"name": "old.txt", "path": "/old.txt"}) + "\n")
         mock_files = [{"name": "new.txt", "path": "/new.txt"}]
 
-        # GraphTransferClientのモック設定
+        # GraphTransferClientのモック設定（クロール結果は逐次返す）
         mock_instance = Mock()
-        mock_instance.collect_file_targets_from_onedrive.return_value = mock_files
+        mock_instance.iter_file_targets_from_onedrive.return_value = iter(mock_files)
         mock_client.return_value = mock_instance
 
-        with patch.dict(
-            os.environ,
-            {
-                "CLIENT_ID": "test_id",
-                "CLIENT_SECRET": "test_secret",
-                "TENANT_ID": "test_tenant",
-                "DESTINATION_SHAREPOINT_SITE_ID": "test_site",
-                "DESTINATION_SHAREPOINT_DRIVE_ID": "test_drive",
-                "SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME": "test@example.com",
-            },
-        ):
-            with patch("builtins.open", mock_open()) as mock_file:
-                result = get_onedrive_files(force_crawl=True)
+        with patch.dict(os.environ, self.ENV):
+            result = get_onedrive_files(force_crawl=True)
+
+        assert list(result) == mock_files
+        mock_instance.iter_file_targets_from_onedrive.assert_called_once()
+        assert not os.path.exists(self.cache_file + ".partial")
+        mock_instance.close.assert_called_once()
+
+    @patch("src.main.get_onedrive_delta_state_path", return_value="logs/delta.json")
+    @patch("src.main.get_onedrive_delta_enabled", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_get_onedrive_files_delta_sync(self, mock_client, mock_delta_enabled, mock_state_path):
+        """検証対象: get_onedrive_files()
+        目的: delta 有効時は差分同期を使い、失敗時は全件クロールに切り替わることを確認"""
+        mock_instance = Mock()
+        mock_instance.sync_onedrive_delta.return_value = [{"name": "delta.txt", "path": "/delta.txt"}]
+        mock_instance.iter_file_targets_from_onedrive.return_value = iter([{"name": "crawl.txt", "path": "/crawl.txt"}])
+        mock_client.return_value = mock_instance
+
+        with patch.dict(os.environ, self.ENV):
+            result = get_onedrive_files(force_crawl=True)
+
+        assert list(result) == [{"name": "delta.txt", "path": "/delta.txt"}]
+        assert mock_instance.sync_onedrive_delta.call_args.kwargs["state_path"] == "logs/delta.json"
+        mock_instance.iter_file_targets_from_onedrive.assert_not_called()
+
+        mock_instance.sync_onedrive_delta.side_effect = requests.exceptions.ConnectionError("down")
+        with patch.dict(os.environ, self.ENV):
+            result = get_onedrive_files(force_crawl=True)
+
+        assert list(result) == [{"name": "crawl.txt", "path": "/crawl.txt"}]
+
+    @patch("src.main.get_onedrive_delta_enabled", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_get_onedrive_files_streaming_skips_delta(self, mock_client, mock_delta_enabled):
+        """検証対象: get_onedrive_files()
+        目的: on_file 指定時（パイプライン転送）は delta 有効でも全件クロールでページの到着順に渡すことを確認"""
+        mock_files = [{"name": "a.txt", "path": "/a.txt"}, {"name": "b.txt", "path": "/b.txt"}]
+        mock_instance = Mock()
+        mock_instance.iter_file_targets_from_onedrive.return_value = iter(mock_files)
+        mock_client.return_value = mock_instance
+        received = []
+
+        with patch.dict(os.environ, self.ENV):
+            get_onedrive_files(force_crawl=True, on_file=received.append)
 
-        assert result == mock_files
-        mock_instance.collect_file_targets_from_onedrive.assert_called_once()
-        mock_file.assert_called()
+        assert received == mock_files
+        mock_instance.sync_onedrive_delta.assert_not_called()
 
     @patch("src.main.GraphTransferClient")
     def test_get_onedrive_files_missing_env_vars(self, mock_client):
@@ -244,6 +341,19 @@ class TestGetOneDriveFiles:
 class TestRebuildSkipList:
     """スキップリスト再構築のテスト"""
 
+    @patch("src.main.get_sharepoint_delta_enabled", return_value=True)
+    @patch("src.main.create_skip_list_from_sharepoint", return_value=[])
+    @patch("src.main.crawl_sharepoint", return_value=[])
+    @patch("os.path.exists", return_value=True)
+    def test_rebuild_skip_list_delta_ignores_stale_cache(
+        self, mock_exists, mock_crawl_sharepoint, mock_create_skip_list, mock_delta_enabled
+    ):
+        """検証対象: rebuild_skip_list()
+        目的: 転送先の delta 有効時はキャッシュではなく差分同期した最新のインベントリで照合することを確認"""
+        rebuild_skip_list(onedrive_files=[{"name": "file1.txt"}])
+
+        mock_crawl_sharepoint.assert_called_once()
+
     @patch("src.main.create_skip_list_from_sharepoint")
     @patch("src.main.crawl_sharepoint")
     @patch("src.main.get_onedrive_files")
@@ -330,6 +440,34 @@ class TestTransferFile:
         mock_log_success.assert_called_once_with(file_info, elapsed=5.0)
         mock_add_skip.assert_called_once_with(file_info, "logs/skip_list.json")
 
+    @patch("src.main.add_to_skip_list")
+    @patch("src.main.log_transfer_success")
+    @patch("src.main.log_transfer_start")
+    @patch("src.main.get_skip_list_path")
+    @patch("time.time")
+    def test_transfer_file_logs_chunk_retries(
+        self,
+        mock_time,
+        mock_skip_list_path,
+        mock_log_start,
+        mock_log_success,
+        mock_add_skip,
+    ):
+        """検証対象: transfer_file() 目的: チャンク単位リトライの統計が転送ログへ渡されることを確認"""
+        file_info = {"name": "big.bin", "path": "/big.bin"}
+        mock_client = Mock()
+        mock_client.upload_file_to_sharepoint.return_value = {
+            "message": "Upload completed via upload session",
+            "chunk_retries": 2,
+            "retry_saved_bytes": 4096,
+        }
+        mock_time.side_effect = [100.0, 105.0]
+
+        result = transfer_file(file_info, mock_client, retry_count=3, timeout=10)
+
+        assert result is True
+        mock_log_success.assert_called_once_with(file_info, elapsed=5.0, chunk_retries=2, retry_saved_bytes=4096)
+
     @patch("src.main.log_transfer_error")
     @patch("src.main.log_transfer_start")
     @patch("time.sleep")
@@ -357,9 +495,17 @@ class TestTransferFile:
 class TestRunTransfer:
     """転送実行のテスト"""
 
-    @patch("src.main.ThreadPoolExecutor")
-    @patch("src.main.load_skip_list")
-    @patch("src.main.is_skipped")
+    TRANSFER_ENV = {
+        "CLIENT_ID": "test_id",
+        "CLIENT_SECRET": "test_secret",
+        "TENANT_ID": "test_tenant",
+        "DESTINATION_SHAREPOINT_SITE_ID": "test_site",
+        "DESTINATION_SHAREPOINT_DRIVE_ID": "test_drive",
+        "SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME": "test@example.com",
+    }
+
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.SkipIndex.load")
     @patch("src.main.get_onedrive_files")
     @patch("src.main.GraphTransferClient")
     @patch("src.main.get_config")
@@ -368,9 +514,8 @@ class TestRunTransfer:
         mock_get_config,
         mock_client_class,
         mock_get_onedrive,
-        mock_is_skipped,
         mock_load_skip,
-        mock_executor_class,
+        mock_transfer,
     ):
         """検証対象: run_transfer() 目的: 転送処理の正常実行確認"""
         # モックの設定
@@ -378,40 +523,116 @@ class TestRunTransfer:
         skip_list = [{"name": "file1.txt"}]
 
         mock_get_onedrive.return_value = onedrive_files
-        mock_load_skip.return_value = skip_list
-        mock_is_skipped.side_effect = lambda f, sl: f["name"] == "file1.txt"
+        mock_load_skip.return_value = SkipIndex(skip_list)
         mock_get_config.side_effect = lambda key, default: {
             "max_parallel_transfers": 4,
             "retry_count": 3,
             "timeout_sec": 10,
         }.get(key, default)
+        mock_client_class.return_value.connection_stats.return_value = {}
 
-        # ThreadPoolExecutorのモック
-        mock_executor = MagicMock()
-        mock_future = Mock()
-        mock_future.result.return_value = True
-        mock_executor.submit.return_value = mock_future
-        mock_executor.__enter__.return_value = mock_executor
-        mock_executor.__exit__.return_value = None
-        mock_executor_class.return_value = mock_executor
-
-        # as_completedのモック
-        with patch("src.main.as_completed", return_value=[mock_future]):
-            with patch.dict(
-                os.environ,
-                {
-                    "CLIENT_ID": "test_id",
-                    "CLIENT_SECRET": "test_secret",
-                    "TENANT_ID": "test_tenant",
-                    "DESTINATION_SHAREPOINT_SITE_ID": "test_site",
-                    "DESTINATION_SHAREPOINT_DRIVE_ID": "test_drive",
-                    "SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME": "test@example.com",
-                },
-            ):
-                run_transfer(onedrive_files)
+        with patch.dict(os.environ, self.TRANSFER_ENV):
+            run_transfer(onedrive_files)
 
         # 1つのファイルのみが転送対象（file2.txt）
-        mock_executor.submit.assert_called_once()
+        mock_transfer.assert_called_once()
+        assert mock_transfer.call_args.args[0] == {"name": "file2.txt"}
+        # 転送前に転送先フォルダを事前作成する
+        mock_client_class.return_value.prepare_sharepoint_folders.assert_called_once()
+        folder_targets = mock_client_class.return_value.prepare_sharepoint_folders.call_args.args[0]
+        assert list(folder_targets) == [{"name": "file2.txt"}]
+
+    @patch("src.main.get_transfer_submit_window", return_value=1)
+    @patch("src.main.get_large_file_parallel_transfers", return_value=1)
+    @patch("src.main.get_max_parallel_transfers_ceiling", return_value=1)
+    @patch("src.main.get_large_file_threshold_mb", return_value=1)
+    @patch("src.main.transfer_file")
+    @patch("src.main.GraphTransferClient")
+    def test_run_transfer_bounded_window(
+        self, mock_client_class, mock_transfer, mock_threshold, mock_ceiling, mock_large_workers, mock_window
+    ):
+        """検証対象: run_transfer()
+        目的: 未完了の投入数がレーン毎の window 内に収まり、大容量ファイルが大きい順に転送されることを確認"""
+        mb = 1024 * 1024
+        onedrive_files = [{"name": f"small{i}.txt", "size": 10} for i in range(20)]
+        onedrive_files += [{"name": f"large{i}.bin", "size": (i + 1) * mb} for i in range(3)]
+        mock_client_class.return_value.connection_stats.return_value = {}
+        submitted = []
+        original_submit = ThreadPoolExecutor.submit
+        peak = 0
+
+        def tracking_submit(executor, fn, *args, **kwargs):
+            nonlocal peak
+            future = original_submit(executor, fn, *args, **kwargs)
+            submitted.append(future)
+            peak = max(peak, sum(1 for f in submitted if not f.done()))
+            return future
+
+        transferred = []
+        mock_transfer.side_effect = lambda f, *args: transferred.append(f["name"]) or True
+
+        with (
+            patch.dict(os.environ, self.TRANSFER_ENV),
+            patch("src.main.SkipIndex.load", return_value=SkipIndex()),
+            patch("src.main.get_max_parallel_transfers", return_value=1),
+            patch.object(ThreadPoolExecutor, "submit", tracking_submit),
+        ):
+            run_transfer(onedrive_files)
+
+        assert len(transferred) == 23
+        # 小容量レーン（window は同時転送数の2倍）と大容量レーン（同時転送数の2倍）の合計を超えない
+        assert peak <= 4
+        assert [name for name in transferred if name.startswith("large")] == ["large2.bin", "large1.bin", "large0.bin"]
+
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_run_transfer_stops_on_signal(self, mock_client_class, mock_transfer):
+        """検証対象: run_transfer()
+        目的: SIGINT 受信後は新規投入を止め、実行中の転送の完了を待って終了することを確認"""
+        onedrive_files = [{"name": f"file{i}.txt", "size": 10} for i in range(50)]
+        mock_client_class.return_value.connection_stats.return_value = {}
+
+        def interrupt_first(f, *args):
+            if f["name"] == "file0.txt":
+                signal.raise_signal(signal.SIGINT)
+            return True
+
+        mock_transfer.side_effect = interrupt_first
+        previous_handler = signal.getsignal(signal.SIGINT)
+
+        with (
+            patch.dict(os.environ, self.TRANSFER_ENV),
+            patch("src.main.SkipIndex.load", return_value=SkipIndex()),
+            patch("src.main.get_transfer_submit_window", return_value=1),
+            patch("src.main.get_max_parallel_transfers_ceiling", return_value=1),
+            patch("src.main.get_max_parallel_transfers", return_value=1),
+        ):
+            run_transfer(onedrive_files)
+
+        assert mock_transfer.call_count < len(onedrive_files)
+        # シグナルハンドラは元に戻る
+        assert signal.getsignal(signal.SIGINT) is previous_handler
+
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_run_transfer_stops_on_stop_event(self, mock_client_class, mock_transfer):
+        """検証対象: run_transfer()
+        目的: 呼び出し元から渡した停止イベントが設定されると新規投入を止めることを確認"""
+        onedrive_files = [{"name": f"file{i}.txt", "size": 10} for i in range(50)]
+        mock_client_class.return_value.connection_stats.return_value = {}
+        stop_event = threading.Event()
+        mock_transfer.side_effect = lambda f, *args: stop_event.set() or True
+
+        with (
+            patch.dict(os.environ, self.TRANSFER_ENV),
+            patch("src.main.SkipIndex.load", return_value=SkipIndex()),
+            patch("src.main.get_transfer_submit_window", return_value=1),
+            patch("src.main.get_max_parallel_transfers_ceiling", return_value=1),
+            patch("src.main.get_max_parallel_transfers", return_value=1),
+        ):
+            assert run_transfer(onedrive_files, stop_event=stop_event) is False
+
+        assert mock_transfer.call_count < len(onedrive_files)
 
     def test_run_transfer_missing_env_vars(self):
         """検証対象: run_transfer()
@@ -420,6 +641,330 @@ class TestRunTransfer:
             # エラーログが出力されるが例外は発生しない
             run_transfer()
 
+    @patch("src.main.get_max_parallel_transfers", return_value=50)
+    @patch("src.main._run_transfer_lanes")
+    @patch("src.main.GraphTransferClient")
+    def test_run_transfer_concurrency_setting(self, mock_client_class, mock_lanes, mock_max_workers):
+        """検証対象: run_transfer()
+        目的: max_parallel_transfers を小容量レーンの同時転送数の開始値とし、終了時にクライアントを閉じることを確認"""
+        onedrive_files = [{"name": "file1.txt"}]
+        limiter = MagicMock()
+        limiter.stats.return_value = {}
+        timings = MagicMock()
+        timings.report.return_value = {}
+        dispatcher = MagicMock()
+        dispatcher.stop_event.is_set.return_value = False
+        mock_lanes.return_value = (1, limiter, timings, dispatcher)
+        mock_client_class.return_value.connection_stats.return_value = {}
+
+        with (
+            patch.dict(os.environ, self.TRANSFER_ENV),
+            patch("src.main.SkipIndex.load", return_value=SkipIndex()),
+        ):
+            assert run_transfer(onedrive_files) is True
+
+        assert mock_lanes.call_args.args[2] == 50
+        mock_client_class.return_value.close.assert_called_once()
+
+
+class TestRunTransferPipelined:
+    """パイプライン転送のテスト"""
+
+    TRANSFER_ENV = {
+        **TestRunTransfer.TRANSFER_ENV,
+        "SOURCE_ONEDRIVE_FOLDER_PATH": "TEST-Onedrive",
+        "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
+    }
+    FILES = [{"name": f"file{i}.txt", "path": f"TEST-Onedrive/file{i}.txt", "size": 10} for i in range(4)]
+
+    @patch("src.main.add_to_skip_list")
+    @patch("src.main._get_sharepoint_files")
+    @patch("src.main.SkipIndex.load")
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_transfers_while_crawling(
+        self, mock_client_class, mock_transfer, mock_load_skip, mock_sharepoint, mock_add_to_skip
+    ):
+        """検証対象: run_transfer_pipelined()
+        目的: クロールの完了を待たずに転送が始まり、スキップリスト・転送先に存在するファイルは転送しないことを確認"""
+        mock_client = mock_client_class.return_value
+        mock_client.connection_stats.return_value = {}
+        mock_client.get_sharepoint_item.side_effect = lambda f, **kwargs: {} if f["name"] == "file1.txt" else None
+        mock_load_skip.return_value = SkipIndex([{"name": "file0.txt", "path": "TEST-Onedrive/file0.txt"}])
+        mock_sharepoint.return_value = [{"name": "file1.txt", "path": "TEST-Sharepoint/file1.txt"}]
+        first_transferred = threading.Event()
+        mock_transfer.side_effect = lambda f, *args: first_transferred.set() or True
+
+        def crawl(force_crawl, on_file):
+            for file_info in self.FILES[:3]:
+                on_file(file_info)
+            # 最初の転送が完了するまでクロールを進めない
+            assert first_transferred.wait(5)
+            on_file(self.FILES[3])
+
+        with patch.dict(os.environ, self.TRANSFER_ENV), patch("src.main.get_onedrive_files", side_effect=crawl):
+            assert run_transfer_pipelined(reconcile=True) is True
+
+        assert sorted(call.args[0]["name"] for call in mock_transfer.call_args_list) == ["file2.txt", "file3.txt"]
+        # 転送先に存在したファイルは、インベントリ・個別確認のどちらで判定してもスキップリストに1回だけ追加する
+        mock_add_to_skip.assert_called_once()
+        assert mock_add_to_skip.call_args.args[0] == self.FILES[1]
+        # 転送先フォルダの事前作成は行わない
+        mock_client.prepare_sharepoint_folders.assert_not_called()
+
+    @patch("src.main.add_to_skip_list")
+    @patch("src.main._get_sharepoint_files")
+    @patch("src.main.SkipIndex.load", return_value=SkipIndex())
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_reconcile_does_not_delay_transfers(
+        self, mock_client_class, mock_transfer, mock_load_skip, mock_sharepoint, mock_add_to_skip
+    ):
+        """検証対象: run_transfer_pipelined()
+        目的: 転送先のインベントリの取得完了を待たずに転送が始まり、取得中は転送先へ個別に確認することを確認"""
+        mock_client = mock_client_class.return_value
+        mock_client.connection_stats.return_value = {}
+        mock_client.get_sharepoint_item.side_effect = lambda f, **kwargs: {} if f["name"] == "file0.txt" else None
+        all_transferred = threading.Event()
+        mock_transfer.side_effect = lambda f, *args: f is self.FILES[3] and all_transferred.set() or True
+
+        def crawl_sharepoint(force_crawl):
+            # 転送が終わるまでインベントリの取得を終えない
+            assert all_transferred.wait(5)
+            return []
+
+        mock_sharepoint.side_effect = crawl_sharepoint
+
+        def crawl(force_crawl, on_file):
+            for file_info in self.FILES:
+                on_file(file_info)
+
+        with patch.dict(os.environ, self.TRANSFER_ENV), patch("src.main.get_onedrive_files", side_effect=crawl):
+            assert run_transfer_pipelined(reconcile=True) is True
+
+        assert mock_transfer.call_count == 3
+        assert mock_client.get_sharepoint_item.call_count == 4
+        mock_add_to_skip.assert_called_once()
+        assert mock_add_to_skip.call_args.args[0] == self.FILES[0]
+
+    @patch("src.main._get_sharepoint_files")
+    @patch("src.main.SkipIndex.load", return_value=SkipIndex())
+    @patch("src.main.transfer_file", return_value=True)
+    @patch("src.main.GraphTransferClient")
+    def test_crawl_failure_transfers_queued_files(
+        self, mock_client_class, mock_transfer, mock_load_skip, mock_sharepoint
+    ):
+        """検証対象: run_transfer_pipelined()
+        目的: クロールが失敗した場合はキューに入った分を転送し、中断として False を返すことを確認"""
+        mock_client_class.return_value.connection_stats.return_value = {}
+
+        def crawl(force_crawl, on_file):
+            on_file(self.FILES[0])
+            raise requests.exceptions.ConnectionError("crawl failed")
+
+        with patch.dict(os.environ, self.TRANSFER_ENV), patch("src.main.get_onedrive_files", side_effect=crawl):
+            assert run_transfer_pipelined() is False
+        mock_client_class.return_value.close.assert_called_once()
+
+        mock_transfer.assert_called_once()
+        # 照合しない場合は転送先のインベントリを取得しない
+        mock_sharepoint.assert_not_called()
+
+
+class TestMultiprocessTransfer:
+    """マルチプロセス転送のテスト"""
+
+    @patch("src.main.add_to_skip_list")
+    def test_record_transferred_via_queue(self, mock_add_skip):
+        """検証対象: _record_transferred() 目的: ワーカープロセスでは転送済みファイルをコーディネータへ送ることを確認"""
+        result_queue = queue.Queue()
+        file_info = {"name": "a.txt", "path": "/a.txt"}
+
+        with patch("src.main._transferred_sink", partial(_put_transferred, result_queue)):
+            _record_transferred(file_info)
+
+        assert result_queue.get_nowait() == ("transferred", file_info)
+        mock_add_skip.assert_not_called()
+
+    @patch("src.main.get_skip_list_path", return_value="logs/skip_list.json")
+    @patch("src.main.add_many_to_skip_list")
+    def test_collect_shard_results(self, mock_add_many, mock_skip_path):
+        """検証対象: _collect_shard_results()
+        目的: 全シャードの完了報告まで結果を回収し、転送済みファイルをまとめてスキップリストへ書き込むことを確認"""
+        result_queue = queue.Queue()
+        for message in [
+            ("transferred", {"name": "a.txt"}),
+            ("finished", 0, 2),
+            ("transferred", {"name": "b.txt"}),
+            ("finished", 1, 1),
+        ]:
+            result_queue.put(message)
+        worker = Mock()
+        worker.is_alive.return_value = True
+
+        transferred, target_count = _collect_shard_results(result_queue, [worker, worker], 2)
+
+        assert (transferred, target_count) == (2, 3)
+        written = [f["name"] for call in mock_add_many.call_args_list for f in call.args[0]]
+        assert written == ["a.txt", "b.txt"]
+
+    @patch("src.main.add_many_to_skip_list")
+    def test_collect_stops_when_workers_died(self, mock_add_many):
+        """検証対象: _collect_shard_results() 目的: 完了報告なしにワーカーが全て終了した場合に待ち続けないことを確認"""
+        worker = Mock()
+        worker.is_alive.return_value = False
+
+        with patch("src.main.SKIP_LIST_FLUSH_SEC", 0.01):
+            assert _collect_shard_results(queue.Queue(), [worker], 1) == (0, 0)
+
+    @patch("src.main.run_transfer")
+    @patch("src.main.get_onedrive_files")
+    def test_shard_worker_transfers_own_shard(self, mock_get_onedrive, mock_run_transfer):
+        """検証対象: _transfer_shard_worker() 目的: 担当シャードのファイルのみを転送し完了を報告することを確認"""
+        files = [{"name": f"f{i}.txt", "path": f"/f{i}.txt"} for i in range(20)]
+        mock_get_onedrive.return_value = files
+        result_queue = queue.Queue()
+
+        with patch("src.main._transferred_sink", None):
+            _transfer_shard_worker(1, 3, result_queue)
+
+        shard = list(mock_run_transfer.call_args.args[0])
+        assert shard == [f for f in files if shard_of(f, 3) == 1]
+        assert result_queue.get_nowait() == ("finished", 1, len(shard))
+
+
+def _all_transferred(targets, client, max_workers, stop_event=None, mode="single"):
+    """_transfer_targets の代わりに全ファイルを転送済みとして記録する"""
+    for file_info in targets:
+        _record_transferred(file_info)
+    return len(targets), len(targets), False
+
+
+@patch("src.main.add_to_skip_list")
+@patch("src.main.GraphTransferClient")
+@patch("src.main._get_transfer_credentials", return_value=("id", "secret", "tenant", "site", "drive"))
+class TestLeasedTransfer:
+    """リース転送（複数ノードでの分担転送）のテスト"""
+
+    @patch("src.main.get_shard_count", return_value=4)
+    @patch("src.main._transfer_targets", side_effect=_all_transferred)
+    def test_all_shards_transferred(
+        self, mock_transfer, mock_shard_count, mock_credentials, mock_client_class, mock_add_skip, tmp_path
+    ):
+        """検証対象: run_transfer_leased()
+        目的: 全シャードを取得して転送し、完了として記録すること、クライアントと転送先フォルダの事前作成は
+        ノードで1回だけ行い終了時にクライアントを閉じること、転送済みファイルをまとめて記録することを確認"""
+        files = [{"name": f"f{i}.txt", "path": f"/f{i}.txt"} for i in range(40)]
+        db_path = str(tmp_path / "leases.sqlite")
+
+        with patch.object(ShardLeaseStore, "record_transferred_many", autospec=True) as mock_record:
+            run_transfer_leased(db_path, files)
+
+        transferred = [f for call in mock_transfer.call_args_list for f in call.args[0]]
+        assert sorted(f["name"] for f in transferred) == sorted(f["name"] for f in files)
+        assert ShardLeaseStore(db_path).stats()["shards_done"] == 4
+        mock_client_class.assert_called_once()
+        mock_client_class.return_value.prepare_sharepoint_folders.assert_called_once()
+        mock_client_class.return_value.close.assert_called_once()
+        # シャード毎に1回のトランザクションで記録する
+        assert mock_record.call_count == 4
+
+    @patch("src.main.get_shard_count", return_value=4)
+    @patch("src.main._transfer_targets", side_effect=_all_transferred)
+    def test_lost_lease_keeps_claiming(
+        self, mock_transfer, mock_shard_count, mock_credentials, mock_client_class, mock_add_skip, tmp_path
+    ):
+        """検証対象: run_transfer_leased()
+        目的: リースを失ったシャードは転送の停止イベントで中断し、終了せずに残りのシャードを取得することを確認"""
+        files = [{"name": f"f{i}.txt", "path": f"/f{i}.txt"} for i in range(40)]
+        db_path = str(tmp_path / "leases.sqlite")
+        heartbeats = []
+
+        class FakeHeartbeat:
+            def __init__(self, store, shard, stop_event=None):
+                self.lost = threading.Event()
+                if not heartbeats:
+                    # 最初のシャードは転送中に他のノードへ回収される
+                    self.lost.set()
+                    stop_event.set()
+                heartbeats.append(self)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return None
+
+        def transfer(targets, client, max_workers, stop_event=None, mode="single"):
+            return len(targets), len(targets), stop_event.is_set()
+
+        mock_transfer.side_effect = transfer
+        with patch("src.main.LeaseHeartbeat", FakeHeartbeat):
+            run_transfer_leased(db_path, files)
+
+        assert mock_transfer.call_count == 4
+        assert mock_transfer.call_args_list[0].args[3].is_set()
+        assert ShardLeaseStore(db_path).stats()["shards_done"] == 3
+
+    @patch("src.main.get_shard_count", return_value=2)
+    @patch("src.main._transfer_targets")
+    def test_interrupted_shard_released(
+        self, mock_transfer, mock_shard_count, mock_credentials, mock_client_class, mock_add_skip, tmp_path
+    ):
+        """検証対象: run_transfer_leased()
+        目的: 中断したシャードは転送済みファイルを記録して解放され、再取得時は残りのみ転送することを確認"""
+        files = [{"name": f"f{i}.txt", "path": f"/f{i}.txt"} for i in range(20)]
+        db_path = str(tmp_path / "leases.sqlite")
+
+        def interrupted(targets, client, max_workers, stop_event=None, mode="single"):
+            _record_transferred(targets[0])
+            return 1, len(targets), True
+
+        mock_transfer.side_effect = interrupted
+        run_transfer_leased(db_path, files)
+
+        first_targets = list(mock_transfer.call_args.args[0])
+        assert mock_transfer.call_count == 1
+        assert ShardLeaseStore(db_path).stats()["shards_pending"] == 2
+
+        mock_transfer.side_effect = _all_transferred
+        run_transfer_leased(db_path, files)
+
+        retried = mock_transfer.call_args_list[1].args[0]
+        assert list(retried) == first_targets[1:]
+
+    @patch("src.main.get_shard_count", return_value=2)
+    @patch("src.main._transfer_targets")
+    def test_failed_files_keep_shard_pending(
+        self, mock_transfer, mock_shard_count, mock_credentials, mock_client_class, mock_add_skip, tmp_path
+    ):
+        """検証対象: run_transfer_leased()
+        目的: 転送に失敗したファイルが残るシャードは完了にせず解放され、このノードでは再取得せずに
+        残りのシャードを転送し、次回実行時に失敗したファイルのみ再試行することを確認"""
+        files = [{"name": f"f{i}.txt", "path": f"/f{i}.txt"} for i in range(20)]
+        db_path = str(tmp_path / "leases.sqlite")
+
+        def first_fails(targets, client, max_workers, stop_event=None, mode="single"):
+            # 最初のシャードは先頭のファイルのみ転送に失敗する
+            succeeded = targets[1:] if mock_transfer.call_count == 1 else targets
+            for file_info in succeeded:
+                _record_transferred(file_info)
+            return len(succeeded), len(targets), False
+
+        mock_transfer.side_effect = first_fails
+        run_transfer_leased(db_path, files)
+
+        first_targets = list(mock_transfer.call_args_list[0].args[0])
+        assert mock_transfer.call_count == 2
+        stats = ShardLeaseStore(db_path).stats()
+        assert (stats["shards_pending"], stats["shards_done"]) == (1, 1)
+
+        mock_transfer.side_effect = _all_transferred
+        run_transfer_leased(db_path, files)
+
+        assert list(mock_transfer.call_args_list[2].args[0]) == first_targets[:1]
+        assert ShardLeaseStore(db_path).stats()["shards_done"] == 2
+
 
 class TestMain:
     """メイン関数のテスト"""
@@ -481,6 +1026,32 @@ class TestMain:
         mock_rebuild.assert_not_called()  # スキップリストが存在するので再構築しない
         mock_run_transfer.assert_called_once()
 
+    @patch("src.main.get_skip_list_reconcile_before_transfer", return_value=True)
+    @patch("src.main.run_transfer")
+    @patch("src.main.rebuild_skip_list")
+    @patch("src.main.get_onedrive_files")
+    @patch("src.main.check_config_changed")
+    @patch("os.path.exists")
+    @patch("sys.argv", ["main.py"])
+    def test_main_default_reconciles_skip_list(
+        self,
+        mock_exists,
+        mock_config_changed,
+        mock_get_onedrive,
+        mock_rebuild,
+        mock_run_transfer,
+        mock_reconcile,
+    ):
+        """検証対象: main() 目的: 照合有効時はスキップリストが存在しても転送前に照合し直すことを確認"""
+        mock_config_changed.return_value = False
+        mock_exists.return_value = True
+        mock_get_onedrive.return_value = [{"name": "test.txt"}]
+
+        main()
+
+        mock_rebuild.assert_called_once_with([{"name": "test.txt"}], force_crawl=False, verbose=False)
+        mock_run_transfer.assert_called_once()
+
     @patch("src.main.run_transfer")
     @patch("src.main.rebuild_skip_list")
     @patch("src.main.get_onedrive_files")
@@ -507,6 +1078,42 @@ class TestMain:
         mock_rebuild.assert_called_once()  # スキップリストが存在しないので自動再構築
         mock_run_transfer.assert_called_once()
 
+    @patch("src.main.get_skip_list_reconcile_before_transfer", return_value=False)
+    @patch("src.main.run_transfer_pipelined")
+    @patch("src.main.run_transfer")
+    @patch("src.main.get_onedrive_files")
+    @patch("src.main.check_config_changed", return_value=False)
+    @patch("os.path.exists")
+    @patch("sys.argv", ["main.py", "--pipeline"])
+    def test_main_pipeline_option(
+        self, mock_exists, mock_config_changed, mock_get_onedrive, mock_run_transfer, mock_pipelined, mock_reconcile
+    ):
+        """検証対象: main() 目的: --pipeline 指定時はクロールを待たずにパイプライン転送を行うことを確認"""
+        mock_exists.return_value = False  # skip_list.json does not exist
+
+        main()
+
+        # スキップリストが無いため転送先のインベントリと照合する
+        mock_pipelined.assert_called_once_with(reconcile=True)
+        mock_get_onedrive.assert_not_called()
+        mock_run_transfer.assert_not_called()
+
+    @patch("src.main.run_transfer_pipelined")
+    @patch("src.main.run_transfer_multiprocess")
+    @patch("src.main.get_onedrive_files")
+    @patch("src.main.check_config_changed", return_value=False)
+    @patch("os.path.exists", return_value=True)
+    @patch("sys.argv", ["main.py", "--pipeline", "--processes", "2"])
+    def test_main_pipeline_falls_back_with_processes(
+        self, mock_exists, mock_config_changed, mock_get_onedrive, mock_multiprocess, mock_pipelined
+    ):
+        """検証対象: main() 目的: マルチプロセス転送ではパイプライン転送を行わず、クロール完了後に転送することを確認"""
+        main()
+
+        mock_pipelined.assert_not_called()
+        mock_get_onedrive.assert_called_once_with()
+        mock_multiprocess.assert_called_once()
+
     @patch("src.main.run_transfer")
     @patch("src.main.rebuild_skip_list")
     @patch("src.main.get_onedrive_files")
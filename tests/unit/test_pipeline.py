@@ -0,0 +1,143 @@
+"""
+src/pipeline.py のテスト
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.pipeline import DestinationReconciler, FeedStopped, TransferFeed
+from src.skiplist import SkipIndex
+
+FILES = [{"name": f"file{i}.txt", "path": f"TEST-Onedrive/file{i}.txt"} for i in range(5)]
+
+
+class TestTransferFeed:
+    """TransferFeed クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_streams_before_crawl_finishes(self):
+        """逐次受け渡しのテスト"""
+        # 検証対象: TransferFeed.start(), TransferFeed.__iter__()
+        # 目的: クロールの完了を待たずに最初のファイルを受け取れ、スキップ対象は除かれることを確認
+        received_first = threading.Event()
+
+        def produce(put):
+            put(FILES[0])
+            # 転送側が最初のファイルを受け取るまでクロールを進めない
+            assert received_first.wait(5)
+            for file_info in FILES[1:]:
+                put(file_info)
+
+        feed = TransferFeed(10, is_skipped=lambda f: f["name"] == "file2.txt", poll_sec=0.05)
+        feed.start(produce)
+        received = []
+        for index, file_info in feed:
+            received.append((index, file_info["name"]))
+            received_first.set()
+        feed.join()
+
+        assert received == [(0, "file0.txt"), (1, "file1.txt"), (2, "file3.txt"), (3, "file4.txt")]
+        assert feed.error is None
+        stats = feed.stats()
+        assert (stats["crawled"], stats["skipped"], stats["enqueued"]) == (5, 1, 4)
+        assert stats["first_transfer_sec"] is not None
+
+    @pytest.mark.unit
+    def test_queue_is_bounded(self):
+        """有界キューのテスト"""
+        # 検証対象: TransferFeed.put()
+        # 目的: キューが満杯の間はクロール側が待たされ、保持する件数が上限を超えないことを確認
+        feed = TransferFeed(2, poll_sec=0.05)
+        feed.start(lambda put: [put(file_info) for file_info in FILES])
+        time.sleep(0.3)
+
+        # キューの2件と、満杯のため待っている1件のみ
+        assert feed.crawled == 3
+        assert [file_info["name"] for _, file_info in feed] == [file_info["name"] for file_info in FILES]
+        feed.join()
+
+    @pytest.mark.unit
+    def test_stop_event_stops_crawl_and_iteration(self):
+        """停止要求のテスト"""
+        # 検証対象: TransferFeed.put(), TransferFeed.__iter__()
+        # 目的: 停止要求後は put() が FeedStopped を送出してクロールを中断し、受け取りも終えることを確認
+        stop_event = threading.Event()
+        feed = TransferFeed(1, stop_event=stop_event, poll_sec=0.05)
+        feed.start(lambda put: [put(file_info) for file_info in FILES])
+        received = []
+        for _, file_info in feed:
+            received.append(file_info)
+            stop_event.set()
+        feed.join(5)
+
+        assert received == FILES[:1]
+        assert feed.error is None
+        assert feed.crawled < len(FILES)
+        with pytest.raises(FeedStopped):
+            feed.put(FILES[0])
+
+    @pytest.mark.unit
+    def test_crawl_error_is_recorded(self):
+        """クロール失敗のテスト"""
+
+        # 検証対象: TransferFeed.start()
+        # 目的: クロールが失敗しても受け渡し済みのファイルは受け取れ、例外は error に記録されることを確認
+        def produce(put):
+            put(FILES[0])
+            raise RuntimeError("crawl failed")
+
+        feed = TransferFeed(10, poll_sec=0.05)
+        feed.start(produce)
+
+        assert [file_info for _, file_info in feed] == FILES[:1]
+        feed.join()
+        assert isinstance(feed.error, RuntimeError)
+
+
+class TestDestinationReconciler:
+    """DestinationReconciler クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_lookup_until_index_is_loaded(self):
+        """インベントリ取得中の照合テスト"""
+        # 検証対象: DestinationReconciler.is_present(), DestinationReconciler.is_indexed()
+        # 目的: インベントリの取得中は1件ずつ問い合わせ、取得後は索引で判定し、存在したファイルを記録することを確認
+        release_index = threading.Event()
+        matched = []
+
+        def load_index():
+            assert release_index.wait(5)
+            return SkipIndex(FILES[2:])
+
+        reconciler = DestinationReconciler(load_index, lambda file_info: file_info is FILES[1], matched.append)
+        reconciler.start()
+
+        assert reconciler.is_indexed(FILES[1]) is False
+        assert reconciler.is_present(FILES[0]) is False
+        assert reconciler.is_present(FILES[1]) is True
+        release_index.set()
+        reconciler.join(5)
+
+        assert reconciler.is_indexed(FILES[2]) is True
+        assert reconciler.is_present(FILES[0]) is False
+        assert matched == [FILES[1], FILES[2]]
+        assert reconciler.stats() == {"sharepoint_matched": 2, "sharepoint_lookups": 2, "reconcile_ready": True}
+
+    @pytest.mark.unit
+    def test_load_failure_keeps_lookups(self):
+        """インベントリ取得失敗のテスト"""
+
+        # 検証対象: DestinationReconciler.start()
+        # 目的: インベントリの取得に失敗しても例外は error に記録し、以降も1件ずつ問い合わせることを確認
+        def load_index():
+            raise RuntimeError("crawl failed")
+
+        reconciler = DestinationReconciler(load_index, lambda file_info: True, lambda file_info: None)
+        reconciler.start()
+        reconciler.join(5)
+
+        assert isinstance(reconciler.error, RuntimeError)
+        assert reconciler.is_present(FILES[0]) is True
+        assert reconciler.lookups == 1
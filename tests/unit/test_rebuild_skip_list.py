@@ -3,9 +3,10 @@ src/rebuild_skip_list.py のテスト
 """
 
 import os
-from unittest.mock import Mock, mock_open, patch
+from unittest.mock import Mock, patch
 
 import pytest
+import requests
 
 from src.rebuild_skip_list import (
     crawl_onedrive,
@@ -17,6 +18,16 @@ from src.rebuild_skip_list import (
 class TestCrawlSharepoint:
     """crawl_sharepoint 関数のテスト"""
 
+    @pytest.fixture(autouse=True)
+    def _full_crawl(self, tmp_path):
+        # delta を使わない全件クロールの経路を検証する（delta の経路は個別のテストで有効化する）
+        self.files_path = str(tmp_path / "sharepoint_current_files.ndjson")
+        with (
+            patch("src.rebuild_skip_list.get_sharepoint_delta_enabled", return_value=False),
+            patch("src.rebuild_skip_list.get_sharepoint_current_files_path", return_value=self.files_path),
+        ):
+            yield
+
     @patch("src.rebuild_skip_list.GraphTransferClient")
     @patch("src.rebuild_skip_list.get_structured_logger")
     @patch("os.makedirs")
@@ -46,7 +57,7 @@ class TestCrawlSharepoint:
                 "parentReference": {"path": "/drive/root:/TEST-Sharepoint"},
             },
         ]
-        mock_client.list_drive_items.return_value = sharepoint_items
+        mock_client.iter_drive_items.return_value = sharepoint_items
 
         with patch.dict(
             os.environ,
@@ -59,8 +70,7 @@ class TestCrawlSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
             },
         ):
-            with patch("builtins.open", mock_open()) as mock_file:
-                result = crawl_sharepoint()
+            result = list(crawl_sharepoint())
 
         # 結果の検証
         assert len(result) == 2
@@ -74,7 +84,9 @@ class TestCrawlSharepoint:
         mock_logger_instance.info.assert_any_call("SharePointクロール完了", file_count=2)
 
         # ファイル保存の確認
-        mock_file.assert_called()
+        assert os.path.exists(self.files_path)
+        # クロール後はクライアントを閉じる
+        mock_client.close.assert_called_once()
 
     @patch("src.rebuild_skip_list.GraphTransferClient")
     @patch("src.rebuild_skip_list.get_structured_logger")
@@ -113,7 +125,7 @@ class TestCrawlSharepoint:
                 }
             )
 
-        mock_client.list_drive_items.return_value = sharepoint_items
+        mock_client.iter_drive_items.return_value = sharepoint_items
 
         with patch.dict(
             os.environ,
@@ -126,9 +138,8 @@ class TestCrawlSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
             },
         ):
-            with patch("builtins.open", mock_open()):
-                with patch("src.logger.logger") as mock_progress_logger:
-                    result = crawl_sharepoint()
+            with patch("src.logger.logger") as mock_progress_logger:
+                result = list(crawl_sharepoint())
 
         # 結果の検証
         assert len(result) == 1500
@@ -136,13 +147,63 @@ class TestCrawlSharepoint:
         # 進捗ログの確認（1000件と1500件で2回呼ばれるはず）
         assert mock_progress_logger.info.call_count >= 1
 
+    @patch("src.rebuild_skip_list.GraphTransferClient")
+    @patch("src.rebuild_skip_list.get_structured_logger")
+    @patch("os.makedirs")
+    def test_crawl_sharepoint_uses_crawled_full_path(self, mock_makedirs, mock_logger, mock_client_class):
+        """検証対象: crawl_sharepoint() 目的: クロール時に付与されたフルパスをそのまま使うことを確認"""
+        mock_logger.return_value = Mock()
+        mock_client = Mock()
+        mock_client_class.return_value = mock_client
+        mock_client.iter_drive_items.return_value = [
+            {
+                "name": "file1.txt",
+                "id": "file1_id",
+                "size": 1024,
+                "lastModifiedDateTime": "2024-01-01T00:00:00Z",
+                "full_path": "TEST-Sharepoint/a/TEST-Sharepoint/file1.txt",
+            }
+        ]
+
+        with patch.dict(os.environ, {"DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint"}):
+            result = list(crawl_sharepoint())
+
+        # parentReference の文字列分解では誤るフォルダ名の重複も正しく扱える
+        assert result[0]["path"] == "TEST-Sharepoint/a/TEST-Sharepoint/file1.txt"
+
+    @patch("src.rebuild_skip_list.get_sharepoint_delta_state_path", return_value="logs/sp_delta.json")
+    @patch("src.rebuild_skip_list.GraphTransferClient")
+    @patch("src.rebuild_skip_list.get_structured_logger")
+    @patch("os.makedirs")
+    def test_crawl_sharepoint_delta(self, mock_makedirs, mock_logger, mock_client_class, mock_state_path):
+        """検証対象: crawl_sharepoint()
+        目的: delta 有効時は転送先の差分同期結果を使い、失敗時は全件クロールすることを確認"""
+        mock_logger.return_value = Mock()
+        mock_client = Mock()
+        mock_client_class.return_value = mock_client
+        delta_files = [{"name": "file1.txt", "path": "TEST-Sharepoint/file1.txt", "size": 1, "id": "1"}]
+        mock_client.sync_sharepoint_delta.return_value = delta_files
+        mock_client.iter_drive_items.return_value = [{"name": "file2.txt", "full_path": "TEST-Sharepoint/file2.txt"}]
+
+        with (
+            patch("src.rebuild_skip_list.get_sharepoint_delta_enabled", return_value=True),
+            patch.dict(os.environ, {"DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint"}),
+        ):
+            result = list(crawl_sharepoint())
+            mock_client.sync_sharepoint_delta.side_effect = requests.exceptions.ConnectionError("down")
+            fallback = list(crawl_sharepoint())
+
+        assert result == delta_files
+        mock_client.sync_sharepoint_delta.assert_called_with("TEST-Sharepoint", "logs/sp_delta.json")
+        assert [f["path"] for f in fallback] == ["TEST-Sharepoint/file2.txt"]
+
 
 class TestCrawlOnedrive:
     """crawl_onedrive 関数のテスト"""
 
     @patch("src.rebuild_skip_list.GraphTransferClient")
     @patch("src.rebuild_skip_list.get_structured_logger")
-    def test_crawl_onedrive_success(self, mock_logger, mock_client_class):
+    def test_crawl_onedrive_success(self, mock_logger, mock_client_class, tmp_path):
         """検証対象: crawl_onedrive() 目的: OneDriveクロール成功時の動作確認"""
         mock_logger_instance = Mock()
         mock_logger.return_value = mock_logger_instance
@@ -155,7 +216,8 @@ class TestCrawlOnedrive:
             {"name": "doc1.txt", "path": "/TEST-Onedrive/doc1.txt", "size": 1024},
             {"name": "doc2.txt", "path": "/TEST-Onedrive/doc2.txt", "size": 2048},
         ]
-        mock_client.collect_file_targets_from_onedrive.return_value = onedrive_files
+        mock_client.iter_file_targets_from_onedrive.return_value = iter(onedrive_files)
+        files_path = str(tmp_path / "onedrive_files.ndjson")
 
         with patch.dict(
             os.environ,
@@ -169,36 +231,45 @@ class TestCrawlOnedrive:
                 "SOURCE_ONEDRIVE_FOLDER_PATH": "TEST-Onedrive",
             },
         ):
-            with patch("builtins.open", mock_open()) as mock_file:
+            with patch("src.rebuild_skip_list.get_onedrive_files_path", return_value=files_path):
                 result = crawl_onedrive()
 
-        # 結果の検証
-        assert result == onedrive_files
+        # 結果の検証（保存したファイルリストを遅延読み込みする）
+        assert list(result) == onedrive_files
 
         # GraphTransferClientの呼び出し確認
-        mock_client.collect_file_targets_from_onedrive.assert_called_once_with(
-            folder_path="TEST-Onedrive",
-            user_principal_name="test@example.com",
-            drive_id=None,
-        )
+        mock_client.iter_file_targets_from_onedrive.assert_called_once()
+        call_kwargs = mock_client.iter_file_targets_from_onedrive.call_args.kwargs
+        assert call_kwargs["folder_path"] == "TEST-Onedrive"
+        assert call_kwargs["user_principal_name"] == "test@example.com"
+        assert call_kwargs["drive_id"] is None
+        # 途中経過はファイルリストの隣に保存する
+        assert call_kwargs["checkpoint"].path == files_path + ".checkpoint"
 
         # ログ出力の確認
         mock_logger_instance.info.assert_any_call("OneDriveクロール開始", folder="TEST-Onedrive")
         mock_logger_instance.info.assert_any_call("OneDriveクロール完了", file_count=2)
 
         # ファイル保存の確認
-        mock_file.assert_called()
+        assert os.path.exists(files_path)
 
     @patch("src.rebuild_skip_list.GraphTransferClient")
     @patch("src.rebuild_skip_list.get_structured_logger")
-    def test_crawl_onedrive_missing_env_vars(self, mock_logger, mock_client_class):
+    def test_crawl_onedrive_missing_env_vars(self, mock_logger, mock_client_class, tmp_path):
         """検証対象: crawl_onedrive() 目的: 必須環境変数未設定時のエラー確認"""
         mock_logger_instance = Mock()
         mock_logger.return_value = mock_logger_instance
+        # 未設定のままのクライアントはファイルリストを返せない（反復不可）
+        mock_client_class.return_value.iter_file_targets_from_onedrive.return_value = Mock()
+        files_path = str(tmp_path / "onedrive_files.ndjson")
 
         with patch.dict(os.environ, {}, clear=True):
-            with pytest.raises(TypeError):
-                crawl_onedrive()
+            with patch("src.rebuild_skip_list.get_onedrive_files_path", return_value=files_path):
+                with pytest.raises(TypeError):
+                    crawl_onedrive()
+
+        # 途中で失敗した場合はファイルリストを置き換えない
+        assert not os.path.exists(files_path)
 
 
 class TestCreateSkipListFromSharepoint:
@@ -239,7 +310,7 @@ class TestCreateSkipListFromSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
             },
         ):
-            with patch("builtins.open", mock_open()) as mock_file:
+            with patch("src.rebuild_skip_list.save_skip_list") as mock_file:
                 result = create_skip_list_from_sharepoint(onedrive_files, sharepoint_files)
 
         # 結果の検証
@@ -287,7 +358,7 @@ class TestCreateSkipListFromSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
             },
         ):
-            with patch("builtins.open", mock_open()):
+            with patch("src.rebuild_skip_list.save_skip_list"):
                 result = create_skip_list_from_sharepoint(onedrive_files, sharepoint_files)
 
         # 結果の検証
@@ -315,7 +386,7 @@ class TestCreateSkipListFromSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "TEST-Sharepoint",
             },
         ):
-            with patch("builtins.open", mock_open()):
+            with patch("src.rebuild_skip_list.save_skip_list"):
                 result = create_skip_list_from_sharepoint([], [])
 
         # 結果の検証
@@ -347,7 +418,7 @@ class TestCreateSkipListFromSharepoint:
                 "DESTINATION_SHAREPOINT_DOCLIB": "MySharePoint",
             },
         ):
-            with patch("builtins.open", mock_open()):
+            with patch("src.rebuild_skip_list.save_skip_list"):
                 result = create_skip_list_from_sharepoint(onedrive_files, sharepoint_files)
 
         # 結果の検証
@@ -374,14 +445,14 @@ class TestCreateSkipListFromSharepoint:
         ):
             # config_manager のインポートエラーをシミュレート
             with patch("src.config_manager.get_skip_list_path", side_effect=ImportError()):
-                with patch("builtins.open", mock_open()) as mock_file:
+                with patch("src.rebuild_skip_list.save_skip_list") as mock_file:
                     result = create_skip_list_from_sharepoint(onedrive_files, sharepoint_files)
 
         # 結果の検証
         assert len(result) == 1
 
         # デフォルトパスでファイルが保存されることを確認
-        mock_file.assert_called()
+        assert mock_file.call_args.args[1] == "logs/skip_list.json"
 
 
 class TestMainExecution:
@@ -0,0 +1,160 @@
+"""
+サイズ別転送レーンのスケジューリングのテスト
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.scheduling import BoundedDispatcher, LaneTimings, split_transfer_lanes
+
+MB = 1024 * 1024
+
+
+class TestSplitTransferLanes:
+    """split_transfer_lanes 関数のテスト"""
+
+    @pytest.mark.unit
+    def test_split_and_order(self):
+        """レーン分割・順序テスト"""
+        # 検証対象: split_transfer_lanes()
+        # 目的: 閾値未満は元の順序で小容量レーン、閾値以上はサイズの大きい順に大容量レーンへ入ることを確認
+        targets = [
+            {"name": "a", "size": 10 * MB},
+            {"name": "b", "size": 1},
+            {"name": "c", "size": 500 * MB},
+            {"name": "d"},
+            {"name": "e", "size": 4 * MB},
+        ]
+
+        small, large = split_transfer_lanes(targets, 4 * MB)
+
+        assert [(i, f["name"]) for i, f in small] == [(1, "b"), (3, "d")]
+        assert [(i, f["name"]) for i, f in large] == [(2, "c"), (0, "a"), (4, "e")]
+
+
+class TestMakespan:
+    """全体完了時間の見積もりテスト"""
+
+    @pytest.mark.unit
+    def test_report_compares_with_single_pool(self):
+        """単一プールとの比較テスト"""
+        # 検証対象: LaneTimings.report()
+        # 目的: レーン別の集計から単一プールの完了時間（最長の転送が最後に残る場合）を見積もり、
+        #       実測との改善率とレーン別件数を返すことを確認
+        timings = LaneTimings()
+        for lane, elapsed in [("large", 10.0), ("small", 1.0), ("small", 1.0), ("small", 1.0), ("small", 1.0)]:
+            timings.record(lane, elapsed)
+
+        report = timings.report(makespan=10.0, single_pool_workers=2)
+
+        assert report["single_pool_makespan_estimate_sec"] == 12
+        assert report["makespan_improvement_pct"] == pytest.approx(16.7)
+        assert report["small_lane_files"] == 4
+        assert report["large_lane_files"] == 1
+
+
+class TestBoundedDispatcher:
+    """BoundedDispatcher クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_items_pulled_lazily_within_window(self):
+        """投入数制限テスト"""
+        # 検証対象: BoundedDispatcher.__iter__()
+        # 目的: イテレータから window 件ずつ取り出して投入し、全件の結果が返ることを確認
+        pulled = 0
+
+        def items():
+            nonlocal pulled
+            for i in range(100):
+                pulled += 1
+                yield i
+
+        dispatcher = BoundedDispatcher()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            dispatcher.add_lane(executor, lambda i: i * 2, items(), window=3)
+            iterator = iter(dispatcher)
+            next(iterator)
+            assert pulled <= 3
+            results = [future.result() for future, _ in iterator]
+
+        assert len(results) == 99
+        assert dispatcher.submitted == 100
+
+    @pytest.mark.unit
+    def test_stop_cancels_queued(self):
+        """停止要求テスト"""
+        # 検証対象: BoundedDispatcher.__iter__()
+        # 目的: stop_event 設定後は新規投入を止め、未着手の Future を取り消して終了することを確認
+        stop_event = threading.Event()
+        dispatcher = BoundedDispatcher(stop_event, poll_sec=0.01)
+
+        def work(i):
+            if i == 0:
+                stop_event.set()
+            return i
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            dispatcher.add_lane(executor, work, range(1000), window=10)
+            completed = [item for _, item in dispatcher]
+
+        assert 0 in completed
+        assert dispatcher.submitted <= 10
+        assert len(completed) + dispatcher.cancelled == dispatcher.submitted
+
+    @pytest.mark.unit
+    def test_routed_lanes_use_separate_executors(self):
+        """レーン振り分けテスト"""
+        # 検証対象: BoundedDispatcher.add_routed_lanes()
+        # 目的: 大容量レーンが全て実行中でも、後に到着した小容量の要素は別のスレッドプールで先に完了することを確認
+        release_large = threading.Event()
+        dispatcher = BoundedDispatcher(poll_sec=0.01)
+        completed = []
+
+        def transfer_large(i):
+            assert release_large.wait(5)
+            return i
+
+        with (
+            ThreadPoolExecutor(max_workers=1) as large_executor,
+            ThreadPoolExecutor(max_workers=2) as small_executor,
+        ):
+            lanes = {"large": (large_executor, transfer_large, 1), "small": (small_executor, lambda i: i, 2)}
+            dispatcher.add_routed_lanes(range(20), lambda i: "large" if i < 2 else "small", lanes, backlog=4)
+            for _, item in dispatcher:
+                completed.append(item)
+                if len(completed) == 18:
+                    release_large.set()
+
+        assert sorted(completed[:18]) == list(range(2, 20))
+        assert sorted(completed) == list(range(20))
+
+    @pytest.mark.unit
+    def test_routed_lanes_bound_backlog(self):
+        """振り分け待ちの保持数テスト"""
+        # 検証対象: BoundedDispatcher.add_routed_lanes()
+        # 目的: 投入数が上限のレーンの要素は backlog 件まで保持し、それ以上はイテレータを読み進めないことを確認
+        pulled = 0
+        release = threading.Event()
+
+        def items():
+            nonlocal pulled
+            for i in range(100):
+                pulled += 1
+                yield i
+
+        def work(i):
+            assert release.wait(5)
+            return i
+
+        dispatcher = BoundedDispatcher(poll_sec=0.01)
+        with ThreadPoolExecutor(max_workers=1) as large_executor, ThreadPoolExecutor(max_workers=1) as small_executor:
+            lanes = {"large": (large_executor, work, 1), "small": (small_executor, work, 1)}
+            dispatcher.add_routed_lanes(items(), lambda i: "large", lanes, backlog=3)
+            iterator = iter(dispatcher)
+            threading.Timer(0.1, release.set).start()
+            next(iterator)
+            # 投入済み1件 + 保持3件までしか読み進めない
+            assert pulled <= 5
+            assert len([item for _, item in iterator]) == 99
@@ -0,0 +1,39 @@
+"""
+転送対象のシャード分割のテスト
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from src.sharding import iter_shard, shard_of
+
+
+class TestSharding:
+    """shard_of / iter_shard 関数のテスト"""
+
+    @pytest.mark.unit
+    def test_partition_is_complete_and_disjoint(self):
+        """分割の網羅性テスト"""
+        # 検証対象: iter_shard()
+        # 目的: 全シャードを合わせると転送対象が重複・欠落なく1回ずつ現れ、偏りが小さいことを確認
+        targets = [{"path": f"/user/docs/{i // 10}/file{i}.txt", "name": f"file{i}.txt"} for i in range(1000)]
+
+        shards = [list(iter_shard(targets, index, 4)) for index in range(4)]
+
+        assert sorted(f["name"] for shard in shards for f in shard) == sorted(f["name"] for f in targets)
+        assert min(len(shard) for shard in shards) > 150
+
+    @pytest.mark.unit
+    def test_stable_across_processes(self):
+        """プロセス間の決定性テスト"""
+        # 検証対象: shard_of()
+        # 目的: ハッシュのランダム化に影響されず、別プロセスでも同じシャード番号になることを確認
+        file_info = {"path": "/user/docs/report.xlsx", "name": "report.xlsx"}
+        code = "from src.sharding import shard_of; print(shard_of({'path': '/user/docs/report.xlsx'}, 7))"
+
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+        assert int(output) == shard_of(file_info, 7)
+        assert shard_of(file_info, 1) == 0
@@ -1,7 +1,23 @@
 import json
-from unittest.mock import MagicMock, mock_open, patch
+import os
+from unittest.mock import mock_open, patch
 
-from src.skiplist import add_to_skip_list, is_skipped, load_skip_list, save_skip_list
+from src import skiplist
+from src.skiplist import (
+    FSYNC_ALWAYS,
+    FSYNC_NEVER,
+    SkipIndex,
+    SkipJournal,
+    add_many_to_skip_list,
+    add_to_skip_list,
+    compact_skip_list,
+    count_skip_list,
+    is_skipped,
+    load_skip_list,
+    remove_skip_list,
+    save_skip_list,
+    skip_list_exists,
+)
 
 
 class TestSkipList:
@@ -49,43 +65,210 @@ class TestSkipList:
         result = is_skipped(file_info, skip_list)
         assert result is False
 
-    @patch("src.skiplist.FileLock")
-    def test_add_to_skip_list(self, mock_filelock):
+    def test_skip_index_membership(self):
+        """SkipIndex の判定テスト"""
+        index = SkipIndex(self.test_skip_list)
+
+        assert {"path": "/test/file1.txt", "name": "file1.txt", "size": 99} in index
+        assert {"path": "/other/file1.txt", "name": "file1.txt"} not in index
+        assert len(index) == 2
+        # is_skipped に渡した場合も索引で判定する
+        assert is_skipped({"path": "/test/file2.txt", "name": "file2.txt"}, index) is True
+
+    def test_skip_index_incremental_add(self):
+        """SkipIndex の逐次追加テスト"""
+        index = SkipIndex()
+
+        assert index.add({"path": "/test/a.txt", "name": "a.txt", "id": "item-a"}) is True
+        # 登録済みの (パス, ファイル名) は追加しない
+        assert index.add({"path": "/test/a.txt", "name": "a.txt"}) is False
+        assert index.add_many([{"path": "/test/b.txt", "name": "b.txt"}, {"path": "/test/a.txt", "name": "a.txt"}]) == 1
+        assert len(index) == 2
+        assert index.has_id("item-a") is True
+        assert index.has_id("item-b") is False
+        assert index.has_id(None) is False
+
+    def test_skip_index_load(self, tmp_path):
+        """SkipIndex の読み込みテスト"""
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list, path)
+
+        index = SkipIndex.load(path)
+
+        assert {"path": "/test/file2.txt", "name": "file2.txt"} in index
+        assert len(SkipIndex.load(str(tmp_path / "missing.json"))) == 0
+
+    def test_add_to_skip_list(self, tmp_path):
         """スキップリストへの追加テスト"""
-        mock_lock = MagicMock()
-        mock_filelock.return_value.__enter__.return_value = mock_lock
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list, path)
 
-        file_info = {"path": "/test/new_file.txt", "name": "new_file.txt"}
-        with patch("src.skiplist.load_skip_list", return_value=[]):
-            with patch("src.skiplist.save_skip_list") as mock_save:
-                add_to_skip_list(file_info, "test_path.json")
-                mock_save.assert_called_once()
+        add_to_skip_list({"path": "/test/new_file.txt", "name": "new_file.txt"}, path)
 
-    @patch("src.skiplist.FileLock")
-    def test_add_to_skip_list_duplicate(self, mock_filelock):
+        # スナップショットは書き直さず、ジャーナルに1行追記する
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == self.test_skip_list
+        with open(path + ".journal", encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == [{"path": "/test/new_file.txt", "name": "new_file.txt"}]
+        assert [item["name"] for item in load_skip_list(path)] == ["file1.txt", "file2.txt", "new_file.txt"]
+
+    def test_add_to_skip_list_duplicate(self, tmp_path):
         """重複するスキップリストへの追加テスト"""
-        mock_lock = MagicMock()
-        mock_filelock.return_value.__enter__.return_value = mock_lock
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list, path)
 
-        file_info = {"path": "/test/file1.txt", "name": "file1.txt"}
-        existing_list = [{"path": "/test/file1.txt", "name": "file1.txt", "reason": "existing"}]
+        add_to_skip_list({"path": "/test/file1.txt", "name": "file1.txt"}, path)
+
+        # 重複は追記しない
+        assert not os.path.exists(path + ".journal")
+
+    def test_add_many_to_skip_list(self, tmp_path):
+        """複数件の一括追加テスト"""
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list, path)
+        file_infos = [
+            {"path": "/test/file1.txt", "name": "file1.txt"},
+            {"path": "/test/file3.txt", "name": "file3.txt"},
+            {"path": "/test/file3.txt", "name": "file3.txt"},
+        ]
+
+        added = add_many_to_skip_list(file_infos, path, str(tmp_path / "skip_list.lock"))
+
+        # 既存・重複は追加されず、1回の書き込みで新規分のみ追加される
+        assert added == 1
+        assert [item["name"] for item in load_skip_list(path)] == ["file1.txt", "file2.txt", "file3.txt"]
+
+    def test_journal_compaction(self, tmp_path):
+        """ジャーナルの圧縮テスト"""
+        path = str(tmp_path / "skip_list.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.test_skip_list, f)
+        journal = SkipJournal(path, str(tmp_path / "skip_list.lock"), compact_records=2)
+
+        journal.add({"path": "/test/file3.txt", "name": "file3.txt"})
+        assert os.path.exists(path + ".journal")
+        # 2件目の追記で従来の JSON 配列のスナップショットとジャーナルを NDJSON のスナップショットへまとめる
+        journal.add({"path": "/test/file4.txt", "name": "file4.txt"})
+        journal.close()
+
+        assert not os.path.exists(path + ".journal")
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line)["name"] for line in f] == ["file1.txt", "file2.txt", "file3.txt", "file4.txt"]
+        assert count_skip_list(path) == 4
+
+    def test_journal_reads_interrupted_compaction(self, tmp_path):
+        """圧縮途中で停止したジャーナルの読み込みテスト"""
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list[:1], path)
+        with open(path + ".journal.compacting", "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.test_skip_list[1]) + "\n")
+        with open(path + ".journal", "w", encoding="utf-8") as f:
+            # 重複と、書き込み途中で停止した不完全な行
+            f.write(json.dumps(self.test_skip_list[0]) + "\n" + '{"path": "/test/fi')
 
-        with patch("src.skiplist.load_skip_list", return_value=existing_list):
-            with patch("src.skiplist.save_skip_list") as mock_save:
-                add_to_skip_list(file_info, "test_path.json")
-                # 重複は追加されないので、save_skip_listは呼ばれない
-                mock_save.assert_not_called()
+        assert load_skip_list(path) == self.test_skip_list
+        assert skip_list_exists(path)
 
-    def test_save_skip_list(self):
+        assert compact_skip_list(path, str(tmp_path / "skip_list.lock")) == 2
+        assert load_skip_list(path) == self.test_skip_list
+
+    def test_journal_append_during_compaction(self, tmp_path):
+        """他プロセスの圧縮と重なった追記のテスト"""
+        path = str(tmp_path / "skip_list.json")
+        lock_path = str(tmp_path / "skip_list.lock")
+        journal = SkipJournal(path, lock_path, compact_records=0)
+        journal.add({"path": "/a", "name": "a"})
+        real_flock = skiplist.fcntl.flock
+        compacted = []
+
+        def flock(fd, operation):
+            # 開いているジャーナルを確認した後、共有ロックを取得する前に他のプロセスが圧縮を終える
+            if operation == skiplist.fcntl.LOCK_SH and not compacted:
+                compacted.append(SkipJournal(path, lock_path).compact())
+            real_flock(fd, operation)
+
+        with patch("src.skiplist.fcntl.flock", side_effect=flock):
+            journal.add({"path": "/b", "name": "b"})
+        journal.close()
+
+        assert compacted == [1]
+        assert [item["name"] for item in load_skip_list(path)] == ["a", "b"]
+        assert compact_skip_list(path, lock_path) == 2
+
+    def test_journal_append_during_compaction_without_flock(self, tmp_path):
+        """flock を使えない環境で他プロセスの圧縮と重なった追記のテスト"""
+        path = str(tmp_path / "skip_list.json")
+        lock_path = str(tmp_path / "skip_list.lock")
+        journal = SkipJournal(path, lock_path, compact_records=0)
+        journal.add({"path": "/a", "name": "a"})
+        real_write = os.write
+        compacted = []
+
+        def write(fd, data):
+            # 置き換え前のジャーナルへ書き込んだ直後に、他のプロセスが圧縮を終える
+            written = real_write(fd, data)
+            if fd == journal._fd and not compacted:
+                compacted.append(None)
+                compacted[0] = SkipJournal(path, lock_path).compact()
+            return written
+
+        with patch("src.skiplist.fcntl", None), patch("src.skiplist.os.write", side_effect=write):
+            journal.add({"path": "/b", "name": "b"})
+        journal.close()
+
+        # 圧縮に含まれたかに関わらず新しいジャーナルへ追記し直す（重複は読み込みで除かれる）
+        assert compacted == [2]
+        assert [item["name"] for item in load_skip_list(path)] == ["a", "b"]
+        assert compact_skip_list(path, lock_path) == 2
+
+    @patch("src.skiplist.os.fsync")
+    def test_journal_fsync_policy(self, mock_fsync, tmp_path):
+        """fsync の方針のテスト"""
+        path = str(tmp_path / "skip_list.json")
+        always = SkipJournal(path, fsync=FSYNC_ALWAYS, compact_records=0)
+        always.add_many([{"path": "/a", "name": "a"}, {"path": "/b", "name": "b"}])
+        always.add({"path": "/c", "name": "c"})
+        always.close()
+        # 追記毎に fsync する（close 時は書き出し済み）
+        assert mock_fsync.call_count == 2
+
+        mock_fsync.reset_mock()
+        never = SkipJournal(str(tmp_path / "other.json"), fsync=FSYNC_NEVER, compact_records=0)
+        never.add({"path": "/a", "name": "a"})
+        never.close()
+        mock_fsync.assert_not_called()
+
+    def test_remove_skip_list(self, tmp_path):
+        """スキップリスト削除テスト"""
+        path = str(tmp_path / "skip_list.json")
+        save_skip_list(self.test_skip_list, path)
+        add_to_skip_list({"path": "/test/file3.txt", "name": "file3.txt"}, path)
+
+        removed = remove_skip_list(path)
+
+        assert removed == [path, path + ".journal"]
+        assert not skip_list_exists(path)
+        # 削除後は同じファイルも改めて追記できる
+        add_to_skip_list({"path": "/test/file3.txt", "name": "file3.txt"}, path)
+        assert count_skip_list(path) == 1
+
+    def test_save_skip_list(self, tmp_path):
         """スキップリスト保存テスト"""
-        with patch("builtins.open", mock_open()) as mock_file:
-            save_skip_list(self.test_skip_list, "test_output.json")
-            mock_file.assert_called_once()
+        path = str(tmp_path / "skip_list.json")
+        add_to_skip_list({"path": "/test/file3.txt", "name": "file3.txt"}, path)
 
-    def test_save_skip_list_with_directory_creation(self):
+        assert save_skip_list(iter(self.test_skip_list), path) == 2
+
+        # NDJSON のスナップショットで置き換え、ジャーナルに追記済みの分は破棄する
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == self.test_skip_list
+        assert not os.path.exists(path + ".journal")
+        assert load_skip_list(path) == self.test_skip_list
+
+    def test_save_skip_list_with_directory_creation(self, tmp_path):
         """ディレクトリ作成付きスキップリスト保存テスト"""
-        with patch("os.makedirs"):
-            with patch("builtins.open", mock_open()):
-                save_skip_list(self.test_skip_list, "logs/test_output.json")
-                # save_skip_listは直接os.makedirsを呼ばないので、このテストは削除
-                pass
+        path = str(tmp_path / "logs" / "skip_list.json")
+
+        save_skip_list(self.test_skip_list, path)
+
+        assert count_skip_list(path) == 2
@@ -0,0 +1,82 @@
+"""
+ThrottleController のテスト
+"""
+
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.throttle import ThrottleController, parse_retry_after
+
+
+def _response(retry_after=None, status_code=429):
+    """スロットリング応答のモック"""
+    response = MagicMock(status_code=status_code)
+    response.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return response
+
+
+class TestParseRetryAfter:
+    """parse_retry_after 関数のテスト"""
+
+    @pytest.mark.unit
+    def test_seconds_and_http_date(self):
+        """秒数・日時形式の解釈テスト"""
+        # 検証対象: parse_retry_after()
+        # 目的: 秒数と HTTP-date の両方の形式を秒数に変換し、不正値は None になることを確認
+        assert parse_retry_after("12") == 12
+        assert parse_retry_after("0") == 0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        retry_at = format_datetime(datetime.now(UTC) + timedelta(seconds=30), usegmt=True)
+        assert parse_retry_after(retry_at) == pytest.approx(30, abs=2)
+
+
+class TestThrottleController:
+    """ThrottleController クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_retry_after_pauses_all_workers(self):
+        """全ワーカー一時停止テスト"""
+        # 検証対象: ThrottleController.record_throttle(), ThrottleController.wait()
+        # 目的: Retry-After の間は他のワーカーの wait() も待機し、解除後は待機しないことを確認
+        throttle = ThrottleController()
+        with patch("src.throttle.time.monotonic", return_value=100.0):
+            delay = throttle.record_throttle(_response("5"))
+            with patch("src.throttle.time.sleep") as mock_sleep:
+                waited = throttle.wait()
+
+        assert delay == 5
+        assert waited == 5
+        mock_sleep.assert_called_once_with(5.0)
+        with patch("src.throttle.time.monotonic", return_value=106.0):
+            assert throttle.wait() == 0
+
+    @pytest.mark.unit
+    def test_overlapping_pauses_counted_once(self):
+        """損失時間の重複排除テスト"""
+        # 検証対象: ThrottleController.stats()
+        # 目的: 同時に受けたスロットリングの停止期間が重複して損失時間に加算されないことを確認
+        throttle = ThrottleController()
+        with patch("src.throttle.time.monotonic", return_value=100.0):
+            throttle.record_throttle(_response("10"))
+            throttle.record_throttle(_response("4"))
+        with patch("src.throttle.time.monotonic", return_value=105.0):
+            throttle.record_throttle(_response("10"))
+
+        stats = throttle.stats()
+        assert stats["throttled_requests"] == 3
+        assert stats["throttle_seconds_lost"] == 15
+
+    @pytest.mark.unit
+    def test_jittered_backoff_without_header(self):
+        """ジッタ付き指数バックオフテスト"""
+        # 検証対象: ThrottleController.backoff_delay()
+        # 目的: Retry-After が無い場合は試行回数に応じた上限内でジッタ付きの待機時間になることを確認
+        throttle = ThrottleController(backoff_base_sec=1.0, backoff_max_sec=8.0)
+
+        assert 0.5 <= throttle.backoff_delay(_response(), 1) <= 1.0
+        assert 2.0 <= throttle.backoff_delay(_response(), 3) <= 4.0
+        assert 4.0 <= throttle.backoff_delay(_response(), 10) <= 8.0
@@ -5,26 +5,59 @@ GraphTransferClient のテスト
 from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 
-from src.transfer import GraphTransferClient
+from src.crawler import DEFAULT_PAGE_SIZE
+from src.download_urls import DownloadUrlCache
+from src.graph_batch import GraphBatcher
+from src.skiplist import SkipIndex
+from src.transfer import ONEDRIVE_ITEM_SELECT, GraphTransferClient, _FolderDedup
+from src.upload_sessions import UploadSessionStore
+
+
+def _session_status(next_offset):
+    """nextExpectedRanges が next_offset から始まるアップロードセッション状態のレスポンス"""
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"nextExpectedRanges": [f"{next_offset}-"]}
+    return response
 
 
 class TestGraphTransferClient:
     """GraphTransferClient クラスのテスト"""
 
     @pytest.fixture
-    def transfer_client(self, mock_env_vars, mock_auth):
+    def transfer_client(self, mock_env_vars, mock_auth, tmp_path):
         """テスト用 GraphTransferClient インスタンス"""
         # 検証対象: GraphTransferClient の初期化
         # 目的: 環境変数から正しく認証情報を取得することを確認
         with patch("src.transfer.GraphAuthenticator", return_value=mock_auth.return_value):
-            return GraphTransferClient(
+            client = GraphTransferClient(
                 client_id="test_client_id",
                 client_secret="test_client_secret",
                 tenant_id="test_tenant_id",
                 site_id="test_site_id",
                 drive_id="test_drive_id",
             )
+        # アップロードセッションの再開情報はテスト毎に分離する
+        client.upload_sessions = UploadSessionStore(str(tmp_path / "upload_sessions.json"))
+        # ダウンロードURLキャッシュはテスト毎に分離する
+        client.download_urls = DownloadUrlCache()
+        # クロールのスナップショットはテスト毎に分離する
+        client.onedrive_crawl_snapshot_path = str(tmp_path / "onedrive_crawl_snapshot.json")
+        client.sharepoint_crawl_snapshot_path = str(tmp_path / "sharepoint_crawl_snapshot.json")
+        # 個別リクエスト経路を検証する（$batch 経路は batched_client で検証）
+        client.batcher.close()
+        client.batcher = None
+        return client
+
+    @pytest.fixture
+    def batched_client(self, transfer_client):
+        """$batch 有効な GraphTransferClient インスタンス"""
+        transfer_client.batcher = GraphBatcher(
+            transfer_client.session, transfer_client.base_url, transfer_client._headers, max_wait_ms=50
+        )
+        yield transfer_client
+        transfer_client.batcher.close()
 
     @pytest.mark.transfer
     def test_upload_file_to_sharepoint_small_file(self, transfer_client, mock_requests_put, sample_file_info):
@@ -36,7 +69,7 @@ class TestGraphTransferClient:
         small_file_info = sample_file_info.copy()
         small_file_info["size"] = 1024
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # ファイル情報取得のモック
             mock_get.return_value.status_code = 200
             mock_get.return_value.json.return_value = {"@microsoft.graph.downloadUrl": "https://test.download.url"}
@@ -72,9 +105,12 @@ class TestGraphTransferClient:
 
             with patch.object(transfer_client, "_get_onedrive_file_stream") as mock_stream:
                 mock_stream.return_value = MagicMock()
-                mock_stream.return_value.iter_content.return_value = [b"test_content" * 1000]
+                mock_stream.return_value.read.side_effect = [b"x" * large_file_info["size"], b""]
 
-                with patch("requests.put") as mock_put:
+                with (
+                    patch("requests.Session.put") as mock_put,
+                    patch.object(transfer_client, "ensure_sharepoint_folder"),
+                ):
                     mock_put.return_value.status_code = 202
                     mock_put.return_value.json.return_value = {"nextExpectedRanges": []}
 
@@ -159,7 +195,7 @@ class TestGraphTransferClient:
         # 目的: SharePointに必要なフォルダ構造が作成されることを確認
 
         with patch.object(transfer_client, "create_folder") as mock_create:
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 # フォルダが存在しない場合のレスポンス
                 mock_get.return_value.status_code = 404
 
@@ -168,13 +204,171 @@ class TestGraphTransferClient:
                 # フォルダ作成が呼ばれることを確認
                 assert mock_create.called
 
+    @pytest.mark.transfer
+    def test_ensure_sharepoint_folder_batched(self, batched_client):
+        """SharePointフォルダ確保テスト（$batch）"""
+        # 検証対象: ensure_sharepoint_folder()
+        # 目的: 全階層の存在確認が1回の $batch にまとめられ、存在しない階層のみ作成されることを確認
+        batch_reply = MagicMock()
+        batch_reply.json.return_value = {
+            "responses": [
+                {"id": "0", "status": 200, "body": {}},
+                {"id": "1", "status": 404, "body": {}},
+                {"id": "2", "status": 404, "body": {}},
+            ]
+        }
+
+        with (
+            patch("requests.Session.post", return_value=batch_reply) as mock_post,
+            patch("requests.Session.get") as mock_get,
+            patch.object(batched_client, "create_folder") as mock_create,
+        ):
+            batched_client.ensure_sharepoint_folder("/test/nested/folder")
+
+        assert mock_post.call_count == 1
+        assert len(mock_post.call_args.kwargs["json"]["requests"]) == 3
+        mock_get.assert_not_called()
+        assert [c.args for c in mock_create.call_args_list] == [("test", "nested"), ("test/nested", "folder")]
+
+    @pytest.mark.transfer
+    def test_ensure_sharepoint_folder_batched_encodes_names(self, batched_client):
+        """SharePointフォルダ確保テスト（$batch・URLエンコード）"""
+        # 検証対象: ensure_sharepoint_folder()
+        # 目的: "#"・"%"・空白を含むフォルダ名が区切り毎にパーセントエンコードされて $batch に入ることを確認
+        batch_reply = MagicMock()
+        batch_reply.json.return_value = {
+            "responses": [{"id": "0", "status": 200, "body": {}}, {"id": "1", "status": 200, "body": {}}]
+        }
+
+        with patch("requests.Session.post", return_value=batch_reply) as mock_post:
+            batched_client.ensure_sharepoint_folder("/Q1 #1/50% off")
+
+        urls = [r["url"] for r in mock_post.call_args.kwargs["json"]["requests"]]
+        root = f"/sites/{batched_client.site_id}/drives/{batched_client.drive_id}/root:"
+        assert urls == [f"{root}/Q1%20%231", f"{root}/Q1%20%231/50%25%20off"]
+
+    @pytest.mark.transfer
+    def test_get_sharepoint_item_batched(self, batched_client):
+        """転送先アイテム取得テスト（$batch）"""
+        # 検証対象: get_sharepoint_item()
+        # 目的: 転送先のパスを $batch で問い合わせ、存在すればアイテム・404 なら None を返すことを確認
+        batch_reply = MagicMock()
+        batch_reply.json.return_value = {
+            "responses": [{"id": "0", "status": 200, "body": {"name": "a #1.txt", "size": 5}}]
+        }
+        file_info = {"name": "a #1.txt", "path": "TEST-Onedrive/dir/a #1.txt"}
+
+        with patch("requests.Session.post", return_value=batch_reply) as mock_post:
+            assert batched_client.get_sharepoint_item(file_info) == {"name": "a #1.txt", "size": 5}
+            batch_reply.json.return_value = {"responses": [{"id": "0", "status": 404, "body": {}}]}
+            assert batched_client.get_sharepoint_item(file_info) is None
+
+        root = f"/sites/{batched_client.site_id}/drives/{batched_client.drive_id}/root:"
+        assert mock_post.call_args.kwargs["json"]["requests"][0]["url"] == f"{root}/TEST-Sharepoint/dir/a%20%231.txt"
+
+    @pytest.mark.transfer
+    def test_get_onedrive_file_stream_batched_lookup(self, batched_client, sample_file_info):
+        """OneDriveファイルストリーム取得テスト（$batch）"""
+        # 検証対象: _get_onedrive_file_stream()
+        # 目的: ダウンロードURL取得のアイテム取得が $batch 経由で行われることを確認
+        batch_reply = MagicMock()
+        batch_reply.json.return_value = {
+            "responses": [{"id": "0", "status": 200, "body": {"@microsoft.graph.downloadUrl": "https://dl"}}]
+        }
+        download_response = MagicMock(status_code=200, raw=b"file_content")
+
+        with (
+            patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}),
+            patch("requests.Session.post", return_value=batch_reply) as mock_post,
+            patch("requests.Session.get", return_value=download_response) as mock_get,
+        ):
+            result = batched_client._get_onedrive_file_stream(sample_file_info)
+
+        assert result == b"file_content"
+        batch_request = mock_post.call_args.kwargs["json"]["requests"][0]
+        assert batch_request["url"] == "/drives/test_drive_id/items/test_file_id"
+        mock_get.assert_called_once_with("https://dl", stream=True, timeout=10)
+
+    @pytest.mark.transfer
+    def test_ensure_sharepoint_folder_cached(self, transfer_client):
+        """SharePointフォルダ確保テスト（キャッシュ）"""
+        # 検証対象: ensure_sharepoint_folder()
+        # 目的: 作成済みフォルダは2回目以降 API を呼ばず、新規作成フォルダの子は存在確認を省くことを確認
+        with (
+            patch("requests.Session.get") as mock_get,
+            patch.object(transfer_client, "create_folder", return_value={"id": "new"}) as mock_create,
+        ):
+            mock_get.return_value.status_code = 404
+            transfer_client.ensure_sharepoint_folder("root/a/b")
+            first_get_count = mock_get.call_count
+
+            transfer_client.ensure_sharepoint_folder("root/a/b")
+            transfer_client.ensure_sharepoint_folder("root/a")
+
+        # root の確認で 404 になった後は確認せず作成のみ行う
+        assert first_get_count == 1
+        assert mock_get.call_count == 1
+        assert mock_create.call_count == 3
+
+    @pytest.mark.transfer
+    def test_ensure_sharepoint_folder_concurrent_single_flight(self, transfer_client):
+        """SharePointフォルダ確保の同時実行テスト"""
+        # 検証対象: ensure_sharepoint_folder()
+        # 目的: 複数ワーカーが同じフォルダを要求しても作成は1回だけ行われることを確認
+        import threading
+        import time
+
+        def slow_create(parent, name):
+            time.sleep(0.02)
+            return {"id": name}
+
+        with (
+            patch("requests.Session.get") as mock_get,
+            patch.object(transfer_client, "create_folder", side_effect=slow_create) as mock_create,
+        ):
+            mock_get.return_value.status_code = 404
+            threads = [
+                threading.Thread(target=transfer_client.ensure_sharepoint_folder, args=("shared",)) for _ in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert mock_create.call_count == 1
+
+    @pytest.mark.transfer
+    def test_prepare_sharepoint_folders_breadth_first(self, transfer_client):
+        """転送先フォルダ事前作成テスト"""
+        # 検証対象: prepare_sharepoint_folders()
+        # 目的: 転送対象から一意なフォルダを洗い出し、浅い階層から順に作成することを確認
+        targets = [
+            {"path": "src/a/b/f1.txt"},
+            {"path": "src/a/b/f2.txt"},
+            {"path": "src/a/c/f3.txt"},
+            {"path": "src/top.txt"},
+        ]
+        ensured = []
+
+        def record(folder_path):
+            ensured.append(folder_path)
+            transfer_client.folder_cache.mark_exists(folder_path)
+
+        with patch.object(transfer_client, "ensure_sharepoint_folder", side_effect=record):
+            count = transfer_client.prepare_sharepoint_folders(targets, "src", "dst", max_workers=2)
+
+        assert count == 4
+        depths = [p.count("/") for p in ensured]
+        assert depths == sorted(depths)
+        assert sorted(ensured) == ["dst", "dst/a", "dst/a/b", "dst/a/c"]
+
     @pytest.mark.integration
     def test_upload_with_error_handling(self, transfer_client, sample_file_info):
         """エラーハンドリングテスト"""
         # 検証対象: upload_file_to_sharepoint() のエラー処理
         # 目的: API エラー時に適切な例外が発生することを確認
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # ファイル情報取得でエラーを発生させる
             mock_get.return_value.status_code = 404
             mock_get.return_value.text = "File not found"
@@ -192,7 +386,7 @@ class TestGraphTransferClient:
 
         import requests
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
 
             result = transfer_client.list_drive_items("test_folder")
@@ -208,7 +402,7 @@ class TestGraphTransferClient:
 
         import requests
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("Network error")
 
             result = transfer_client.list_drive_items("test_folder")
@@ -222,7 +416,7 @@ class TestGraphTransferClient:
         # 検証対象: ensure_sharepoint_folder() のエラー処理
         # 目的: フォルダ作成時のエラーが適切に処理されることを確認
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 404  # フォルダが存在しない
 
             with patch.object(transfer_client, "create_folder") as mock_create:
@@ -240,7 +434,7 @@ class TestGraphTransferClient:
         # 検証対象: _get_onedrive_file_stream() のエラー処理
         # 目的: ファイルストリーム取得時のエラーが適切に処理されることを確認
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # ファイル情報取得は成功するが、ダウンロードURLが無い場合
             mock_get.return_value.status_code = 200
             mock_get.return_value.json.return_value = {}  # ダウンロードURLなし
@@ -258,7 +452,7 @@ class TestGraphTransferClient:
 
         import requests
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError(
                 "Session creation failed"
             )
@@ -343,19 +537,15 @@ class TestGraphTransferClient:
             {"name": "file3.txt", "path": "/test/file3.txt", "size": 3072},
         ]
 
-        # スキップリストのモック
-        skip_list = {"/test/file2.txt": True}
-
-        with patch("src.transfer.load_skip_list", return_value=skip_list):
-            with patch("src.transfer.is_skipped") as mock_is_skipped:
-                # file2.txt のみスキップされるように設定
-                mock_is_skipped.side_effect = lambda f, sl: f["path"] == "/test/file2.txt"
+        # スキップリストのモック（file2.txt のみスキップ）
+        skip_index = SkipIndex([{"name": "file2.txt", "path": "/test/file2.txt"}])
 
-                result = transfer_client.filter_skipped_targets(file_targets)
+        with patch("src.transfer.SkipIndex.load", return_value=skip_index):
+            result = transfer_client.filter_skipped_targets(file_targets)
 
-                # file2.txt が除外されることを確認
-                assert len(result) == 2
-                assert all(f["path"] != "/test/file2.txt" for f in result)
+            # file2.txt が除外されることを確認
+            assert len(result) == 2
+            assert all(f["path"] != "/test/file2.txt" for f in result)
 
     @pytest.mark.transfer
     def test_save_file_targets(self, transfer_client, tmp_path):
@@ -408,7 +598,7 @@ class TestGraphTransferClient:
             },
         ]
 
-        with patch.object(transfer_client, "list_onedrive_items_with_path", return_value=mock_items):
+        with patch.object(transfer_client, "iter_onedrive_items_with_path", return_value=mock_items):
             result = transfer_client.collect_file_targets_from_onedrive("/test", user_principal_name="test@example.com")
 
             # 結果の検証
@@ -418,6 +608,71 @@ class TestGraphTransferClient:
             assert result[1]["name"] == "file2.txt"
             assert result[1]["path"] == "/test/file2.txt"
 
+    @pytest.mark.transfer
+    def test_collect_file_targets_captures_download_url(self, transfer_client):
+        """クロール時のダウンロードURL・ハッシュ取得テスト"""
+        # 検証対象: collect_file_targets_from_onedrive()
+        # 目的: ハッシュはファイルリストに保持し、ダウンロードURLはキャッシュのみに保持することを確認
+        mock_items = [
+            {
+                "name": "file1.txt",
+                "full_path": "/test/file1.txt",
+                "size": 1024,
+                "lastModifiedDateTime": "2024-01-01T00:00:00Z",
+                "id": "file1_id",
+                "file": {"hashes": {"quickXorHash": "abc="}},
+                "@microsoft.graph.downloadUrl": "https://dl/file1",
+            }
+        ]
+
+        with patch.object(transfer_client, "iter_onedrive_items_with_path", return_value=mock_items):
+            result = transfer_client.collect_file_targets_from_onedrive("test")
+
+        assert result[0]["hashes"] == {"quickXorHash": "abc="}
+        assert "@microsoft.graph.downloadUrl" not in result[0]
+        assert transfer_client.download_urls.get("file1_id") == "https://dl/file1"
+
+    @pytest.mark.transfer
+    def test_sync_onedrive_delta(self, transfer_client, tmp_path):
+        """OneDrive差分同期テスト"""
+        # 検証対象: sync_onedrive_delta()
+        # 目的: delta の結果をクロールと同じ形式（フォルダパス付き）のファイルリストに変換することを確認
+        page = MagicMock()
+        page.status_code = 200
+        page.json.return_value = {
+            "value": [
+                {"id": "root", "root": {}},
+                {"id": "src", "name": "test", "folder": {}, "parentReference": {"id": "root"}},
+                {
+                    "id": "file1_id",
+                    "name": "file1.txt",
+                    "size": 1024,
+                    "file": {"hashes": {"quickXorHash": "abc="}},
+                    "parentReference": {"id": "src"},
+                    "@microsoft.graph.downloadUrl": "https://dl/file1",
+                },
+            ],
+            "@odata.deltaLink": "https://graph.microsoft.com/v1.0/users/u/drive/root/delta?token=1",
+        }
+
+        with patch.object(transfer_client.session, "get", return_value=page) as mock_get:
+            result = transfer_client.sync_onedrive_delta(
+                "test", str(tmp_path / "delta.json"), user_principal_name="test@example.com"
+            )
+
+        assert mock_get.call_args.args[0] == "https://graph.microsoft.com/v1.0/users/test@example.com/drive/root/delta"
+        assert result == [
+            {
+                "name": "file1.txt",
+                "path": "test/file1.txt",
+                "size": 1024,
+                "lastModifiedDateTime": None,
+                "id": "file1_id",
+                "hashes": {"quickXorHash": "abc="},
+            }
+        ]
+        assert transfer_client.download_urls.get("file1_id") == "https://dl/file1"
+
     @pytest.mark.transfer
     def test_collect_file_targets_progress_logging(self, transfer_client):
         """OneDriveファイルターゲット収集の進捗ログテスト"""
@@ -438,7 +693,7 @@ class TestGraphTransferClient:
                 }
             )
 
-        with patch.object(transfer_client, "list_onedrive_items_with_path", return_value=mock_items):
+        with patch.object(transfer_client, "iter_onedrive_items_with_path", return_value=mock_items):
             with patch("src.transfer.get_structured_logger") as mock_logger:
                 mock_logger_instance = MagicMock()
                 mock_logger.return_value = mock_logger_instance
@@ -472,7 +727,7 @@ class TestGraphTransferClient:
             ]
         }
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 200
             mock_get.return_value.json.return_value = mock_response_data
             mock_get.return_value.raise_for_status.return_value = None
@@ -488,7 +743,12 @@ class TestGraphTransferClient:
 
             # 正しいURLが呼ばれることを確認
             expected_url = f"{transfer_client.base_url}/users/test@example.com/drive/root:/test_folder:/children"
-            mock_get.assert_called_with(expected_url, headers=transfer_client._headers(), timeout=10)
+            mock_get.assert_called_with(
+                expected_url,
+                headers=transfer_client._headers(),
+                params={"$top": DEFAULT_PAGE_SIZE, "$select": ONEDRIVE_ITEM_SELECT},
+                timeout=10,
+            )
 
     @pytest.mark.transfer
     def test_list_onedrive_items_with_path_drive_id(self, transfer_client):
@@ -508,7 +768,7 @@ class TestGraphTransferClient:
             ]
         }
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 200
             mock_get.return_value.json.return_value = mock_response_data
             mock_get.return_value.raise_for_status.return_value = None
@@ -521,7 +781,12 @@ class TestGraphTransferClient:
 
             # 正しいURLが呼ばれることを確認
             expected_url = f"{transfer_client.base_url}/drives/test_drive_id/root:/test_folder:/children"
-            mock_get.assert_called_with(expected_url, headers=transfer_client._headers(), timeout=10)
+            mock_get.assert_called_with(
+                expected_url,
+                headers=transfer_client._headers(),
+                params={"$top": DEFAULT_PAGE_SIZE, "$select": ONEDRIVE_ITEM_SELECT},
+                timeout=10,
+            )
 
     @pytest.mark.transfer
     def test_list_onedrive_items_with_path_no_params_error(self, transfer_client):
@@ -542,7 +807,7 @@ class TestGraphTransferClient:
 
         import requests
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.Timeout("Request timeout")
 
             result = transfer_client.list_onedrive_items_with_path(user_principal_name="test@example.com")
@@ -558,7 +823,7 @@ class TestGraphTransferClient:
 
         import requests
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("Network error")
 
             result = transfer_client.list_onedrive_items_with_path(user_principal_name="test@example.com")
@@ -599,7 +864,7 @@ class TestGraphTransferClient:
             ]
         }
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 200
             mock_get.return_value.raise_for_status.return_value = None
             # 最初の呼び出しでフォルダを含むレスポンス、2回目でファイルのみ
@@ -629,7 +894,7 @@ class TestGraphTransferClient:
         # 検証対象: create_folder() の競合処理
         # 目的: フォルダが既に存在する場合の処理を確認
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value.status_code = 409  # Conflict
 
             result = transfer_client.create_folder("/test", "existing_folder")
@@ -660,7 +925,7 @@ class TestGraphTransferClient:
         # 検証対象: ensure_sharepoint_folder() の既存フォルダ処理
         # 目的: フォルダが既に存在する場合に作成処理をスキップすることを確認
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 200  # フォルダが存在
 
             with patch.object(transfer_client, "create_folder") as mock_create:
@@ -680,14 +945,14 @@ class TestGraphTransferClient:
         small_file_info.pop("id", None)  # ファイルIDを削除
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": ""}):  # 空のドライブID
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 # ダウンロードレスポンスのモック
                 mock_download_response = MagicMock()
                 mock_download_response.raw = b"test_content"
                 mock_download_response.raise_for_status.return_value = None
                 mock_get.return_value = mock_download_response
 
-                with patch("requests.put") as mock_put:
+                with patch("requests.Session.put") as mock_put:
                     mock_put.return_value.json.return_value = {"id": "uploaded_file_id"}
                     mock_put.return_value.raise_for_status.return_value = None
 
@@ -708,7 +973,7 @@ class TestGraphTransferClient:
         small_file_info["size"] = 1024
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}):
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 mock_get.return_value.status_code = 404
                 mock_get.return_value.text = "File not found"
 
@@ -727,7 +992,7 @@ class TestGraphTransferClient:
         small_file_info["size"] = 1024
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}):
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 mock_get.return_value.status_code = 200
                 mock_get.return_value.json.return_value = {}  # ダウンロードURLなし
 
@@ -769,6 +1034,139 @@ class TestGraphTransferClient:
                         # チャンクアップロードが呼ばれることを確認
                         assert mock_upload_chunk.call_count >= 1
 
+    @pytest.mark.transfer
+    def test_upload_large_file_resumes_from_persisted_session(self, transfer_client, sample_file_info):
+        """アップロードセッション再開テスト"""
+        # 検証対象: _upload_large_file_to_sharepoint() の再開処理
+        # 目的: 保存済みセッションの nextExpectedRanges 位置からダウンロード・アップロードを再開することを確認
+        chunk = 5 * 1024 * 1024
+        large_file_info = sample_file_info.copy()
+        large_file_info["size"] = 3 * chunk
+        transfer_client.upload_sessions.save(
+            large_file_info,
+            {"uploadUrl": "https://test.upload.url", "expirationDateTime": "2999-01-01T00:00:00Z"},
+            "TEST-Sharepoint/test/path/test_file.txt",
+            next_offset=chunk,
+        )
+
+        mock_stream = MagicMock()
+        mock_stream.read.side_effect = [b"a" * chunk, b"b" * chunk, b""]
+
+        with (
+            patch("requests.Session.get") as mock_get,
+            patch.object(transfer_client, "_create_upload_session") as mock_create,
+            patch.object(transfer_client, "_get_onedrive_file_stream", return_value=mock_stream) as mock_stream_open,
+            patch.object(transfer_client, "_upload_chunk") as mock_upload_chunk,
+            patch.object(transfer_client, "ensure_sharepoint_folder"),
+        ):
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.json.return_value = {"nextExpectedRanges": [f"{chunk}-"]}
+
+            transfer_client._upload_large_file_to_sharepoint(large_file_info, src_root="/")
+
+        mock_create.assert_not_called()
+        mock_stream_open.assert_called_once_with(large_file_info, 10, start_byte=chunk)
+        start_bytes = [c.args[2] for c in mock_upload_chunk.call_args_list]
+        assert start_bytes == [chunk, 2 * chunk]
+        # 完了後は再開情報が削除される
+        assert transfer_client.upload_sessions.get(large_file_info) is None
+
+    @pytest.mark.transfer
+    def test_upload_large_file_failure_keeps_committed_offset(self, transfer_client, sample_file_info):
+        """チャンク失敗時の再開位置保存テスト"""
+        # 検証対象: _upload_large_file_to_sharepoint() の失敗時処理
+        # 目的: チャンク失敗時にセッションと確定済みバイト位置が保存されたまま残ることを確認
+        chunk = 5 * 1024 * 1024
+        large_file_info = sample_file_info.copy()
+        large_file_info["size"] = 3 * chunk
+
+        mock_stream = MagicMock()
+        mock_stream.read.side_effect = [b"a" * chunk, b"b" * chunk, b"c" * chunk, b""]
+        session = {"uploadUrl": "https://test.upload.url", "expirationDateTime": "2999-01-01T00:00:00Z"}
+
+        with (
+            patch.object(transfer_client, "_create_upload_session", return_value=session),
+            patch.object(transfer_client, "_get_onedrive_file_stream", return_value=mock_stream),
+            patch.object(transfer_client, "_upload_chunk", side_effect=[None, Exception("chunk failed")]),
+            patch.object(transfer_client, "ensure_sharepoint_folder"),
+        ):
+            with pytest.raises(Exception, match="chunk failed"):
+                transfer_client._upload_large_file_to_sharepoint(large_file_info)
+
+        record = transfer_client.upload_sessions.get(large_file_info)
+        assert record["uploadUrl"] == "https://test.upload.url"
+        assert record["next_offset"] == chunk
+
+    @pytest.mark.transfer
+    def test_upload_large_file_extends_session_expiration(self, transfer_client, sample_file_info):
+        """セッション有効期限の延長テスト"""
+        # 検証対象: _upload_large_file_to_sharepoint() の確定済み位置の記録
+        # 目的: チャンク応答で延長された expirationDateTime が保存済みセッションに反映されることを確認
+        chunk = 5 * 1024 * 1024
+        large_file_info = sample_file_info.copy()
+        large_file_info["size"] = 3 * chunk
+
+        mock_stream = MagicMock()
+        mock_stream.read.side_effect = [b"a" * chunk, b"b" * chunk, b"c" * chunk, b""]
+        session = {"uploadUrl": "https://test.upload.url", "expirationDateTime": "2999-01-01T00:00:00Z"}
+        chunk_response = MagicMock()
+        chunk_response.json.return_value = {"expirationDateTime": "2999-01-02T00:00:00Z"}
+
+        with (
+            patch.object(transfer_client, "_create_upload_session", return_value=session),
+            patch.object(transfer_client, "_get_onedrive_file_stream", return_value=mock_stream),
+            patch.object(transfer_client, "_upload_chunk", side_effect=[chunk_response, Exception("chunk failed")]),
+            patch.object(transfer_client, "ensure_sharepoint_folder"),
+        ):
+            with pytest.raises(Exception, match="chunk failed"):
+                transfer_client._upload_large_file_to_sharepoint(large_file_info)
+
+        record = transfer_client.upload_sessions.get(large_file_info)
+        assert record["next_offset"] == chunk
+        assert record["expirationDateTime"] == "2999-01-02T00:00:00Z"
+
+    @pytest.mark.transfer
+    def test_upload_large_file_expired_session_recreated(self, transfer_client, sample_file_info):
+        """失効セッションの再作成テスト"""
+        # 検証対象: _resume_or_create_upload_session()
+        # 目的: 保存済みセッションがサーバ側で失効（404）している場合は新規作成して先頭から送ることを確認
+        large_file_info = sample_file_info.copy()
+        large_file_info["size"] = 10 * 1024 * 1024
+        transfer_client.upload_sessions.save(
+            large_file_info,
+            {"uploadUrl": "https://old.upload.url", "expirationDateTime": "2999-01-01T00:00:00Z"},
+            "dst/test_file.txt",
+        )
+        new_session = {"uploadUrl": "https://new.upload.url", "expirationDateTime": "2999-01-01T00:00:00Z"}
+
+        with (
+            patch("requests.Session.get") as mock_get,
+            patch.object(transfer_client, "_create_upload_session", return_value=new_session) as mock_create,
+        ):
+            mock_get.return_value.status_code = 404
+            record, start = transfer_client._resume_or_create_upload_session(
+                large_file_info, "dst/test_file.txt", large_file_info["size"]
+            )
+
+        mock_create.assert_called_once()
+        assert start == 0
+        assert record["uploadUrl"] == "https://new.upload.url"
+
+    @pytest.mark.transfer
+    def test_open_download_stream_range_ignored(self, transfer_client):
+        """Range 非対応時の読み捨てテスト"""
+        # 検証対象: _open_download_stream()
+        # 目的: Range 要求が無視され 200 が返った場合に再開位置まで読み捨てることを確認
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.raw.read.side_effect = [b"x" * 100, b"x" * 50]
+
+            stream = transfer_client._open_download_stream("https://download.url", start_byte=150)
+
+        assert stream is mock_get.return_value.raw
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=150-"}
+        assert mock_get.return_value.raw.read.call_count == 2
+
     @pytest.mark.transfer
     def test_create_upload_session(self, transfer_client):
         """アップロードセッション作成テスト"""
@@ -780,7 +1178,7 @@ class TestGraphTransferClient:
 
         mock_response = {"uploadUrl": "https://test.upload.url"}
 
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.return_value.json.return_value = mock_response
             mock_post.return_value.raise_for_status.return_value = None
 
@@ -808,7 +1206,7 @@ class TestGraphTransferClient:
         # 目的: ファイルIDを使った直接アクセス方式を確認
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}):
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 # ファイル情報取得のレスポンス
                 mock_file_response = MagicMock()
                 mock_file_response.status_code = 200
@@ -829,6 +1227,45 @@ class TestGraphTransferClient:
                 # 2回のGETリクエストが呼ばれることを確認
                 assert mock_get.call_count == 2
 
+    @pytest.mark.transfer
+    def test_get_onedrive_file_stream_uses_cached_url(self, transfer_client, sample_file_info):
+        """キャッシュ済みダウンロードURL利用テスト"""
+        # 検証対象: _open_item_download_stream()
+        # 目的: クロール時のダウンロードURLが有効ならアイテム取得を省略することを確認
+        transfer_client.download_urls.put("test_file_id", "https://cached.download.url")
+
+        with (
+            patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}),
+            patch("requests.Session.get") as mock_get,
+        ):
+            mock_get.return_value.raw = b"file_content"
+            result = transfer_client._get_onedrive_file_stream(sample_file_info)
+
+        assert result == b"file_content"
+        mock_get.assert_called_once_with("https://cached.download.url", stream=True, timeout=10)
+
+    @pytest.mark.transfer
+    def test_get_onedrive_file_stream_cached_url_rejected(self, transfer_client, sample_file_info):
+        """キャッシュ済みダウンロードURL拒否時の再取得テスト"""
+        # 検証対象: _open_item_download_stream()
+        # 目的: キャッシュ済みURLが 403 の場合は破棄してアイテムを取得し直すことを確認
+        transfer_client.download_urls.put("test_file_id", "https://stale.download.url")
+        rejected = MagicMock()
+        rejected.raise_for_status.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=403))
+        lookup = MagicMock(status_code=200)
+        lookup.json.return_value = {"@microsoft.graph.downloadUrl": "https://fresh.download.url"}
+        download = MagicMock(status_code=200, raw=b"fresh_content")
+
+        with (
+            patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}),
+            patch("requests.Session.get", side_effect=[rejected, lookup, download]) as mock_get,
+        ):
+            result = transfer_client._get_onedrive_file_stream(sample_file_info)
+
+        assert result == b"fresh_content"
+        assert mock_get.call_count == 3
+        assert transfer_client.download_urls.get("test_file_id") == "https://fresh.download.url"
+
     @pytest.mark.transfer
     def test_get_onedrive_file_stream_fallback_path(self, transfer_client, sample_file_info):
         """OneDriveファイルストリーム取得のフォールバック処理テスト"""
@@ -839,7 +1276,7 @@ class TestGraphTransferClient:
         file_info_no_id.pop("id", None)  # ファイルIDを削除
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": ""}):  # 空のドライブID
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 mock_download_response = MagicMock()
                 mock_download_response.raw = b"file_content"
                 mock_download_response.raise_for_status.return_value = None
@@ -857,7 +1294,7 @@ class TestGraphTransferClient:
         # 目的: ファイル情報取得に失敗した場合の例外処理を確認
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}):
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 mock_get.return_value.status_code = 404
                 mock_get.return_value.text = "File not found"
 
@@ -873,7 +1310,7 @@ class TestGraphTransferClient:
         # 目的: ダウンロードURLが取得できない場合の例外処理を確認
 
         with patch.dict("os.environ", {"SOURCE_ONEDRIVE_DRIVE_ID": "test_drive_id"}):
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 mock_get.return_value.status_code = 200
                 mock_get.return_value.json.return_value = {}  # ダウンロードURLなし
 
@@ -894,7 +1331,7 @@ class TestGraphTransferClient:
         end_byte = len(chunk_data) - 1
         total_size = 1024
 
-        with patch("requests.put") as mock_put:
+        with patch("requests.Session.put") as mock_put:
             mock_put.return_value.raise_for_status.return_value = None
 
             result = transfer_client._upload_chunk(upload_url, chunk_data, start_byte, end_byte, total_size)
@@ -909,6 +1346,149 @@ class TestGraphTransferClient:
             }
             mock_put.assert_called_once_with(upload_url, headers=expected_headers, data=chunk_data, timeout=10)
 
+    @pytest.mark.transfer
+    def test_upload_chunk_retries_transient_failure(self, transfer_client):
+        """チャンク単位リトライテスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: 一時的な失敗時にファイル全体ではなく同じチャンクだけを再送し、統計を記録することを確認
+        chunk_data = b"a" * 10
+        retry_stats = {"chunk_retries": 0, "retry_saved_bytes": 0}
+        ok_response = MagicMock()
+        ok_response.raise_for_status.return_value = None
+
+        with (
+            patch("requests.Session.put") as mock_put,
+            patch.object(transfer_client, "_get_upload_session", return_value=_session_status(100)),
+            patch("src.transfer.time.sleep") as mock_sleep,
+        ):
+            mock_put.side_effect = [requests.exceptions.ConnectionError("reset"), ok_response]
+
+            result = transfer_client._upload_chunk("https://u", chunk_data, 100, 109, 1000, retry_stats=retry_stats)
+
+        assert result is ok_response
+        assert mock_put.call_count == 2
+        assert mock_put.call_args.kwargs["headers"]["Content-Range"] == "bytes 100-109/1000"
+        assert retry_stats == {"chunk_retries": 1, "retry_saved_bytes": 100}
+        mock_sleep.assert_called_once()
+
+    @pytest.mark.transfer
+    def test_upload_chunk_resends_remaining_slice(self, transfer_client):
+        """部分受理時の残り再送テスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: サーバが途中まで受理していた場合はバッファ済みチャンクの残り部分だけを再送することを確認
+        chunk_data = bytes(range(10))
+        error_response = MagicMock(status_code=503, headers={"Retry-After": "0"})
+        ok_response = MagicMock()
+        ok_response.raise_for_status.return_value = None
+
+        with (
+            patch("requests.Session.put") as mock_put,
+            patch.object(transfer_client, "_get_upload_session", return_value=_session_status(4)),
+            patch("src.transfer.time.sleep") as mock_sleep,
+        ):
+            mock_put.side_effect = [requests.exceptions.HTTPError(response=error_response), ok_response]
+
+            transfer_client._upload_chunk("https://u", chunk_data, 0, 9, 10)
+
+        retry_call = mock_put.call_args
+        assert retry_call.kwargs["headers"]["Content-Range"] == "bytes 4-9/10"
+        assert retry_call.kwargs["data"] == chunk_data[4:]
+        mock_sleep.assert_called_once_with(0.0)
+
+    @pytest.mark.transfer
+    def test_upload_chunk_does_not_retry_client_error(self, transfer_client):
+        """リトライ対象外エラーテスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: 400 などの恒久的なエラーはチャンクリトライせず即座に送出することを確認
+        error_response = MagicMock(status_code=400, headers={})
+
+        with patch("requests.Session.put") as mock_put:
+            mock_put.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError(response=error_response)
+
+            with pytest.raises(requests.exceptions.HTTPError):
+                transfer_client._upload_chunk("https://u", b"x", 0, 0, 1)
+
+        assert mock_put.call_count == 1
+
+    @pytest.mark.transfer
+    def test_upload_chunk_gives_up_after_max_attempts(self, transfer_client):
+        """チャンクリトライ上限テスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: chunk_retry_count 回失敗したら例外を送出し、ファイル単位のリトライに委ねることを確認
+        with (
+            patch("requests.Session.put", side_effect=requests.exceptions.Timeout("slow")) as mock_put,
+            patch("src.transfer.get_chunk_retry_count", return_value=3),
+            patch.object(transfer_client, "_get_upload_session", return_value=None),
+            patch("src.transfer.time.sleep"),
+        ):
+            with pytest.raises(requests.exceptions.Timeout):
+                transfer_client._upload_chunk("https://u", b"x", 0, 0, 1)
+
+        assert mock_put.call_count == 3
+
+    @pytest.mark.transfer
+    def test_upload_chunk_accepted_despite_error_returns_status(self, transfer_client):
+        """失敗応答だが受理済みのチャンクのテスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: タイムアウトしたチャンクが受理済みだった場合は再送せず、セッション状態のレスポンスを返すことを確認
+        status = _session_status(10)
+
+        with (
+            patch("requests.Session.put", side_effect=requests.exceptions.Timeout("slow")) as mock_put,
+            patch.object(transfer_client, "_get_upload_session", return_value=status),
+            patch("src.transfer.time.sleep"),
+        ):
+            result = transfer_client._upload_chunk("https://u", b"x" * 10, 0, 9, 100)
+
+        assert result is status
+        assert mock_put.call_count == 1
+
+    @pytest.mark.transfer
+    def test_upload_chunk_final_chunk_committed(self, transfer_client):
+        """最終チャンクの応答喪失テスト"""
+        # 検証対象: _upload_chunk()
+        # 目的: 最終チャンクがタイムアウトしセッションが 404 の場合、名前・サイズが一致する転送先で完了とすることを確認
+        item = MagicMock(status_code=200)
+        item.json.return_value = {"name": "big #1.bin", "size": 10}
+
+        with (
+            patch("requests.Session.put", side_effect=requests.exceptions.Timeout("slow")) as mock_put,
+            patch("requests.Session.get", return_value=MagicMock(status_code=404)),
+            patch.object(transfer_client, "_get_metadata", return_value=item) as mock_metadata,
+            patch("src.transfer.time.sleep"),
+        ):
+            result = transfer_client._upload_chunk(
+                "https://u", b"x" * 5, 5, 9, 10, dst_path="TEST-Sharepoint/big #1.bin"
+            )
+
+        assert result is item
+        assert mock_put.call_count == 1
+        assert mock_metadata.call_args.args[0].endswith("/root:/TEST-Sharepoint/big%20%231.bin")
+
+    @pytest.mark.transfer
+    def test_upload_chunk_final_chunk_not_committed(self, transfer_client):
+        """最終チャンクの応答喪失テスト（未完了）"""
+        # 検証対象: _upload_chunk()
+        # 目的: セッションが 404 でも転送先のサイズが一致しない場合は完了とせず、最終チャンクを再送することを確認
+        item = MagicMock(status_code=200)
+        item.json.return_value = {"name": "big.bin", "size": 3}
+        error_response = MagicMock(status_code=404, headers={})
+
+        with (
+            patch("requests.Session.put") as mock_put,
+            patch("requests.Session.get", return_value=MagicMock(status_code=404)),
+            patch.object(transfer_client, "_get_metadata", return_value=item),
+            patch("src.transfer.time.sleep"),
+        ):
+            mock_put.side_effect = [
+                requests.exceptions.Timeout("slow"),
+                requests.exceptions.HTTPError(response=error_response),
+            ]
+            with pytest.raises(requests.exceptions.HTTPError):
+                transfer_client._upload_chunk("https://u", b"x" * 5, 5, 9, 10, dst_path="TEST-Sharepoint/big.bin")
+
+        assert mock_put.call_count == 2
+
     @pytest.mark.transfer
     def test_list_drive_items_recursive_folder_handling(self, transfer_client):
         """ドライブアイテム一覧取得の再帰フォルダ処理テスト"""
@@ -940,7 +1520,7 @@ class TestGraphTransferClient:
             ]
         }
 
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.return_value.status_code = 200
             mock_get.return_value.raise_for_status.return_value = None
             # 最初の呼び出しでフォルダを含むレスポンス、2回目でファイルのみ
@@ -961,6 +1541,33 @@ class TestGraphTransferClient:
             # 2回のAPIコールが行われることを確認
             assert mock_get.call_count == 2
 
+    @pytest.mark.transfer
+    def test_list_drive_items_paginated_with_full_path(self, transfer_client):
+        """ドライブアイテム一覧取得のページング・フルパス付与テスト"""
+        # 検証対象: list_drive_items() のページング処理
+        # 目的: nextLink の全ページと子フォルダ（アイテムID指定）を辿り、相対フルパスを付与することを確認
+        drive_url = "https://graph.microsoft.com/v1.0/sites/test_site_id/drives/test_drive_id"
+        responses = {
+            f"{drive_url}/root:/docs:/children": {
+                "value": [{"id": "sub_id", "name": "sub", "folder": {"childCount": 1}}],
+                "@odata.nextLink": f"{drive_url}/root:/docs:/children?$skiptoken=1",
+            },
+            f"{drive_url}/root:/docs:/children?$skiptoken=1": {"value": [{"id": "a", "name": "a.txt", "file": {}}]},
+            f"{drive_url}/items/sub_id/children": {"value": [{"id": "b", "name": "b.txt", "file": {}}]},
+        }
+
+        def fake_get(url, **kwargs):
+            resp = MagicMock()
+            resp.raise_for_status.return_value = None
+            resp.json.return_value = responses[url]
+            return resp
+
+        with patch.object(transfer_client.session, "get", side_effect=fake_get) as mock_get:
+            result = transfer_client.list_drive_items("docs")
+
+        assert sorted(item["full_path"] for item in result) == ["docs/a.txt", "docs/sub/b.txt"]
+        assert mock_get.call_count == 3
+
     @pytest.mark.transfer
     def test_filter_skipped_targets_with_default_path(self, transfer_client):
         """スキップリストフィルタリングテスト（デフォルトパス使用）"""
@@ -971,15 +1578,14 @@ class TestGraphTransferClient:
             {"name": "file1.txt", "path": "/test/file1.txt", "size": 1024},
         ]
 
-        with patch("src.transfer.load_skip_list", return_value={}):
-            with patch("src.transfer.is_skipped", return_value=False):
-                # config_manager のインポートエラーをシミュレート
-                with patch("src.config_manager.get_skip_list_path", side_effect=ImportError):
-                    result = transfer_client.filter_skipped_targets(file_targets, None)
+        with patch("src.transfer.SkipIndex.load", return_value=SkipIndex()):
+            # config_manager のインポートエラーをシミュレート
+            with patch("src.config_manager.get_skip_list_path", side_effect=ImportError):
+                result = transfer_client.filter_skipped_targets(file_targets, None)
 
-                    # 結果の検証
-                    assert len(result) == 1
-                    assert result[0]["name"] == "file1.txt"
+                # 結果の検証
+                assert len(result) == 1
+                assert result[0]["name"] == "file1.txt"
 
     @pytest.mark.transfer
     def test_collect_file_targets_duplicate_handling(self, transfer_client):
@@ -1006,9 +1612,25 @@ class TestGraphTransferClient:
             },
         ]
 
-        with patch.object(transfer_client, "list_onedrive_items_with_path", return_value=mock_items):
+        with patch.object(transfer_client, "iter_onedrive_items_with_path", return_value=mock_items):
             result = transfer_client.collect_file_targets_from_onedrive("/test", user_principal_name="test@example.com")
 
             # 重複が除去されることを確認
             assert len(result) == 1
             assert result[0]["name"] == "file1.txt"
+
+    @pytest.mark.unit
+    def test_folder_dedup_keeps_recent_folders_only(self):
+        """フォルダ毎の重複排除テスト"""
+        # 検証対象: _FolderDedup.first_seen()
+        # 目的: フォルダ内の重複を除き、保持するのは最近のフォルダのキーのみであることを確認
+        dedup = _FolderDedup(max_folders=2)
+
+        assert dedup.first_seen("a", ("x.txt", "1")) is True
+        assert dedup.first_seen("a", ("x.txt", "1")) is False
+        # 別フォルダの同名ファイルは重複ではない
+        assert dedup.first_seen("b", ("x.txt", "2")) is True
+        assert dedup.first_seen("c", ("y.txt", "3")) is True
+        # 古いフォルダ a のキーは捨てられている
+        assert len(dedup._folders) == 2
+        assert "a" not in dedup._folders
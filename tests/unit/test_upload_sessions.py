@@ -0,0 +1,108 @@
+"""
+UploadSessionStore のテスト
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from src.upload_sessions import UploadSessionStore, session_key
+
+
+def _future(hours: int = 12) -> str:
+    return (datetime.now(UTC) + timedelta(hours=hours)).isoformat().replace("+00:00", "Z")
+
+
+@pytest.fixture
+def store(tmp_path):
+    """テスト用ストア"""
+    return UploadSessionStore(str(tmp_path / "state" / "upload_sessions.json"))
+
+
+@pytest.fixture
+def large_file_info(sample_file_info):
+    """大容量ファイル情報"""
+    info = sample_file_info.copy()
+    info["size"] = 50 * 1024 * 1024
+    return info
+
+
+class TestUploadSessionStore:
+    """UploadSessionStore クラスのテスト"""
+
+    @pytest.mark.unit
+    def test_save_and_get(self, store, large_file_info):
+        """保存・取得テスト"""
+        # 検証対象: UploadSessionStore.save() / get()
+        # 目的: セッションURL・有効期限・送信位置が永続化され、別インスタンスから読めることを確認
+        session = {"uploadUrl": "https://upload.example/session", "expirationDateTime": _future()}
+        store.save(large_file_info, session, "dst/test_file.txt", next_offset=0)
+
+        reloaded = UploadSessionStore(store.path).get(large_file_info)
+
+        assert reloaded is not None
+        assert reloaded["uploadUrl"] == "https://upload.example/session"
+        assert reloaded["dst_path"] == "dst/test_file.txt"
+        assert reloaded["next_offset"] == 0
+
+    @pytest.mark.unit
+    def test_update_offset_and_remove(self, store, large_file_info):
+        """送信位置更新・削除テスト"""
+        # 検証対象: UploadSessionStore.update_offset() / remove()
+        # 目的: 確定済み位置が更新され、完了後に記録が消えることを確認
+        record = store.save(large_file_info, {"uploadUrl": "https://u", "expirationDateTime": _future()}, "dst/a")
+
+        store.update_offset(large_file_info, record, 10 * 1024 * 1024)
+        with open(store.path, encoding="utf-8") as f:
+            persisted = json.load(f)
+        assert persisted[session_key(large_file_info)]["next_offset"] == 10 * 1024 * 1024
+
+        store.remove(large_file_info)
+        assert store.get(large_file_info) is None
+
+    @pytest.mark.unit
+    def test_update_offset_extends_expiration(self, store, large_file_info):
+        """有効期限の延長テスト"""
+        # 検証対象: UploadSessionStore.update_offset()
+        # 目的: チャンク応答の有効期限を保存し、当初の期限を過ぎても再開できることを確認
+        expired = {"uploadUrl": "https://u", "expirationDateTime": _future(hours=-1)}
+        record = store.save(large_file_info, expired, "dst/a")
+
+        store.update_offset(large_file_info, record, 10 * 1024 * 1024, _future())
+
+        reloaded = store.get(large_file_info)
+        assert reloaded is not None
+        assert reloaded["next_offset"] == 10 * 1024 * 1024
+
+    @pytest.mark.unit
+    def test_get_ignores_changed_source(self, store, large_file_info):
+        """ソース変更時の無効化テスト"""
+        # 検証対象: UploadSessionStore.get()
+        # 目的: ソースファイルのサイズが変わった場合は再開しないことを確認
+        store.save(large_file_info, {"uploadUrl": "https://u", "expirationDateTime": _future()}, "dst/a")
+
+        changed = large_file_info.copy()
+        changed["size"] += 1
+
+        assert store.get(changed) is None
+
+    @pytest.mark.unit
+    def test_get_ignores_expired_session(self, store, large_file_info):
+        """有効期限切れセッションの無効化テスト"""
+        # 検証対象: UploadSessionStore.get()
+        # 目的: 有効期限切れ（または間近）のセッションを返さないことを確認
+        store.save(large_file_info, {"uploadUrl": "https://u", "expirationDateTime": _future(hours=-1)}, "dst/a")
+
+        assert store.get(large_file_info) is None
+
+    @pytest.mark.unit
+    def test_corrupted_state_file(self, store, large_file_info):
+        """破損ファイルのテスト"""
+        # 検証対象: UploadSessionStore.get()
+        # 目的: 状態ファイルが破損していても例外にならず新規転送扱いになることを確認
+        store.save(large_file_info, {"uploadUrl": "https://u", "expirationDateTime": _future()}, "dst/a")
+        with open(store.path, "w", encoding="utf-8") as f:
+            f.write("{broken")
+
+        assert store.get(large_file_info) is None
@@ -6,6 +6,8 @@ import json
 import subprocess
 from unittest.mock import Mock, mock_open, patch
 
+import pytest
+
 from src.watchdog import (
     _handle_freeze_detection,
     _handle_keyboard_interrupt,
@@ -118,19 +120,27 @@ class TestFormatTimeDiff:
 class TestIsTransferRemaining:
     """is_transfer_remaining 関数のテスト"""
 
+    @pytest.fixture(autouse=True)
+    def _files(self, tmp_path):
+        # OneDriveファイルリスト（NDJSON）とスキップリストは一時ディレクトリに置く
+        self.onedrive_path = tmp_path / "onedrive_files.ndjson"
+        self.skiplist_path = tmp_path / "skip_list.json"
+        with (
+            patch("src.watchdog.get_onedrive_files_path", return_value=str(self.onedrive_path)),
+            patch("src.watchdog.get_skip_list_path", return_value=str(self.skiplist_path)),
+        ):
+            yield
+
+    def _write(self, onedrive_data, skiplist_data):
+        self.onedrive_path.write_text("".join(json.dumps(item) + "\n" for item in onedrive_data), encoding="utf-8")
+        self.skiplist_path.write_text(json.dumps(skiplist_data), encoding="utf-8")
+
     @patch("src.watchdog.log_watchdog")
     def test_is_transfer_remaining_true(self, mock_log):
         """検証対象: is_transfer_remaining() 目的: 転送残あり時のTrue返却確認"""
-        onedrive_data = [{"name": "file1"}, {"name": "file2"}, {"name": "file3"}]
-        skiplist_data = [{"name": "file1"}]
-
-        with patch("builtins.open", mock_open()) as mock_file:
-            mock_file.side_effect = [
-                mock_open(read_data=json.dumps(onedrive_data)).return_value,
-                mock_open(read_data=json.dumps(skiplist_data)).return_value,
-            ]
+        self._write([{"name": "file1"}, {"name": "file2"}, {"name": "file3"}], [{"name": "file1"}])
 
-            result = is_transfer_remaining()
+        result = is_transfer_remaining()
 
         assert result is True
         mock_log.assert_called_with("転送残判定: OneDrive=3件, スキップリスト=1件, 残り=2件")
@@ -138,16 +148,9 @@ class TestIsTransferRemaining:
     @patch("src.watchdog.log_watchdog")
     def test_is_transfer_remaining_false(self, mock_log):
         """検証対象: is_transfer_remaining() 目的: 転送残なし時のFalse返却確認"""
-        onedrive_data = [{"name": "file1"}]
-        skiplist_data = [{"name": "file1"}]
+        self._write([{"name": "file1"}], [{"name": "file1"}])
 
-        with patch("builtins.open", mock_open()) as mock_file:
-            mock_file.side_effect = [
-                mock_open(read_data=json.dumps(onedrive_data)).return_value,
-                mock_open(read_data=json.dumps(skiplist_data)).return_value,
-            ]
-
-            result = is_transfer_remaining()
+        result = is_transfer_remaining()
 
         assert result is False
         mock_log.assert_called_with("転送残判定: OneDrive=1件, スキップリスト=1件, 残り=0件")
@@ -155,8 +158,7 @@ class TestIsTransferRemaining:
     @patch("src.watchdog.log_watchdog")
     def test_is_transfer_remaining_error(self, mock_log):
         """検証対象: is_transfer_remaining() 目的: エラー時のTrue返却確認"""
-        with patch("builtins.open", side_effect=FileNotFoundError()):
-            result = is_transfer_remaining()
+        result = is_transfer_remaining()
 
         assert result is True
         mock_log.assert_called()
@@ -1,30 +1,38 @@
 #!/usr/bin/env python3
 """
-OneDrive現状ファイル一覧（onedrive_files.json）とスキップリスト（skip_list.json）の件数・重複・差分を集計・可視化するスクリプト。
+OneDrive現状ファイル一覧（onedrive_files.ndjson）とスキップリスト（skip_list.json）の件数・重複・差分を集計・可視化するスクリプト。
 
 【使い方】
   $ python utils/collect_onedrive_skiplist_stats.py
 """
 
-import json
+import sys
+from collections import Counter
 from pathlib import Path
 
-onedrive_path = Path("logs/onedrive_files.json")
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inventory import iter_inventory  # noqa: E402
+from src.skiplist import iter_skip_list  # noqa: E402
+
+onedrive_path = Path("logs/onedrive_files.ndjson")
 skiplist_path = Path("logs/skip_list.json")
 
 
-def load_json(path):
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+def _paths_and_names(records):
+    """ファイルリストを1件ずつ読み、パスの集合とファイル名毎の件数を作る（リストに展開しない）"""
+    paths = set()
+    names = Counter()
+    for e in records:
+        paths.add(e["path"])
+        names[e["name"]] += 1
+    return paths, names
 
 
 def main():
-    onedrive = load_json(onedrive_path)
-    skiplist = load_json(skiplist_path)
-
-    # パスの集合
-    onedrive_paths = set(e["path"] for e in onedrive)
-    skiplist_paths = set(e["path"] for e in skiplist)
+    onedrive_paths, onedrive_names = _paths_and_names(iter_inventory(str(onedrive_path)))
+    # スキップリストはスナップショットと追記中のジャーナルを合わせて読み込む
+    skiplist_paths, skiplist_names = _paths_and_names(iter_skip_list(str(skiplist_path)))
 
     # 完全一致
     onedrive_paths & skiplist_paths
@@ -40,8 +48,8 @@ def main():
             pass
 
     # name重複チェック
-    [e["name"] for e in onedrive]
-    [e["name"] for e in skiplist]
+    [name for name, count in onedrive_names.items() if count > 1]
+    [name for name, count in skiplist_names.items() if count > 1]
 
 
 if __name__ == "__main__":
@@ -8,10 +8,9 @@
 【使い方】
   $ python utils/collect_stats.py
   （logs/transfer_start_success_error.log*,
-   logs/sharepoint_current_files.json, logs/skip_list.json を集計）
+   logs/sharepoint_current_files.ndjson, logs/skip_list.json を集計）
 """
 
-import json
 import os
 import sys
 from pathlib import Path
@@ -30,12 +29,18 @@ except ImportError:
         return "logs/transfer_start_success_error.log"
 
     def get_sharepoint_current_files_path():
-        return "logs/sharepoint_current_files.json"
+        return "logs/sharepoint_current_files.ndjson"
 
     def get_skip_list_path():
         return "logs/skip_list.json"
 
 
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.inventory import count_inventory  # noqa: E402
+from src.skiplist import count_skip_list, skip_list_exists  # noqa: E402
+
+
 def main():
     import glob
 
@@ -64,15 +69,13 @@ def main():
 
     # SharePoint現状
     if sharepoint_path.exists():
-        with open(sharepoint_path, encoding="utf-8") as f:
-            json.load(f)
+        count_inventory(str(sharepoint_path))
     else:
         pass
 
     # スキップリスト
-    if skiplist_path.exists():
-        with open(skiplist_path, encoding="utf-8") as f:
-            json.load(f)
+    if skip_list_exists(str(skiplist_path)):
+        count_skip_list(str(skiplist_path))
     else:
         pass
 
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 
-初回クロール時のSharePoint現状ファイル一覧（sharepoint_current_files.json）とサクセスログ（transfer.log）を突き合わせ、
+初回クロール時のSharePoint現状ファイル一覧（sharepoint_current_files.ndjson）とサクセスログ（transfer.log）を突き合わせ、
 - 上書き転送されたファイル数
 - 新規転送されたファイル数
 - サクセスログの総件数
@@ -13,7 +13,6 @@
 ※ transfer.logは1行ごとに[INFO] SUCCESS: <パス> ... の形式
 """
 
-import json
 import os
 import re
 import sys
@@ -31,7 +30,12 @@ except ImportError:
         return "logs/transfer_start_success_error.log"
 
     def get_sharepoint_current_files_path():
-        return "logs/sharepoint_current_files.json"
+        return "logs/sharepoint_current_files.ndjson"
+
+
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.inventory import iter_inventory  # noqa: E402
 
 
 def normalize_path(path, root):
@@ -43,11 +47,6 @@ def normalize_path(path, root):
     return path.lstrip("/\\")
 
 
-def load_json(path):
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
-
-
 def extract_success_paths(log_path):
     pattern = re.compile(r"SUCCESS: (.+?)(?: \[|$)")
     paths = []
@@ -74,9 +73,8 @@ def main():
     if not transfer_log_path.exists():
         return
 
-    sharepoint = load_json(sharepoint_path)
-    # SharePoint側のパスを正規化
-    sharepoint_paths = set(normalize_path(e["path"], sharepoint_root) for e in sharepoint)
+    # SharePoint側のパスを正規化（ファイルリストはリストに展開せず1件ずつ読みながら集合にする）
+    sharepoint_paths = set(normalize_path(e["path"], sharepoint_root) for e in iter_inventory(str(sharepoint_path)))
     success_paths = [normalize_path(p, sharepoint_root) for p in extract_success_paths(transfer_log_path)]
 
     overwritten = [p for p in success_paths if p in sharepoint_paths]
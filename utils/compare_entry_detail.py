@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-ファイル名を入力して、onedrive_files.jsonとskip_list.jsonの両方から該当エントリを詳細比較するスクリプト。
+ファイル名を入力して、onedrive_files.ndjsonとskip_list.jsonの両方から該当エントリを詳細比較するスクリプト。
 
 【目的】
   - OneDrive現状ファイルとスキップリストの差異を個別に比較・検証
@@ -9,28 +9,30 @@
   → ファイル名を入力すると両リストから該当エントリを抽出・表示
 """
 
-import json
+import sys
 from pathlib import Path
 
-onedrive_path = Path("logs/onedrive_files.json")
-skiplist_path = Path("logs/skip_list.json")
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inventory import iter_inventory  # noqa: E402
+from src.skiplist import iter_skip_list  # noqa: E402
 
-with open(onedrive_path, encoding="utf-8") as f:
-    onedrive = json.load(f)
-with open(skiplist_path, encoding="utf-8") as f:
-    skiplist = json.load(f)
+onedrive_path = Path("logs/onedrive_files.ndjson")
+skiplist_path = Path("logs/skip_list.json")
 
 filename = input("検索したいファイル名（部分一致OK）を入力してください: ").strip()
 
+# ファイルリストはリストに展開せず1件ずつ読みながら比較する
 found = False
-for entry in onedrive:
+for entry in iter_inventory(str(onedrive_path)):
     if filename in entry.get("name", "") or filename in entry.get("path", ""):
         found = True
 if not found:
     pass
 
+# スキップリストはスナップショットと追記中のジャーナルを合わせて読み込む
 found = False
-for entry in skiplist:
+for entry in iter_skip_list(str(skiplist_path)):
     if filename in entry.get("name", "") or filename in entry.get("path", ""):
         found = True
 if not found:
@@ -1,10 +1,13 @@
 import json
 import os
+from collections.abc import Iterable
+from contextlib import closing
 from typing import Any
 
 import requests
 from dotenv import load_dotenv
 
+from src.inventory import InventoryFile, write_inventory
 from src.skiplist import save_skip_list
 from src.transfer import GraphTransferClient
 
@@ -64,18 +67,15 @@ def crawl_onedrive_files(
     Returns:
         重複排除済みファイルリスト
     """
-    client = create_transfer_client()
-
     if user_principal_name is None:
         user_principal_name = os.getenv("SOURCE_ONEDRIVE_USER_PRINCIPAL_NAME")
         if not user_principal_name:
             raise ValueError("user_principal_nameまたは環境変数SOURCE_ONEDRIVE_USER_PRINCIPAL_NAMEが必要です")
 
-    file_targets = client.collect_file_targets_from_onedrive(
-        folder_path=root_folder, user_principal_name=user_principal_name
-    )
-
-    return file_targets
+    with closing(create_transfer_client()) as client:
+        return client.collect_file_targets_from_onedrive(
+            folder_path=root_folder, user_principal_name=user_principal_name
+        )
 
 
 def crawl_sharepoint_files(
@@ -90,54 +90,48 @@ def crawl_sharepoint_files(
     Returns:
         重複排除済みファイルリスト
     """
-    client = create_transfer_client()
-
-    # Get SharePoint items and convert to file targets format
-    items = client.list_drive_items(folder_path=root_folder)
-    # Convert items to file targets format (items already have the right structure)
-    file_targets = [item for item in items if item.get("file")]
+    with closing(create_transfer_client()) as client:
+        # Get SharePoint items and convert to file targets format
+        items = client.list_drive_items(folder_path=root_folder)
+        # Convert items to file targets format (items already have the right structure)
+        file_targets = [item for item in items if item.get("file")]
 
     return file_targets
 
 
-def save_file_list(file_targets: list[dict[str, Any]], save_path: str) -> None:
+def save_file_list(file_targets: Iterable[dict[str, Any]], save_path: str) -> None:
     """
-    ファイルリストをJSONで保存
+    ファイルリストを1行1件の NDJSON で逐次保存（末尾が .gz の場合は gzip 圧縮）
 
     Args:
         file_targets: ファイルリスト
         save_path: 保存先パス
     """
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    with open(save_path, "w", encoding="utf-8") as f:
-        json.dump(file_targets, f, ensure_ascii=False, indent=2)
+    write_inventory(save_path, file_targets)
 
 
-def load_file_list(file_path: str) -> list[dict[str, Any]]:
+def load_file_list(file_path: str) -> InventoryFile:
     """
-    JSONファイルからファイルリストを読み込む
+    ファイルリストを読み込む（NDJSON・gzip・従来の JSON 配列に対応し、走査の都度1件ずつ読む）
 
     Args:
-        file_path: ファイルリストのJSONパス
+        file_path: ファイルリストのパス
 
     Returns:
-        ファイルリスト
+        ファイルリスト（再走査可能、len() で件数を数える）
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"ファイルリストが見つかりません: {file_path}")
 
-    with open(file_path, encoding="utf-8") as f:
-        file_targets = json.load(f)
-
-    return file_targets
+    return InventoryFile(file_path)
 
 
-def build_skiplist_from_filelist(file_targets: list[dict[str, Any]], skip_list_path: str) -> None:
+def build_skiplist_from_filelist(file_targets: Iterable[dict[str, Any]], skip_list_path: str) -> None:
     """
     ファイルリストからスキップリストを生成・保存
 
     Args:
-        file_targets: ファイルリスト
+        file_targets: ファイルリスト（load_file_list の結果も可）
         skip_list_path: スキップリスト保存先パス
     """
     save_skip_list(file_targets, skip_list_path)
@@ -286,7 +280,6 @@ def _check_graph_endpoint(label: str, url: str, headers: dict[str, str]) -> tupl
 def validate_configuration() -> tuple[bool, list[str]]:
     """環境変数とMicrosoft Graph疎通を確認"""
     messages: list[str] = []
-    success = True
 
     required_env = [
         "CLIENT_ID",
@@ -312,6 +305,14 @@ def validate_configuration() -> tuple[bool, list[str]]:
 
     messages.append("[OK] Required environment variables are set.")
 
+    with closing(client):
+        return _check_graph_access(client, messages)
+
+
+def _check_graph_access(client: GraphTransferClient, messages: list[str]) -> tuple[bool, list[str]]:
+    """アクセストークンの取得と SharePoint / OneDrive への疎通を確認"""
+    success = True
+
     try:
         token = client.auth.get_access_token()
     except Exception as exc:  # noqa: BLE001 - 認証例外をそのまま返す
@@ -18,7 +18,6 @@
 """
 
 import glob
-import json
 import os
 import re
 import sys
@@ -42,7 +41,13 @@ except ImportError:
         return "logs/skip_list.json"
 
     def get_onedrive_files_path():
-        return "logs/onedrive_files.json"
+        return "logs/onedrive_files.ndjson"
+
+
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.inventory import count_inventory  # noqa: E402
+from src.skiplist import count_skip_list, skip_list_exists  # noqa: E402
 
 
 def parse_timestamp(line):
@@ -112,18 +117,14 @@ def load_file_counts():
     # OneDriveファイル数
     if onedrive_path.exists():
         try:
-            with open(onedrive_path, encoding="utf-8") as f:
-                onedrive_files = json.load(f)
-                onedrive_count = len(onedrive_files)
+            onedrive_count = count_inventory(str(onedrive_path))
         except Exception:
             pass
 
-    # スキップリスト件数
-    if skiplist_path.exists():
+    # スキップリスト件数（スナップショットと追記中のジャーナルを合わせて数える）
+    if skip_list_exists(str(skiplist_path)):
         try:
-            with open(skiplist_path, encoding="utf-8") as f:
-                skiplist = json.load(f)
-                skiplist_count = len(skiplist)
+            skiplist_count = count_skip_list(str(skiplist_path))
         except Exception:
             pass
 
@@ -6,17 +6,22 @@
   - SharePoint現状ファイルとスキップリストの一致・差分を確認
 【使い方】
   $ python utils/verify_skiplist_vs_sharepoint.py
-  （logs/sharepoint_current_files.json, logs/skip_list.json を比較）
+  （logs/sharepoint_current_files.ndjson, logs/skip_list.json を比較）
 """
 
 import json
 import os
+import sys
 from pathlib import Path
 
+# プロジェクトルートを import パスに追加（ファイルリストの読み込みに src.inventory を使う）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.inventory import iter_inventory  # noqa: E402
+from src.skiplist import iter_skip_list  # noqa: E402
+
 
 def load_config():
     """config/config.jsonと.envから必要なルート名を取得"""
-    import json
 
     from dotenv import load_dotenv
 
@@ -36,11 +41,6 @@ def load_config():
     return onedrive_root, sharepoint_root
 
 
-def load_json(path):
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
-
-
 def normalize_path(path, root):
     """先頭のroot部分を除去し、スラッシュを正規化"""
     # 先頭にrootがあれば除去
@@ -56,17 +56,15 @@ def normalize_path(path, root):
 
 
 def main():
-    sharepoint_path = Path("logs/sharepoint_current_files.json")
+    sharepoint_path = Path("logs/sharepoint_current_files.ndjson")
     skiplist_path = Path("logs/skip_list.json")
 
     onedrive_root, sharepoint_root = load_config()
 
-    sharepoint = load_json(sharepoint_path)
-    skiplist = load_json(skiplist_path)
-
-    # 各pathからルート名を除去して比較キーを生成（パスのみ）
-    sharepoint_set = set(normalize_path(f["path"], sharepoint_root) for f in sharepoint)
-    skiplist_set = set(normalize_path(f["path"], onedrive_root) for f in skiplist)
+    # 各pathからルート名を除去して比較キーを生成（パスのみ。リストに展開せず1件ずつ読みながら集合にする）
+    sharepoint_set = set(normalize_path(f["path"], sharepoint_root) for f in iter_inventory(str(sharepoint_path)))
+    # スキップリストはスナップショットと追記中のジャーナルを合わせて読み込む
+    skiplist_set = set(normalize_path(f["path"], onedrive_root) for f in iter_skip_list(str(skiplist_path)))
 
     only_in_sharepoint = sharepoint_set - skiplist_set
     only_in_skiplist = skiplist_set - sharepoint_set
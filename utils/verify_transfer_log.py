@@ -9,7 +9,6 @@
   （logs/transfer.log, logs/skip_list.json を比較）
 """
 
-import json
 import os
 import re
 import sys
@@ -28,9 +27,14 @@ except ImportError:
         return "logs/skip_list.json"
 
 
+# プロジェクトルートを import パスに追加（スキップリストの読み込みに src.skiplist を使う）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.skiplist import iter_skip_list, skip_list_exists  # noqa: E402
+
+
 def load_skiplist(path):
-    with open(path, encoding="utf-8") as f:
-        return set((f["path"], f.get("id")) for f in json.load(f))
+    # スキップリストはスナップショットと追記中のジャーナルを合わせて読み込む
+    return set((f["path"], f.get("id")) for f in iter_skip_list(str(path)))
 
 
 def main():
@@ -38,7 +42,7 @@ def main():
     skiplist_path = Path(get_skip_list_path())
     if not log_path.exists():
         return
-    if not skiplist_path.exists():
+    if not skip_list_exists(str(skiplist_path)):
         return
     skiplist = load_skiplist(skiplist_path)
 